@@ -104,20 +104,20 @@ int main(int argc, char *argv[]) {
   delete meld_thermal;
 
   // Create transfer scheme of type linearizedMELD
-  //TransferScheme *linmeld = new LinearizedMELD(comm, comm, 0, comm, 0, nn, beta);
-  //linmeld->setAeroNodes(XA0, aero_nnodes);
-  //linmeld->setStructNodes(XS0, struct_nnodes);
-  //linmeld->initialize();
+  TransferScheme *linmeld = new LinearizedMELD(comm, comm, 0, comm, 0, nn, beta);
+  linmeld->setAeroNodes(XA0, aero_nnodes);
+  linmeld->setStructNodes(XS0, struct_nnodes);
+  linmeld->initialize();
 
   // Test linearizedMELD
-  //linmeld->testLoadTransfer(US, FA, US_pert, h);
-  //linmeld->testDispJacVecProducts(US, test_vec_a1, test_vec_s1, h);
+  linmeld->testLoadTransfer(US, FA, US_pert, h);
+  linmeld->testDispJacVecProducts(US, test_vec_a1, test_vec_s1, h);
   //linmeld->testLoadJacVecProducts(US, FA, test_vec_s1, test_vec_s2, h);
   //linmeld->testdDdxA0Products(US, test_vec_a1, test_vec_a2, h);
   //linmeld->testdDdxS0Products(US, test_vec_a1, test_vec_s1, h);
   //linmeld->testdLdxA0Products(US, FA, test_vec_a1, test_vec_s1, h);
   //linmeld->testdLdxS0Products(US, FA, test_vec_s1, test_vec_s2, h);
-  //delete linmeld;
+  delete linmeld;
 
   // Create transfer scheme of type RBF
   RBF::RbfType rbf_type = RBF::THIN_PLATE_SPLINE;
@@ -137,6 +137,19 @@ int main(int argc, char *argv[]) {
   rbf->testdLdxS0Products(US, FA, test_vec_s1, test_vec_s2, h);
   delete rbf;
 
+  // Create transfer scheme of type RBF with the compactly supported basis
+  double support_radius = 0.5;
+  TransferScheme *crbf = new RBF(comm, comm, 0, comm, 0, RBF::WENDLAND_C2,
+                                 denom, support_radius);
+  crbf->setAeroNodes(XA0, aero_nnodes);
+  crbf->setStructNodes(XS0, struct_nnodes);
+  crbf->initialize();
+
+  // Test compact RBF
+  crbf->testLoadTransfer(US, FA, US_pert, h);
+  crbf->testDispJacVecProducts(US, test_vec_a1, test_vec_s1, h);
+  delete crbf;
+
   // Free allocated memory
   delete [] XA0;
   delete [] FA;
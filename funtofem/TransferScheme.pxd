@@ -7,6 +7,16 @@ include "FuntofemTypedefs.pxi"
 
 cdef extern from "TransferScheme.h":
   cppclass TransferScheme:
+    # Shared-memory threading of the aerodynamic node loops
+    void setNumThreads(int num_threads)
+    int getNumThreads()
+
+    # Single precision forward-only transfers
+    int getSinglePrecision()
+
+    # Memory used by the arrays of the scheme on this processor
+    int getMemoryUsage(const char **names, size_t *nbytes)
+
     # Mesh loading
     void setAeroNodes(const F2FScalar *aero_X, int aero_nnodes)
     void setStructNodes(const F2FScalar *struct_X, int struct_nnodes)
@@ -72,13 +82,40 @@ cdef extern from "TransferScheme.h":
                             const F2FScalar *test_vec_s2, 
                             const F2FScalar h)
 
+cdef extern from "LocatePoint.h":
+  cppclass LocatePoint:
+    LocatePoint(const F2FScalar *Xpts, int npts, int max_num_points)
+
+    # Batched search for the K closest points, optionally including the
+    # mirror images across a plane of symmetry
+    void locateKClosestBatch(int K, int nq, const F2FScalar *xq,
+                             int *indices, F2FScalar *dist, int nthreads,
+                             int isymm)
+
 cdef extern from "MELD.h":
   cppclass MELD(TransferScheme):
     # Constructor
     MELD(MPI_Comm all,
          MPI_Comm structure, int struct_root,
          MPI_Comm aero, int aero_root,
-         int symmetry, int num_nearest, F2FScalar beta)
+         int symmetry, int num_nearest, F2FScalar beta,
+         int partitioned)
+
+    # Update the connectivity and weights after the nodes have moved
+    void reconnect(double tol)
+
+    # Save or load the connectivity and weights
+    int saveConnectivity(const char *filename)
+    int loadConnectivity(const char *filename)
+
+    # Single precision forward-only transfers
+    void setSinglePrecision(int flag)
+
+    # Block versions of the adjoint Jacobian-vector products
+    void applydDduSBlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs)
+    void applydDduSTransBlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs)
+    void applydLduSBlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs)
+    void applydLduSTransBlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs)
 
 cdef extern from "MELDThermal.h":
   cppclass MELDThermal(TransferScheme):
@@ -88,6 +125,20 @@ cdef extern from "MELDThermal.h":
                 MPI_Comm aero, int aero_root,
                 int symmetry, int num_nearest, F2FScalar beta)
 
+    # Update the connectivity and weights after the nodes have moved
+    void reconnect(double tol)
+
+    # Save or load the connectivity and weights
+    int saveConnectivity(const char *filename)
+    int loadConnectivity(const char *filename)
+
+    # Single precision forward-only transfers
+    void setSinglePrecision(int flag)
+
+    # Use the connectivity and weights of a MELD scheme
+    void shareConnectivity(MELD *source)
+    int getSharedConnectivityFail()
+
     void transferTemp(const F2FScalar *struct_temp,
                                F2FScalar *aero_temp)
     void transferFlux(const F2FScalar *aero_flux,
@@ -99,6 +150,12 @@ cdef extern from "MELDThermal.h":
     void applydQdqA(const F2FScalar *vecs, F2FScalar *prods)
     void applydQdqATrans(const F2FScalar *vecs, F2FScalar *prods)
 
+    # Block versions of the adjoint Jacobian-vector products
+    void applydTdtSBlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs)
+    void applydTdtSTransBlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs)
+    void applydQdqABlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs)
+    void applydQdqATransBlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs)
+
     # Routines to test necessary functionality of transfer scheme
     void testFluxTransfer(const F2FScalar *struct_temps,
                           const F2FScalar *aero_flux,
@@ -122,16 +179,25 @@ cdef extern from "LinearizedMELD.h":
                    MPI_Comm aero, int aero_root,
                    int num_nearest, F2FScalar beta)
 
+    # CSR data of the displacement transfer operator
+    void getDispOperator(int *nrows, int *ncols, const int **rowp,
+                         const int **cols, const F2FScalar **vals)
+
 cdef extern from "RBF.h":
   enum RbfType "RBF::RbfType":
     GAUSSIAN "RBF::GAUSSIAN"
     MULTIQUADRIC "RBF::MULTIQUADRIC"
     INVERSE_MULTIQUADRIC "RBF::INVERSE_MULTIQUADRIC"
     THIN_PLATE_SPLINE "RBF::THIN_PLATE_SPLINE"
+    WENDLAND_C2 "RBF::WENDLAND_C2"
 
   cppclass RBF(TransferScheme):
     # Constructor
     RBF(MPI_Comm all,
         MPI_Comm structure, int struct_root,
         MPI_Comm aero, int aero_root,
-        RbfType rbf_type, int sampling_ratio)
+        RbfType rbf_type, int sampling_ratio,
+        double support_radius, unsigned int sampling_seed)
+
+    # Greedy selection of the interpolation centers
+    void setGreedySampling(double tol, int max_centers)
@@ -13,6 +13,8 @@ from TransferScheme cimport *
 # Import numpy
 import numpy as np
 cimport numpy as np
+cimport cython
+from libc.stdlib cimport malloc, free
 
 # For the use of the numpy C API
 np.import_array()
@@ -20,6 +22,108 @@ np.import_array()
 # Include the definitions
 include "FuntofemDefs.pxi"
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef F2FScalar* _gatherVector(const F2FScalar[:] x, int nvars, int ndof,
+                              F2FScalar **tmp):
+    """
+    Get a pointer to the entries of a vector with nvars entries per node. If
+    x is contiguous with nvars entries per node, this points into x.
+    Otherwise, the first nvars of every ndof entries of x are gathered into a
+    temporary array, returned in tmp, that is released by _freeVector or
+    _scatterVector
+    """
+    cdef int nnodes = (x.shape[0] + ndof - nvars)//ndof
+    cdef int i, k
+
+    tmp[0] = NULL
+    if (ndof == nvars and x.shape[0] > 0 and
+        x.strides[0] == sizeof(F2FScalar)):
+        return <F2FScalar*>&x[0]
+
+    tmp[0] = <F2FScalar*>malloc((nvars*nnodes + 1)*sizeof(F2FScalar))
+    for i in range(nnodes):
+        for k in range(nvars):
+            tmp[0][nvars*i + k] = x[ndof*i + k]
+
+    return tmp[0]
+
+cdef void _freeVector(F2FScalar *tmp):
+    """
+    Release the temporary array of an input vector
+    """
+    if tmp != NULL:
+        free(tmp)
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _scatterVector(F2FScalar[:] x, int nvars, int ndof,
+                         F2FScalar *tmp):
+    """
+    Copy the temporary array of an output vector back to the first nvars of
+    every ndof entries of x and release it
+    """
+    cdef int nnodes = (x.shape[0] + ndof - nvars)//ndof
+    cdef int i, k
+
+    if tmp != NULL:
+        for i in range(nnodes):
+            for k in range(nvars):
+                x[ndof*i + k] = tmp[nvars*i + k]
+        free(tmp)
+
+def _blockColumns(cols):
+    """
+    Convert the indices of the columns of a block product to an int array, or
+    None for all the columns
+    """
+    if cols is None:
+        return None
+    return np.asarray(cols, dtype=np.intc)
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef F2FScalar* _gatherBlock(const F2FScalar[:, :] x, int[:] cols,
+                             F2FScalar **tmp):
+    """
+    Get a pointer to the columns of a block of vectors stored node-by-node, so
+    that entry k of row i is located at i*ncols + k. If x is C-contiguous and
+    all its columns are used, this points into x. Otherwise, the columns in
+    cols (all if None) are gathered into a temporary array, returned in tmp,
+    that is released by _freeVector or _scatterBlock
+    """
+    cdef int ncols = x.shape[1] if cols is None else cols.shape[0]
+    cdef int i, k
+
+    tmp[0] = NULL
+    if (cols is None and x.shape[0] > 0 and x.shape[1] > 0 and
+        x.strides[1] == <Py_ssize_t>sizeof(F2FScalar) and
+        x.strides[0] == x.shape[1]*<Py_ssize_t>sizeof(F2FScalar)):
+        return <F2FScalar*>&x[0, 0]
+
+    tmp[0] = <F2FScalar*>malloc((x.shape[0]*ncols + 1)*sizeof(F2FScalar))
+    for i in range(x.shape[0]):
+        for k in range(ncols):
+            tmp[0][ncols*i + k] = x[i, k if cols is None else cols[k]]
+
+    return tmp[0]
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _scatterBlock(F2FScalar[:, :] x, int[:] cols, F2FScalar *tmp):
+    """
+    Copy the temporary array of a block of output vectors back to the columns
+    in cols (all if None) of x and release it
+    """
+    cdef int ncols = x.shape[1] if cols is None else cols.shape[0]
+    cdef int i, k
+
+    if tmp != NULL:
+        for i in range(x.shape[0]):
+            for k in range(ncols):
+                x[i, k if cols is None else cols[k]] = tmp[ncols*i + k]
+        free(tmp)
+
 # Wrap the transfer scheme class and its functions
 cdef class pyTransferScheme:
     """
@@ -30,10 +134,110 @@ cdef class pyTransferScheme:
     C++ extension must be compiled in complex mode in order to use complex
     step approximation in test functions
 
+    The one-dimensional vectors of the transfers and products can be any
+    array or memoryview of the scalar type, including strided views such as
+    the columns of two-dimensional arrays, and the outputs are written in
+    place. Structural vectors with more than the transferred entries per node
+    (e.g. 6 degrees of freedom) are passed directly with the ndof argument.
+    Contiguous vectors are passed to the library without copies
+
     """
     cdef TransferScheme *ptr
 
-    def setAeroNodes(self, np.ndarray[F2FScalar, ndim=1, mode='c'] X):
+    def setNumThreads(self, int num_threads):
+        """
+        Set the number of shared-memory threads used for the loops over the
+        aerodynamic surface nodes. This only has an effect if the library was
+        compiled with OpenMP, and the results do not depend on the number of
+        threads
+
+        Parameters
+        ----------
+        num_threads: int
+            number of threads
+
+        """
+        self.ptr.setNumThreads(num_threads)
+
+        return
+
+    def getNumThreads(self):
+        """
+        Get the number of shared-memory threads used for the loops over the
+        aerodynamic surface nodes
+
+        Returns
+        -------
+        num_threads: int
+            number of threads
+
+        """
+        return self.ptr.getNumThreads()
+
+    def getSinglePrecision(self):
+        """
+        Get whether the forward transfers use single precision data
+
+        Returns
+        -------
+        single: bool
+            whether single precision transfers are used
+
+        """
+        return self.ptr.getSinglePrecision() != 0
+
+    def hasJacobianProducts(self):
+        """
+        Get whether the Jacobian-vector products needed by the adjoint are
+        available
+
+        Returns
+        -------
+        available: bool
+            whether the Jacobian-vector products can be applied
+
+        """
+        return True
+
+    def _checkJacobianProducts(self, name, p):
+        """
+        Zero the output of a Jacobian-vector product and raise an error if
+        the products are not available
+
+        """
+        if not self.hasJacobianProducts():
+            np.asarray(p)[...] = 0.0
+            raise RuntimeError('%s is not available with single precision '
+                               'transfers' % name)
+        return
+
+    def getMemoryUsage(self):
+        """
+        Get the memory used by the arrays of the transfer scheme on this
+        processor, excluding the temporary arrays of the transfers and
+        products
+
+        Returns
+        -------
+        usage: dict
+            size in bytes of each allocated array, keyed by the name of the
+            array
+
+        """
+        cdef int n = self.ptr.getMemoryUsage(NULL, NULL)
+        cdef const char **names = <const char**>malloc((n + 1)*sizeof(char*))
+        cdef size_t *nbytes = <size_t*>malloc((n + 1)*sizeof(size_t))
+        self.ptr.getMemoryUsage(names, nbytes)
+
+        usage = {}
+        for i in range(n):
+            usage[names[i].decode()] = nbytes[i]
+        free(names)
+        free(nbytes)
+
+        return usage
+
+    def setAeroNodes(self, const F2FScalar[:] X):
         """
         Set and store the aerodynamic surface node locations in memory
 
@@ -44,11 +248,13 @@ cdef class pyTransferScheme:
 
         """
         cdef int nnodes = int(len(X)/3)
-        self.ptr.setAeroNodes(<F2FScalar*>X.data, nnodes)
+        cdef F2FScalar *X_tmp = NULL
+        self.ptr.setAeroNodes(_gatherVector(X, 3, 3, &X_tmp), nnodes)
+        _freeVector(X_tmp)
 
         return
 
-    def setStructNodes(self, np.ndarray[F2FScalar, ndim=1, mode='c'] X):
+    def setStructNodes(self, const F2FScalar[:] X):
         """
         Set and store the structural node locations in memory
 
@@ -59,7 +265,9 @@ cdef class pyTransferScheme:
 
         """
         cdef int nnodes = int(len(X)/3)
-        self.ptr.setStructNodes(<F2FScalar*>X.data, nnodes)
+        cdef F2FScalar *X_tmp = NULL
+        self.ptr.setStructNodes(_gatherVector(X, 3, 3, &X_tmp), nnodes)
+        _freeVector(X_tmp)
 
         return
 
@@ -74,9 +282,9 @@ cdef class pyTransferScheme:
 
         return
 
-    def transferDisps(self,
-            np.ndarray[F2FScalar, ndim=1, mode='c'] struct_disps,
-            np.ndarray[F2FScalar, ndim=1, mode='c'] aero_disps):
+    def transferDisps(self, const F2FScalar[:] struct_disps,
+                            F2FScalar[:] aero_disps,
+                            int ndof=3):
         """
         Convert the input structural node displacements into aerodynamic
         surface node displacements and store in empty input array
@@ -87,15 +295,22 @@ cdef class pyTransferScheme:
             One-dimensional array of structural displacements
         aero_disps: ndarray
             One-dimensional empty array of size of aerodynamic displacements
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first three are used
 
         """
-        self.ptr.transferDisps(<F2FScalar*>struct_disps.data,
-                               <F2FScalar*>aero_disps.data)
+        cdef F2FScalar *struct_disps_tmp = NULL
+        cdef F2FScalar *aero_disps_tmp = NULL
+        self.ptr.transferDisps(_gatherVector(struct_disps, 3, ndof, &struct_disps_tmp),
+                               _gatherVector(aero_disps, 3, 3, &aero_disps_tmp))
+        _freeVector(struct_disps_tmp)
+        _scatterVector(aero_disps, 3, 3, aero_disps_tmp)
         return
 
-    def transferLoads(self,
-            np.ndarray[F2FScalar, ndim=1, mode='c'] aero_loads,
-            np.ndarray[F2FScalar, ndim=1, mode='c'] struct_loads):
+    def transferLoads(self, const F2FScalar[:] aero_loads,
+                            F2FScalar[:] struct_loads,
+                            int ndof=3):
         """
         Convert the input aerodynamic surface loads into structural loads and
         store in empty input array
@@ -106,14 +321,22 @@ cdef class pyTransferScheme:
             One-dimensional array of aerodynamic surface loads
         struct_loads: ndarray
             One-dimensional empty array of size of structural loads
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first three are used
 
         """
-        self.ptr.transferLoads(<F2FScalar*>aero_loads.data,
-                               <F2FScalar*>struct_loads.data)
+        cdef F2FScalar *aero_loads_tmp = NULL
+        cdef F2FScalar *struct_loads_tmp = NULL
+        self.ptr.transferLoads(_gatherVector(aero_loads, 3, 3, &aero_loads_tmp),
+                               _gatherVector(struct_loads, 3, ndof, &struct_loads_tmp))
+        _freeVector(aero_loads_tmp)
+        _scatterVector(struct_loads, 3, ndof, struct_loads_tmp)
         return
 
-    def applydDduS(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                   np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydDduS(self, const F2FScalar[:] v,
+                         F2FScalar[:] p,
+                         int ndof=3):
         """
         Apply the action of the Jacobian containing the derivatives of the
         displacement transfer residuals with respect to the structural
@@ -126,13 +349,23 @@ cdef class pyTransferScheme:
             One-dimensional array of size of structural displacements
         p: ndarray
             One-dimensional empty array of size of aerodynamic displacements
-
-        """
-        self.ptr.applydDduS(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first three are used
+
+        """
+        self._checkJacobianProducts('applydDduS', p)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        self.ptr.applydDduS(_gatherVector(v, 3, ndof, &v_tmp),
+                            _gatherVector(p, 3, 3, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 3, 3, p_tmp)
         return
 
-    def applydDduSTrans(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                        np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydDduSTrans(self, const F2FScalar[:] v,
+                              F2FScalar[:] p,
+                              int ndof=3):
         """
         Apply the action of the transpose of the Jacobian containing the
         derivatives of the displacement transfer residuals with respect to the
@@ -145,13 +378,23 @@ cdef class pyTransferScheme:
             One-dimensional array of size of aerodynamic displacements
         p: ndarray
             One-dimensional empty array of size of structural displacements
-
-        """
-        self.ptr.applydDduSTrans(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first three are used
+
+        """
+        self._checkJacobianProducts('applydDduSTrans', p)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        self.ptr.applydDduSTrans(_gatherVector(v, 3, 3, &v_tmp),
+                                 _gatherVector(p, 3, ndof, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 3, ndof, p_tmp)
         return
 
-    def applydLduS(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                   np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydLduS(self, const F2FScalar[:] v,
+                         F2FScalar[:] p,
+                         int ndof=3):
         """
         Apply the action of the Jacobian containing the derivatives of the load
         transfer residuals with respect to the structural displacements to an
@@ -163,13 +406,23 @@ cdef class pyTransferScheme:
             One-dimensional array of size of structural displacements
         p: ndarray
             One-dimensional empty array of size of structural loads
-
-        """
-        self.ptr.applydLduS(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first three are used
+
+        """
+        self._checkJacobianProducts('applydLduS', p)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        self.ptr.applydLduS(_gatherVector(v, 3, ndof, &v_tmp),
+                            _gatherVector(p, 3, ndof, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 3, ndof, p_tmp)
         return
 
-    def applydLduSTrans(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                        np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydLduSTrans(self, const F2FScalar[:] v,
+                              F2FScalar[:] p,
+                              int ndof=3):
         """
         Apply the action of the transpose of the Jacobian containing the
         derivatives of the load transfer residuals with respect to the
@@ -182,13 +435,126 @@ cdef class pyTransferScheme:
             One-dimensional array of size of structural loads
         p: ndarray
             One-dimensional empty array of size of structural displacements
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first three are used
+
+        """
+        self._checkJacobianProducts('applydLduSTrans', p)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        self.ptr.applydLduSTrans(_gatherVector(v, 3, ndof, &v_tmp),
+                                 _gatherVector(p, 3, ndof, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 3, ndof, p_tmp)
+        return
+
+    def _applyColumns(self, apply, const F2FScalar[:, :] v,
+                      F2FScalar[:, :] p, cols=None):
+        """
+        Apply a single-vector product to each column in cols (all if None) of
+        a block of vectors. Used by schemes that do not provide a native block
+        implementation
+
+        """
+        cdef int[:] c = _blockColumns(cols)
+        cdef Py_ssize_t ncols = v.shape[1] if c is None else c.shape[0]
+        cdef Py_ssize_t j, k
+        for j in range(ncols):
+            k = j if c is None else c[j]
+            apply(v[:, k], p[:, k])
+        return
+
+    def applydDduSBlock(self, const F2FScalar[:, :] v,
+                        F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydDduS` to every column of a block of vectors and
+        store the products in the columns of the empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (size of structural displacements,
+            number of vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (size of aerodynamic
+            displacements, number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
+
+        """
+        self._applyColumns(self.applydDduS, v, p, cols)
+        return
+
+    def applydDduSTransBlock(self, const F2FScalar[:, :] v,
+                             F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydDduSTrans` to every column of a block of vectors and
+        store the products in the columns of the empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (size of aerodynamic displacements,
+            number of vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (size of structural
+            displacements, number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
+
+        """
+        self._applyColumns(self.applydDduSTrans, v, p, cols)
+        return
+
+    def applydLduSBlock(self, const F2FScalar[:, :] v,
+                        F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydLduS` to every column of a block of vectors and
+        store the products in the columns of the empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (size of structural displacements,
+            number of vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (size of structural loads,
+            number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
+
+        """
+        self._applyColumns(self.applydLduS, v, p, cols)
+        return
+
+    def applydLduSTransBlock(self, const F2FScalar[:, :] v,
+                             F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydLduSTrans` to every column of a block of vectors and
+        store the products in the columns of the empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (size of structural loads, number of
+            vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (size of structural
+            displacements, number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
 
         """
-        self.ptr.applydLduSTrans(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        self._applyColumns(self.applydLduSTrans, v, p, cols)
         return
 
-    def applydDdxA0(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                    np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydDdxA0(self, const F2FScalar[:] v,
+                          F2FScalar[:] p):
         """
         Apply the action of the Jacobian containing the derivatives of the
         displacement transfer residuals with respect to the initial aerodynamic
@@ -203,11 +569,17 @@ cdef class pyTransferScheme:
             One-dimensional empty array of size of aerodynamic displacements
 
         """
-        self.ptr.applydDdxA0(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        self._checkJacobianProducts('applydDdxA0', p)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        self.ptr.applydDdxA0(_gatherVector(v, 3, 3, &v_tmp),
+                             _gatherVector(p, 3, 3, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 3, 3, p_tmp)
         return
 
-    def applydDdxS0(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                    np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydDdxS0(self, const F2FScalar[:] v,
+                          F2FScalar[:] p):
         """
         Apply the action of the Jacobian containing the derivatives of the
         displacement transfer residuals with respect to the initial structural
@@ -222,11 +594,18 @@ cdef class pyTransferScheme:
             One-dimensional empty array of size of aerodynamic displacements
 
         """
-        self.ptr.applydDdxS0(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        self._checkJacobianProducts('applydDdxS0', p)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        self.ptr.applydDdxS0(_gatherVector(v, 3, 3, &v_tmp),
+                             _gatherVector(p, 3, 3, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 3, 3, p_tmp)
         return
 
-    def applydLdxA0(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                    np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydLdxA0(self, const F2FScalar[:] v,
+                          F2FScalar[:] p,
+                          int ndof=3):
         """
         Apply the action of the Jacobian containing the derivatives of the
         displacement transfer residuals with respect to the initial structural
@@ -239,13 +618,23 @@ cdef class pyTransferScheme:
             One-dimensional array of size of structural node locations
         p: ndarray
             One-dimensional empty array of size of structural loads
-
-        """
-        self.ptr.applydLdxA0(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first three are used
+
+        """
+        self._checkJacobianProducts('applydLdxA0', p)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        self.ptr.applydLdxA0(_gatherVector(v, 3, ndof, &v_tmp),
+                             _gatherVector(p, 3, 3, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 3, 3, p_tmp)
         return
 
-    def applydLdxS0(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                    np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydLdxS0(self, const F2FScalar[:] v,
+                          F2FScalar[:] p,
+                          int ndof=3):
         """
         Apply the action of the Jacobian containing the derivatives of the load
         transfer residuals with respect to the initial structural node locations
@@ -257,9 +646,18 @@ cdef class pyTransferScheme:
             One-dimensional array of size of structural node locations
         p: ndarray
             One-dimensional empty array of size of structural loads
-
-        """
-        self.ptr.applydLdxS0(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first three are used
+
+        """
+        self._checkJacobianProducts('applydLdxS0', p)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        self.ptr.applydLdxS0(_gatherVector(v, 3, ndof, &v_tmp),
+                             _gatherVector(p, 3, 3, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 3, 3, p_tmp)
         return
 
     def testLoadTransfer(self,
@@ -600,13 +998,17 @@ cdef class pyMELD(pyTransferScheme):
         number of structural nodes linked to each aerodynamic node
     beta: float
         weighting decay parameter
+    partitioned: int
+        if non-zero, each process only keeps the structural nodes referenced
+        by its own aerodynamic nodes and exchanges structural vectors with the
+        processes that own them, instead of holding the full structural mesh
 
     """
     def __cinit__(self, MPI.Comm comm,
                   MPI.Comm struct, int struct_root,
                   MPI.Comm aero, int aero_root,
                   int symmetry, int num_nearest,
-                  F2FScalar beta):
+                  F2FScalar beta, int partitioned=0):
         cdef MPI_Comm c_comm = comm.ob_mpi
         cdef MPI_Comm struct_comm = struct.ob_mpi
         cdef MPI_Comm aero_comm = aero.ob_mpi
@@ -614,13 +1016,243 @@ cdef class pyMELD(pyTransferScheme):
         # Allocate the underlying class
         self.ptr = new MELD(c_comm, struct_comm, struct_root,
                             aero_comm, aero_root, symmetry,
-                            num_nearest, beta)
+                            num_nearest, beta, partitioned)
 
         return
 
     def __dealloc__(self):
         del self.ptr
 
+    def setSinglePrecision(self, flag=True):
+        """
+        Store the weights and the centroids and rotations of the load
+        transfer in single precision for forward-only analysis. The transfers
+        still accumulate their sums in double precision, but the
+        Jacobian-vector products needed by the adjoint are not available and
+        raise a RuntimeError. This must be called before initialize() or
+        load() and is not available in complex mode
+
+        Parameters
+        ----------
+        flag: bool
+            whether to use single precision transfers
+
+        """
+        cdef MELD *ptr = <MELD*> self.ptr
+        ptr.setSinglePrecision(1 if flag else 0)
+
+        return
+
+    def hasJacobianProducts(self):
+        """
+        Get whether the Jacobian-vector products needed by the adjoint are
+        available, which is not the case with single precision transfers
+
+        Returns
+        -------
+        available: bool
+            whether the Jacobian-vector products can be applied
+
+        """
+        return not self.getSinglePrecision()
+
+    def reconnect(self, double tol=0.0):
+        """
+        Update the aerostructural connectivity and weights after the node
+        locations have been changed with setAeroNodes/setStructNodes. The
+        nearest node search is only repeated for the aerodynamic nodes whose
+        set of nearest structural nodes may have changed, and the weights are
+        only recomputed for the aerodynamic nodes that moved, or are linked to
+        a structural node that moved, by more than tol. The number of nodes
+        must be unchanged. The node locations and gaps needed for this are
+        only stored from the first call, which repeats the search for every
+        aerodynamic node
+
+        A partitioned scheme only holds the structural nodes linked to its
+        aerodynamic nodes, so it cannot repeat the search for some of the
+        nodes. It gathers the full structural mesh again and repeats the
+        search for every aerodynamic node, at the cost of initialize()
+
+        Parameters
+        ----------
+        tol: float
+            node movement below which the weights are not recomputed
+
+        """
+        cdef MELD *ptr = <MELD*> self.ptr
+        ptr.reconnect(tol)
+
+        return
+
+    def save(self, path):
+        """
+        Save the aerostructural connectivity and weights, together with a
+        fingerprint of the meshes and settings they were computed for, to a
+        binary file. On more than one processor, each processor writes its
+        aerodynamic nodes to path.rank. The arrays start on 8-byte boundaries
+        after a 64-byte header so they can be memory mapped
+
+        Parameters
+        ----------
+        path: str
+            name of the connectivity file
+
+        Returns
+        -------
+        success: bool
+            whether the file was written on every processor
+
+        """
+        cdef MELD *ptr = <MELD*> self.ptr
+        cdef bytes fname = str(path).encode()
+        fail = ptr.saveConnectivity(fname)
+
+        return fail == 0
+
+    def load(self, path):
+        """
+        Load the aerostructural connectivity and weights saved with save()
+        in place of initialize(). The file is rejected if the meshes or
+        settings do not match the fingerprint stored in the file, in which
+        case the scheme must be initialized instead
+
+        Parameters
+        ----------
+        path: str
+            name of the connectivity file
+
+        Returns
+        -------
+        success: bool
+            whether the connectivity was loaded
+
+        """
+        cdef MELD *ptr = <MELD*> self.ptr
+        cdef bytes fname = str(path).encode()
+        fail = ptr.loadConnectivity(fname)
+
+        return fail == 0
+
+    def applydDduSBlock(self, const F2FScalar[:, :] v,
+                        F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydDduS` to every column of a block of vectors in a
+        single pass over the connectivity
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (size of structural displacements,
+            number of vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (size of aerodynamic
+            displacements, number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
+
+        """
+        self._checkJacobianProducts('applydDduSBlock', p)
+        cdef MELD *meld = <MELD*> self.ptr
+        cdef int[:] c = _blockColumns(cols)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        meld.applydDduSBlock(_gatherBlock(v, c, &v_tmp), _gatherBlock(p, c, &p_tmp),
+                             (v.shape[1] if c is None else c.shape[0]))
+        _freeVector(v_tmp)
+        _scatterBlock(p, c, p_tmp)
+        return
+
+    def applydDduSTransBlock(self, const F2FScalar[:, :] v,
+                             F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydDduSTrans` to every column of a block of vectors in
+        a single pass over the connectivity
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (size of aerodynamic displacements,
+            number of vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (size of structural
+            displacements, number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
+
+        """
+        self._checkJacobianProducts('applydDduSTransBlock', p)
+        cdef MELD *meld = <MELD*> self.ptr
+        cdef int[:] c = _blockColumns(cols)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        meld.applydDduSTransBlock(_gatherBlock(v, c, &v_tmp), _gatherBlock(p, c, &p_tmp),
+                                  (v.shape[1] if c is None else c.shape[0]))
+        _freeVector(v_tmp)
+        _scatterBlock(p, c, p_tmp)
+        return
+
+    def applydLduSBlock(self, const F2FScalar[:, :] v,
+                        F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydLduS` to every column of a block of vectors in a
+        single pass over the connectivity
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (size of structural displacements,
+            number of vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (size of structural loads,
+            number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
+
+        """
+        self._checkJacobianProducts('applydLduSBlock', p)
+        cdef MELD *meld = <MELD*> self.ptr
+        cdef int[:] c = _blockColumns(cols)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        meld.applydLduSBlock(_gatherBlock(v, c, &v_tmp), _gatherBlock(p, c, &p_tmp),
+                             (v.shape[1] if c is None else c.shape[0]))
+        _freeVector(v_tmp)
+        _scatterBlock(p, c, p_tmp)
+        return
+
+    def applydLduSTransBlock(self, const F2FScalar[:, :] v,
+                             F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydLduSTrans` to every column of a block of vectors in
+        a single pass over the connectivity
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (size of structural loads, number of
+            vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (size of structural
+            displacements, number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
+
+        """
+        self._checkJacobianProducts('applydLduSTransBlock', p)
+        cdef MELD *meld = <MELD*> self.ptr
+        cdef int[:] c = _blockColumns(cols)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        meld.applydLduSTransBlock(_gatherBlock(v, c, &v_tmp), _gatherBlock(p, c, &p_tmp),
+                                  (v.shape[1] if c is None else c.shape[0]))
+        _freeVector(v_tmp)
+        _scatterBlock(p, c, p_tmp)
+        return
+
 
 # Wrap the MELD class
 cdef class pyMELDThermal(pyTransferScheme):
@@ -657,6 +1289,9 @@ cdef class pyMELDThermal(pyTransferScheme):
         weighting decay parameter
 
     """
+    # Scheme whose connectivity is shared, kept alive with this scheme
+    cdef object conn_source
+
     def __cinit__(self, MPI.Comm comm,
                   MPI.Comm struct, int struct_root,
                   MPI.Comm aero, int aero_root,
@@ -676,9 +1311,140 @@ cdef class pyMELDThermal(pyTransferScheme):
     def __dealloc__(self):
         del self.ptr
 
-    def transferTemp(self,
-            np.ndarray[F2FScalar, ndim=1, mode='c'] struct_temp,
-                     np.ndarray[F2FScalar, ndim=1, mode='c'] aero_temp):
+    def setSinglePrecision(self, flag=True):
+        """
+        Store the weights in single precision. The transfers and the
+        Jacobian-vector products are linear in the weights, so they still
+        accumulate their sums in double precision with the same single
+        precision weights. This must be called before initialize() or load()
+        and is not available in complex mode
+
+        Parameters
+        ----------
+        flag: bool
+            whether to use single precision transfers
+
+        """
+        cdef MELDThermal *ptr = <MELDThermal*> self.ptr
+        ptr.setSinglePrecision(1 if flag else 0)
+
+        return
+
+    def shareConnectivity(self, source):
+        """
+        Use the connectivity and weights of a MELD or linearized MELD scheme
+        in place of computing them in initialize(), so that they are stored
+        once for the temperature and displacement transfers of a body. The
+        source must be initialized with the same nodes first and must not be
+        partitioned, otherwise the transfers and products of this scheme
+        return zero and raise a RuntimeError. reconnect() of the source
+        updates both schemes, and the connectivity is saved and loaded with
+        the source
+
+        Parameters
+        ----------
+        source: pyMELD or pyLinearizedMELD
+            scheme that owns the connectivity and weights
+
+        """
+        if not isinstance(source, (pyMELD, pyLinearizedMELD)):
+            raise TypeError('The connectivity can only be shared with a '
+                            'pyMELD or pyLinearizedMELD scheme')
+
+        cdef MELDThermal *ptr = <MELDThermal*> self.ptr
+        cdef pyTransferScheme src = source
+        ptr.shareConnectivity(<MELD*> src.ptr)
+        self.conn_source = source
+
+        return
+
+    def _checkSharedConnectivity(self):
+        """
+        Raise an error if the connectivity of the source scheme could not be
+        shared, in which case the transfers and products return zero
+
+        """
+        cdef MELDThermal *ptr = <MELDThermal*> self.ptr
+        if ptr.getSharedConnectivityFail():
+            raise RuntimeError('The connectivity of the source scheme cannot '
+                               'be shared')
+        return
+
+    def reconnect(self, double tol=0.0):
+        """
+        Update the aerostructural connectivity and weights after the node
+        locations have been changed with setAeroNodes/setStructNodes. The
+        nearest node search is only repeated for the aerodynamic nodes whose
+        set of nearest structural nodes may have changed, and the weights are
+        only recomputed for the aerodynamic nodes that moved, or are linked to
+        a structural node that moved, by more than tol. The number of nodes
+        must be unchanged. The node locations and gaps needed for this are
+        only stored from the first call, which repeats the search for every
+        aerodynamic node
+
+        Parameters
+        ----------
+        tol: float
+            node movement below which the weights are not recomputed
+
+        """
+        cdef MELDThermal *ptr = <MELDThermal*> self.ptr
+        ptr.reconnect(tol)
+
+        return
+
+    def save(self, path):
+        """
+        Save the aerostructural connectivity and weights, together with a
+        fingerprint of the meshes and settings they were computed for, to a
+        binary file. On more than one processor, each processor writes its
+        aerodynamic nodes to path.rank. The arrays start on 8-byte boundaries
+        after a 64-byte header so they can be memory mapped
+
+        Parameters
+        ----------
+        path: str
+            name of the connectivity file
+
+        Returns
+        -------
+        success: bool
+            whether the file was written on every processor
+
+        """
+        cdef MELDThermal *ptr = <MELDThermal*> self.ptr
+        cdef bytes fname = str(path).encode()
+        fail = ptr.saveConnectivity(fname)
+
+        return fail == 0
+
+    def load(self, path):
+        """
+        Load the aerostructural connectivity and weights saved with save()
+        in place of initialize(). The file is rejected if the meshes or
+        settings do not match the fingerprint stored in the file, in which
+        case the scheme must be initialized instead
+
+        Parameters
+        ----------
+        path: str
+            name of the connectivity file
+
+        Returns
+        -------
+        success: bool
+            whether the connectivity was loaded
+
+        """
+        cdef MELDThermal *ptr = <MELDThermal*> self.ptr
+        cdef bytes fname = str(path).encode()
+        fail = ptr.loadConnectivity(fname)
+
+        return fail == 0
+
+    def transferTemp(self, const F2FScalar[:] struct_temp,
+                           F2FScalar[:] aero_temp,
+                           int ndof=1):
         """
         Convert the input structural node displacements into aerodynamic
         surface node displacements and store in empty input array
@@ -689,15 +1455,24 @@ cdef class pyMELDThermal(pyTransferScheme):
             One-dimensional array of structural temperatures
         aero_disps: ndarray
             One-dimensional empty array of size of aerodynamic temperatures
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first one is used
 
         """
         cdef MELDThermal *mt = <MELDThermal*> self.ptr
-        mt.transferTemp(<F2FScalar*>struct_temp.data, <F2FScalar*>aero_temp.data)
+        cdef F2FScalar *struct_temp_tmp = NULL
+        cdef F2FScalar *aero_temp_tmp = NULL
+        mt.transferTemp(_gatherVector(struct_temp, 1, ndof, &struct_temp_tmp),
+                        _gatherVector(aero_temp, 1, 1, &aero_temp_tmp))
+        _freeVector(struct_temp_tmp)
+        _scatterVector(aero_temp, 1, 1, aero_temp_tmp)
+        self._checkSharedConnectivity()
         return
 
-    def transferFlux(self,
-            np.ndarray[F2FScalar, ndim=1, mode='c'] aero_flux,
-                     np.ndarray[F2FScalar, ndim=1, mode='c'] struct_flux):
+    def transferFlux(self, const F2FScalar[:] aero_flux,
+                           F2FScalar[:] struct_flux,
+                           int ndof=1):
         """
         Convert the input aerodynamic surface loads into structural loads and
         store in empty input array
@@ -708,14 +1483,24 @@ cdef class pyMELDThermal(pyTransferScheme):
             One-dimensional array of aerodynamic surface flux
         struct_loads: ndarray
             One-dimensional empty array of size of structural flux
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first one is used
 
         """
         cdef MELDThermal *mt = <MELDThermal*> self.ptr
-        mt.transferFlux(<F2FScalar*>aero_flux.data, <F2FScalar*>struct_flux.data)
+        cdef F2FScalar *aero_flux_tmp = NULL
+        cdef F2FScalar *struct_flux_tmp = NULL
+        mt.transferFlux(_gatherVector(aero_flux, 1, 1, &aero_flux_tmp),
+                        _gatherVector(struct_flux, 1, ndof, &struct_flux_tmp))
+        _freeVector(aero_flux_tmp)
+        _scatterVector(struct_flux, 1, ndof, struct_flux_tmp)
+        self._checkSharedConnectivity()
         return
 
-    def applydTdtS(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                   np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydTdtS(self, const F2FScalar[:] v,
+                         F2FScalar[:] p,
+                         int ndof=1):
         """
         Apply the action of the Jacobian containing the derivatives of the
         displacement transfer residuals with respect to the structural
@@ -728,14 +1513,24 @@ cdef class pyMELDThermal(pyTransferScheme):
             One-dimensional array of size of structural displacements
         p: ndarray
             One-dimensional empty array of size of aerodynamic displacements
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first one is used
 
         """
         cdef MELDThermal *mt = <MELDThermal*> self.ptr
-        mt.applydTdtS(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        mt.applydTdtS(_gatherVector(v, 1, ndof, &v_tmp),
+                      _gatherVector(p, 1, 1, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 1, 1, p_tmp)
+        self._checkSharedConnectivity()
         return
 
-    def applydTdtSTrans(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                        np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydTdtSTrans(self, const F2FScalar[:] v,
+                              F2FScalar[:] p,
+                              int ndof=1):
         """
         Apply the action of the transpose of the Jacobian containing the
         derivatives of the displacement transfer residuals with respect to the
@@ -748,14 +1543,24 @@ cdef class pyMELDThermal(pyTransferScheme):
             One-dimensional array of size of aerodynamic displacements
         p: ndarray
             One-dimensional empty array of size of structural displacements
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first one is used
 
         """
         cdef MELDThermal *mt = <MELDThermal*> self.ptr
-        mt.applydTdtSTrans(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        mt.applydTdtSTrans(_gatherVector(v, 1, 1, &v_tmp),
+                           _gatherVector(p, 1, ndof, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 1, ndof, p_tmp)
+        self._checkSharedConnectivity()
         return
 
-    def applydQdqA(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                   np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydQdqA(self, const F2FScalar[:] v,
+                         F2FScalar[:] p,
+                         int ndof=1):
         """
         Apply the action of the Jacobian containing the derivatives of the load
         transfer residuals with respect to the structural displacements to an
@@ -767,14 +1572,24 @@ cdef class pyMELDThermal(pyTransferScheme):
             One-dimensional array of size of structural displacements
         p: ndarray
             One-dimensional empty array of size of structural loads
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first one is used
 
         """
         cdef MELDThermal *mt = <MELDThermal*> self.ptr
-        mt.applydQdqA(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        mt.applydQdqA(_gatherVector(v, 1, 1, &v_tmp),
+                      _gatherVector(p, 1, ndof, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 1, ndof, p_tmp)
+        self._checkSharedConnectivity()
         return
 
-    def applydQdqATrans(self, np.ndarray[F2FScalar, ndim=1, mode='c'] v,
-                        np.ndarray[F2FScalar, ndim=1, mode='c'] p):
+    def applydQdqATrans(self, const F2FScalar[:] v,
+                              F2FScalar[:] p,
+                              int ndof=1):
         """
         Apply the action of the transpose of the Jacobian containing the
         derivatives of the load transfer residuals with respect to the
@@ -787,10 +1602,139 @@ cdef class pyMELDThermal(pyTransferScheme):
             One-dimensional array of size of structural loads
         p: ndarray
             One-dimensional empty array of size of structural displacements
+        ndof: int
+            number of entries per node of the structural vectors, of which
+            the first one is used
+
+        """
+        cdef MELDThermal *mt = <MELDThermal*> self.ptr
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        mt.applydQdqATrans(_gatherVector(v, 1, ndof, &v_tmp),
+                           _gatherVector(p, 1, 1, &p_tmp))
+        _freeVector(v_tmp)
+        _scatterVector(p, 1, 1, p_tmp)
+        self._checkSharedConnectivity()
+        return
+
+    def applydTdtSBlock(self, const F2FScalar[:, :] v,
+                        F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydTdtS` to every column of a block of vectors in a
+        single pass over the connectivity
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (number of structural nodes, number
+            of vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (number of aerodynamic nodes,
+            number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
+
+        """
+        cdef MELDThermal *mt = <MELDThermal*> self.ptr
+        cdef int[:] c = _blockColumns(cols)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        mt.applydTdtSBlock(_gatherBlock(v, c, &v_tmp), _gatherBlock(p, c, &p_tmp),
+                           (v.shape[1] if c is None else c.shape[0]))
+        _freeVector(v_tmp)
+        _scatterBlock(p, c, p_tmp)
+        self._checkSharedConnectivity()
+        return
+
+    def applydTdtSTransBlock(self, const F2FScalar[:, :] v,
+                             F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydTdtSTrans` to every column of a block of vectors in
+        a single pass over the connectivity
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (number of aerodynamic nodes, number
+            of vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (number of structural nodes,
+            number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
+
+        """
+        cdef MELDThermal *mt = <MELDThermal*> self.ptr
+        cdef int[:] c = _blockColumns(cols)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        mt.applydTdtSTransBlock(_gatherBlock(v, c, &v_tmp), _gatherBlock(p, c, &p_tmp),
+                                (v.shape[1] if c is None else c.shape[0]))
+        _freeVector(v_tmp)
+        _scatterBlock(p, c, p_tmp)
+        self._checkSharedConnectivity()
+        return
+
+    def applydQdqABlock(self, const F2FScalar[:, :] v,
+                        F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydQdqA` to every column of a block of vectors in a
+        single pass over the connectivity
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (number of aerodynamic nodes, number
+            of vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (number of structural nodes,
+            number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
+
+        """
+        cdef MELDThermal *mt = <MELDThermal*> self.ptr
+        cdef int[:] c = _blockColumns(cols)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        mt.applydQdqABlock(_gatherBlock(v, c, &v_tmp), _gatherBlock(p, c, &p_tmp),
+                           (v.shape[1] if c is None else c.shape[0]))
+        _freeVector(v_tmp)
+        _scatterBlock(p, c, p_tmp)
+        self._checkSharedConnectivity()
+        return
+
+    def applydQdqATransBlock(self, const F2FScalar[:, :] v,
+                             F2FScalar[:, :] p, cols=None):
+        """
+        Apply :meth:`applydQdqATrans` to every column of a block of vectors in
+        a single pass over the connectivity
+
+        Parameters
+        ----------
+        v: ndarray
+            Two-dimensional array of shape (number of structural nodes, number
+            of vectors)
+        p: ndarray
+            Two-dimensional empty array of shape (number of aerodynamic nodes,
+            number of vectors)
+        cols: array of int
+            indices of the columns to apply the products to (all by default).
+            The other columns of p are left unchanged
 
         """
         cdef MELDThermal *mt = <MELDThermal*> self.ptr
-        mt.applydQdqATrans(<F2FScalar*>v.data, <F2FScalar*>p.data)
+        cdef int[:] c = _blockColumns(cols)
+        cdef F2FScalar *v_tmp = NULL
+        cdef F2FScalar *p_tmp = NULL
+        mt.applydQdqATransBlock(_gatherBlock(v, c, &v_tmp), _gatherBlock(p, c, &p_tmp),
+                                (v.shape[1] if c is None else c.shape[0]))
+        _freeVector(v_tmp)
+        _scatterBlock(p, c, p_tmp)
+        self._checkSharedConnectivity()
         return
 
 
@@ -932,11 +1876,210 @@ cdef class pyLinearizedMELD(pyTransferScheme):
     def __dealloc__(self):
         del self.ptr
 
+    def setSinglePrecision(self, flag=True):
+        """
+        Store the weights and the displacement transfer operator in single
+        precision. The transfers and the Jacobian-vector products still
+        accumulate their sums in double precision with the same operator, but
+        getDispOperator is not available. This must be called before
+        initialize() or load() and is not available in complex mode
+
+        Parameters
+        ----------
+        flag: bool
+            whether to use single precision transfers
+
+        """
+        cdef LinearizedMELD *ptr = <LinearizedMELD*> self.ptr
+        ptr.setSinglePrecision(1 if flag else 0)
+
+        return
+
+    def reconnect(self, double tol=0.0):
+        """
+        Update the aerostructural connectivity and weights after the node
+        locations have been changed with setAeroNodes/setStructNodes. The
+        nearest node search is only repeated for the aerodynamic nodes whose
+        set of nearest structural nodes may have changed, and the weights are
+        only recomputed for the aerodynamic nodes that moved, or are linked to
+        a structural node that moved, by more than tol. The number of nodes
+        must be unchanged. The node locations and gaps needed for this are
+        only stored from the first call, which repeats the search for every
+        aerodynamic node
+
+        Parameters
+        ----------
+        tol: float
+            node movement below which the weights are not recomputed
+
+        """
+        cdef LinearizedMELD *ptr = <LinearizedMELD*> self.ptr
+        ptr.reconnect(tol)
+
+        return
+
+    def save(self, path):
+        """
+        Save the aerostructural connectivity and weights, together with a
+        fingerprint of the meshes and settings they were computed for, to a
+        binary file. On more than one processor, each processor writes its
+        aerodynamic nodes to path.rank. The arrays start on 8-byte boundaries
+        after a 64-byte header so they can be memory mapped
+
+        Parameters
+        ----------
+        path: str
+            name of the connectivity file
+
+        Returns
+        -------
+        success: bool
+            whether the file was written on every processor
+
+        """
+        cdef LinearizedMELD *ptr = <LinearizedMELD*> self.ptr
+        cdef bytes fname = str(path).encode()
+        fail = ptr.saveConnectivity(fname)
+
+        return fail == 0
+
+    def load(self, path):
+        """
+        Load the aerostructural connectivity and weights saved with save()
+        in place of initialize(). The file is rejected if the meshes or
+        settings do not match the fingerprint stored in the file, in which
+        case the scheme must be initialized instead
+
+        Parameters
+        ----------
+        path: str
+            name of the connectivity file
+
+        Returns
+        -------
+        success: bool
+            whether the connectivity was loaded
+
+        """
+        cdef LinearizedMELD *ptr = <LinearizedMELD*> self.ptr
+        cdef bytes fname = str(path).encode()
+        fail = ptr.loadConnectivity(fname)
+
+        return fail == 0
+
+    def getDispOperator(self):
+        """
+        Get the linearized displacement transfer operator D, assembled in
+        initialize, such that the aerodynamic displacements are
+        u_A = D*u_S and the structural loads are f_S = D^T*f_A
+
+        Returns
+        -------
+        D: scipy.sparse.csr_matrix
+            Sparse matrix with a row for each local aerodynamic displacement
+            and a column for each displacement in the image of the structural
+            mesh on this process
+
+        """
+        from scipy.sparse import csr_matrix
+
+        cdef LinearizedMELD *lmeld = <LinearizedMELD*> self.ptr
+        cdef int nrows = 0, ncols = 0
+        cdef const int *rowp = NULL
+        cdef const int *cols = NULL
+        cdef const F2FScalar *vals = NULL
+        lmeld.getDispOperator(&nrows, &ncols, &rowp, &cols, &vals)
+
+        # Copy the CSR data into numpy arrays
+        cdef int nnz = rowp[nrows] if rowp != NULL else 0
+        if nnz > 0 and vals == NULL:
+            raise RuntimeError('The displacement transfer operator is not '
+                               'available with single precision transfers')
+        D_rowp = np.zeros(nrows+1, dtype=np.intc)
+        D_cols = np.zeros(nnz, dtype=np.intc)
+        D_vals = np.zeros(nnz, dtype=dtype)
+        if rowp != NULL:
+            D_rowp[:] = <int[:nrows+1]> <int*> rowp
+        if nnz > 0:
+            D_cols[:] = <int[:nnz]> <int*> cols
+            D_vals[:] = <F2FScalar[:nnz]> <F2FScalar*> vals
+
+        return csr_matrix((D_vals, D_cols, D_rowp), shape=(nrows, ncols))
+
+cdef class pyLocatePoint:
+    """
+    Search tree over a cloud of points in R^3 for closest-point queries
+
+    Parameters
+    ----------
+    X: numpy.ndarray
+        point coordinates x1, y1, z1, ..., xn, yn, zn
+    max_num_points: int
+        maximum number of points stored at a leaf of the tree
+
+    """
+    cdef LocatePoint *ptr
+    cdef object X
+
+    def __cinit__(self, np.ndarray[F2FScalar, ndim=1, mode='c'] X,
+                  int max_num_points=10):
+        # The tree references the coordinates, so keep a copy of them
+        self.X = np.array(X, dtype=dtype)
+        cdef np.ndarray[F2FScalar, ndim=1, mode='c'] Xc = self.X
+        cdef int npts = int(len(X)/3)
+        self.ptr = new LocatePoint(<F2FScalar*>Xc.data, npts, max_num_points)
+
+        return
+
+    def __dealloc__(self):
+        del self.ptr
+
+    def locateKClosest(self, int K,
+                       np.ndarray[F2FScalar, ndim=1, mode='c'] xq,
+                       int nthreads=1, int isymm=-1):
+        """
+        Find the K closest points to each of a batch of query points. The
+        queries are processed in spatial order and split between nthreads
+        threads (if compiled with OpenMP). If isymm > -1, the mirror images
+        of the points across the plane x[isymm] = 0 are also searched and
+        the mirror image of point n is returned as npts + n
+
+        Parameters
+        ----------
+        K: int
+            number of closest points
+        xq: numpy.ndarray
+            query point coordinates x1, y1, z1, ..., xm, ym, zm
+        nthreads: int
+            number of threads
+        isymm: int
+            direction normal to the plane of symmetry (-1 for no symmetry)
+
+        Returns
+        -------
+        indices: numpy.ndarray
+            (m, K) array of the indices of the closest points, sorted by
+            distance
+        dist: numpy.ndarray
+            (m, K) array of the squared distances to the closest points
+
+        """
+        cdef int nq = int(len(xq)/3)
+        cdef np.ndarray[int, ndim=1, mode='c'] indices = np.zeros(K*nq, dtype=np.intc)
+        cdef np.ndarray[F2FScalar, ndim=1, mode='c'] dist = np.zeros(K*nq, dtype=dtype)
+        self.ptr.locateKClosestBatch(K, nq, <F2FScalar*>xq.data,
+                                     <int*>indices.data,
+                                     <F2FScalar*>dist.data, nthreads,
+                                     isymm)
+
+        return indices.reshape(nq, K), dist.reshape(nq, K)
+
 # Wrap the MELD class
 PY_GAUSSIAN = GAUSSIAN
 PY_MULTIQUADRIC = MULTIQUADRIC
 PY_INVERSE_MULTIQUADRIC = INVERSE_MULTIQUADRIC
 PY_THIN_PLATE_SPLINE = THIN_PLATE_SPLINE
+PY_WENDLAND_C2 = WENDLAND_C2
 
 cdef class pyRBF(pyTransferScheme):
     """
@@ -956,16 +2099,24 @@ cdef class pyRBF(pyTransferScheme):
         id of the aerodynamic root process
     rbf_type: C++ enum
         type of radial basis function to use (PY_GAUSSIAN, PY_MULTIQUADRIC,
-        PY_INVERSE_MULTIQUADRIC, PY_THIN_PLATE_SPLINE)
+        PY_INVERSE_MULTIQUADRIC, PY_THIN_PLATE_SPLINE, PY_WENDLAND_C2)
     sampling_ratio: int
         minimum number of points in leaf node of octree (one point sampled
         from each node)
+    support_radius: float
+        support radius of the compactly supported PY_WENDLAND_C2 basis. The
+        interpolation is stored and solved in sparse form, so the radius
+        controls the number of non-zeros per row
+    sampling_seed: int
+        seed of the random number generator used to pick the sampled point
+        in each leaf node of the octree, so that sampled runs are repeatable
 
     """
     def __cinit__(self, MPI.Comm comm,
                   MPI.Comm struct, int struct_root,
                   MPI.Comm aero, int aero_root,
-                  RbfType rbf_type, int sampling_ratio):
+                  RbfType rbf_type, int sampling_ratio,
+                  double support_radius=1.0, unsigned int sampling_seed=0):
         """
 
         Parameters
@@ -977,6 +2128,8 @@ cdef class pyRBF(pyTransferScheme):
         aero_root
         rbf_type
         sampling_ratio
+        support_radius
+        sampling_seed
 
         Returns
         -------
@@ -989,7 +2142,29 @@ cdef class pyRBF(pyTransferScheme):
         # Allocate the underlying class
         self.ptr = new RBF(c_comm, struct_comm, struct_root,
                            aero_comm, aero_root,
-                           rbf_type, sampling_ratio)
+                           rbf_type, sampling_ratio, support_radius,
+                           sampling_seed)
+
+        return
+
+    def setGreedySampling(self, double tol, int max_centers=0):
+        """
+        Select the interpolation centers greedily when initialize() is called,
+        instead of sampling one point from each leaf of the octree. The
+        structural node with the largest interpolation error bound (the power
+        function) is added until the largest bound is below tol times its
+        initial value or max_centers centers are selected
+
+        Parameters
+        ----------
+        tol: float
+            relative tolerance on the interpolation error bound
+        max_centers: int
+            maximum number of centers (no limit if <= 0)
+
+        """
+        cdef RBF *rbf = <RBF*> self.ptr
+        rbf.setGreedySampling(tol, max_centers)
 
         return
 
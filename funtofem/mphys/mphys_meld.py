@@ -4,6 +4,21 @@ from mphys import Builder
 
 from funtofem import TransferScheme
 
+def _xfer_array(x):
+    """
+    Get an OpenMDAO vector as an array of the transfer scheme type. This is x
+    itself unless the types differ, when the transfer scheme is complex
+    """
+    return np.asarray(x, dtype=TransferScheme.dtype)
+
+def _copy_back(x, y):
+    """
+    Copy an array obtained from _xfer_array back to the OpenMDAO vector x if
+    it is not x itself
+    """
+    if y is not x:
+        x[:] = y.real
+
 class MeldDispXfer(om.ExplicitComponent):
     """
     Component to perform displacement transfer using MELD
@@ -58,13 +73,10 @@ class MeldDispXfer(om.ExplicitComponent):
         #self.declare_partials('u_aero',['x_struct0','x_aero0','u_struct'])
 
     def compute(self, inputs, outputs):
-        x_s0 = np.array(inputs['x_struct0'],dtype=TransferScheme.dtype)
-        x_a0 = np.array(inputs['x_aero0'],dtype=TransferScheme.dtype)
-        u_a  = np.array(outputs['u_aero'],dtype=TransferScheme.dtype)
-
-        u_s  = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-        for i in range(3):
-            u_s[i::3] = inputs['u_struct'][i::self.struct_ndof]
+        x_s0 = _xfer_array(inputs['x_struct0'])
+        x_a0 = _xfer_array(inputs['x_aero0'])
+        u_s  = _xfer_array(inputs['u_struct'])
+        u_a  = _xfer_array(outputs['u_aero'])
 
         self.meld.setStructNodes(x_s0)
         self.meld.setAeroNodes(x_a0)
@@ -73,9 +85,8 @@ class MeldDispXfer(om.ExplicitComponent):
             self.meld.initialize()
             self.initialized_meld = True
 
-        self.meld.transferDisps(u_s,u_a)
-
-        outputs['u_aero'] = u_a
+        self.meld.transferDisps(u_s,u_a,self.struct_ndof)
+        _copy_back(outputs['u_aero'],u_a)
 
     def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
         """
@@ -86,25 +97,19 @@ class MeldDispXfer(om.ExplicitComponent):
         So explicit partials below for u_a are negative partials of D
         """
         if self.check_partials:
-            x_s0 = np.array(inputs['x_struct0'],dtype=TransferScheme.dtype)
-            x_a0 = np.array(inputs['x_aero0'],dtype=TransferScheme.dtype)
-            self.meld.setStructNodes(x_s0)
-            self.meld.setAeroNodes(x_a0)
-        u_s  = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-        for i in range(3):
-            u_s[i::3] = inputs['u_struct'][i::self.struct_ndof]
+            self.meld.setStructNodes(_xfer_array(inputs['x_struct0']))
+            self.meld.setAeroNodes(_xfer_array(inputs['x_aero0']))
+        u_s = _xfer_array(inputs['u_struct'])
         u_a = np.zeros(self.aero_nnodes*3,dtype=TransferScheme.dtype)
-        self.meld.transferDisps(u_s,u_a)
+        self.meld.transferDisps(u_s,u_a,self.struct_ndof)
 
         if mode == 'fwd':
             if 'u_aero' in d_outputs:
                 if 'u_struct' in d_inputs:
-                    d_in = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-                    for i in range(3):
-                        d_in[i::3] = d_inputs['u_struct'][i::self.struct_ndof]
+                    d_in = _xfer_array(d_inputs['u_struct'])
                     prod = np.zeros(self.aero_nnodes*3,dtype=TransferScheme.dtype)
-                    self.meld.applydDduS(d_in,prod)
-                    d_outputs['u_aero'] -= np.array(prod,dtype=float)
+                    self.meld.applydDduS(d_in,prod,self.struct_ndof)
+                    d_outputs['u_aero'] -= prod.real
 
                 if 'x_aero0' in d_inputs:
                     if self.check_partials:
@@ -120,24 +125,23 @@ class MeldDispXfer(om.ExplicitComponent):
 
         if mode == 'rev':
             if 'u_aero' in d_outputs:
-                du_a = np.array(d_outputs['u_aero'],dtype=TransferScheme.dtype)
+                du_a = _xfer_array(d_outputs['u_aero'])
                 if 'u_struct' in d_inputs:
                     # du_a/du_s^T * psi = - dD/du_s^T psi
-                    prod = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-                    self.meld.applydDduSTrans(du_a,prod)
-                    for i in range(3):
-                        d_inputs['u_struct'][i::self.struct_ndof] -= np.array(prod[i::3],dtype=np.float64)
+                    prod = np.zeros(d_inputs['u_struct'].size,dtype=TransferScheme.dtype)
+                    self.meld.applydDduSTrans(du_a,prod,self.struct_ndof)
+                    d_inputs['u_struct'] -= prod.real
 
                 # du_a/dx_a0^T * psi = - psi^T * dD/dx_a0 in F2F terminology
                 if 'x_aero0' in d_inputs:
                     prod = np.zeros(d_inputs['x_aero0'].size,dtype=TransferScheme.dtype)
                     self.meld.applydDdxA0(du_a,prod)
-                    d_inputs['x_aero0'] -= np.array(prod,dtype=float)
+                    d_inputs['x_aero0'] -= prod.real
 
                 if 'x_struct0' in d_inputs:
                     prod = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
                     self.meld.applydDdxS0(du_a,prod)
-                    d_inputs['x_struct0'] -= np.array(prod,dtype=float)
+                    d_inputs['x_struct0'] -= prod.real
 
 class MeldLoadXfer(om.ExplicitComponent):
     """
@@ -201,24 +205,17 @@ class MeldLoadXfer(om.ExplicitComponent):
 
     def compute(self, inputs, outputs):
         if self.check_partials:
-            x_s0 = np.array(inputs['x_struct0'],dtype=TransferScheme.dtype)
-            x_a0 = np.array(inputs['x_aero0'],dtype=TransferScheme.dtype)
-            self.meld.setStructNodes(x_s0)
-            self.meld.setAeroNodes(x_a0)
-        f_a =  np.array(inputs['f_aero'],dtype=TransferScheme.dtype)
-        f_s = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-
-        u_s  = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-        for i in range(3):
-            u_s[i::3] = inputs['u_struct'][i::self.struct_ndof]
+            self.meld.setStructNodes(_xfer_array(inputs['x_struct0']))
+            self.meld.setAeroNodes(_xfer_array(inputs['x_aero0']))
+        f_a = _xfer_array(inputs['f_aero'])
+        u_s = _xfer_array(inputs['u_struct'])
         u_a = np.zeros(inputs['f_aero'].size,dtype=TransferScheme.dtype)
-        self.meld.transferDisps(u_s,u_a)
-
-        self.meld.transferLoads(f_a,f_s)
+        self.meld.transferDisps(u_s,u_a,self.struct_ndof)
 
         outputs['f_struct'][:] = 0.0
-        for i in range(3):
-            outputs['f_struct'][i::self.struct_ndof] = f_s[i::3]
+        f_s = _xfer_array(outputs['f_struct'])
+        self.meld.transferLoads(f_a,f_s,self.struct_ndof)
+        _copy_back(outputs['f_struct'],f_s)
 
     def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
         """
@@ -229,38 +226,30 @@ class MeldLoadXfer(om.ExplicitComponent):
         So explicit partials below for f_s are negative partials of L
         """
         if self.check_partials:
-            x_s0 = np.array(inputs['x_struct0'],dtype=TransferScheme.dtype)
-            x_a0 = np.array(inputs['x_aero0'],dtype=TransferScheme.dtype)
-            self.meld.setStructNodes(x_s0)
-            self.meld.setAeroNodes(x_a0)
-        f_a =  np.array(inputs['f_aero'],dtype=TransferScheme.dtype)
+            self.meld.setStructNodes(_xfer_array(inputs['x_struct0']))
+            self.meld.setAeroNodes(_xfer_array(inputs['x_aero0']))
+        f_a = _xfer_array(inputs['f_aero'])
         f_s = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
 
-        u_s  = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-        for i in range(3):
-            u_s[i::3] = inputs['u_struct'][i::self.struct_ndof]
+        u_s = _xfer_array(inputs['u_struct'])
         u_a = np.zeros(inputs['f_aero'].size,dtype=TransferScheme.dtype)
-        self.meld.transferDisps(u_s,u_a)
+        self.meld.transferDisps(u_s,u_a,self.struct_ndof)
         self.meld.transferLoads(f_a,f_s)
 
         if mode == 'fwd':
             if 'f_struct' in d_outputs:
                 if 'u_struct' in d_inputs:
-                    d_in = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-                    for i in range(3):
-                        d_in[i::3] = d_inputs['u_struct'][i::self.struct_ndof]
-                    prod = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-                    self.meld.applydLduS(d_in,prod)
-                    for i in range(3):
-                        d_outputs['f_struct'][i::self.struct_ndof] -= np.array(prod[i::3],dtype=float)
+                    d_in = _xfer_array(d_inputs['u_struct'])
+                    prod = np.zeros(d_outputs['f_struct'].size,dtype=TransferScheme.dtype)
+                    self.meld.applydLduS(d_in,prod,self.struct_ndof)
+                    d_outputs['f_struct'] -= prod.real
 
                 if 'f_aero' in d_inputs:
                     # df_s/df_a psi = - dL/df_a * psi = -dD/du_s^T * psi
-                    prod = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-                    df_a = np.array(d_inputs['f_aero'],dtype=TransferScheme.dtype)
-                    self.meld.applydDduSTrans(df_a,prod)
-                    for i in range(3):
-                        d_outputs['f_struct'][i::self.struct_ndof] -= np.array(prod[i::3],dtype=float)
+                    prod = np.zeros(d_outputs['f_struct'].size,dtype=TransferScheme.dtype)
+                    df_a = _xfer_array(d_inputs['f_aero'])
+                    self.meld.applydDduSTrans(df_a,prod,self.struct_ndof)
+                    d_outputs['f_struct'] -= prod.real
 
                 if 'x_aero0' in d_inputs:
                     if self.check_partials:
@@ -276,35 +265,31 @@ class MeldLoadXfer(om.ExplicitComponent):
 
         if mode == 'rev':
             if 'f_struct' in d_outputs:
-                d_out = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-                for i in range(3):
-                    d_out[i::3] = d_outputs['f_struct'][i::self.struct_ndof]
+                d_out = _xfer_array(d_outputs['f_struct'])
 
                 if 'u_struct' in d_inputs:
-                    d_in = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
                     # df_s/du_s^T * psi = - dL/du_s^T * psi
-                    self.meld.applydLduSTrans(d_out,d_in)
-
-                    for i in range(3):
-                        d_inputs['u_struct'][i::self.struct_ndof] -= np.array(d_in[i::3],dtype=float)
+                    d_in = np.zeros(d_inputs['u_struct'].size,dtype=TransferScheme.dtype)
+                    self.meld.applydLduSTrans(d_out,d_in,self.struct_ndof)
+                    d_inputs['u_struct'] -= d_in.real
 
                 if 'f_aero' in d_inputs:
                     # df_s/df_a^T psi = - dL/df_a^T * psi = -dD/du_s * psi
                     prod = np.zeros(self.aero_nnodes*3,dtype=TransferScheme.dtype)
-                    self.meld.applydDduS(d_out,prod)
-                    d_inputs['f_aero'] -= np.array(prod,dtype=float)
+                    self.meld.applydDduS(d_out,prod,self.struct_ndof)
+                    d_inputs['f_aero'] -= prod.real
 
                 if 'x_aero0' in d_inputs:
                     # df_s/dx_a0^T * psi = - psi^T * dL/dx_a0 in F2F terminology
                     prod = np.zeros(self.aero_nnodes*3,dtype=TransferScheme.dtype)
-                    self.meld.applydLdxA0(d_out,prod)
-                    d_inputs['x_aero0'] -= np.array(prod,dtype=float)
+                    self.meld.applydLdxA0(d_out,prod,self.struct_ndof)
+                    d_inputs['x_aero0'] -= prod.real
 
                 if 'x_struct0' in d_inputs:
                     # df_s/dx_s0^T * psi = - psi^T * dL/dx_s0 in F2F terminology
                     prod = np.zeros(self.struct_nnodes*3,dtype=TransferScheme.dtype)
-                    self.meld.applydLdxS0(d_out,prod)
-                    d_inputs['x_struct0'] -= np.array(prod,dtype=float)
+                    self.meld.applydLdxS0(d_out,prod,self.struct_ndof)
+                    d_inputs['x_struct0'] -= prod.real
 
 class MeldBuilder(Builder):
     def __init__(self, aero_builder, struct_builder,
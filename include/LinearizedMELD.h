@@ -6,6 +6,17 @@
 /*
   Linearized MELD is a transfer scheme developed from the MELD transfer scheme
   assuming displacements tend to zero.
+
+  The displacement transfer is linear in the structural displacements and
+  only depends on the undeformed geometry, so it is assembled once into a
+  sparse CSR matrix D with u_A = D*u_S. The rows are the displacements of the
+  local aerodynamic nodes and the columns are the displacements in the image
+  of the structural mesh on this processor. The load transfer is the
+  transpose, f_S = D^{T}*f_A
+
+  With single precision transfers the entries of D are stored in single
+  precision and the products with D are accumulated in double precision.
+  The Jacobian-vector products use the same D, so they remain available
 */
 class F2F_API LinearizedMELD : public MELD {
  public:
@@ -17,8 +28,11 @@ class F2F_API LinearizedMELD : public MELD {
   // Destructor
   ~LinearizedMELD();
 
-  // Initialization
-  void initialize();
+  // Update the connectivity and weights after the nodes have moved
+  void reconnect(double tol=0.0);
+
+  // Names and sizes in bytes of the arrays allocated on this processor
+  int getMemoryUsage(const char **names=NULL, size_t *bytes=NULL);
 
   // Load and displacement transfers
   void transferDisps(const F2FScalar *struct_disps,
@@ -38,19 +52,32 @@ class F2F_API LinearizedMELD : public MELD {
   void applydLdxA0(const F2FScalar *vecs, F2FScalar *prods);
   void applydLdxS0(const F2FScalar *vecs, F2FScalar *prods);
 
+  // Access the CSR data of the displacement transfer operator
+  void getDispOperator(int *nrows, int *ncols, const int **rowp,
+                       const int **cols, const F2FScalar **vals);
+
+ protected:
+  // Assemble the displacement transfer operator after the connectivity and
+  // weights are set
+  void finalizeConnectivity();
+
  private:
-  // Data for the transfers
-  F2FScalar *global_H;
+  // CSR data of the displacement transfer operator, with the entries in
+  // single_disp_vals for single precision transfers
+  int *disp_rowp;
+  int *disp_cols;
+  F2FScalar *disp_vals;
+  float *single_disp_vals;
+
+  // Assembly and products with the displacement transfer operator
+  void assembleDispOperator();
+  void multDispOperator(const F2FScalar *x, F2FScalar *y);
+  void multDispOperatorTrans(const F2FScalar *x, F2FScalar *y);
 
   // Auxiliary functions for linearized load and displacement transfer
   void computePointInertiaInverse(const F2FScalar *H, F2FScalar *Hinv);
-  void computeDispContribution(const F2FScalar w, const F2FScalar *r,
-                               const F2FScalar *Hinv, const F2FScalar *q,
-                               const F2FScalar *us,
-                               F2FScalar *ua);
-  void computeLoadContribution(const F2FScalar w, const F2FScalar *q, 
-                               const F2FScalar *Hinv, const F2FScalar *r, 
-                               const F2FScalar *fa,
-                               F2FScalar *fj);
+  void computeDispOperator(const F2FScalar w, const F2FScalar *r,
+                           const F2FScalar *Hinv, const F2FScalar *q,
+                           F2FScalar *A);
 };
 #endif //LINEARIZEDMELD_H
@@ -27,7 +27,34 @@ class F2F_API LocatePoint {
                        F2FScalar dist[], const F2FScalar xpt[] );
   void locateKExhaustive( int K, int indices[], 
                           F2FScalar dist[], const F2FScalar xpt[] );
+
+  // Locate the K-closest points among the points and their mirror images
+  // across the plane x[isymm] = 0. The mirror image of point n is returned
+  // as npts + n, and points on the plane are only returned once
+  // --------------------------------------------------------------------------
+  void locateKClosestSymm( int K, int isymm, int indices[],
+                           F2FScalar dist[], const F2FScalar xpt[] );
   
+  // Locate the K-closest points for a batch of nq query points. The queries
+  // are processed in spatial order with nthreads threads (if compiled with
+  // OpenMP). indices (and dist if not NULL) must be of length K*nq. If
+  // isymm > -1 the mirror images are searched as in locateKClosestSymm
+  // --------------------------------------------------------------------------
+  void locateKClosestBatch( int K, int nq, const F2FScalar xq[],
+                            int indices[], F2FScalar dist[],
+                            int nthreads=1, int isymm=-1 );
+
+  // Number of points and mirror images across the plane x[isymm] = 0, i.e.
+  // the points on the plane are counted once
+  // --------------------------------------------------------------------------
+  int getNumSymmPoints( int isymm );
+
+  // Locate all the points within the given radius. Returns the number of
+  // points found, only the first max_num of which are stored in indices/dist
+  // --------------------------------------------------------------------------
+  int locateInRadius( F2FScalar radius, int max_num, int indices[],
+                      F2FScalar dist[], const F2FScalar xpt[] );
+
   // Find the point with the closest taxi-cab distance to the plane
   // --------------------------------------------------------------
   void locateClosestTaxi( int K, int indices[],
@@ -40,6 +67,21 @@ class F2F_API LocatePoint {
                       F2FScalar * dist, int * index );
   void locateKClosest( int K, int root, const F2FScalar xpt[], 
 		       F2FScalar * dist, int * indices, int * nk );
+  int locateKClosestSymm( int K, int isymm, const F2FScalar xpt[],
+                          F2FScalar * dist, int * indices,
+                          F2FScalar * work, int * iwork );
+
+  // Check whether a point lies on the plane of symmetry
+  int onSymmPlane( int n, int isymm ){
+    return !(fabs(F2FRealPart(Xpts[3*n+isymm])) > 1e-7);
+  }
+
+  void locateInRadius( int root, F2FScalar r2, const F2FScalar xpt[],
+                       int max_num, F2FScalar * dist, int * indices,
+                       int * nr );
+
+  // Order the query points along a space-filling curve
+  void sortByLocality( int nq, const F2FScalar xq[], int order[] );
 
   // Insert the index into the sorted list of indices
   void insertIndex( F2FScalar * dist, int * indices, int *nk, 
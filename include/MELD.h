@@ -21,15 +21,40 @@
         =  2 for symmetry across z = 0
 
   Users must also specify number of nearest nodes in initialize(num_nearest)
+
+  By default every processor holds a replica of the full structural mesh.
+  If partitioned is non-zero, each processor only keeps the structural nodes
+  referenced by its local aerostructural connectivity after initialize() and
+  structural vectors are exchanged point-to-point with the processors that
+  own those nodes
+
+  After the nodes are moved with setAeroNodes()/setStructNodes(), reconnect()
+  repeats the nearest node search only for the aerodynamic nodes whose set of
+  nearest structural nodes may have changed, and recomputes the weights only
+  where the nodes moved. In partitioned mode reconnect() repeats the search
+  for every aerodynamic node and partitions the structural mesh again
+
+  saveConnectivity() writes the connectivity and weights to a binary file
+  that loadConnectivity() reads in place of initialize() when the meshes and
+  settings match the fingerprint stored in the file
+
+  For forward-only analysis, setSinglePrecision() before initialize() stores
+  the weights and the centroids and rotations of the load transfer in single
+  precision, with the sums still computed in double precision. The
+  Jacobian-vector products are not available in this mode and zero their
+  outputs
 */
 class F2F_API MELD : public TransferScheme {
+  // MELDThermal can share the connectivity and weights of a MELD scheme
+  friend class MELDThermal;
+
  public:
   // Constructor
   MELD(MPI_Comm all,
        MPI_Comm structure, int _struct_root,
        MPI_Comm aero, int _aero_root,
        int _isymm, int num_nearest,
-       F2FScalar beta);
+       F2FScalar beta, int _partitioned=0);
 
   // Destructor
   ~MELD();
@@ -37,6 +62,19 @@ class F2F_API MELD : public TransferScheme {
   // Initialization
   virtual void initialize();
 
+  // Update the connectivity and weights after the nodes have moved
+  virtual void reconnect(double tol=0.0);
+
+  // Save or load the connectivity and weights
+  int saveConnectivity(const char *filename);
+  int loadConnectivity(const char *filename);
+
+  // Use single precision data for forward-only transfers
+  void setSinglePrecision(int flag);
+
+  // Names and sizes in bytes of the arrays allocated on this processor
+  virtual int getMemoryUsage(const char **names=NULL, size_t *bytes=NULL);
+
   void setStructNodes(const F2FScalar *struct_X, int struct_nnodes);
 
   // Load and displacement transfers
@@ -51,6 +89,15 @@ class F2F_API MELD : public TransferScheme {
   virtual void applydLduS(const F2FScalar *vecs, F2FScalar *prods);
   virtual void applydLduSTrans(const F2FScalar *vecs, F2FScalar *prods);
 
+  // Block versions of the adjoint products applied to nvecs vectors at once.
+  // The vectors are stored node-by-node, i.e. a row-major (n, nvecs) array
+  void applydDduSBlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs);
+  void applydDduSTransBlock(const F2FScalar *vecs, F2FScalar *prods,
+                            int nvecs);
+  void applydLduSBlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs);
+  void applydLduSTransBlock(const F2FScalar *vecs, F2FScalar *prods,
+                            int nvecs);
+
   // Action of Jacobians needed for assembling gradient from adjoint variables
   virtual void applydDdxA0(const F2FScalar *vecs, F2FScalar *prods);
   virtual void applydDdxS0(const F2FScalar *vecs, F2FScalar *prods);
@@ -83,14 +130,61 @@ class F2F_API MELD : public TransferScheme {
   F2FScalar *global_M1;
   int *global_ipiv;
 
+  // Single precision weights and load transfer data used in place of the
+  // double precision arrays with single precision transfers
+  float *single_W;
+  float *single_xs0bar;
+  float *single_R;
+  float *single_S;
+
+  // Convert the weights between single and double precision, so that the
+  // connectivity routines can update them in double precision
+  void setDoubleWeights();
+  void setSingleWeights();
+
+  // Partitioned structural mesh data: the structural nodes referenced by
+  // this processor are received from recv_procs into contiguous ranges
+  // recv_ptr, and the local nodes send_ids are sent to send_procs
+  int partitioned;
+  int nrecv_procs, nsend_procs;
+  int *recv_procs, *recv_ptr;
+  int *send_procs, *send_ptr, *send_ids;
+
+  // Number of nodes in the full structural mesh and, in partitioned mode,
+  // the full structural mesh ids of the referenced nodes
+  int ns_global;
+  int *ref_ids;
+
+  // Node locations, gap between the distances to the (nn+1)-th and nn-th
+  // closest structural nodes of each aerodynamic node, and node counts at
+  // the last connectivity update. The locations and gaps are allocated by
+  // the first reconnect()
+  F2FScalar *conn_Xa, *conn_Xs;
+  double *conn_gap;
+  int conn_na, conn_ns;
+  void storeConnectivityMesh();
+
+  // Hashes of the structural nodes set on this processor and of the full
+  // structural mesh, and fingerprint of the meshes of the connectivity
+  uint64_t struct_hash_local, struct_hash;
+  uint64_t conn_fingerprint;
+  uint64_t computeFingerprint();
+
+  // Partition the structural mesh and allocate the transfer data after the
+  // connectivity and weights are set
+  virtual void finalizeConnectivity();
+  void freeConnectivity();
+
   // Parallel movement of structural vectors
-  void distributeStructuralMesh();
-  void collectStructuralVector(const F2FScalar *local, F2FScalar *global);
-  void distributeStructuralVector(F2FScalar *global, F2FScalar *local);
+  int distributeStructuralMesh();
+  void partitionStructuralMesh();
+  void collectStructuralVector(const F2FScalar *local, F2FScalar *global, int vars_per_node=3);
+  void distributeStructuralVector(F2FScalar *global, F2FScalar *local, int vars_per_node=3);
 
   // Auxiliary functions for creating connectivity and weighting
-  void setAeroStructConn(int *aerostruct_conn);
-  void computeWeights(F2FScalar *W);
+  void setAeroStructConn(int *aerostruct_conn, int nids=-1,
+                         const int *aero_ids=NULL);
+  void computeWeights(F2FScalar *W, int nids=-1, const int *aero_ids=NULL);
 
   // Auxiliary functions for displacement transfer
   void computeCentroid(const int *local_conn, const F2FScalar *W, 
@@ -3,6 +3,7 @@
 
 #include "mpi.h"
 #include "TransferScheme.h"
+#include "MELD.h"
 
 /*
   MELD (Matching-based Extrapolation of Loads and Displacments) is scalable
@@ -21,6 +22,24 @@
         =  2 for symmetry across z = 0
 
   Users must also specify number of nearest nodes in initialize(num_nearest)
+
+  After the nodes are moved, reconnect() repeats the nearest node search only
+  for the aerodynamic nodes whose set of nearest structural nodes may have
+  changed, and recomputes the weights only where the nodes moved
+
+  saveConnectivity() writes the connectivity and weights to a binary file
+  that loadConnectivity() reads in place of initialize() when the meshes and
+  settings match the fingerprint stored in the file
+
+  For forward-only analysis, setSinglePrecision() before initialize() stores
+  the weights in single precision, with the sums still computed in double
+  precision. The transfers are linear in the weights, so the Jacobian-vector
+  products use the same single precision weights and remain exact
+
+  shareConnectivity() before initialize() uses the connectivity and weights
+  of a MELD scheme for the same meshes in place of its own, so they are
+  computed and stored only once on aerothermoelastic bodies. reconnect() of
+  the MELD scheme then updates both schemes
 */
 
 class F2F_API MELDThermal : public TransferScheme {
@@ -38,6 +57,26 @@ class F2F_API MELDThermal : public TransferScheme {
   // Initialization
   virtual void initialize();
 
+  // Update the connectivity and weights after the nodes have moved
+  virtual void reconnect(double tol=0.0);
+
+  // Save or load the connectivity and weights
+  int saveConnectivity(const char *filename);
+  int loadConnectivity(const char *filename);
+
+  // Use single precision weights for forward-only transfers
+  void setSinglePrecision(int flag);
+
+  // Use the connectivity and weights of a MELD scheme for the same meshes
+  void shareConnectivity(MELD *source);
+
+  // Non-zero if the shared connectivity cannot be used, in which case the
+  // transfers and products return zero
+  int getSharedConnectivityFail(){ return shared_fail; }
+
+  // Names and sizes in bytes of the arrays allocated on this processor
+  virtual int getMemoryUsage(const char **names=NULL, size_t *bytes=NULL);
+
   // Set the aerodynamic and structural node locations
   void setStructNodes(const F2FScalar *struct_X, int struct_nnodes);
   void setAeroNodes(const F2FScalar *aero_X, int aero_nnodes);
@@ -54,6 +93,15 @@ class F2F_API MELDThermal : public TransferScheme {
   void applydQdqA(const F2FScalar *vecs, F2FScalar *prods);
   void applydQdqATrans(const F2FScalar *vecs, F2FScalar *prods);
 
+  // Block versions of the adjoint products applied to nvecs vectors at once.
+  // The vectors are stored node-by-node, i.e. a row-major (n, nvecs) array
+  void applydTdtSBlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs);
+  void applydTdtSTransBlock(const F2FScalar *vecs, F2FScalar *prods,
+                            int nvecs);
+  void applydQdqABlock(const F2FScalar *vecs, F2FScalar *prods, int nvecs);
+  void applydQdqATransBlock(const F2FScalar *vecs, F2FScalar *prods,
+                            int nvecs);
+
   // Test Functions
   void testFluxTransfer(const F2FScalar *struct_temps,
                         const F2FScalar *aero_flux,
@@ -99,9 +147,39 @@ class F2F_API MELDThermal : public TransferScheme {
 
   // Data for thermal transfer
   F2FScalar *global_W;
-  F2FScalar *global_xs0bar;
-  F2FScalar *global_R;
-  F2FScalar *global_S;
+
+  // Single precision weights used in place of global_W with single
+  // precision transfers
+  float *single_W;
+
+  // Convert the weights between single and double precision, so that the
+  // connectivity routines can update them in double precision
+  void setDoubleWeights();
+  void setSingleWeights();
+
+  // MELD scheme that owns the shared connectivity and weights, if any. The
+  // source is checked in initialize() and reconnect(), and since its arrays
+  // are reallocated when their precision changes, the pointers are updated
+  // before they are used
+  MELD *conn_source;
+  int shared_fail;
+  void checkSharedConnectivity();
+  int getSharedConnectivity();
+
+  // Node locations, gap between the distances to the (nn+1)-th and nn-th
+  // closest structural nodes of each aerodynamic node, and node counts at
+  // the last connectivity update. The locations and gaps are allocated by
+  // the first reconnect()
+  F2FScalar *conn_Xa, *conn_Xs;
+  double *conn_gap;
+  int conn_na, conn_ns;
+  void storeConnectivityMesh();
+
+  // Hashes of the structural nodes set on this processor and of the full
+  // structural mesh, and fingerprint of the meshes of the connectivity
+  uint64_t struct_hash_local, struct_hash;
+  uint64_t conn_fingerprint;
+  uint64_t computeFingerprint();
 
   // Parallel movement of structural vectors
   void distributeStructuralMesh();
@@ -109,8 +187,9 @@ class F2F_API MELDThermal : public TransferScheme {
   void distributeStructuralVector(F2FScalar *global, F2FScalar *local, int vars_per_node=3);
 
   // Auxiliary functions for creating connectivity and weighting
-  void setAeroStructConn(int *aerostruct_conn);
-  void computeWeights(F2FScalar *W);
+  void setAeroStructConn(int *aerostruct_conn, int nids=-1,
+                         const int *aero_ids=NULL);
+  void computeWeights(F2FScalar *W, int nids=-1, const int *aero_ids=NULL);
 };
 
 #endif //MELDTHERMAL_H
@@ -5,6 +5,11 @@
 
 /*
   A class implementing a matrix-based octree
+
+  The points are sorted by bin as the tree is divided, so each bin only visits
+  its own points and the points in each leaf bin are available as a list:
+  leaf_points[leaf_ptr[k]:leaf_ptr[k+1]] are the IDs of the points in leaf
+  bin leaf_bins[k]
 */
 class F2F_API Octree {
  public:
@@ -24,10 +29,16 @@ class F2F_API Octree {
   int *points_bins; // ID of bin that each point is in
   int nleaf; // number of leaf bins
   int *leaf_bins; // IDs of leaf bins
+  int *leaf_ptr; // pointer into leaf_points for each leaf bin
+  int *leaf_points; // IDs of the points sorted by leaf bin
 
  private:
-  // Recursive function used by initialize to create octree
-  bool divide(int bin_num);
+  // Recursive function used by initialize to create octree, the points in
+  // the bin are point_ids[start:end]
+  bool divide(int bin_num, int start, int end);
+
+  // Grow the bin arrays to hold at least one more bin
+  void extendBins();
 
   // Recursion exit conditions
   int min_points;
@@ -37,6 +48,10 @@ class F2F_API Octree {
   // Private tree data
   int npts;
   double *Xpts;
+  int max_bins; // allocated length of the bin arrays
+  int max_leaf; // allocated length of the leaf arrays
+  int *point_ids; // IDs of the points sorted by bin
+  int *work; // work array for sorting the points
 };
 
 #endif // OCTREE_H
@@ -11,6 +11,13 @@
   The basic algorithm and notation (names of variables) were taken from
   "Unified fluid–structure interpolation and mesh motion using radial basis
   functions" by T. C. S. Rendall and C. B. Allen.
+
+  The compactly supported Wendland C2 basis (WENDLAND_C2) vanishes beyond the
+  support radius, so the RBF and evaluation matrices are stored in sparse
+  (CSR) format instead of forming the dense na x nsub interpolation matrix.
+  The RBF matrix is factored once in initialize() within its envelope after a
+  reverse Cuthill-McKee reordering, so each transfer only needs sparse
+  mat-vecs and triangular solves
 */
 class F2F_API RBF : public TransferScheme {
  public:
@@ -18,17 +25,25 @@ class F2F_API RBF : public TransferScheme {
   enum RbfType {GAUSSIAN, 
                 MULTIQUADRIC, 
                 INVERSE_MULTIQUADRIC,
-                THIN_PLATE_SPLINE};
+                THIN_PLATE_SPLINE,
+                WENDLAND_C2};
 
   // Constructor
   RBF(MPI_Comm all,
       MPI_Comm structure, int struct_root,
       MPI_Comm aero, int aero_root,
-      enum RbfType rbf_type, int sampling_ratio);
+      enum RbfType rbf_type, int sampling_ratio,
+      double _support_radius=1.0, unsigned int _sampling_seed=0);
 
   // Destructor
   ~RBF();
 
+  // Select the centers greedily instead of sampling the octree leaf bins
+  void setGreedySampling(double tol, int max_centers);
+
+  // Names and sizes in bytes of the arrays allocated on this processor
+  int getMemoryUsage(const char **names=NULL, size_t *bytes=NULL);
+
   // Initialization
   void initialize();
 
@@ -57,19 +72,54 @@ class F2F_API RBF : public TransferScheme {
   // Function to build interpolation matrix
   void buildInterpolationMatrix();
 
+  // Compactly supported interpolation data
+  int compact; // flag for the sparse interpolation
+  double support_radius; // support radius of the compact basis
+  int npoly; // number of polynomial terms
+  int poly_dirs[3]; // coordinate directions of the linear polynomial terms
+  int *M_rowp, *M_cols; // CSR RBF matrix between the sampled points
+  F2FScalar *M_vals;
+  int *Aas_rowp, *Aas_cols; // CSR RBF evaluation at the aerodynamic nodes
+  F2FScalar *Aas_vals;
+  int *L_perm; // reverse Cuthill-McKee ordering of the sampled points
+  int *L_first; // first column of each row in the envelope of M
+  int *L_ptr; // offsets of the rows of the envelope
+  F2FScalar *L_vals, *L_diag; // LDL^{T} factors of the reordered M
+  F2FScalar *MinvPt; // M^{-1}*P^{T}
+  F2FScalar *Sp; // LU factors of P*M^{-1}*P^{T}
+  int *Sp_ipiv;
+
+  // Functions for the compactly supported interpolation
+  void buildSparseInterpolation();
+  void setPolynomialTerms(const F2FScalar *X, int n);
+  void evalPolynomial(const F2FScalar *x, F2FScalar *p);
+  void factorSparse();
+  void solveSparse(const F2FScalar *b, F2FScalar *x);
+  void solveInterpolation(const F2FScalar *br, const F2FScalar *bp,
+                          F2FScalar *xr, F2FScalar *xp);
+
   // Pointer to radial basis function
   F2FScalar (*phi)(F2FScalar *x, F2FScalar *y);
 
   // Sampling data
   int denominator; // one point sampled for every denominator points 
+  unsigned int sampling_seed; // seed for the random pick in each leaf bin
   int nsub; // number of structural points sampled
   int *sample_ids; // IDs of the sampled points
 
+  // Greedy center selection data
+  int greedy; // flag for greedy selection
+  double greedy_tol; // relative tolerance on the power function
+  int greedy_max; // maximum number of centers
+  void greedySample();
+
   // Functions defining types of radial basis functions
   static F2FScalar gaussian(F2FScalar *x, F2FScalar *y);
   static F2FScalar multiquadric(F2FScalar *x, F2FScalar *y);
   static F2FScalar invMultiquadric(F2FScalar *x, F2FScalar *y);
   static F2FScalar thinPlateSpline(F2FScalar *x, F2FScalar *y);
+  static F2FScalar wendlandC2(F2FScalar r);
+  F2FScalar evalBasis(F2FScalar *x, F2FScalar *y);
 
   // Function to write out point clouds for Tecplot visualization
   void writeCloudsToTecplot();
@@ -2,8 +2,13 @@
 #define TRANSFERSCHEME_H
 
 #include <complex>
+#include <stdint.h>
 #include "mpi.h"
 
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
 // Macro for DLL export on Windows
 #if defined(WIN32)
 #ifdef transfer_schemes_EXPORTS
@@ -64,11 +69,53 @@ F2F_API inline F2FComplex F2Ffabs( const F2FComplex& c ){
   return c;
 }
 
+/*
+  Shared-memory parallel loop over the aerodynamic nodes using the number of
+  threads set by setNumThreads(). Without OpenMP the loop runs serially
+*/
+#ifdef _OPENMP
+#define F2F_OMP_PARALLEL_FOR \
+  _Pragma("omp parallel for num_threads(nthreads) schedule(static)")
+#else
+#define F2F_OMP_PARALLEL_FOR
+#endif
+
+// Get the index of the calling thread within a parallel loop
+inline int F2FThreadNum(){
+#ifdef _OPENMP
+  return omp_get_thread_num();
+#else
+  return 0;
+#endif
+}
+
+/*
+  Number of aerodynamic nodes whose contributions to the linked structural
+  nodes are computed in parallel before they are added to a structural vector
+*/
+#define F2F_AERO_BLOCK_SIZE 256
+
+// Initial value of the hashes of the node locations
+#define F2F_HASH_OFFSET_BASIS 14695981039346656037ULL
+
 class F2F_API TransferScheme {
  public:
+  // Constructor
+  TransferScheme();
+
   // Destructor
   virtual ~TransferScheme();
 
+  // Number of shared-memory threads used for the aerodynamic node loops
+  void setNumThreads(int num_threads);
+  int getNumThreads(){ return nthreads; }
+
+  // Non-zero if the forward transfers use single precision data
+  int getSinglePrecision(){ return single_precision; }
+
+  // Names and sizes in bytes of the arrays allocated on this processor
+  virtual int getMemoryUsage(const char **names=NULL, size_t *bytes=NULL);
+
   // Mesh loading
   virtual void setAeroNodes(const F2FScalar *aero_X, int aero_nnodes);
   virtual void setStructNodes(const F2FScalar *struct_X, int struct_nnodes);
@@ -157,16 +204,64 @@ class F2F_API TransferScheme {
   F2FScalar *Us;
   int ns;
 
-  // Rigid transformation data
+  // Number of shared-memory threads
+  int nthreads;
+
+  // Flag for the forward-only transfers with single precision data. The
+  // double precision data needed by the Jacobian-vector products is not kept
+  int single_precision;
+  int checkDoublePrecision(const char *name, F2FScalar *prods, int size);
+
+  // Add an array to the memory usage report if it is allocated
+  static int addMemoryUsage(int n, const char *name, const void *ptr,
+                            size_t size, const char **names, size_t *bytes);
+
+  // Rigid transformation data. The centroid xa0bar of the aerodynamic nodes
+  // is recomputed when xa0bar_update is set after the nodes change
   F2FScalar Raero[9];
   F2FScalar Saero[9];
   F2FScalar xa0bar[3];
   F2FScalar xabar[3];
+  int xa0bar_update;
 
   // Parallel movement of aerodynamic vectors
   void collectAerodynamicVector(const F2FScalar *local, F2FScalar *global);
   void distributeAerodynamicVector(F2FScalar *global, F2FScalar *local);
 
+  // Number of structural nodes of each processor of global_comm and offsets
+  // of their nodes in the global image of the structural mesh, set when the
+  // structural nodes change. struct_ordered is non-zero if the offsets
+  // increase with the global rank
+  int *struct_counts, *struct_offsets;
+  int struct_ordered;
+  int setStructuralLayout(int ns_local);
+
+  // Parallel movement of structural vectors with the cached layout
+  void allgatherStructuralVector(const F2FScalar *local, F2FScalar *global,
+                                 int vars_per_node);
+  void reduceScatterStructuralVector(F2FScalar *global, F2FScalar *local,
+                                     int vars_per_node);
+
+  // Add the contributions of a block of aerodynamic nodes to the linked
+  // structural nodes in a fixed order
+  void addStructuralContributions(int nn, const int *conn, int i0, int i1,
+                                  const F2FScalar *contrib,
+                                  int vars_per_node, F2FScalar *global);
+
+  // Hash of the real part of node locations or other data, used to check
+  // that a saved connectivity matches the current meshes
+  static uint64_t hashData(const void *data, size_t size, uint64_t h);
+  static uint64_t hashNodes(const F2FScalar *X, int n, uint64_t h);
+  uint64_t gatherHash(uint64_t local_hash);
+
+  // Write or read the aerostructural connectivity, weights and gaps of the
+  // aerodynamic nodes on this processor
+  int writeConnectivityFile(const char *filename, uint64_t fingerprint,
+                            int nn, const int *conn, const F2FScalar *W,
+                            const double *gap);
+  int readConnectivityFile(const char *filename, uint64_t fingerprint,
+                           int nn, int *conn, F2FScalar *W, double *gap);
+
   // Auxiliary function for computing rotation from covariance matrix
   void computeRotation(const F2FScalar *H, F2FScalar *R, F2FScalar *S);
 
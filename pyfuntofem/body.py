@@ -138,6 +138,9 @@ class Body(Base):
         self.aero_temps  = None
         self.aero_heat_flux = None
 
+        # persistent coupling buffers, see get_buffer
+        self.buffers = {}
+
     def update_id(self, id):
         """
         **[model call]**
@@ -169,6 +172,40 @@ class Body(Base):
 
         super(Body, self).add_variable(vartype, var)
 
+    def get_buffer(self, name, shape, dtype):
+        """
+        **[driver call]**
+        Get a persistent work array of the body for the coupling variable or
+        temporary name. The array is allocated on the first call and only
+        reallocated when the shape or dtype changes, e.g. when the node counts
+        change. The contents are not zeroed when the array is reused.
+
+        Callers that keep an array beyond the current iteration must copy it,
+        since the next request for the same name writes into it in place.
+
+        Parameters
+        ----------
+        name: str
+            name of the buffer
+        shape: int or tuple
+            shape of the array
+        dtype: numpy dtype
+            type of the array entries, e.g. TransferScheme.dtype or TACS.dtype
+
+        Returns
+        -------
+        buf: numpy array
+            the buffer
+        """
+        shape = (shape,) if np.isscalar(shape) else tuple(shape)
+
+        buf = self.buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != np.dtype(dtype):
+            buf = np.zeros(shape, dtype=dtype)
+            self.buffers[name] = buf
+
+        return buf
+
     def collect_coordinate_derivatives(self, comm, discipline, root=0):
         """
         Write the sensitivity files for the aerodynamic and structural meshes on
@@ -211,7 +211,7 @@ class Cart3DInterface(SolverInterface):
                 with open(self.conv_hist_file, 'a') as f:
                     f.write("{0:22.15e} ".format(delta_u_rms))
 
-                self.uprev[body.id] = body.aero_disps
+                self.uprev[body.id] = body.aero_disps.copy()
 
         file_out = "Components{0:03d}.i.tri".format(step)
         WriteTri(verts, faces, comps, file_out)
@@ -25,6 +25,8 @@ from .funtofem_nlbgs_driver import *
 #from .funtofem_nlbgs_aerothermal_driver import *
 #from .funtofem_nlbgs_aerothermoelastic_driver import *
 from .funtofem_nlbgs_fsi_subiters_driver import *
+from .funtofem_newton_krylov_driver import *
+from .interface_accelerator import *
 from .pyopt_optimization import *
 
 # Solver interfaces
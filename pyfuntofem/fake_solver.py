@@ -179,11 +179,11 @@ class FakeSolver(SolverInterface):
                 if body.aero_nnodes > 0:
                     if body.transfer is not None:
                         self.force_save[scenario.id][ibody] = body.aero_loads
-                        self.disps_save[scenario.id][ibody] = body.aero_disps
+                        self.disps_save[scenario.id][ibody] = body.aero_disps.copy()
                     if body.thermal_transfer is not None:
                         self.heat_flux_save[scenario.id][ibody] = body.aero_heat_flux
                         self.heat_flux_mag_save[scenario.id][ibody] = body.aero_heat_flux_mag
-                        self.temps_save[scenario.id][ibody] = body.aero_temps
+                        self.temps_save[scenario.id][ibody] = body.aero_temps.copy()
 
     def set_states(self, scenario, bodies, step):
         for ibody, body in enumerate(bodies, 1):
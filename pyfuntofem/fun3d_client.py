@@ -559,7 +559,7 @@ class Fun3dClient(SolverInterface):
             for ibody, body in enumerate(bodies):
                 if body.aero_nnodes > 0:
                     self.force_save[scenario.id][ibody] = body.aero_loads
-                    self.disps_save[scenario.id][ibody] = body.aero_disps
+                    self.disps_save[scenario.id][ibody] = body.aero_disps.copy()
 
     def set_states(self,scenario,bodies,step):
         """
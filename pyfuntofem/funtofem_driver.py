@@ -121,6 +121,14 @@ class FUNtoFEMDriver(object):
         if type(transfer_options) is dict:
             transfer_options = len(self.model.bodies) * [ transfer_options ]
 
+        # Tolerance for updating the MELD connectivity of each body when the
+        # nodes move (None to keep the connectivity from the initialization)
+        self.reconnect_tol = len(self.model.bodies) * [ None ]
+
+        # Whether the thermal transfer of each body shares the connectivity
+        # of its displacement transfer
+        self.thermal_shared = len(self.model.bodies) * [ False ]
+
         for ibody, body in enumerate(self.model.bodies):
             body.transfer = None
             body.thermal_transfer = None
@@ -149,19 +157,34 @@ class FUNtoFEMDriver(object):
                             basis = TransferScheme.PY_MULTIQUADRIC
                         elif transfer_options[ibody]['basis function'].lower() == 'inverse multiquadric':
                             basis = TransferScheme.PY_INVERSE_MULTIQUADRIC
+                        elif transfer_options[ibody]['basis function'].lower() == 'wendland c2':
+                            basis = TransferScheme.PY_WENDLAND_C2
                         else:
                             print('Unknown RBF basis function for body number', ibody)
                             quit()
 
+                    support_radius = 1.0
+                    if 'support radius' in transfer_options[ibody]:
+                        support_radius = transfer_options[ibody]['support radius']
+
                     body.transfer = TransferScheme.pyRBF(self.comm, self.struct_comm,
                                                          self.struct_root, self.aero_comm,
-                                                         self.aero_root, basis, 1)
+                                                         self.aero_root, basis, 1,
+                                                         support_radius)
+
+                    # Greedy selection of the interpolation centers
+                    if ('greedy tol' in transfer_options[ibody] or
+                        'max centers' in transfer_options[ibody]):
+                        greedy_tol = transfer_options[ibody].get('greedy tol', 0.0)
+                        max_centers = transfer_options[ibody].get('max centers', 0)
+                        body.transfer.setGreedySampling(greedy_tol, max_centers)
 
                 elif transfer_options[ibody]['scheme'].lower() == 'meld':
                     # defaults
                     isym = -1 # No symmetry
                     beta = 0.5 # Decay factor
                     num_nearest = 200 # Number of nearest neighbours
+                    partitioned = 0 # Full structural mesh on every process
 
                     if 'isym' in transfer_options[ibody]:
                         isym = transfer_options[ibody]['isym']
@@ -169,20 +192,20 @@ class FUNtoFEMDriver(object):
                         beta = transfer_options[ibody]['beta']
                     if 'npts' in transfer_options[ibody]:
                         num_nearest = transfer_options[ibody]['npts']
+                    if 'partitioned' in transfer_options[ibody]:
+                        partitioned = int(transfer_options[ibody]['partitioned'])
 
                     body.transfer = TransferScheme.pyMELD(self.comm, self.struct_comm,
                                                           self.struct_root, self.aero_comm,
                                                           self.aero_root,
-                                                          isym, num_nearest, beta)
+                                                          isym, num_nearest, beta,
+                                                          partitioned)
 
                 elif transfer_options[ibody]['scheme'].lower() == 'linearized meld':
                     # defaults
-                    isym = -1
                     beta = 0.5
                     num_nearest = 200
 
-                    if 'isym' in transfer_options[ibody]:
-                        isym = transfer_options[ibody]['isym']
                     if 'beta' in transfer_options[ibody]:
                         beta = transfer_options[ibody]['beta']
                     if 'npts' in transfer_options[ibody]:
@@ -192,7 +215,7 @@ class FUNtoFEMDriver(object):
                     body.transfer = TransferScheme.pyLinearizedMELD(self.comm, self.struct_comm,
                                                                     self.struct_root, self.aero_comm,
                                                                     self.aero_root,
-                                                                    isym, num_nearest, beta)
+                                                                    num_nearest, beta)
 
                 elif transfer_options[ibody]['scheme'].lower()== 'beam':
                     conn = transfer_options[ibody]['conn']
@@ -210,6 +233,7 @@ class FUNtoFEMDriver(object):
                     quit()
 
             # Set up the transfer schemes based on the type of analysis set for this body
+            thermal_shared = False
             if body_analysis_type == 'aerothermal' or body_analysis_type == 'aerothermoelastic':
                 # Set up the load and displacement transfer schemes
 
@@ -230,10 +254,41 @@ class FUNtoFEMDriver(object):
                                                                          self.struct_root, self.aero_comm,
                                                                          self.aero_root,
                                                                          isym, num_nearest, beta)
+
+                    # Use the connectivity and weights of the MELD displacement
+                    # transfer when it connects the nodes with the same settings
+                    scheme = transfer_options[ibody].get('scheme', '').lower()
+                    if (body.transfer is not None and
+                        transfer_options[ibody].get('share connectivity', True) and
+                        ((scheme == 'meld' and
+                          not transfer_options[ibody].get('partitioned', False)) or
+                         (scheme == 'linearized meld' and isym == -1))):
+                        body.thermal_transfer.shareConnectivity(body.transfer)
+                        thermal_shared = True
+                        self.thermal_shared[ibody] = True
                 else:
                     print("Error: Unknown thermal transfer scheme for body", ibody)
                     quit()
 
+            # File the MELD connectivity is saved to and loaded from
+            conn_file = transfer_options[ibody].get('connectivity file', None)
+
+            # Update the connectivity of the MELD schemes when the nodes move
+            if 'reconnect' in transfer_options[ibody]:
+                self.reconnect_tol[ibody] = float(transfer_options[ibody]['reconnect'])
+
+            # Set the number of shared-memory threads used by the transfer schemes
+            if 'nthreads' in transfer_options[ibody]:
+                for transfer in [body.transfer, body.thermal_transfer]:
+                    if transfer is not None and hasattr(transfer, 'setNumThreads'):
+                        transfer.setNumThreads(transfer_options[ibody]['nthreads'])
+
+            # Store the MELD data in single precision for forward-only analysis
+            if transfer_options[ibody].get('single precision', False):
+                for transfer in [body.transfer, body.thermal_transfer]:
+                    if transfer is not None and hasattr(transfer, 'setSinglePrecision'):
+                        transfer.setSinglePrecision(True)
+
             # Load structural and aerodynamic meshes into FUNtoFEM
             # Only want real part for the initialization
             if body.transfer is not None:
@@ -259,7 +314,7 @@ class FUNtoFEMDriver(object):
                         body.aero_nnodes = 0
 
                 # Initialize FUNtoFEM
-                body.transfer.initialize()
+                self._initialize_connectivity(body.transfer, conn_file)
 
                 # Load structural and aerodynamic meshes into FUNtoFEM
                 if TransferScheme.dtype == np.complex128 or TransferScheme.dtype == complex:
@@ -296,7 +351,10 @@ class FUNtoFEMDriver(object):
                         body.aero_nnodes = 0
 
                 # Initialize FUNtoFEM
-                body.thermal_transfer.initialize()
+                thermal_conn_file = None
+                if conn_file is not None and not thermal_shared:
+                    thermal_conn_file = conn_file + '.thermal'
+                self._initialize_connectivity(body.thermal_transfer, thermal_conn_file)
 
                 # Load structural and aerodynamic meshes into FUNtoFEM
                 if TransferScheme.dtype == np.complex128 or TransferScheme.dtype == complex:
@@ -311,33 +369,80 @@ class FUNtoFEMDriver(object):
 
         return
 
-    def _update_transfer(self):
+    def _initialize_connectivity(self, transfer, conn_file):
+        """
+        Initialize a transfer scheme, loading its connectivity from a file
+        saved by a previous run when the meshes match
+
+        Parameters
+        ----------
+        transfer: transfer scheme object
+            the transfer scheme with the node locations set
+        conn_file: str or None
+            file the connectivity is loaded from, or saved to if it does not
+            exist or does not match the meshes
+        """
+        if conn_file is None or not hasattr(transfer, 'load'):
+            transfer.initialize()
+        elif not transfer.load(conn_file):
+            transfer.initialize()
+            transfer.save(conn_file)
+
+        return
+
+    def _update_transfer(self, reconnect=True):
         """
         Update the positions of the nodes in transfer schemes
+
+        Parameters
+        ----------
+        reconnect: bool
+            whether to update the connectivity of the schemes set up with a reconnect
+            tolerance, which is only needed once after the meshes change
         """
+        complex_run = (TransferScheme.dtype == np.complex128 or
+                       TransferScheme.dtype == complex)
+
         self.struct_disps = []
         self.struct_temps = []
-        for body in self.model.bodies:
-            if body.transfer is not None:
-                if self.struct_comm != MPI.COMM_NULL:
-                    body.transfer.setStructNodes(body.struct_X)
-                else:
-                    body.struct_nnodes = 0
-                if self.aero_comm != MPI.COMM_NULL:
-                    body.transfer.setAeroNodes(body.aero_X)
-                else:
-                    body.aero_nnodes = 0
+        for ibody, body in enumerate(self.model.bodies):
+            reconnect_tol = None
+            if reconnect and hasattr(self, 'reconnect_tol'):
+                reconnect_tol = self.reconnect_tol[ibody]
+
+            for transfer in [body.transfer, body.thermal_transfer]:
+                if transfer is None:
+                    continue
+
+                # A thermal scheme that shares the connectivity of the
+                # displacement transfer picks up its update
+                update = (reconnect_tol is not None and hasattr(transfer, 'reconnect') and
+                          not (transfer is body.thermal_transfer and
+                               self.thermal_shared[ibody]))
+
+                # Update the connectivity with the real part of the node
+                # locations, as in the initialization
+                if update and complex_run:
+                    if self.struct_comm != MPI.COMM_NULL:
+                        transfer.setStructNodes(np.array(body.struct_X.real,
+                                                         dtype=TransferScheme.dtype))
+                    if self.aero_comm != MPI.COMM_NULL:
+                        transfer.setAeroNodes(np.array(body.aero_X.real,
+                                                       dtype=TransferScheme.dtype))
+                    transfer.reconnect(reconnect_tol)
 
-            if body.thermal_transfer is not None:
                 if self.struct_comm != MPI.COMM_NULL:
-                    body.thermal_transfer.setStructNodes(body.struct_X)
+                    transfer.setStructNodes(body.struct_X)
                 else:
                     body.struct_nnodes = 0
                 if self.aero_comm != MPI.COMM_NULL:
-                    body.thermal_transfer.setAeroNodes(body.aero_X)
+                    transfer.setAeroNodes(body.aero_X)
                 else:
                     body.aero_nnodes = 0
 
+                if update and not complex_run:
+                    transfer.reconnect(reconnect_tol)
+
     def solve_forward(self, steps=None):
         """
         Solves the coupled forward problem
@@ -356,7 +461,7 @@ class FUNtoFEMDriver(object):
             body.update_shape(complex_run)
 
         # loop over the forward problem for the different scenarios
-        for scenario in self.model.scenarios:
+        for iscenario, scenario in enumerate(self.model.scenarios):
 
             # tell the solvers what the variable values and functions are for this scenario
             if not self.fakemodel:
@@ -369,8 +474,10 @@ class FUNtoFEMDriver(object):
                 if self.comm.Get_rank() == 0:
                     print("Fail flag return during initialization")
 
-            # Update transfer postions to the initial conditions
-            self._update_transfer()
+            # Update transfer postions to the initial conditions. The scenarios
+            # share the meshes of the design, so the connectivity is only
+            # updated for the first one
+            self._update_transfer(reconnect=(iscenario == 0))
 
             if scenario.steady:
                 fail = self._solve_steady_forward(scenario,steps)
@@ -404,6 +511,15 @@ class FUNtoFEMDriver(object):
             print("Aborting: attempting to run FUNtoFEM adjoint with no functions defined")
             quit()
 
+        # The Jacobian-vector products are not available with single precision transfers
+        for body in self.model.bodies:
+            for transfer in [body.transfer, body.thermal_transfer]:
+                if transfer is not None and not transfer.hasJacobianProducts():
+                    if self.comm.Get_rank() == 0:
+                        print("FUNtoFEM adjoint is not available with the 'single precision'",
+                              "transfer option, which is for forward-only analysis")
+                    return 1
+
         # Set the functions into the solvers
         for scenario in self.model.scenarios:
             # tell the solvers what the variable values and functions are for this scenario
@@ -495,29 +611,99 @@ class FUNtoFEMDriver(object):
             for body in self.model.bodies:
                 if body.transfer:
                     # Aerodynamic coordinate derivatives
-                    temp = np.zeros((3*body.aero_nnodes), dtype=TransferScheme.dtype)
+                    temp = body.get_buffer('aero_shape_temp', 3*body.aero_nnodes,
+                                           TransferScheme.dtype)
                     for func in range(nfunctions):
                         # Load transfer term
-                        body.transfer.applydLdxA0(body.psi_L[:, func].copy(order='C'), temp)
-                        body.aero_shape_term[:,func] += temp.copy()
+                        body.transfer.applydLdxA0(body.psi_L[:, func], temp)
+                        body.aero_shape_term[:,func] += temp
 
                         # Displacement transfer term
-                        body.transfer.applydDdxA0(body.psi_D[:, func].copy(order='C'), temp)
-                        body.aero_shape_term[:,func] += temp.copy()
+                        body.transfer.applydDdxA0(body.psi_D[:, func], temp)
+                        body.aero_shape_term[:,func] += temp
 
                     # Structural coordinate derivatives
-                    temp = np.zeros(body.struct_nnodes*body.xfer_ndof, dtype=TransferScheme.dtype)
+                    temp = body.get_buffer('struct_shape_temp', body.struct_nnodes*body.xfer_ndof,
+                                           TransferScheme.dtype)
                     for func in range(nfunctions):
                         # Load transfer term
-                        body.transfer.applydLdxS0(body.psi_L[:, func].copy(order='C'), temp)
-                        body.struct_shape_term[:,func] += temp.copy()
+                        body.transfer.applydLdxS0(body.psi_L[:, func], temp)
+                        body.struct_shape_term[:,func] += temp
 
                         # Displacement transfer term
-                        body.transfer.applydDdxS0(body.psi_D[:, func].copy(order='C'), temp)
-                        body.struct_shape_term[:,func] += temp.copy()
+                        body.transfer.applydDdxS0(body.psi_D[:, func], temp)
+                        body.struct_shape_term[:,func] += temp
+
+        return
+
+    def _get_interface_state(self):
+        """
+        Stack the structural displacements and temperatures of all the bodies on this
+        processor into the interface vector of the coupling accelerator
+
+        Returns
+        -------
+        x: ndarray
+            interface vector
+        fields: ndarray
+            field number of each entry, 0 for the displacements and 1 for the temperatures
+        """
+        x = []
+        fields = []
+        for body in self.model.bodies:
+            if body.transfer is not None and body.struct_nnodes > 0:
+                x.append(np.asarray(body.struct_disps))
+                fields.append(np.zeros(x[-1].size, dtype=int))
+            if body.thermal_transfer is not None and body.struct_nnodes > 0:
+                x.append(np.asarray(body.struct_temps))
+                fields.append(np.ones(x[-1].size, dtype=int))
+
+        if len(x) == 0:
+            return np.zeros(0, dtype=TransferScheme.dtype), np.zeros(0, dtype=int)
+        return np.concatenate(x), np.concatenate(fields)
+
+    def _set_interface_state(self, x):
+        """
+        Set the structural displacements and temperatures of all the bodies on this processor
+        from the interface vector of the coupling accelerator. The values are copied into the
+        existing arrays so that references held by the solvers stay current
+
+        Parameters
+        ----------
+        x: ndarray
+            interface vector
+        """
+        offset = 0
+        for body in self.model.bodies:
+            if body.transfer is not None and body.struct_nnodes > 0:
+                size = np.asarray(body.struct_disps).size
+                body.struct_disps[:] = x[offset:offset+size]
+                offset += size
+            if body.thermal_transfer is not None and body.struct_nnodes > 0:
+                size = np.asarray(body.struct_temps).size
+                body.struct_temps[:] = x[offset:offset+size]
+                offset += size
 
         return
 
+    def _accelerate(self):
+        """
+        Update the structural displacements and temperatures of all the bodies with the
+        coupling accelerator in place of the Aitken under-relaxation
+
+        Returns
+        -------
+        res: ndarray
+            squared norms of the displacement and temperature updates on this processor
+        """
+        xt, fields = self._get_interface_state()
+        r = np.real(xt - self.accelerator.x)
+        res = np.array([np.sum(r[fields == 0]**2), np.sum(r[fields == 1]**2)])
+
+        self._set_interface_state(self.accelerator.update(xt))
+
+        return res
+
     def _solve_steady_forward(self, scenario, steps):
         return 1
 
@@ -0,0 +1,489 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from __future__ import print_function
+
+import numpy as np
+from mpi4py import MPI
+from funtofem import TransferScheme
+from .funtofem_nlbgs_driver import FUNtoFEMnlbgs
+
+class FUNtoFEMnewtonKrylov(FUNtoFEMnlbgs):
+    def __init__(self, solvers, comm, struct_comm, struct_root,
+                 aero_comm, aero_root, transfer_options=None, model=None,
+                 krylov_rtol=1e-2, krylov_subspace=30, fd_step=1e-7):
+        """
+        The FUNtoFEM driver for the Jacobian-free Newton-Krylov solution of the steady
+        coupled problem and the GMRES solution of its coupled adjoint.
+
+        One pass of the displacement and temperature transfers, flow solver, load and heat flux
+        transfers and structural solver maps the structural displacements and temperatures x of
+        all the bodies to G(x). The forward analysis solves the interface residual
+        R(x) = G(x) - x = 0 with Newton's method, where each Newton update is computed with GMRES
+        from finite difference directional derivatives of G. The adjoint analysis solves the
+        linear system whose fixed-point iteration is the linear block Gauss-Seidel adjoint with
+        GMRES, one adjoint sweep per Krylov iteration.
+
+        Both solves assume that each call of the solvers' iterate() and iterate_adjoint()
+        returns the response to its inputs, i.e. the disciplinary solves are converged within
+        a call. The unsteady analyses use the NLBGS algorithm.
+
+        Parameters
+        ----------
+        solvers: dict
+           the various disciplinary solvers
+        comm: MPI.comm
+            MPI communicator
+        transfer_options: dict
+            options of the load and displacement transfer scheme
+        model: :class:`~funtofem_model.FUNtoFEMmodel`
+            The model containing the design data
+        krylov_rtol: float
+            relative tolerance of the GMRES solve of each Newton update
+        krylov_subspace: int
+            maximum number of GMRES iterations of each Newton update, and the restart length of
+            the adjoint GMRES solve
+        fd_step: float
+            relative step size of the finite difference directional derivatives
+        """
+
+        super(FUNtoFEMnewtonKrylov,self).__init__(solvers, comm, struct_comm, struct_root,
+                                                  aero_comm, aero_root,
+                                                  transfer_options=transfer_options, model=model)
+
+        # Newton-Krylov settings
+        self.krylov_rtol = krylov_rtol
+        self.krylov_subspace = krylov_subspace
+        self.fd_step = fd_step
+
+    def _solve_steady_forward(self, scenario, steps=None):
+        """
+        Solve the aerothermoelastic forward analysis using the Jacobian-free Newton-Krylov
+        algorithm.
+
+        The norms of the displacement and temperature parts of the interface residual
+        G(x) - x are stored in scenario.residuals, starting with the initial state. The Newton
+        iterations stop once both norms are below the scenario's atol, or rtol times their
+        initial values.
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        steps: int
+            Maximum number of Newton iterations if not set by the model
+        """
+
+        fail = 0
+
+        # Determine if we're using the scenario's number of steps or the argument
+        if steps is None:
+            if self.model:
+                steps = scenario.steps
+            else:
+                if self.comm.Get_rank()==0:
+                    print("No number of steps given for the coupled problem. Using default (1000)")
+                steps = 1000
+
+        # Convergence tolerances of the interface residual
+        atol = getattr(scenario, 'atol', 0.0)
+        rtol = getattr(scenario, 'rtol', 0.0)
+        scenario.residuals = []
+
+        # Evaluate the interface residual at the initial structural state
+        x, fields = self._get_interface_state()
+        fail, g = self._evaluate_interface_map(scenario, x, 1)
+        if fail != 0:
+            return fail
+
+        for step in range(1, steps+1):
+            r = g - x
+            res = self._field_norms(r, fields)
+            scenario.residuals.append(res)
+
+            if atol > 0.0 or rtol > 0.0:
+                if np.all(res <= np.maximum(atol, rtol*scenario.residuals[0])):
+                    if self.comm.Get_rank() == 0:
+                        print('Newton-Krylov converged in', step-1, 'iterations')
+                    break
+
+            # Solve (dG/dx - I)*dx = -r for the Newton update with finite difference products
+            h = self.fd_step*(1.0 + _norms(self.comm, x[:, np.newaxis])[0])
+
+            def matvec(v):
+                vnorm = _norms(self.comm, v)[0]
+                if vnorm == 0.0:
+                    return -v
+                eps = h/vnorm
+                fail, gp = self._evaluate_interface_map(scenario, x + eps*v[:, 0], step)
+                if fail != 0:
+                    return None
+                return ((gp - g)/eps)[:, np.newaxis] - v
+
+            tol = self.krylov_rtol*_norms(self.comm, r[:, np.newaxis])
+            dx, niter = _gmres(self.comm, matvec, -r[:, np.newaxis], tol, self.krylov_subspace)
+            if dx is None:
+                return 1
+
+            # Evaluate the interface residual at the updated state
+            x = x + dx[:, 0]
+            fail, g = self._evaluate_interface_map(scenario, x, step)
+            if fail != 0:
+                return fail
+
+        # Keep the latest structural solution and transfer it to the aerodynamic surface
+        self._set_interface_state(g)
+        for body in self.model.bodies:
+            if body.transfer is not None:
+                body.aero_disps = body.get_buffer('aero_disps', 3*body.aero_nnodes,
+                                                  TransferScheme.dtype)
+                body.transfer.transferDisps(body.struct_disps, body.aero_disps)
+
+            if body.thermal_transfer is not None:
+                body.aero_temps = body.get_buffer('aero_temps', body.aero_nnodes,
+                                                  TransferScheme.dtype)
+                body.thermal_transfer.transferTemp(body.struct_temps, body.aero_temps)
+
+        return fail
+
+    def _evaluate_interface_map(self, scenario, x, step):
+        """
+        Evaluate G(x) with one pass of the transfers and the flow and structural solvers from
+        the structural displacements and temperatures x
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        x: ndarray
+            interface vector on this processor
+        step: int
+            iteration number passed to the solvers
+
+        Returns
+        -------
+        fail: int
+            fail flag of the solvers
+        xt: ndarray
+            structural displacements and temperatures computed by the structural solver
+        """
+        self._set_interface_state(x)
+
+        # Transfer displacements and temperatures
+        for body in self.model.bodies:
+            if body.transfer is not None:
+                body.aero_disps = body.get_buffer('aero_disps', 3*body.aero_nnodes,
+                                                  TransferScheme.dtype)
+                body.transfer.transferDisps(body.struct_disps, body.aero_disps)
+
+            if body.thermal_transfer is not None:
+                body.aero_temps = body.get_buffer('aero_temps', body.aero_nnodes,
+                                                  TransferScheme.dtype)
+                body.thermal_transfer.transferTemp(body.struct_temps, body.aero_temps)
+
+        # Take a step in the flow solver
+        fail = self.solvers['flow'].iterate(scenario, self.model.bodies, step)
+
+        fail = self.comm.allreduce(fail)
+        if fail != 0:
+            if self.comm.Get_rank() == 0:
+                print('Flow solver returned fail flag')
+            return fail, None
+
+        # Transfer the loads and heat flux
+        for body in self.model.bodies:
+            if body.transfer is not None:
+                body.struct_loads = body.get_buffer('struct_loads', body.struct_nnodes*body.xfer_ndof,
+                                                    TransferScheme.dtype)
+                body.transfer.transferLoads(body.aero_loads, body.struct_loads)
+
+            if body.thermal_transfer is not None:
+                body.struct_heat_flux = body.get_buffer('struct_heat_flux', body.struct_nnodes,
+                                                        TransferScheme.dtype)
+                heat_flux_magnitude = body.aero_heat_flux_mag[:]
+                body.thermal_transfer.transferFlux(heat_flux_magnitude,
+                                                   body.struct_heat_flux)
+
+        # Take a step in the FEM model
+        fail = self.solvers['structural'].iterate(scenario, self.model.bodies, step)
+
+        fail = self.comm.allreduce(fail)
+        if fail != 0:
+            if self.comm.Get_rank() == 0:
+                print('Structural solver returned fail flag')
+            return fail, None
+
+        return 0, self._get_interface_state()[0]
+
+    def _field_norms(self, r, fields):
+        """
+        Norms of the displacement and temperature parts of an interface vector
+        """
+        r = np.real(r)
+        res = np.array([np.sum(r[fields == 0]**2), np.sum(r[fields == 1]**2)])
+        self.comm.Allreduce(MPI.IN_PLACE, res, op=MPI.SUM)
+
+        return np.sqrt(res)
+
+    def _solve_steady_adjoint(self, scenario):
+        """
+        Solve the aerothermoelastic adjoint analysis with GMRES.
+
+        A sweep of the linear block Gauss-Seidel adjoint maps the structural adjoint variables
+        psi_S and psi_T_S of all the functions to F(psi) = A*psi + b. The coupled adjoint
+        (I - A)*psi = b is solved with GMRES for every function at once, where each iteration
+        takes one sweep.
+
+        The norms of the psi_S and psi_T_S parts of b and of the change over the final sweep
+        are stored in scenario.adjoint_residuals. The GMRES iterations of a function stop once
+        its residual is below the scenario's atol, or rtol times the norm of its b, and the
+        solve takes at most the scenario's steps sweeps.
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        """
+
+        fail = 0
+        steps = scenario.steps
+
+        # Load the current state
+        for body in self.model.bodies:
+            if body.transfer is not None:
+                aero_disps = body.get_buffer('lin_aero_disps', body.aero_disps.size,
+                                             TransferScheme.dtype)
+                body.transfer.transferDisps(body.struct_disps, aero_disps)
+
+                struct_loads = body.get_buffer('lin_struct_loads', body.struct_loads.size,
+                                               TransferScheme.dtype)
+                body.transfer.transferLoads(body.aero_loads, struct_loads)
+
+        # Initialize the adjoint variables
+        nfunctions = scenario.count_adjoint_functions()
+        self._initialize_adjoint_variables(scenario, self.model.bodies)
+
+        atol = getattr(scenario, 'atol', 0.0)
+        rtol = getattr(scenario, 'rtol', 0.0)
+        scenario.adjoint_residuals = []
+        scenario.adjoint_active = np.ones(nfunctions, dtype=bool)
+        active = scenario.adjoint_active
+
+        # The right-hand side is the sweep from zero adjoint variables
+        psi0, fields = self._get_adjoint_state(nfunctions)
+        fail = self._iterate_adjoint_sweep(scenario, 1, active)
+        if fail != 0:
+            return fail
+        b = self._get_adjoint_state(nfunctions)[0]
+        scenario.adjoint_residuals.append(self._adjoint_field_norms(b - psi0, fields))
+
+        sweeps = [1]
+        def matvec(v):
+            sweeps[0] += 1
+            self._set_adjoint_state(v)
+            fail = self._iterate_adjoint_sweep(scenario, sweeps[0], active)
+            if fail != 0:
+                return None
+            return v - (self._get_adjoint_state(nfunctions)[0] - b)
+
+        tol = np.maximum(atol, rtol*_norms(self.comm, b))
+        psi, niter = _gmres(self.comm, matvec, b, tol, max(steps-2, 0),
+                            restart=self.krylov_subspace)
+        if psi is None:
+            return 1
+
+        # Sweep from the solution so that the adjoint variables of the transfers and solvers
+        # are consistent with it
+        self._set_adjoint_state(psi)
+        fail = self._iterate_adjoint_sweep(scenario, sweeps[0]+1, active)
+        if fail != 0:
+            return fail
+        res = self._adjoint_field_norms(self._get_adjoint_state(nfunctions)[0] - psi, fields)
+        scenario.adjoint_residuals.append(res)
+
+        if atol > 0.0 or rtol > 0.0:
+            if np.all(np.sqrt(np.sum(res**2, axis=1)) <= tol):
+                if self.comm.Get_rank() == 0:
+                    print('Adjoint GMRES converged in', niter, 'iterations')
+
+        self._extract_coordinate_derivatives(scenario, self.model.bodies, steps)
+        return 0
+
+    def _get_adjoint_state(self, nfunctions):
+        """
+        Stack the structural adjoint variables psi_S and psi_T_S of all the bodies on this
+        processor, one column per function
+
+        Parameters
+        ----------
+        nfunctions: int
+            number of adjoint functions
+
+        Returns
+        -------
+        psi: ndarray
+            stacked adjoint variables
+        fields: ndarray
+            field number of each row, 0 for psi_S and 1 for psi_T_S
+        """
+        psi = []
+        fields = []
+        for body in self.model.bodies:
+            if body.transfer is not None and body.struct_nnodes > 0:
+                psi.append(np.asarray(body.psi_S))
+                fields.append(np.zeros(psi[-1].shape[0], dtype=int))
+            if body.thermal_transfer is not None and body.struct_nnodes > 0:
+                psi.append(np.asarray(body.psi_T_S))
+                fields.append(np.ones(psi[-1].shape[0], dtype=int))
+
+        if len(psi) == 0:
+            return (np.zeros((0, nfunctions), dtype=TransferScheme.dtype),
+                    np.zeros(0, dtype=int))
+        return np.vstack(psi), np.concatenate(fields)
+
+    def _set_adjoint_state(self, psi):
+        """
+        Set the structural adjoint variables psi_S and psi_T_S of all the bodies on this
+        processor from the stacked adjoint variables
+        """
+        offset = 0
+        for body in self.model.bodies:
+            if body.transfer is not None and body.struct_nnodes > 0:
+                size = body.psi_S.shape[0]
+                body.psi_S[:] = psi[offset:offset+size]
+                offset += size
+            if body.thermal_transfer is not None and body.struct_nnodes > 0:
+                size = body.psi_T_S.shape[0]
+                body.psi_T_S[:] = psi[offset:offset+size]
+                offset += size
+
+        return
+
+    def _adjoint_field_norms(self, r, fields):
+        """
+        Norms of the psi_S and psi_T_S parts of each function's column of stacked adjoint
+        variables
+        """
+        r = np.real(r)
+        res = np.zeros((r.shape[1], 2))
+        res[:, 0] = np.sum(r[fields == 0]**2, axis=0)
+        res[:, 1] = np.sum(r[fields == 1]**2, axis=0)
+        self.comm.Allreduce(MPI.IN_PLACE, res, op=MPI.SUM)
+
+        return np.sqrt(res)
+
+def _dots(comm, a, b):
+    """
+    Inner products of the columns of two distributed arrays
+    """
+    d = np.sum(np.conj(a)*b, axis=0)
+    comm.Allreduce(MPI.IN_PLACE, d, op=MPI.SUM)
+    return d
+
+def _norms(comm, a):
+    """
+    Norms of the columns of a distributed array
+    """
+    d = np.sum(np.abs(a)**2, axis=0)
+    comm.Allreduce(MPI.IN_PLACE, d, op=MPI.SUM)
+    return np.sqrt(d)
+
+def _gmres(comm, matvec, b, tol, maxiter, restart=None):
+    """
+    Solve A*x = b for each column of b with restarted GMRES from a zero initial guess. The
+    Arnoldi iterations of the columns share the products with A, and the rows of the vectors
+    may be distributed over the processors of comm
+
+    Parameters
+    ----------
+    comm: MPI.comm
+        communicator of the processors that hold rows of the vectors
+    matvec: function
+        product of A with an array of columns, or None if the product failed
+    b: ndarray
+        right-hand sides, one column per system
+    tol: ndarray
+        absolute tolerance on the residual norm of each column
+    maxiter: int
+        maximum number of products with A
+    restart: int
+        number of iterations between restarts, or None for no restarts
+
+    Returns
+    -------
+    x: ndarray
+        solution, or None if a product failed
+    niter: int
+        number of products with A
+    """
+    if restart is None:
+        restart = maxiter
+
+    ncols = b.shape[1]
+    x = np.zeros(b.shape, dtype=np.result_type(b, TransferScheme.dtype))
+    r = b
+    niter = 0
+    while True:
+        beta = _norms(comm, r)
+        if np.all(beta <= tol) or niter >= maxiter:
+            return x, niter
+
+        # Arnoldi iterations with modified Gram-Schmidt
+        m = min(restart, maxiter - niter)
+        V = [r/np.where(beta > 0.0, beta, 1.0)]
+        H = np.zeros((m+1, m, ncols), dtype=x.dtype)
+        for k in range(m):
+            w = matvec(V[k])
+            niter += 1
+            if w is None:
+                return None, niter
+
+            for j in range(k+1):
+                H[j, k] = _dots(comm, V[j], w)
+                w = w - V[j]*H[j, k]
+            hnorm = _norms(comm, w)
+            H[k+1, k] = hnorm
+            V.append(w/np.where(hnorm > 0.0, hnorm, 1.0))
+
+            # Minimize the residual of each column over the Krylov subspace
+            y = np.zeros((k+1, ncols), dtype=x.dtype)
+            res = np.zeros(ncols)
+            for c in range(ncols):
+                g = np.zeros(k+2, dtype=x.dtype)
+                g[0] = beta[c]
+                y[:, c] = np.linalg.lstsq(H[:k+2, :k+1, c], g, rcond=None)[0]
+                res[c] = np.linalg.norm(H[:k+2, :k+1, c].dot(y[:, c]) - g)
+
+            if np.all(res <= tol) or np.all(hnorm == 0.0):
+                break
+
+        for j in range(y.shape[0]):
+            x = x + V[j]*y[j]
+
+        if np.all(res <= tol) or np.all(hnorm == 0.0) or niter >= maxiter:
+            return x, niter
+
+        # Restart from the true residual
+        w = matvec(x)
+        niter += 1
+        if w is None:
+            return None, niter
+        r = b - w
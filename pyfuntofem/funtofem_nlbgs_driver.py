@@ -33,7 +33,7 @@ except:
 class FUNtoFEMnlbgs(FUNtoFEMDriver):
     def __init__(self, solvers, comm, struct_comm, struct_root,
                  aero_comm, aero_root, transfer_options=None, model=None,
-                 theta_init=0.125, theta_min=0.01, theta_max=1.0):
+                 theta_init=0.125, theta_min=0.01, theta_max=1.0, accelerator=None):
         """
         The FUNtoFEM driver for the Nonlinear Block Gauss-Seidel
         solvers for steady and unsteady coupled adjoint.
@@ -52,6 +52,9 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
             Initial value of theta for the Aitken under-relaxation
         theta_min: float
             Minimum value of theta for the Aitken under-relaxation
+        accelerator: :class:`~interface_accelerator.IQNILS`
+            Accelerator of the forward coupling iterations used in place of the Aitken
+            under-relaxation, or None for Aitken
         """
 
         super(FUNtoFEMnlbgs,self).__init__(solvers, comm, struct_comm, struct_root, aero_comm,
@@ -70,6 +73,9 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
         self.up_prev = None
         self.therm_up_prev = None
 
+        # Interface quasi-Newton or other coupling accelerator
+        self.accelerator = accelerator
+
     def _initialize_adjoint_variables(self, scenario, bodies):
         """
         Initialize the adjoint variables
@@ -130,6 +136,11 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
         Solve the aerothermoelastic forward analysis using the nonlinear block Gauss-Seidel algorithm.
         Aitken under-relaxation for stabilty.
 
+        The norms of the coupling residual, the change in the structural displacements and
+        temperatures over an iteration before the under-relaxation, are stored in
+        scenario.residuals. The iterations stop early once both norms are below the scenario's
+        atol, or rtol times their values at the first iteration.
+
         Parameters
         ----------
         scenario: :class:`~scenario.Scenario`
@@ -150,18 +161,27 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                     print("No number of steps given for the coupled problem. Using default (1000)")
                 steps = 1000
 
+        # Convergence tolerances of the coupling residual
+        atol = getattr(scenario, 'atol', 0.0)
+        rtol = getattr(scenario, 'rtol', 0.0)
+        scenario.residuals = []
+
+        # Start the accelerator from the current structural state
+        if self.accelerator is not None:
+            self.accelerator.reset(*self._get_interface_state())
+
         # Loop over the NLBGS steps
         for step in range(1, steps+1):
             # Transfer displacements and temperatures
             for body in self.model.bodies:
                 if body.transfer is not None:
-                    body.aero_disps = np.zeros(3*body.aero_nnodes,
-                                               dtype=TransferScheme.dtype)
+                    body.aero_disps = body.get_buffer('aero_disps', 3*body.aero_nnodes,
+                                                      TransferScheme.dtype)
                     body.transfer.transferDisps(body.struct_disps, body.aero_disps)
 
                 if body.thermal_transfer is not None:
-                    body.aero_temps = np.zeros(body.aero_nnodes,
-                                               dtype=TransferScheme.dtype)
+                    body.aero_temps = body.get_buffer('aero_temps', body.aero_nnodes,
+                                                      TransferScheme.dtype)
                     body.thermal_transfer.transferTemp(body.struct_temps, body.aero_temps)
 
             # Take a step in the flow solver
@@ -176,13 +196,13 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
             # Transfer the loads and heat flux
             for body in self.model.bodies:
                 if body.transfer is not None:
-                    body.struct_loads = np.zeros(body.struct_nnodes*body.xfer_ndof,
-                                                 dtype=TransferScheme.dtype)
+                    body.struct_loads = body.get_buffer('struct_loads', body.struct_nnodes*body.xfer_ndof,
+                                                        TransferScheme.dtype)
                     body.transfer.transferLoads(body.aero_loads, body.struct_loads)
 
                 if body.thermal_transfer is not None:
-                    body.struct_heat_flux = np.zeros(body.struct_nnodes,
-                                                     dtype=TransferScheme.dtype)
+                    body.struct_heat_flux = body.get_buffer('struct_heat_flux', body.struct_nnodes,
+                                                            TransferScheme.dtype)
                     # FUN3D returns x,y,z, and magnitude of the surface normal heat flux
                     # only need magnitude for TACS
                     heat_flux_magnitude = body.aero_heat_flux_mag[:]
@@ -198,21 +218,35 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                     print('Structural solver returned fail flag')
                 return fail
 
-            # Under-relaxation for solver stability
-            self._aitken_relax()
+            # Under-relaxation or acceleration for solver stability
+            if self.accelerator is not None:
+                res = self._accelerate()
+            else:
+                res = self._aitken_relax()
 
             # Transfer displacements and temperatures
             for body in self.model.bodies:
                 if body.transfer is not None:
-                    body.aero_disps = np.zeros(body.aero_nnodes*3,
-                                               dtype=TransferScheme.dtype)
+                    body.aero_disps = body.get_buffer('aero_disps', 3*body.aero_nnodes,
+                                                      TransferScheme.dtype)
                     body.transfer.transferDisps(body.struct_disps, body.aero_disps)
 
                 if body.thermal_transfer is not None:
-                    body.aero_temps = np.zeros(body.aero_nnodes,
-                                               dtype=TransferScheme.dtype)
+                    body.aero_temps = body.get_buffer('aero_temps', body.aero_nnodes,
+                                                      TransferScheme.dtype)
                     body.thermal_transfer.transferTemp(body.struct_temps, body.aero_temps)
 
+            # Check the convergence of the displacement and temperature residuals
+            self.comm.Allreduce(MPI.IN_PLACE, res, op=MPI.SUM)
+            res = np.sqrt(res)
+            scenario.residuals.append(res)
+
+            if atol > 0.0 or rtol > 0.0:
+                if np.all(res <= np.maximum(atol, rtol*scenario.residuals[0])):
+                    if self.comm.Get_rank() == 0:
+                        print('NLBGS converged in', step, 'iterations')
+                    break
+
         # end solve loop
         return fail
 
@@ -221,6 +255,13 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
         Solve the aeroelastic adjoint analysis using the linear block Gauss-Seidel algorithm.
         Aitken under-relaxation for stabilty.
 
+        The adjoint residual of each function, the change in its structural adjoint variables
+        psi_S and psi_T_S over an iteration before the under-relaxation, is stored in
+        scenario.adjoint_residuals. Once both norms of a function are below the scenario's atol,
+        or rtol times their values at the first iteration, its adjoint variables are frozen and
+        it is dropped from scenario.adjoint_active, so that the transfer products skip it and
+        the solvers may skip it. The iterations stop when every function has converged.
+
         Parameters
         ----------
         scenario: :class:`~scenario.Scenario`
@@ -236,94 +277,155 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
         # Load the current state
         for body in self.model.bodies:
             if body.transfer is not None:
-                aero_disps = np.zeros(body.aero_disps.size,
-                                      dtype=TransferScheme.dtype)
+                aero_disps = body.get_buffer('lin_aero_disps', body.aero_disps.size,
+                                             TransferScheme.dtype)
                 body.transfer.transferDisps(body.struct_disps, aero_disps)
 
-                struct_loads = np.zeros(body.struct_loads.size,
-                                        dtype=TransferScheme.dtype)
+                struct_loads = body.get_buffer('lin_struct_loads', body.struct_loads.size,
+                                               TransferScheme.dtype)
                 body.transfer.transferLoads(body.aero_loads, struct_loads)
 
         # Initialize the adjoint variables
         nfunctions = scenario.count_adjoint_functions()
         self._initialize_adjoint_variables(scenario, self.model.bodies)
 
+        # Convergence tolerances of the adjoint residuals and the functions still iterated
+        atol = getattr(scenario, 'atol', 0.0)
+        rtol = getattr(scenario, 'rtol', 0.0)
+        scenario.adjoint_residuals = []
+        scenario.adjoint_active = np.ones(nfunctions, dtype=bool)
+        active = scenario.adjoint_active
+
         # loop over the adjoint NLBGS solver
         for step in range(1, steps+1):
-            # Get force and heat flux terms for the flow solver
-            for body in self.model.bodies:
-                for func in range(nfunctions):
+            fail = self._iterate_adjoint_sweep(scenario, step, active)
+            if fail != 0:
+                return fail
 
-                    if body.transfer is not None:
-                        # Transform load transfer adjoint variables using transpose Jacobian from
-                        # funtofem: dLdfA^T * psi_L = dDdus * psi_S
-                        psi_L_r = np.zeros(body.aero_nnodes*3,
-                                           dtype=TransferScheme.dtype)
-                        body.transfer.applydDduS(body.psi_S[:, func].copy(order='C'), psi_L_r)
-                        body.dLdfa[:,func] = psi_L_r
+            res = self._aitken_adjoint_relax(scenario)
 
-                    if body.thermal_transfer is not None:
-                        # Transform heat flux transfer adjoint variables using transpose Jacobian from
-                        # funtofem: dQdftA^T * psi_Q = dTdts * psi_Q
-                        psi_Q_r = np.zeros(body.aero_nnodes,
-                                           dtype=TransferScheme.dtype)
-                        body.thermal_transfer.applydQdqATrans(body.psi_T_S[:, func].copy(order='C'), psi_Q_r)
+            # Check the convergence of the adjoint residuals of each function
+            res = np.sqrt(res)
+            scenario.adjoint_residuals.append(res)
 
-                        # Only set heat flux magnitude component of thermal adjoint in FUN3D
-                        # Can either use surface normal magnitude OR x,y,z components, not both
-                        body.dQdfta[:, func] = psi_Q_r
+            if atol > 0.0 or rtol > 0.0:
+                tol = np.maximum(atol, rtol*scenario.adjoint_residuals[0])
+                active &= np.any(res > tol, axis=1)
+                if not np.any(active):
+                    if self.comm.Get_rank() == 0:
+                        print('Adjoint LBGS converged in', step, 'iterations')
+                    break
 
-            # Iterate over the aerodynamic adjoint
-            fail = self.solvers['flow'].iterate_adjoint(scenario, self.model.bodies, step)
+        # end of solve loop
 
-            fail = self.comm.allreduce(fail)
-            if fail != 0:
-                if self.comm.Get_rank() == 0:
-                    print('Flow solver returned fail flag')
-                return fail
+        self._extract_coordinate_derivatives(scenario, self.model.bodies, steps)
+        return 0
 
-            # Get the structural adjoint rhs
-            for body in self.model.bodies:
-                for func in range(nfunctions):
-
-                    if body.transfer is not None:
-                        # calculate dDdu_s^T * psi_D
-                        psi_D_product = np.zeros(body.struct_nnodes*body.xfer_ndof,
-                                                 dtype=TransferScheme.dtype)
-                        body.psi_D = - body.dGdua
-                        body.transfer.applydDduSTrans(body.psi_D[:, func].copy(order='C'), psi_D_product)
-
-                        # calculate dLdu_s^T * psi_L
-                        psi_L_product = np.zeros(body.struct_nnodes*body.xfer_ndof,
-                                                 dtype=TransferScheme.dtype)
-                        body.transfer.applydLduSTrans(body.psi_L[:, func].copy(order='C'), psi_L_product)
-                        # structural elastic rhs
-                        body.struct_rhs[:,func] = -psi_D_product - psi_L_product
-
-                    if body.thermal_transfer is not None:
-                        # calculate dTdt_s^T * psi_T
-                        psi_T_product = np.zeros(body.struct_nnodes*body.therm_xfer_ndof,
-                                                 dtype=TransferScheme.dtype)
-                        body.psi_T = body.dAdta
-                        body.thermal_transfer.applydTdtSTrans(body.psi_T[:, func].copy(order='C'), psi_T_product)
-                        body.struct_rhs_T[:,func] = psi_T_product
+    def _iterate_adjoint_sweep(self, scenario, step, active):
+        """
+        One linear block Gauss-Seidel sweep of the steady adjoint: the aerodynamic adjoint
+        from the current structural adjoint variables psi_S and psi_T_S, then the structural
+        adjoint, which overwrites psi_S and psi_T_S
 
-            # take a step in the structural adjoint
-            fail = self.solvers['structural'].iterate_adjoint(scenario, self.model.bodies, step)
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        step: int
+            adjoint iteration number
+        active: ndarray
+            boolean flags of the functions that are still iterated
 
-            fail = self.comm.allreduce(fail)
-            if fail != 0:
-                if self.comm.Get_rank() == 0:
-                    print('Structural solver returned fail flag')
-                return fail
+        Returns
+        -------
+        fail: int
+            fail flag of the solvers
+        """
+        # Get force and heat flux terms for the flow solver
+        for body in self.model.bodies:
+            if body.transfer is not None:
+                # Transform load transfer adjoint variables using transpose Jacobian from
+                # funtofem: dLdfA^T * psi_L = dDdus * psi_S
+                self._apply_active_block(body.transfer.applydDduSBlock, body.psi_S,
+                                         body.dLdfa, active)
 
-            self._aitken_adjoint_relax(scenario)
+            if body.thermal_transfer is not None:
+                # Transform heat flux transfer adjoint variables using transpose Jacobian from
+                # funtofem: dQdftA^T * psi_Q = dTdts * psi_Q
+                # Only set heat flux magnitude component of thermal adjoint in FUN3D
+                # Can either use surface normal magnitude OR x,y,z components, not both
+                self._apply_active_block(body.thermal_transfer.applydQdqATransBlock,
+                                         body.psi_T_S, body.dQdfta, active)
 
-        # end of solve loop
+        # Iterate over the aerodynamic adjoint
+        fail = self.solvers['flow'].iterate_adjoint(scenario, self.model.bodies, step)
+
+        fail = self.comm.allreduce(fail)
+        if fail != 0:
+            if self.comm.Get_rank() == 0:
+                print('Flow solver returned fail flag')
+            return fail
+
+        # Get the structural adjoint rhs
+        for body in self.model.bodies:
+            if body.transfer is not None:
+                # calculate dDdu_s^T * psi_D
+                psi_D_product = body.get_buffer('psi_D_product', body.struct_rhs.shape,
+                                                TransferScheme.dtype)
+                np.negative(body.dGdua, out=body.psi_D)
+                self._apply_active_block(body.transfer.applydDduSTransBlock, body.psi_D,
+                                         psi_D_product, active)
+
+                # calculate dLdu_s^T * psi_L
+                psi_L_product = body.get_buffer('psi_L_product', body.struct_rhs.shape,
+                                                TransferScheme.dtype)
+                self._apply_active_block(body.transfer.applydLduSTransBlock, body.psi_L,
+                                         psi_L_product, active)
+                # structural elastic rhs
+                np.add(psi_D_product, psi_L_product, out=body.struct_rhs)
+                np.negative(body.struct_rhs, out=body.struct_rhs)
+
+            if body.thermal_transfer is not None:
+                # calculate dTdt_s^T * psi_T
+                body.psi_T = body.dAdta
+                self._apply_active_block(body.thermal_transfer.applydTdtSTransBlock,
+                                         body.psi_T, body.struct_rhs_T, active)
+
+        # take a step in the structural adjoint
+        fail = self.solvers['structural'].iterate_adjoint(scenario, self.model.bodies, step)
+
+        fail = self.comm.allreduce(fail)
+        if fail != 0:
+            if self.comm.Get_rank() == 0:
+                print('Structural solver returned fail flag')
+            return fail
 
-        self._extract_coordinate_derivatives(scenario, self.model.bodies, steps)
         return 0
 
+    def _apply_active_block(self, product, vecs, prods, active):
+        """
+        Apply a block Jacobian-vector product of a transfer scheme to the columns of the
+        functions whose adjoint has not converged. The columns of the converged functions
+        in prods are left unchanged
+
+        Parameters
+        ----------
+        product: method
+            block Jacobian-vector product of the transfer scheme
+        vecs: ndarray
+            input vectors, one column per function
+        prods: ndarray
+            output products, one column per function
+        active: ndarray
+            boolean flags of the functions that are still iterated
+        """
+        if np.all(active):
+            product(vecs, prods)
+        elif np.any(active):
+            product(vecs, prods, np.flatnonzero(active))
+
+        return
+
     def _solve_unsteady_forward(self,scenario,steps=None):
         """
         This function solves the unsteady forward problem using NLBGS without FSI subiterations
@@ -356,19 +458,23 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
             for body in self.model.bodies:
 
                 if body.transfer is not None:
-                    body.aero_disps = np.zeros(body.aero_nnodes*3,dtype=TransferScheme.dtype)
+                    body.aero_disps = body.get_buffer('aero_disps', 3*body.aero_nnodes,
+                                                      TransferScheme.dtype)
                     body.transfer.transferDisps(body.struct_disps, body.aero_disps)
 
                 if body.thermal_transfer is not None:
-                    body.aero_temps = np.zeros(body.aero_nnodes, dtype=TransferScheme.dtype)
+                    body.aero_temps = body.get_buffer('aero_temps', body.aero_nnodes,
+                                                      TransferScheme.dtype)
                     body.thermal_transfer.transferTemp(body.struct_temps, body.aero_temps)
 
                 if ('rigid'  in body.motion_type and
                     'deform' in body.motion_type):
-                    rotation = np.zeros(9, dtype=TransferScheme.dtype)
-                    translation = np.zeros(3, dtype=TransferScheme.dtype)
-                    u = np.zeros(body.aero_nnodes*3, dtype=TransferScheme.dtype)
-                    body.rigid_transform = np.zeros((4,4), dtype=TransferScheme.dtype)
+                    rotation = body.get_buffer('rotation', 9, TransferScheme.dtype)
+                    translation = body.get_buffer('translation', 3, TransferScheme.dtype)
+                    u = body.get_buffer('elastic_aero_disps', 3*body.aero_nnodes,
+                                        TransferScheme.dtype)
+                    body.rigid_transform = body.get_buffer('rigid_transform', (4, 4),
+                                                           TransferScheme.dtype)
 
                     body.transfer.transformEquivRigidMotion(body.aero_disps, rotation, translation, u)
 
@@ -376,7 +482,7 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                     body.rigid_transform[:3, 3] = translation
                     body.rigid_transform[-1,-1] = 1.0
 
-                    body.aero_disps = u.copy()
+                    body.aero_disps = u
 
                 elif('rigid' in body.motion_type):
                     transform = self.solvers['structural'].get_rigid_transform(body)
@@ -394,12 +500,14 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
             for body in self.model.bodies:
 
                 if body.transfer is not None:
-                    body.struct_loads = np.zeros(body.struct_nnodes*body.xfer_ndof, dtype=TransferScheme.dtype)
+                    body.struct_loads = body.get_buffer('struct_loads', body.struct_nnodes*body.xfer_ndof,
+                                                        TransferScheme.dtype)
                     body.transfer.transferLoads(body.aero_loads, body.struct_loads)
 
                 if body.thermal_transfer is not None:
-                    body.struct_heat_flux = np.zeros(body.struct_nnodes, dtype=TransferScheme.dtype)
-                    heat_flux_magnitude = body.aero_heat_flux[3::4].copy(order='C')
+                    body.struct_heat_flux = body.get_buffer('struct_heat_flux', body.struct_nnodes,
+                                                            TransferScheme.dtype)
+                    heat_flux_magnitude = body.aero_heat_flux[3::4]
                     body.thermal_transfer.transferFlux(heat_flux_magnitude, body.struct_heat_flux)
 
             # Take a step in the FEM model
@@ -454,18 +562,22 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                 if body.transfer is not None:
 
 
-                    body.aero_disps = np.zeros(body.aero_nnodes*3,dtype=TransferScheme.dtype)
+                    body.aero_disps = body.get_buffer('aero_disps', 3*body.aero_nnodes,
+                                                      TransferScheme.dtype)
                     body.transfer.transferDisps(body.struct_disps,body.aero_disps)
 
-                    struct_loads = np.zeros(body.struct_nnodes*body.xfer_ndof,dtype=TransferScheme.dtype)
+                    struct_loads = body.get_buffer('lin_struct_loads', body.struct_nnodes*body.xfer_ndof,
+                                                   TransferScheme.dtype)
                     body.transfer.transferLoads(body.aero_loads,struct_loads)
 
                 if 'rigid'  in body.motion_type and 'deform' in body.motion_type:
-                    rotation = np.zeros(9, dtype=TransferScheme.dtype)
-                    translation = np.zeros(3, dtype=TransferScheme.dtype)
-                    u = np.zeros(body.aero_nnodes*3, dtype=TransferScheme.dtype)
+                    rotation = body.get_buffer('rotation', 9, TransferScheme.dtype)
+                    translation = body.get_buffer('translation', 3, TransferScheme.dtype)
+                    u = body.get_buffer('elastic_aero_disps', 3*body.aero_nnodes,
+                                        TransferScheme.dtype)
 
-                    body.rigid_transform = np.zeros((4, 4), dtype=TransferScheme.dtype)
+                    body.rigid_transform = body.get_buffer('rigid_transform', (4, 4),
+                                                           TransferScheme.dtype)
 
                     body.transfer.transformEquivRigidMotion(body.aero_disps, rotation, translation, u)
 
@@ -473,8 +585,8 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                     body.rigid_transform[:3, 3] = translation
                     body.rigid_transform[-1,-1] = 1.0
 
-                    body.global_aero_disps = body.aero_disps[:]
-                    body.aero_disps = u.copy()
+                    body.global_aero_disps = body.aero_disps
+                    body.aero_disps = u
 
             # take a step in the structural adjoint
             fail = self.solvers['structural'].iterate_adjoint(scenario, self.model.bodies, step)
@@ -487,20 +599,15 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
 
             # Get load and heat flux terms for the flow solver
             for body in self.model.bodies:
-                for func in range(nfunctions):
-                    if body.transfer is not None:
-                        # Transform load transfer adjoint variables using transpose Jacobian from
-                        # funtofem: dLdfA^T * psi_L
-                        psi_L_r = np.zeros(body.aero_nnodes*3, dtype=TransferScheme.dtype)
-                        body.transfer.applydDduS(body.psi_S[:, func].copy(order='C'), psi_L_r)
-                        body.dLdfa[:,func] = psi_L_r
-
-                    if body.thermal_transfer is not None:
-                        # Transform heat flux transfer adjoint variables using transpose Jacobian from
-                        # funtofem: dQdftA^T * psi_Q = dTdts * psi_Q
-                        psi_Q_r = np.zeros(body.aero_nnodes, dtype=TransferScheme.dtype)
-                        body.thermal_transfer.applydQdqATrans(body.psi_T_S[:, func].copy(order='C'), psi_Q_r)
-                        body.dQdfta[:, func] = psi_Q_r
+                if body.transfer is not None:
+                    # Transform load transfer adjoint variables using transpose Jacobian from
+                    # funtofem: dLdfA^T * psi_L
+                    body.transfer.applydDduSBlock(body.psi_S, body.dLdfa)
+
+                if body.thermal_transfer is not None:
+                    # Transform heat flux transfer adjoint variables using transpose Jacobian from
+                    # funtofem: dQdftA^T * psi_Q = dTdts * psi_Q
+                    body.thermal_transfer.applydQdqATransBlock(body.psi_T_S, body.dQdfta)
 
             fail = self.solvers['flow'].iterate_adjoint(scenario, self.model.bodies, step)
 
@@ -519,7 +626,8 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                             body.psi_D[:,func] = - body.dGdua[:,func]
                         elif 'rigid' in body.motion_type and 'deform' in body.motion_type:
                             # solve the elastic deformation adjoint
-                            psi_E = np.zeros(body.aero_nnodes*3,dtype=TransferScheme.dtype)
+                            psi_E = body.get_buffer('psi_E', 3*body.aero_nnodes,
+                                                    TransferScheme.dtype)
                             tmt = np.linalg.inv(np.transpose(body.rigid_transform))
                             for node in range(body.aero_nnodes):
                                 for i in range(3):
@@ -529,7 +637,8 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                                                        + tmt[i,3])
 
                             # get the product dE/dT^T psi_E
-                            dEdTmat = np.zeros((3,4),dtype=TransferScheme.dtype)
+                            dEdTmat = body.get_buffer('dEdTmat', (3, 4), TransferScheme.dtype)
+                            dEdTmat[:] = 0.0
 
                             for n in range(body.aero_nnodes):
                                 for i in range(3):
@@ -544,40 +653,38 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                             dEdT = self.comm.allreduce(dEdT)
 
                             # solve the rigid transform adjoint
-                            psi_R = np.zeros(12,dtype=TransferScheme.dtype)
                             dGdT_func = body.dGdT[:,:,func]
                             dGdT = dGdT_func[:3,:4].flatten(order='F')
 
                             psi_R = -dGdT - dEdT
 
                             # now solve the displacement adjoint
-                            dRduA = np.zeros(3*body.aero_nnodes,dtype=TransferScheme.dtype)
+                            dRduA = body.get_buffer('dRduA', 3*body.aero_nnodes,
+                                                    TransferScheme.dtype)
                             body.transfer.applydRduATrans(psi_R, dRduA)
 
-                            body.psi_D[:,func] = - psi_E - dRduA
+                            np.add(psi_E, dRduA, out=body.psi_D[:,func])
+                            np.negative(body.psi_D[:,func], out=body.psi_D[:,func])
 
                 # form the RHS for the structural adjoint equation on the next reverse step
-                for func in range(nfunctions):
-
-                    if body.transfer is not None:
-                        # calculate dDdu_s^T * psi_D
-                        psi_D_product = np.zeros(body.struct_nnodes*body.xfer_ndof,
-                                                 dtype=TransferScheme.dtype)
-                        body.transfer.applydDduSTrans(body.psi_D[:,func].copy(order='C'), psi_D_product)
-
-                        # calculate dLdu_s^T * psi_L
-                        psi_L_product = np.zeros(body.struct_nnodes*body.xfer_ndof,
-                                                 dtype=TransferScheme.dtype)
-                        body.transfer.applydLduSTrans(body.psi_L[:,func].copy(order='C'), psi_L_product)
-                        body.struct_rhs[:,func] = -psi_D_product - psi_L_product
-
-                    if body.thermal_transfer is not None:
-                        # calculate dTdt_s^T * psi_T
-                        psi_T_product = np.zeros(body.struct_nnodes*body.therm_xfer_ndof,
-                                                 dtype=TransferScheme.dtype)
-                        body.psi_T = body.dAdta
-                        body.thermal_transfer.applydTdtSTrans(body.psi_T[:, func].copy(order='C'), psi_T_product)
-                        body.struct_rhs_T[:,func] = -psi_T_product
+                if body.transfer is not None:
+                    # calculate dDdu_s^T * psi_D
+                    psi_D_product = body.get_buffer('psi_D_product', body.struct_rhs.shape,
+                                                    TransferScheme.dtype)
+                    body.transfer.applydDduSTransBlock(body.psi_D, psi_D_product)
+
+                    # calculate dLdu_s^T * psi_L
+                    psi_L_product = body.get_buffer('psi_L_product', body.struct_rhs.shape,
+                                                    TransferScheme.dtype)
+                    body.transfer.applydLduSTransBlock(body.psi_L, psi_L_product)
+                    np.add(psi_D_product, psi_L_product, out=body.struct_rhs)
+                    np.negative(body.struct_rhs, out=body.struct_rhs)
+
+                if body.thermal_transfer is not None:
+                    # calculate dTdt_s^T * psi_T
+                    body.psi_T = body.dAdta
+                    body.thermal_transfer.applydTdtSTransBlock(body.psi_T, body.struct_rhs_T)
+                    np.negative(body.struct_rhs_T, out=body.struct_rhs_T)
 
             # extract and accumulate coordinate derivative every step
             self._extract_coordinate_derivatives(scenario, self.model.bodies, step)
@@ -608,7 +715,12 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
         """
         Solves the aitken relaxation
 
+        Returns
+        -------
+        res: ndarray
+            squared norms of the displacement and temperature updates on this processor
         """
+        res = np.zeros(2)
 
         if self.aitken_init:
             self.aitken_init = False
@@ -643,6 +755,7 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
             if body.transfer is not None:
                 if body.struct_nnodes > 0:
                     up = body.struct_disps - self.aitken_vec[ibody]
+                    res[0] += np.linalg.norm(np.real(up))**2
                     norm2 = (np.linalg.norm(up - self.up_prev[ibody])**2.0)
 
                     # Only update theta if the displacements changed
@@ -661,6 +774,7 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
             if body.thermal_transfer is not None:
                 if body.struct_nnodes > 0:
                     up = body.struct_temps - self.aitken_therm_vec[ibody]
+                    res[1] += np.linalg.norm(np.real(up))**2
                     norm2 = (np.linalg.norm(up - self.therm_up_prev[ibody])**2.0)
 
                     # Only update theta if the displacements changed
@@ -676,10 +790,24 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                     self.therm_up_prev[ibody] = up[:]
                     body.struct_temps = self.aitken_therm_vec[ibody]
 
-        return
+        return res
 
     def _aitken_adjoint_relax(self,scenario):
+        """
+        Solves the aitken relaxation of the structural adjoint variables. The adjoint
+        variables of the functions that are not in scenario.adjoint_active are kept fixed
+
+        The relaxation state of each body is stored with one column per function, and the
+        thetas of all the bodies and functions are computed from a single reduction of their
+        dot products over the processors
+
+        Returns
+        -------
+        res: ndarray
+            squared norms of the psi_S and psi_T_S updates of each function over all processors
+        """
         nfunctions =  scenario.count_adjoint_functions()
+        active = getattr(scenario, 'adjoint_active', np.ones(nfunctions, dtype=bool))
         if self.aitken_init:
             self.aitken_init = False
 
@@ -693,62 +821,70 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
             self.aitken_therm_vec = []
             self.theta_therm = []
 
-            for ibody, body in enumerate(self.model.bodies):
+            for body in self.model.bodies:
                 if body.transfer is not None:
-                    up_prev_body = []
-                    aitken_vec_body = []
-                    theta_body = []
-                    for func in range(nfunctions):
-                        up_prev_body.append(np.zeros(body.struct_nnodes*body.xfer_ndof,
-                                                     dtype=TransferScheme.dtype))
-                        aitken_vec_body.append(np.zeros(body.struct_nnodes*body.xfer_ndof,
-                                                        dtype=TransferScheme.dtype))
-                        theta_body.append(self.theta_init)
-                    self.up_prev.append(up_prev_body)
-                    self.aitken_vec.append(aitken_vec_body)
-                    self.theta.append(theta_body)
+                    shape = (body.struct_nnodes*body.xfer_ndof, nfunctions)
+                    self.up_prev.append(np.zeros(shape, dtype=TransferScheme.dtype))
+                    self.aitken_vec.append(np.zeros(shape, dtype=TransferScheme.dtype))
+                    self.theta.append(self.theta_init*np.ones(nfunctions,
+                                                              dtype=TransferScheme.dtype))
+                else:
+                    self.up_prev.append(None)
+                    self.aitken_vec.append(None)
+                    self.theta.append(None)
 
                 if body.thermal_transfer is not None:
-                    up_prev_body = []
-                    aitken_therm_vec_body = []
-                    theta_body = []
-                    for func in range(nfunctions):
-                        up_prev_body.append(body.T_ref*np.ones(body.struct_nnodes*body.therm_xfer_ndof,
-                                                               dtype=TransferScheme.dtype))
-                        aitken_therm_vec_body.append(body.T_ref*np.ones(body.struct_nnodes*body.therm_xfer_ndof,
-                                                                        dtype=TransferScheme.dtype))
-                        theta_body.append(self.theta_therm_init)
-                    self.therm_up_prev.append(up_prev_body)
-                    self.aitken_therm_vec.append(aitken_therm_vec_body)
-                    self.theta_therm.append(theta_body)
-
-        # do the Aitken update
+                    shape = (body.struct_nnodes*body.therm_xfer_ndof, nfunctions)
+                    self.therm_up_prev.append(body.T_ref*np.ones(shape, dtype=TransferScheme.dtype))
+                    self.aitken_therm_vec.append(body.T_ref*np.ones(shape, dtype=TransferScheme.dtype))
+                    self.theta_therm.append(self.theta_therm_init*np.ones(nfunctions,
+                                                                          dtype=TransferScheme.dtype))
+                else:
+                    self.therm_up_prev.append(None)
+                    self.aitken_therm_vec.append(None)
+                    self.theta_therm.append(None)
+
+        fields = [('psi_S', self.aitken_vec, self.up_prev, self.theta),
+                  ('psi_T_S', self.aitken_therm_vec, self.therm_up_prev, self.theta_therm)]
+
+        # Compute the updates of the active functions and the sums (up - up_prev)^T*up,
+        # ||up - up_prev||^2 and ||up||^2 of each body, field and function
+        sums = np.zeros((len(self.model.bodies), 2, 3, nfunctions), dtype=TransferScheme.dtype)
+        updates = []
         for ibody, body in enumerate(self.model.bodies):
-            if body.struct_nnodes > 0:
-                if body.transfer is not None:
-                    for func in range(nfunctions):
-                        up = body.psi_S[:,func] - self.aitken_vec[ibody][func]
-                        norm2 = np.linalg.norm(up - self.up_prev[ibody][func])**2.0
+            for field, (name, aitken_vec, up_prev, theta) in enumerate(fields):
+                if aitken_vec[ibody] is None:
+                    continue
 
-                        # Only update theta if the vector changed
-                        if norm2 > 1e-13:
-                            self.theta[ibody][func] *= 1.0 - (up - self.up_prev[ibody][func]).dot(up)/np.linalg.norm(up - self.up_prev[ibody][func])**2.0
-                            self.theta[ibody][func] = np.max((np.min((self.theta[ibody][func],self.theta_max)),self.theta_min))
-                        self.aitken_vec[ibody][func] += self.theta[ibody][func] * up
-                        self.up_prev[ibody][func] =up[:]
-                        body.psi_S[:,func] = self.aitken_vec[ibody][func][:]
+                up = getattr(body, name)[:, active] - aitken_vec[ibody][:, active]
+                dup = up - up_prev[ibody][:, active]
+                sums[ibody, field, 0, active] = np.sum(dup*up, axis=0)
+                sums[ibody, field, 1, active] = np.sum(np.abs(dup)**2, axis=0)
+                sums[ibody, field, 2, active] = np.sum(np.real(up)**2, axis=0)
+                updates.append((ibody, field, up))
 
-                if body.thermal_transfer is not None:
-                    for func in range(nfunctions):
-                        up = body.psi_T_S[:,func] - self.aitken_therm_vec[ibody][func]
-                        norm2 = np.linalg.norm(up - self.therm_up_prev[ibody][func])**2.0
+        self.comm.Allreduce(MPI.IN_PLACE, sums, op=MPI.SUM)
+
+        # do the Aitken update
+        for ibody, field, up in updates:
+            name, aitken_vec, up_prev, theta = fields[field]
+            num = sums[ibody, field, 0, active]
+            norm2 = np.real(sums[ibody, field, 1, active])
+
+            # Only update theta if the vector changed
+            th = theta[ibody][active]
+            changed = norm2 > 1e-13
+            th = np.where(changed, th*(1.0 - num/np.where(changed, norm2, 1.0)), th)
+            th = np.where(np.real(th) > self.theta_max, self.theta_max, th)
+            th = np.where(np.real(th) < self.theta_min, self.theta_min, th)
+            theta[ibody][active] = th
+
+            aitken_vec[ibody][:, active] += th*up
+            up_prev[ibody][:, active] = up
 
-                        # Only update theta if the vector changed
-                        if norm2 > 1e-13:
-                            self.theta_therm[ibody][func] *= 1.0 - (up - self.therm_up_prev[ibody][func]).dot(up)/np.linalg.norm(up - self.therm_up_prev[ibody][func])**2.0
-                            self.theta_therm[ibody][func] = np.max((np.min((self.theta_therm[ibody][func],self.theta_max)),self.theta_min))
-                        self.aitken_therm_vec[ibody][func] += self.theta_therm[ibody][func] * up
-                        self.therm_up_prev[ibody][func] =up[:]
-                        body.psi_T_S[:,func] = self.aitken_therm_vec[ibody][func][:]
+        for ibody, body in enumerate(self.model.bodies):
+            for name, aitken_vec, up_prev, theta in fields:
+                if aitken_vec[ibody] is not None:
+                    getattr(body, name)[:] = aitken_vec[ibody]
 
-        return
+        return np.real(np.sum(sums[:, :, 2, :], axis=0)).T
@@ -26,7 +26,7 @@ from .funtofem_driver import *
 
 class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
     def __init__(self,solvers,comm,struct_comm,struct_master,aero_comm,aero_master,transfer_options=None,model=None,
-                 theta_init=0.125,theta_min=0.01,fsi_subiters=1):
+                 theta_init=0.125,theta_min=0.01,fsi_subiters=1,accelerator=None):
         """
         The FUNtoFEM driver for the Nonlinear Block Gauss-Seidel solvers for steady and unsteady coupled adjoint.
 
@@ -44,6 +44,12 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
             Initial value of theta for the Aitken under-relaxation
         theta_min: float
             Minimum value of theta for the Aitken under-relaxation
+        fsi_subiters: int
+            Number of FSI subiterations of each time step
+        accelerator: :class:`~interface_accelerator.IQNILS`
+            Accelerator of the steady coupling iterations, used in place of the Aitken
+            under-relaxation, and of the FSI subiterations of each time step, or None. The
+            displacements of every subiteration are updated, including the last one
         """
 
         super(FUNtoFEMnlbgsFSISubiters,self).__init__(solvers,comm,struct_comm,struct_master,aero_comm,aero_master,transfer_options=transfer_options,model=model)
@@ -58,6 +64,9 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
         self.aitken_vec = None
         self.up_prev = None
 
+        # Interface quasi-Newton or other coupling accelerator
+        self.accelerator = accelerator
+
     def _initialize_adjoint_variables(self,scenario,bodies):
         """
         Initialize the adjoint variables
@@ -116,6 +125,10 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
                     print("No number of steps given for the coupled problem. Using default (1000)")
                 steps = 1000
 
+        # Start the accelerator from the current structural state
+        if self.accelerator is not None:
+            self.accelerator.reset(*self._get_interface_state())
+
         # Loop over the NLBGS steps
         for step in range(1,steps+1):
 
@@ -125,7 +138,8 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
 
             # Transfer the loads
             for body in self.model.bodies:
-                body.struct_loads = np.zeros(body.struct_nnodes*body.xfer_ndof,dtype=TransferScheme.dtype)
+                body.struct_loads = body.get_buffer('struct_loads', body.struct_nnodes*body.xfer_ndof,
+                                                    TransferScheme.dtype)
                 if body.transfer:
                     body.transfer.transferLoads(body.aero_loads, body.struct_loads)
 
@@ -134,13 +148,17 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
             if fail != 0:
                 return fail
 
-            # Under-relaxation for solver stability
-            self._aitken_relax()
+            # Under-relaxation or acceleration for solver stability
+            if self.accelerator is not None:
+                self._accelerate()
+            else:
+                self._aitken_relax()
 
             # Transfer displacements
             for body in self.model.bodies:
                 if body.transfer:
-                    body.aero_disps = np.zeros(body.aero_nnodes*3,dtype=TransferScheme.dtype)
+                    body.aero_disps = body.get_buffer('aero_disps', 3*body.aero_nnodes,
+                                                      TransferScheme.dtype)
                     body.transfer.transferDisps(body.struct_disps, body.aero_disps)
 
         # end solve loop
@@ -168,10 +186,12 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
         # Load the current state
         for body in self.model.bodies:
             if body.transfer:
-                aero_disps   = np.zeros(body.aero_disps.size,dtype=TransferScheme.dtype)
+                aero_disps = body.get_buffer('lin_aero_disps', body.aero_disps.size,
+                                             TransferScheme.dtype)
                 body.transfer.transferDisps(body.struct_disps, aero_disps)
 
-                struct_loads = np.zeros(body.struct_loads.size,dtype=TransferScheme.dtype)
+                struct_loads = body.get_buffer('lin_struct_loads', body.struct_loads.size,
+                                               TransferScheme.dtype)
                 body.transfer.transferLoads(body.aero_loads, struct_loads)
 
         # Initialize the adjoint variables
@@ -182,16 +202,13 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
         for step in range(1,steps+1):
             # Get psi_F for the flow solver
             for body in self.model.bodies:
-                for func in range(nfunctions):
-                    # 'Solve' for load transfer adjoint variables
-                    body.psi_L[:,func] = body.psi_S[:,func]
+                # 'Solve' for load transfer adjoint variables
+                body.psi_L[:, :nfunctions] = body.psi_S[:, :nfunctions]
 
-                    # Transform load transfer adjoint variables using transpose Jacobian from
-                    # funtofem: psi_F = dLdfA^T * psi_L
-                    if body.transfer:
-                        psi_F_r = np.zeros(body.aero_nnodes*3,dtype=TransferScheme.dtype)
-                        body.transfer.applydDduS(body.psi_L[:, func].copy(order='C'), psi_F_r)
-                        body.psi_F[:,func] = psi_F_r
+                # Transform load transfer adjoint variables using transpose Jacobian from
+                # funtofem: psi_F = dLdfA^T * psi_L
+                if body.transfer:
+                    body.transfer.applydDduSBlock(body.psi_L[:, :nfunctions], body.psi_F[:, :nfunctions])
 
             fail = self.solvers['flow'].iterate_adjoint(scenario,self.model.bodies,step)
             if fail != 0:
@@ -199,19 +216,20 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
 
             # Get the structural adjoint rhs
             for body in self.model.bodies:
-                for func in range(nfunctions):
-
-                    # calculate dDdu_s^T * psi_D
-                    psi_D_product = np.zeros(body.struct_nnodes*body.xfer_ndof,dtype=TransferScheme.dtype)
-                    if body.transfer:
-                        body.transfer.applydDduSTrans(body.psi_D[:, func].copy(order='C'), psi_D_product)
+                # calculate dDdu_s^T * psi_D
+                psi_D_product = body.get_buffer('psi_D_product', (body.struct_nnodes*body.xfer_ndof, nfunctions),
+                                                TransferScheme.dtype)
+                if body.transfer:
+                    body.transfer.applydDduSTransBlock(body.psi_D[:, :nfunctions], psi_D_product)
 
-                    # calculate dLdu_s^T * psi_L
-                    psi_L_product = np.zeros(body.struct_nnodes*body.xfer_ndof,dtype=TransferScheme.dtype)
-                    if body.transfer:
-                        body.transfer.applydLduSTrans(body.psi_L[:, func].copy(order='C'), psi_L_product)
+                # calculate dLdu_s^T * psi_L
+                psi_L_product = body.get_buffer('psi_L_product', (body.struct_nnodes*body.xfer_ndof, nfunctions),
+                                                TransferScheme.dtype)
+                if body.transfer:
+                    body.transfer.applydLduSTransBlock(body.psi_L[:, :nfunctions], psi_L_product)
 
-                    body.struct_rhs[:,func] = -psi_D_product - psi_L_product
+                np.add(psi_D_product, psi_L_product, out=body.struct_rhs[:, :nfunctions])
+                np.negative(body.struct_rhs[:, :nfunctions], out=body.struct_rhs[:, :nfunctions])
 
             # take a step in the structural adjoint
             fail = self.solvers['structural'].iterate_adjoint(scenario,self.model.bodies,step)
@@ -260,21 +278,28 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
                 if fail!=0:
                     return fail
 
+            # Start the accelerator of the subiterations, reusing the previous time steps
+            if self.accelerator is not None:
+                self.accelerator.reset(*self._get_interface_state())
+
             for fsi_subiter in range(1,self.fsi_subiters+1):
                 for body in self.model.bodies:
 
                     # Transfer structural displacements to aerodynamic surface
                     if body.transfer:
-                        body.aero_disps = np.zeros(body.aero_nnodes*3,dtype=TransferScheme.dtype)
+                        body.aero_disps = body.get_buffer('aero_disps', 3*body.aero_nnodes,
+                                                          TransferScheme.dtype)
                         body.transfer.transferDisps(body.struct_disps, body.aero_disps)
 
                     if ('rigid'  in body.motion_type and
                         'deform' in body.motion_type):
                         #TODO parallel rigid motion extraction
-                        rotation = np.zeros(9,dtype=TransferScheme.dtype)
-                        translation = np.zeros(3,dtype=TransferScheme.dtype)
-                        u = np.zeros(body.aero_nnodes*3,dtype=TransferScheme.dtype)
-                        body.rigid_transform = np.zeros((4,4),dtype=TransferScheme.dtype)
+                        rotation = body.get_buffer('rotation', 9, TransferScheme.dtype)
+                        translation = body.get_buffer('translation', 3, TransferScheme.dtype)
+                        u = body.get_buffer('elastic_aero_disps', 3*body.aero_nnodes,
+                                            TransferScheme.dtype)
+                        body.rigid_transform = body.get_buffer('rigid_transform', (4, 4),
+                                                               TransferScheme.dtype)
 
                         body.transfer.transformEquivRigidMotion(body.aero_disps,rotation,translation,u)
 
@@ -282,7 +307,7 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
                         body.rigid_transform[:3, 3] = translation
                         body.rigid_transform[-1,-1] = 1.0
 
-                        body.aero_disps = u.copy()
+                        body.aero_disps = u
 
                     elif('rigid' in body.motion_type):
                         transform = self.solvers['structural'].get_rigid_transform(body)
@@ -294,7 +319,8 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
 
                 # Transfer loads from fluid and get loads on structure
                 for body in self.model.bodies:
-                    body.struct_loads = np.zeros(body.struct_nnodes*body.xfer_ndof,dtype=TransferScheme.dtype)
+                    body.struct_loads = body.get_buffer('struct_loads', body.struct_nnodes*body.xfer_ndof,
+                                                        TransferScheme.dtype)
                     if body.transfer:
                         body.transfer.transferLoads(body.aero_loads, body.struct_loads)
 
@@ -303,6 +329,12 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
                 if fail != 0:
                     return fail
 
+                # Accelerate the displacements passed to the next subiteration or time step.
+                # With a single subiteration, only the columns reused from the previous time
+                # steps give a quasi-Newton update
+                if self.accelerator is not None:
+                    self._accelerate()
+
             for solver in self.solvers:
                 fail = self.solvers[solver].step_post(scenario,self.model.bodies,step)
                 if fail != 0:
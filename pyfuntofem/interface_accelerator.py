@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import print_function
+
+import numpy as np
+from mpi4py import MPI
+
+class IQNILS(object):
+    """
+    Interface quasi-Newton accelerator with an inverse Jacobian from a least-squares model
+    (IQN-ILS) for the coupling iterations of the NLBGS drivers, used in place of the Aitken
+    under-relaxation.
+
+    The accelerator works on the interface vector of all the bodies, i.e. the structural
+    displacements and temperatures stacked on each processor. Given the input x of an
+    iteration and the output xt of the flow and structural solves, the residual is r = xt - x.
+    The differences of the residuals and outputs of the previous iterations form the columns of
+    V and W, and the next input is xt + W*c, where c minimizes ||V*c + r||. The first iteration
+    without any columns is under-relaxed with theta instead.
+
+    Each field is scaled by the norm of its first residual after reset() in the least-squares
+    problem, so that displacements and temperatures are weighted equally.
+    """
+    def __init__(self, comm, history=10, reuse=0, theta=0.1, filter_tol=1e-10):
+        """
+        Parameters
+        ----------
+        comm: MPI.comm
+            communicator of the processors that hold parts of the interface vector
+        history: int
+            maximum number of columns kept from the current solve or time step
+        reuse: int
+            number of previous solves or time steps whose columns are reused
+        theta: float
+            under-relaxation factor of the first iteration
+        filter_tol: float
+            relative tolerance on the diagonal of the R factor of the scaled columns below
+            which a column is discarded as nearly dependent on the newer ones
+        """
+        self.comm = comm
+        self.history = history
+        self.reuse = reuse
+        self.theta = theta
+        self.filter_tol = filter_tol
+
+        # Columns of V and W of the current and the reused solves, newest first
+        self.V = []
+        self.W = []
+        self.V_reuse = []
+        self.W_reuse = []
+
+        self.x = None
+        self.r_prev = None
+        self.xt_prev = None
+        self.fields = None
+        self.scale = None
+
+    def reset(self, x0, fields=None):
+        """
+        Start a new solve or time step from the input x0. The columns of the previous solve
+        are kept for reuse, up to the number of solves set by reuse
+
+        Parameters
+        ----------
+        x0: ndarray
+            initial interface vector on this processor
+        fields: ndarray
+            integer field number of each entry of the interface vector, or None for a single
+            field
+        """
+        if self.reuse > 0 and len(self.V) > 0:
+            self.V_reuse.insert(0, np.array(self.V).T)
+            self.W_reuse.insert(0, np.array(self.W).T)
+            del self.V_reuse[self.reuse:]
+            del self.W_reuse[self.reuse:]
+
+        self.V = []
+        self.W = []
+
+        self.x = np.array(x0)
+        self.r_prev = None
+        self.xt_prev = None
+        if fields is None:
+            fields = np.zeros(self.x.size, dtype=int)
+        self.fields = np.asarray(fields)
+        self.scale = None
+
+        return
+
+    def update(self, xt):
+        """
+        Compute the input of the next iteration from the output of the current one
+
+        Parameters
+        ----------
+        xt: ndarray
+            output interface vector of the current iteration on this processor
+
+        Returns
+        -------
+        x: ndarray
+            input interface vector of the next iteration
+        """
+        r = xt - self.x
+
+        # Scale each field by the norm of its first residual
+        if self.scale is None:
+            nfields = self.comm.allreduce(int(np.max(self.fields)) + 1 if self.fields.size else 0,
+                                          op=MPI.MAX)
+            norms = np.zeros(nfields)
+            for f in range(nfields):
+                norms[f] = np.linalg.norm(np.real(r[self.fields == f]))**2
+            self.comm.Allreduce(MPI.IN_PLACE, norms, op=MPI.SUM)
+            norms = np.sqrt(norms)
+            norms[norms == 0.0] = 1.0
+            self.scale = (1.0/norms)[self.fields] if nfields > 0 else np.zeros(0)
+
+        # Add the differences to the previous iteration as the newest columns
+        if self.r_prev is not None:
+            self.V.insert(0, r - self.r_prev)
+            self.W.insert(0, xt - self.xt_prev)
+            del self.V[self.history:]
+            del self.W[self.history:]
+
+        self.r_prev = np.array(r)
+        self.xt_prev = np.array(xt)
+
+        V = self._get_columns(self.V, self.V_reuse, r.size, r.dtype)
+        if V.shape[1] == 0:
+            self.x = self.x + self.theta*r
+        else:
+            W = self._get_columns(self.W, self.W_reuse, r.size, r.dtype)
+
+            # Solve the least-squares problem with the R factor of the scaled columns and
+            # residual, reduced over the processors from the R factors of the local rows
+            Vs = self.scale[:, np.newaxis]*V
+            rs = self.scale*r
+            m = V.shape[1]
+            R = _r_factor(np.column_stack((Vs, rs)))
+            R = _r_factor(np.vstack(self.comm.allgather(R)))
+
+            # Drop the oldest column that is nearly dependent on the newer ones until the
+            # remaining columns are independent
+            keep = list(range(m))
+            while True:
+                Rk = _r_factor(R[:, keep + [m]])
+                diag = np.abs(np.diag(Rk))[:len(keep)]
+                norms = np.sqrt(np.sum(np.abs(R[:, keep])**2, axis=0))
+                small = np.flatnonzero(diag <= self.filter_tol*norms)
+                if small.size == 0:
+                    break
+                del keep[small[-1]]
+
+            k = len(keep)
+            c = np.zeros(m, dtype=Rk.dtype)
+            if k > 0:
+                c[keep] = np.linalg.solve(Rk[:k, :k], -Rk[:k, k])
+            self.x = xt + W.dot(c)
+
+        return self.x
+
+    def _get_columns(self, cols, reuse_cols, n, dtype):
+        """
+        Stack the columns of the current solve and the reused solves
+        """
+        blocks = []
+        if len(cols) > 0:
+            blocks.append(np.array(cols).T)
+        blocks.extend(reuse_cols)
+
+        if len(blocks) == 0:
+            return np.zeros((n, 0), dtype=dtype)
+        return np.hstack(blocks)
+
+
+def _r_factor(A):
+    """
+    Compute the R factor of the QR factorization of A with modified Gram-Schmidt. The inner
+    products are not conjugated so that the factor is analytic in complex mode
+
+    Parameters
+    ----------
+    A: ndarray
+        two-dimensional array with at least as many columns as are factored
+
+    Returns
+    -------
+    R: ndarray
+        upper triangular square array with the number of columns of A
+    """
+    Q = np.array(A)
+    m = Q.shape[1]
+    R = np.zeros((m, m), dtype=Q.dtype)
+    for i in range(m):
+        R[i, i] = np.sqrt(Q[:, i].dot(Q[:, i]))
+        if R[i, i] != 0.0:
+            Q[:, i] /= R[i, i]
+        R[i, i+1:] = Q[:, i].dot(Q[:, i+1:])
+        Q[:, i+1:] -= np.outer(Q[:, i], R[i, i+1:])
+
+    return R
@@ -24,7 +24,8 @@ from .base import Base
 
 class Scenario(Base):
     """A class to hold scenario information for a design point in optimization"""
-    def __init__(self,name, id=0, group=None, steady=True, fun3d=True, steps=1000):
+    def __init__(self,name, id=0, group=None, steady=True, fun3d=True, steps=1000,
+                 atol=0.0, rtol=0.0):
         """
         Parameters
         ----------
@@ -41,6 +42,12 @@ class Scenario(Base):
             whether or not you are using FUN3D. If true, the scenario class will auto-populate 'aerodynamic' required by FUN3D
         steps: int
             the number of coupled time steps to run for the scenario
+        atol: float
+            absolute tolerance on the coupling residual of a steady scenario. The coupled iterations
+            stop before ``steps`` once the residual is below ``atol`` or ``rtol`` times its first value.
+            The adjoint iterations stop each function's adjoint the same way
+        rtol: float
+            relative tolerance on the coupling residual of a steady scenario
 
         See Also
         --------
@@ -62,6 +69,12 @@ class Scenario(Base):
         self.steady = steady
         self.steps  = steps
 
+        # Convergence tolerances and the coupling residual norms of each iteration
+        self.atol = atol
+        self.rtol = rtol
+        self.residuals = []
+        self.adjoint_residuals = []
+
         if fun3d:
             self.add_variable('aerodynamic', dv('Mach', id=1, upper=5.0, active=False))
             self.add_variable('aerodynamic', dv('AOA', id=2, lower=-15.0, upper=15.0, active=False))
@@ -426,7 +426,8 @@ class SolverInterface(object):
     def iterate_adjoint(self, scenario, bodies, step):
         """
         Adjoint iteration for the solver. Typical involves the solver reading in a RHS term then returning an adjoint or adjoint-product.
-        Called in NLBGS solver.
+        Called in NLBGS solver. In the steady solver, the adjoint of function i may be skipped if
+        scenario.adjoint_active[i] is False, since its adjoint variables are no longer updated.
 
         Parameters
         ----------
@@ -378,19 +378,21 @@ class TacsSteadyInterface(SolverInterface):
             ans_array = self.ans.getArray()
             for body in bodies:
                 if body.transfer is not None:
-                    body.struct_disps = np.zeros(body.struct_nnodes*body.xfer_ndof,
-                                                 dtype=TACS.dtype)
+                    body.struct_disps = body.get_buffer('struct_disps', body.struct_nnodes*body.xfer_ndof,
+                                                        TACS.dtype)
                     for i in range(body.xfer_ndof):
                         body.struct_disps[i::body.xfer_ndof] = ans_array[i::ndof]
 
                 if body.thermal_transfer is not None:
-                    body.struct_temps = np.zeros(body.struct_nnodes*body.therm_xfer_ndof,
-                                                 dtype=TACS.dtype)
+                    body.struct_temps = body.get_buffer('struct_temps', body.struct_nnodes*body.therm_xfer_ndof,
+                                                        TACS.dtype)
                     body.struct_temps[:] = ans_array[body.thermal_index::ndof] + body.T_ref
         else:
             for body in bodies:
-                body.struct_disps = np.zeros(body.struct_nnodes*body.xfer_ndof, dtype=TACS.dtype)
-                body.struct_temps = np.zeros(body.struct_nnodes*body.therm_xfer_ndof, dtype=TACS.dtype)
+                body.struct_disps = body.get_buffer('struct_disps', body.struct_nnodes*body.xfer_ndof,
+                                                    TACS.dtype)
+                body.struct_temps = body.get_buffer('struct_temps', body.struct_nnodes*body.therm_xfer_ndof,
+                                                    TACS.dtype)
 
         return fail
 
@@ -418,13 +420,14 @@ class TacsSteadyInterface(SolverInterface):
             ndof = self.assembler.getVarsPerNode()
             for body in bodies:
                 if body.transfer is not None:
-                    body.struct_disps = np.zeros(body.struct_nnodes*body.xfer_ndof, dtype=TACS.dtype)
+                    body.struct_disps = body.get_buffer('struct_disps', body.struct_nnodes*body.xfer_ndof,
+                                                        TACS.dtype)
                     for i in range(body.xfer_ndof):
                         body.struct_disps[i::body.xfer_ndof] = ans_array[i::ndof]
 
                 if body.thermal_transfer is not None:
-                    body.struct_temps = np.zeros(body.struct_nnodes*body.therm_xfer_ndof,
-                                                 dtype=TACS.dtype)
+                    body.struct_temps = body.get_buffer('struct_temps', body.struct_nnodes*body.therm_xfer_ndof,
+                                                        TACS.dtype)
                     body.struct_temps[:] = ans_array[body.thermal_index::ndof]
 
             # Assemble the transpose of the Jacobian matrix for the adjoint
@@ -463,8 +466,10 @@ class TacsSteadyInterface(SolverInterface):
                     self.svsenslist[func].zeroEntries()
         else:
             for body in bodies:
-                body.struct_disps = np.zeros(body.struct_nnodes*body.xfer_ndof, dtype=TACS.dtype)
-                body.struct_temps = np.zeros(body.struct_nnodes*body.therm_xfer_ndof, dtype=TACS.dtype)
+                body.struct_disps = body.get_buffer('struct_disps', body.struct_nnodes*body.xfer_ndof,
+                                                    TACS.dtype)
+                body.struct_temps = body.get_buffer('struct_temps', body.struct_nnodes*body.therm_xfer_ndof,
+                                                    TACS.dtype)
 
         return 0
 
@@ -479,11 +484,16 @@ class TacsSteadyInterface(SolverInterface):
 
         if self.tacs_proc:
             # Evaluate state variable sensitivities and scale to get right-hand side
+            active = getattr(scenario, 'adjoint_active', None)
             for func in range(len(self.funclist)):
                 # Check if the function is a TACS function or not
                 if self.functag[func] == -1:
                     continue
 
+                # Skip the functions whose adjoint has converged
+                if active is not None and not active[func]:
+                    continue
+
                 # Copy values into the right-hand-side
                 self.struct_rhs_vec.copyValues(self.svsenslist[func])
                 struct_rhs_array = self.struct_rhs_vec.getArray()
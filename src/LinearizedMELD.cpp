@@ -25,13 +25,17 @@
 #include "LinearizedMELD.h"
 #include "funtofemlapack.h"
 
+
 LinearizedMELD::LinearizedMELD(MPI_Comm all, 
                                MPI_Comm structure, int struct_root,
                                MPI_Comm aero, int aero_root,
                                int num_nearest, F2FScalar beta) 
   : MELD(all, structure, struct_root, aero, aero_root, -1, num_nearest, beta) {
-  // Initialize the data for the transfers
-  global_H = NULL;
+  // Initialize the displacement transfer operator
+  disp_rowp = NULL;
+  disp_cols = NULL;
+  disp_vals = NULL;
+  single_disp_vals = NULL;
 
   // Notify user of the type of transfer scheme they are using
   printf("Transfer scheme [%i]: Creating scheme of type LinearizedMELD...\n",
@@ -39,61 +43,83 @@ LinearizedMELD::LinearizedMELD(MPI_Comm all,
 }
 
 LinearizedMELD::~LinearizedMELD() {
-  // Free the data for the transfers
-  if (global_H){ delete [] global_H; }
+  // Free the displacement transfer operator
+  if (disp_rowp){ delete [] disp_rowp; }
+  if (disp_cols){ delete [] disp_cols; }
+  if (disp_vals){ delete [] disp_vals; }
+  if (single_disp_vals){ delete [] single_disp_vals; }
 
   printf("Transfer scheme [%i]: freeing LinearizedMELD data...\n",
          object_id);
 }
 
-/* 
-  Set aerostructural connectivity, compute weights, and allocate memory needed
-  for transfers and products
-
-  Arguments
-  ---------
-  num_nearest : the number of struct nodes connected to each aero node
-  global_beta : the weighting decay parameter
-
+/*
+  Assemble the displacement transfer operator once the connectivity and
+  weights are set. The load transfer and product data of MELD are not needed
 */
-void LinearizedMELD::initialize() {
-  // Check that user doesn't set more nearest nodes than exist in total
-  if (nn > ns) { nn = ns; }
-
-  // Create aerostructural connectivity
-  global_conn = new int[nn*na];
-  setAeroStructConn(global_conn);
-
-  // Allocate and compute the weights
-  global_W = new F2FScalar[nn*na];
-  computeWeights(global_W);
+void LinearizedMELD::finalizeConnectivity() {
+  // Save the node locations for updating the connectivity
+  storeConnectivityMesh();
   
-  // Allocate transfer variables
-  global_xs0bar = new F2FScalar[3*na];
-  global_H = new F2FScalar[9*na];
+  // Assemble the displacement transfer operator
+  assembleDispOperator();
 }
 
 /*
-  Computes the displacements of all aerodynamic surface nodes based on
-  linearized version of MELD
+  Update the connectivity and weights after the nodes have moved, then
+  reassemble the displacement transfer operator for the new geometry
+*/
+void LinearizedMELD::reconnect(double tol) {
+  MELD::reconnect(tol);
+  assembleDispOperator();
+}
 
-  Arguments
-  ---------
-  struct_disps : structural node displacements
+/*
+  Report the memory used by the arrays of the scheme on this processor,
+  including the displacement transfer operator
 
   Returns
   -------
-  aero_disps   : aerodynamic node displacements
+  names : names of the allocated arrays
+  bytes : size of each array in bytes
+*/
+int LinearizedMELD::getMemoryUsage(const char **names, size_t *bytes) {
+  size_t k = sizeof(int);
+  int n = MELD::getMemoryUsage(names, bytes);
+  n = addMemoryUsage(n, "disp_rowp", disp_rowp, k*(3*na+1), names, bytes);
+  n = addMemoryUsage(n, "disp_cols", disp_cols, k*9*nn*na, names, bytes);
+  n = addMemoryUsage(n, "disp_vals", disp_vals, sizeof(F2FScalar)*9*nn*na,
+                     names, bytes);
+  n = addMemoryUsage(n, "single_disp_vals", single_disp_vals,
+                     sizeof(float)*9*nn*na, names, bytes);
+  return n;
+}
 
+/*
+  Assemble the displacement transfer operator in CSR format. Each
+  aerodynamic node contributes three rows with the 3x3 blocks of its linked
+  structural nodes, stored in the order of the connectivity. With single
+  precision transfers the operator is assembled in double precision and the
+  entries are then converted
 */
-void LinearizedMELD::transferDisps(const F2FScalar *struct_disps, 
-                         F2FScalar *aero_disps) {
-  // Copy prescribed displacements into displacement vector
-  memcpy(Us, struct_disps, 3*ns*sizeof(F2FScalar));
+void LinearizedMELD::assembleDispOperator() {
+  if (single_precision){
+    setDoubleWeights();
+  }
+
+  if (!disp_rowp){
+    disp_rowp = new int[3*na+1];
+    disp_cols = new int[9*nn*na];
+  }
+  if (!disp_vals){
+    disp_vals = new F2FScalar[9*nn*na];
+  }
 
-  // Zero the outputs
-  memset(aero_disps, 0.0, 3*na*sizeof(F2FScalar));
+  for ( int i = 0; i <= 3*na; i++ ) {
+    disp_rowp[i] = 3*nn*i;
+  }
 
+  F2F_OMP_PARALLEL_FOR
   for ( int i = 0; i < na; i++ ) {
     // Point aerodynamic surface node location into a
     const F2FScalar *xa = &Xa[3*i];
@@ -101,11 +127,11 @@ void LinearizedMELD::transferDisps(const F2FScalar *struct_disps,
     // Compute the centroid of the initial set of nodes
     const int *local_conn = &global_conn[i*nn];
     const F2FScalar *W = &global_W[i*nn];
-    F2FScalar *xs0bar = &global_xs0bar[3*i];
+    F2FScalar xs0bar[3];
     computeCentroid(local_conn, W, Xs, xs0bar);
 
     // Compute the covariance matrix
-    F2FScalar *H = &global_H[9*i];
+    F2FScalar H[9];
     computeCovariance(Xs, Xs, local_conn, W, xs0bar, xs0bar, H);
 
     // Compute the inverse of the point inertia matrix
@@ -117,31 +143,135 @@ void LinearizedMELD::transferDisps(const F2FScalar *struct_disps,
     F2FScalar r[3];
     vec_diff(xs0bar, xa, r);
 
-    // Sum the contributions from each structural node to the aerodynamic
-    // surface node's displacement
-    F2FScalar *ua = &aero_disps[3*i];
-
     for ( int j = 0; j < nn; j++ ) {
       // Get structural node location
-      int indx = global_conn[nn*i+j];
-      F2FScalar *xs = &Xs[3*indx];
+      int indx = local_conn[j];
+      const F2FScalar *xs = &Xs[3*indx];
 
       // Form the vector q from the centroid of the undisplaced set to the node
       F2FScalar q[3];
       vec_diff(xs0bar, xs, q);
 
-      // Get structural node displacement
-      const F2FScalar *us = &Us[3*indx];
+      // Compute the block coupling the two nodes and insert it in the rows of
+      // the aerodynamic node
+      F2FScalar A[9];
+      computeDispOperator(W[j], r, Hinv, q, A);
+
+      for ( int k = 0; k < 3; k++ ) {
+        for ( int l = 0; l < 3; l++ ) {
+          int jp = disp_rowp[3*i+k] + 3*j + l;
+          disp_cols[jp] = 3*indx + l;
+          disp_vals[jp] = A[k+3*l];
+        }
+      }
+    }
+  }
+
+  if (single_precision){
+    if (!single_disp_vals){
+      single_disp_vals = new float[9*nn*na];
+    }
+    for ( int jp = 0; jp < 9*nn*na; jp++ ) {
+      single_disp_vals[jp] = F2FRealPart(disp_vals[jp]);
+    }
+    delete [] disp_vals;
+    disp_vals = NULL;
+    setSingleWeights();
+  }
+}
+
+/*
+  Compute y = D*x where x is in the image of the structural mesh on this
+  processor and y holds the local aerodynamic nodes
+*/
+void LinearizedMELD::multDispOperator(const F2FScalar *x, F2FScalar *y) {
+  F2F_OMP_PARALLEL_FOR
+  for ( int i = 0; i < 3*na; i++ ) {
+    F2FScalar yi = 0.0;
+    if (single_precision){
+      for ( int jp = disp_rowp[i]; jp < disp_rowp[i+1]; jp++ ) {
+        yi += double(single_disp_vals[jp])*x[disp_cols[jp]];
+      }
+    }
+    else {
+      for ( int jp = disp_rowp[i]; jp < disp_rowp[i+1]; jp++ ) {
+        yi += disp_vals[jp]*x[disp_cols[jp]];
+      }
+    }
+    y[i] = yi;
+  }
+}
 
-      // Compute and add contribution to aerodynamic surface node displacement
-      F2FScalar w = W[j];
-      F2FScalar uj[3];
-      computeDispContribution(w, r, Hinv, q, us, uj);
-      vec_add(uj, ua, ua);
+/*
+  Compute y = D^{T}*x where x holds the local aerodynamic nodes and y is in
+  the image of the structural mesh on this processor
+*/
+void LinearizedMELD::multDispOperatorTrans(const F2FScalar *x,
+                                           F2FScalar *y) {
+  memset(y, 0, 3*ns*sizeof(F2FScalar));
+  for ( int i = 0; i < 3*na; i++ ) {
+    if (single_precision){
+      for ( int jp = disp_rowp[i]; jp < disp_rowp[i+1]; jp++ ) {
+        y[disp_cols[jp]] += double(single_disp_vals[jp])*x[i];
+      }
+    }
+    else {
+      for ( int jp = disp_rowp[i]; jp < disp_rowp[i+1]; jp++ ) {
+        y[disp_cols[jp]] += disp_vals[jp]*x[i];
+      }
     }
   }
 }
 
+/*
+  Get the CSR data of the displacement transfer operator
+
+  Returns
+  -------
+  nrows : number of rows (3 times the number of local aerodynamic nodes)
+  ncols : number of columns (3 times the number of structural nodes in the
+          image of the structural mesh on this processor)
+  rowp  : pointer to the start of each row
+  cols  : column indices
+  vals  : entries of the operator (NULL with single precision transfers)
+*/
+void LinearizedMELD::getDispOperator(int *nrows, int *ncols,
+                                     const int **rowp, const int **cols,
+                                     const F2FScalar **vals) {
+  *nrows = 3*na;
+  *ncols = 3*ns;
+  *rowp = disp_rowp;
+  *cols = disp_cols;
+  *vals = disp_vals;
+}
+
+/*
+  Computes the displacements of all aerodynamic surface nodes based on
+  linearized version of MELD
+
+  Arguments
+  ---------
+  struct_disps : structural node displacements
+
+  Returns
+  -------
+  aero_disps   : aerodynamic node displacements
+
+*/
+void LinearizedMELD::transferDisps(const F2FScalar *struct_disps, 
+                                   F2FScalar *aero_disps) {
+  // Reassemble the operator if the structural mesh has changed
+  if (distributeStructuralMesh()){
+    assembleDispOperator();
+  }
+
+  // Copy prescribed displacements into displacement vector
+  collectStructuralVector(struct_disps, Us);
+
+  // Apply the displacement transfer operator
+  multDispOperator(Us, aero_disps);
+}
+
 /* 
   Computes inverse of point inertia matrix Hbar = H - I*Tr(H)
 
@@ -184,8 +314,8 @@ void LinearizedMELD::computePointInertiaInverse(const F2FScalar *H,
 }
 
 /* 
-  Computes contribution to displacement of aerodynamic surface node from single
-  structural node in linearized MELD
+  Computes the block of the displacement transfer operator that couples an
+  aerodynamic surface node to a single structural node in linearized MELD
 
   Arguments
   ---------
@@ -193,21 +323,18 @@ void LinearizedMELD::computePointInertiaInverse(const F2FScalar *H,
   r    : vector from centroid to aerodynamic surface node
   Hinv : inverse of point inertia matrix
   q    : vector from centroid to structural node
-  us   : displacement of structural node
 
   Returns
   -------
-  ua   : contribution to displacement of aerodynamic surface node
+  A    : 3x3 block stored column-major, so that u_A = A*u_S
 
 */
-void LinearizedMELD::computeDispContribution(const F2FScalar w,
-                                             const F2FScalar *r,
-                                             const F2FScalar *Hinv,
-                                             const F2FScalar *q,
-                                             const F2FScalar *us,
-                                             F2FScalar *ua) {
+void LinearizedMELD::computeDispOperator(const F2FScalar w,
+                                         const F2FScalar *r,
+                                         const F2FScalar *Hinv,
+                                         const F2FScalar *q,
+                                         F2FScalar *A) {
   // Compute matrix = w*(qx*Hinv*dx + I)
-  F2FScalar A[9];
   A[0] = w*(q[2]*(r[1]*Hinv[5] - r[2]*Hinv[4]) - 
             q[1]*(r[1]*Hinv[8] - r[2]*Hinv[7]) + 1.0);
   A[1] = w*(q[1]*(r[0]*Hinv[8] - r[2]*Hinv[6]) - 
@@ -226,11 +353,6 @@ void LinearizedMELD::computeDispContribution(const F2FScalar w,
             q[1]*(r[0]*Hinv[2] - r[2]*Hinv[0]));
   A[8] = w*(q[1]*(r[0]*Hinv[1] - r[1]*Hinv[0]) - 
             q[0]*(r[0]*Hinv[4] - r[1]*Hinv[3]) + 1.0);
-
-  // Compute matrix-vector product ua = A*us
-  ua[0] = A[0]*us[0] + A[3]*us[1] + A[6]*us[2]; 
-  ua[1] = A[1]*us[0] + A[4]*us[1] + A[7]*us[2]; 
-  ua[2] = A[2]*us[0] + A[5]*us[1] + A[8]*us[2]; 
 }
 
 /* 
@@ -247,101 +369,17 @@ void LinearizedMELD::computeDispContribution(const F2FScalar w,
 
 */
 void LinearizedMELD::transferLoads(const F2FScalar *aero_loads,
-                         F2FScalar *struct_loads) {
+                                   F2FScalar *struct_loads) {
   // Copy prescribed aero loads into member variable
   memcpy(Fa, aero_loads, 3*na*sizeof(F2FScalar));
 
-  // Zero struct loads
-  memset(struct_loads, 0, 3*ns*sizeof(F2FScalar));
-
-  // Loop over aerodynamic surface nodes
-  for ( int i = 0; i < na; i++ ) {
-    // Get aerodynamic surface node location and load
-    F2FScalar *a = &Xa[3*i];
-    const F2FScalar *fa = &Fa[3*i];
-
-    // Compute vector d from centroid to aerodynamic surface node
-    F2FScalar *xs0bar = &global_xs0bar[3*i];
-    F2FScalar r[3];
-    vec_diff(xs0bar, a, r);
-
-    // Compute inverse of point inertia matrix
-    F2FScalar Hinv[ 9 ];
-    computePointInertiaInverse(&global_H[9*i], Hinv);
-
-    // Loop over linked structural nodes
-    for ( int j = 0; j < nn; j++ ) {
-      // Get structural node using index from connectivity
-      int indx = global_conn[nn*i+j];
-      F2FScalar *xs = &Xs[3*indx];
-
-      // Compute vector q from centroid to structural node
-      F2FScalar q[3];
-      vec_diff(xs0bar, xs, q);
-
-      // Compute load contribution
-      F2FScalar *fs = &struct_loads[3*indx];
-      F2FScalar w = global_W[nn*i+j];
-      F2FScalar fj[3];
-      computeLoadContribution(w, q, Hinv, r, fa, fj);
-
-      // Add load contribution into global structural load array
-      fs[0] += fj[0];
-      fs[1] += fj[1];
-      fs[2] += fj[2];
-    }
-  }
-}
-
-/* 
-  Computes contribution to displacement of aerodynamic surface node from single
-  structural node in linearized MELD
-
-  Arguments
-  ---------
-  w    : weight of structural node
-  q    : vector from centroid to structural node
-  Hinv : inverse of point inertia matrix
-  r    : vector from centroid to aerodynamic surface node
-  fa   : load on aerodynamic surface node
+  // Apply the transpose of the displacement transfer operator
+  F2FScalar *struct_loads_global = new F2FScalar[3*ns];
+  multDispOperatorTrans(Fa, struct_loads_global);
 
-  Returns
-  -------
-  fj   : contribution to load on structural node
-
-*/
-void LinearizedMELD::computeLoadContribution(const F2FScalar w, 
-                                             const F2FScalar *q, 
-                                             const F2FScalar *Hinv, 
-                                             const F2FScalar *r, 
-                                             const F2FScalar *fa,
-                                             F2FScalar *fj) {
-  // Compute matrix = w*(rx*Hinv*qx + I)
-  F2FScalar A[9];
-
-  A[0] = w*(r[1]*(Hinv[7]*q[2] - Hinv[8]*q[1]) - 
-            r[2]*(Hinv[4]*q[2] - Hinv[5]*q[1]) + 1.0); 
-  A[1] = w*(r[2]*(Hinv[3]*q[2] - Hinv[5]*q[0]) - 
-            r[1]*(Hinv[6]*q[2] - Hinv[8]*q[0]));
-  A[2] = w*(r[1]*(Hinv[6]*q[1] - Hinv[7]*q[0]) - 
-            r[2]*(Hinv[3]*q[1] - Hinv[4]*q[0]));
-  A[3] = w*(r[2]*(Hinv[1]*q[2] - Hinv[2]*q[1]) - 
-            r[0]*(Hinv[7]*q[2] - Hinv[8]*q[1]));
-  A[4] = w*(r[0]*(Hinv[6]*q[2] - Hinv[8]*q[0]) - 
-            r[2]*(Hinv[0]*q[2] - Hinv[2]*q[0]) + 1.0);
-  A[5] = w*(r[2]*(Hinv[0]*q[1] - Hinv[1]*q[0]) - 
-            r[0]*(Hinv[6]*q[1] - Hinv[7]*q[0]));
-  A[6] = w*(r[0]*(Hinv[4]*q[2] - Hinv[5]*q[1]) - 
-            r[1]*(Hinv[1]*q[2] - Hinv[2]*q[1]));
-  A[7] = w*(r[1]*(Hinv[0]*q[2] - Hinv[2]*q[0]) - 
-            r[0]*(Hinv[3]*q[2] - Hinv[5]*q[0]));
-  A[8] = w*(r[0]*(Hinv[3]*q[1] - Hinv[4]*q[0]) - 
-            r[1]*(Hinv[0]*q[1] - Hinv[1]*q[0]) + 1.0);
-
-  // Compute matrix-vector product ua = A*us
-  fj[0] = A[0]*fa[0] + A[3]*fa[1] + A[6]*fa[2]; 
-  fj[1] = A[1]*fa[0] + A[4]*fa[1] + A[7]*fa[2]; 
-  fj[2] = A[2]*fa[0] + A[5]*fa[1] + A[8]*fa[2]; 
+  // distribute the structural loads
+  distributeStructuralVector(struct_loads_global, struct_loads);
+  delete [] struct_loads_global;
 }
 
 /*  
@@ -358,12 +396,16 @@ void LinearizedMELD::computeLoadContribution(const F2FScalar w,
 
 */
 void LinearizedMELD::applydDduS(const F2FScalar *vecs , F2FScalar *prods) {
-  transferDisps(vecs, prods);
+  F2FScalar *vecs_global = new F2FScalar[3*ns];
+  collectStructuralVector(vecs, vecs_global);
+  multDispOperator(vecs_global, prods);
 
   // Reverse sign due to definition of diplacement transfer residual
   for (int i = 0; i < 3*na; i++) {
     prods[i] *= -1.0;
   }
+
+  delete [] vecs_global;
 }
 
 /*  
@@ -380,12 +422,16 @@ void LinearizedMELD::applydDduS(const F2FScalar *vecs , F2FScalar *prods) {
 
 */
 void LinearizedMELD::applydDduSTrans(const F2FScalar *vecs, F2FScalar *prods) {
-  transferLoads(vecs, prods);
+  F2FScalar *prods_global = new F2FScalar[3*ns];
+  multDispOperatorTrans(vecs, prods_global);
 
   // Reverse sign due to definition of diplacement transfer residual
   for (int j = 0; j < 3*ns; j++) {
-    prods[j] *= -1.0;
+    prods_global[j] *= -1.0;
   }
+
+  distributeStructuralVector(prods_global, prods);
+  delete [] prods_global;
 }
 
 /*  
@@ -402,7 +448,7 @@ void LinearizedMELD::applydDduSTrans(const F2FScalar *vecs, F2FScalar *prods) {
 
 */
 void LinearizedMELD::applydLduS(const F2FScalar *vecs, F2FScalar *prods) {
-  memset(prods, 0, 3*ns*sizeof(F2FScalar));
+  memset(prods, 0, 3*ns_local*sizeof(F2FScalar));
 }
 
 /*  
@@ -419,7 +465,7 @@ void LinearizedMELD::applydLduS(const F2FScalar *vecs, F2FScalar *prods) {
 
 */
 void LinearizedMELD::applydLduSTrans(const F2FScalar *vecs, F2FScalar *prods) {
-  memset(prods, 0, 3*ns*sizeof(F2FScalar));
+  memset(prods, 0, 3*ns_local*sizeof(F2FScalar));
 }
 
 /*  
@@ -453,7 +499,7 @@ void LinearizedMELD::applydDdxA0(const F2FScalar *vecs, F2FScalar *prods) {
 
 */
 void LinearizedMELD::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
-  memset(prods, 0, 3*ns*sizeof(F2FScalar));
+  memset(prods, 0, 3*ns_local*sizeof(F2FScalar));
 }
 
 /*  
@@ -487,5 +533,5 @@ void LinearizedMELD::applydLdxA0(const F2FScalar *vecs, F2FScalar *prods) {
 
 */
 void LinearizedMELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
-  memset(prods, 0, 3*ns*sizeof(F2FScalar));
+  memset(prods, 0, 3*ns_local*sizeof(F2FScalar));
 }
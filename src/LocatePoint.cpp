@@ -22,6 +22,9 @@
 #include "funtofemlapack.h"
 #include <math.h>
 #include <stdio.h>
+#include <stdint.h>
+#include <algorithm>
+#include <utility>
 
 /*
   Implementation of the locate point code
@@ -287,6 +290,198 @@ void LocatePoint::locateKClosest( int K, int indx[], F2FScalar dist[],
   }
 }
 
+/*!
+  Locate the K closest points among the points and their mirror images
+  across the plane x[isymm] = 0, without storing the mirror images.
+
+  The distance from xpt to the mirror image of a point is the distance
+  from the mirror image of xpt to the point, so the K closest points to
+  xpt and to its mirror image are found in the same tree and the two
+  sorted lists are merged. Points within 1e-7 of the plane coincide
+  with their mirror images and are only taken from the first list. The
+  mirror image of point n is returned as npts + n.
+
+  K        == The number of closest points
+  isymm    == The coordinate direction normal to the plane of symmetry
+  indices  == The K closest indices
+  dist     == The sorted squared distances
+  xpt      == The query point
+*/
+void LocatePoint::locateKClosestSymm( int K, int isymm, int indx[],
+                                      F2FScalar dist[],
+                                      const F2FScalar xpt[] ){
+  F2FScalar *work = new F2FScalar[2*K];
+  int *iwork = new int[2*K];
+  int nk = locateKClosestSymm(K, isymm, xpt, dist, indx, work, iwork);
+  if (nk < K){
+    printf("Error nk = %d < K = %d \n", nk, K);
+  }
+  delete [] work;
+  delete [] iwork;
+}
+
+/*!
+  Merge the K closest points to xpt and to its mirror image into dist
+  and indx using the work arrays of length 2*K, and return the number
+  of points found
+*/
+int LocatePoint::locateKClosestSymm( int K, int isymm, const F2FScalar xpt[],
+                                     F2FScalar *dist, int *indx,
+                                     F2FScalar *work, int *iwork ){
+  // Search for the closest points to the query point and its mirror image
+  int Kd = (K < npts ? K : npts);
+  int n1 = 0, n2 = 0;
+  locateKClosest(Kd, 0, xpt, work, iwork, &n1);
+
+  F2FScalar xr[3] = {xpt[0], xpt[1], xpt[2]};
+  xr[isymm] *= -1.0;
+  locateKClosest(Kd, 0, xr, &work[K], &iwork[K], &n2);
+
+  // Merge the sorted lists, skipping the mirror images on the plane
+  int nk = 0, i = 0, j = 0;
+  while (nk < K){
+    while (j < n2 && onSymmPlane(iwork[K+j], isymm)){
+      j++;
+    }
+    if (i < n1 && (j >= n2 ||
+                   F2FRealPart(work[i]) <= F2FRealPart(work[K+j]))){
+      dist[nk] = work[i];
+      indx[nk] = iwork[i];
+      i++;
+    }
+    else if (j < n2){
+      dist[nk] = work[K+j];
+      indx[nk] = npts + iwork[K+j];
+      j++;
+    }
+    else {
+      break;
+    }
+    nk++;
+  }
+
+  return nk;
+}
+
+/*!
+  Count the points and their mirror images across the plane x[isymm] = 0,
+  with the points on the plane counted once
+*/
+int LocatePoint::getNumSymmPoints( int isymm ){
+  int n = npts;
+  for ( int i = 0; i < npts; i++ ){
+    if (!onSymmPlane(i, isymm)){
+      n++;
+    }
+  }
+  return n;
+}
+
+/*!
+  Locate the K closest points for each of a batch of query points.
+
+  The queries are visited in the order of a space-filling curve so
+  that consecutive queries traverse the same branches of the tree,
+  and the batch is split between the threads in contiguous chunks of
+  that order. The tree is not modified by the queries.
+
+  K        == The number of closest points
+  nq       == The number of query points
+  xq       == The query points
+  indices  == The K closest indices of each query point (K*nq)
+  dist     == The sorted squared distances (K*nq, may be NULL)
+  nthreads == The number of threads
+  isymm    == The direction normal to the plane of symmetry (-1 if none)
+*/
+void LocatePoint::locateKClosestBatch( int K, int nq, const F2FScalar xq[],
+                                       int indx[], F2FScalar dist[],
+                                       int nthreads, int isymm ){
+  if (nthreads < 1){ nthreads = 1; }
+
+  int *order = new int[nq];
+  sortByLocality(nq, xq, order);
+
+  // Scratch space for the distances of each thread, and for the two lists
+  // that are merged with symmetry
+  F2FScalar *work = NULL;
+  if (!dist){
+    work = new F2FScalar[K*nthreads];
+  }
+  F2FScalar *symm_work = NULL;
+  int *symm_iwork = NULL;
+  if (isymm > -1){
+    symm_work = new F2FScalar[2*K*nthreads];
+    symm_iwork = new int[2*K*nthreads];
+  }
+
+  F2F_OMP_PARALLEL_FOR
+  for ( int k = 0; k < nq; k++ ){
+    int i = order[k];
+    int t = F2FThreadNum();
+    F2FScalar *d = (dist ? &dist[K*i] : &work[K*t]);
+    if (isymm > -1){
+      locateKClosestSymm(K, isymm, &xq[3*i], d, &indx[K*i],
+                         &symm_work[2*K*t], &symm_iwork[2*K*t]);
+    }
+    else {
+      locateKClosest(K, &indx[K*i], d, &xq[3*i]);
+    }
+  }
+
+  delete [] order;
+  if (work){ delete [] work; }
+  if (symm_work){ delete [] symm_work; }
+  if (symm_iwork){ delete [] symm_iwork; }
+}
+
+/*!
+  Order the query points along a Morton (Z-order) curve through their
+  bounding box
+*/
+void LocatePoint::sortByLocality( int nq, const F2FScalar xq[], 
+                                  int order[] ){
+  if (nq <= 0){
+    return;
+  }
+
+  double xmin[3], xmax[3];
+  for ( int k = 0; k < 3; k++ ){
+    xmin[k] = xmax[k] = F2FRealPart(xq[k]);
+  }
+  for ( int i = 0; i < nq; i++ ){
+    for ( int k = 0; k < 3; k++ ){
+      double x = F2FRealPart(xq[3*i+k]);
+      if (x < xmin[k]){ xmin[k] = x; }
+      if (x > xmax[k]){ xmax[k] = x; }
+    }
+  }
+  double scale = 0.0;
+  for ( int k = 0; k < 3; k++ ){
+    if (xmax[k] - xmin[k] > scale){ scale = xmax[k] - xmin[k]; }
+  }
+  if (scale > 0.0){ scale = ((1 << 21) - 1)/scale; }
+
+  // Interleave the bits of the 21-bit integer coordinates
+  std::pair<uint64_t, int> *keys = new std::pair<uint64_t, int>[nq];
+  for ( int i = 0; i < nq; i++ ){
+    uint64_t key = 0;
+    for ( int k = 0; k < 3; k++ ){
+      uint64_t c = (uint64_t)(scale*(F2FRealPart(xq[3*i+k]) - xmin[k]));
+      for ( int b = 0; b < 21; b++ ){
+        key |= ((c >> b) & 1) << (3*b + k);
+      }
+    }
+    keys[i].first = key;
+    keys[i].second = i;
+  }
+  std::sort(keys, keys + nq);
+
+  for ( int i = 0; i < nq; i++ ){
+    order[i] = keys[i].second;
+  }
+  delete [] keys;
+}
+
 /*!
   Insert a point into a sorted list based upon the distance from the
   given point
@@ -391,6 +586,77 @@ void LocatePoint::locateKClosest( int K, int root, const F2FScalar xpt[],
   }
 }
 
+/*!
+  Locate all the points within a given radius of a point. The
+  distances are the squared distances and are not sorted.
+
+  radius   == The search radius
+  max_num  == The length of the indices/dist arrays
+  
+  Returns the number of points within the radius, which may exceed
+  max_num in which case only the first max_num points are stored
+*/
+int LocatePoint::locateInRadius( F2FScalar radius, int max_num, int indx[], 
+                                 F2FScalar dist[], const F2FScalar xpt[] ){
+  int nr = 0;
+  int root = 0;
+
+  locateInRadius(root, radius*radius, xpt, max_num, dist, indx, &nr);
+
+  return nr;
+}
+
+/*!
+  Recursively locate the points within the squared distance r2 of xpt
+
+  nr == The number of points found so far
+*/
+void LocatePoint::locateInRadius( int root, F2FScalar r2, 
+                                  const F2FScalar xpt[], int max_num,
+                                  F2FScalar * dist, int * indx, int * nr ){
+  int start = indices_ptr[root];
+  int left_node = nodes[2*root];
+  int right_node = nodes[2*root+1];
+
+  if (start != -1){ // This node is a leaf
+    int end = start + num_indices[root];
+    for ( int k = start; k < end; k++ ){
+      int n = indices[k];
+
+      F2FScalar t = ((Xpts[3*n]   - xpt[0])*(Xpts[3*n]   - xpt[0]) +
+                     (Xpts[3*n+1] - xpt[1])*(Xpts[3*n+1] - xpt[1]) +
+                     (Xpts[3*n+2] - xpt[2])*(Xpts[3*n+2] - xpt[2]));
+
+      if (F2FRealPart(t) <= F2FRealPart(r2)){
+        if (*nr < max_num){
+          dist[*nr] = t;
+          indx[*nr] = n;
+        }
+        *nr += 1;
+      }
+    }
+  }
+  else {
+    F2FScalar *xav = &node_xav[3*root];
+    F2FScalar *normal = &node_normal[3*root];
+
+    // The normal distance
+    F2FScalar ndist = ((xpt[0] - xav[0])*normal[0] +
+                       (xpt[1] - xav[1])*normal[1] +
+                       (xpt[2] - xav[2])*normal[2]); 
+
+    // Search each side of the plane that the ball intersects
+    if (F2FRealPart(ndist) < 0.0 || 
+        F2FRealPart(ndist*ndist) <= F2FRealPart(r2)){
+      locateInRadius(left_node, r2, xpt, max_num, dist, indx, nr);
+    }
+    if (F2FRealPart(ndist) >= 0.0 || 
+        F2FRealPart(ndist*ndist) <= F2FRealPart(r2)){
+      locateInRadius(right_node, r2, xpt, max_num, dist, indx, nr);
+    }
+  }
+}
+
 /*!
   Split the list of indices into approximately two.
   Those on one half of a plane and those on the other.
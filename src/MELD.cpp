@@ -29,7 +29,7 @@
 
 MELD::MELD(MPI_Comm all, MPI_Comm structure, int _struct_root,
            MPI_Comm aero, int _aero_root, int symmetry, 
-           int num_nearest, F2FScalar beta) {
+           int num_nearest, F2FScalar beta, int _partitioned) {
   // Initialize communicators
   global_comm = all;
   struct_comm = structure;
@@ -63,6 +63,19 @@ MELD::MELD(MPI_Comm all, MPI_Comm structure, int _struct_root,
   global_conn = NULL;
   global_W = NULL;
 
+  // Initialize the data for updating the connectivity
+  conn_Xa = NULL;
+  conn_Xs = NULL;
+  conn_gap = NULL;
+  conn_na = 0;
+  conn_ns = 0;
+  conn_fingerprint = 0;
+
+  // Initialize the hashes of the structural node locations
+  struct_hash_local = F2F_HASH_OFFSET_BASIS;
+  struct_hash = F2F_HASH_OFFSET_BASIS;
+  ns_global = 0;
+
   // Initialize the load transfer data
   global_xs0bar = NULL;
   global_R = NULL;
@@ -72,6 +85,23 @@ MELD::MELD(MPI_Comm all, MPI_Comm structure, int _struct_root,
   global_M1 = NULL;
   global_ipiv = NULL;
 
+  // Initialize the single precision transfer data
+  single_W = NULL;
+  single_xs0bar = NULL;
+  single_R = NULL;
+  single_S = NULL;
+
+  // Initialize the partitioned structural mesh data
+  partitioned = _partitioned;
+  nrecv_procs = 0;
+  nsend_procs = 0;
+  recv_procs = NULL;
+  recv_ptr = NULL;
+  send_procs = NULL;
+  send_ptr = NULL;
+  send_ids = NULL;
+  ref_ids = NULL;
+
   // Initialize object id
   object_id = TransferScheme::object_count++;
 
@@ -87,18 +117,7 @@ MELD::MELD(MPI_Comm all, MPI_Comm structure, int _struct_root,
 }
 
 MELD::~MELD() {
-  // Free the aerostructural connectivity data
-  if (global_conn){ delete [] global_conn; }
-
-  // Free the load transfer data
-  if (global_W){ delete [] global_W; }
-  if (global_xs0bar){ delete [] global_xs0bar; }
-  if (global_R){ delete [] global_R; }
-  if (global_S){ delete [] global_S; }
-
-  // Free the Jacobian-vector product data
-  if (global_M1){ delete [] global_M1; }
-  if (global_ipiv){ delete [] global_ipiv; }
+  freeConnectivity();
 
   int rank;
   MPI_Comm_rank(global_comm,&rank);
@@ -107,6 +126,44 @@ MELD::~MELD() {
   }
 }
 
+/*
+  Free the aerostructural connectivity and the data allocated with it, so
+  that the scheme can be initialized again
+*/
+void MELD::freeConnectivity() {
+  // Free the aerostructural connectivity data
+  if (global_conn){ delete [] global_conn; global_conn = NULL; }
+  if (conn_Xa){ delete [] conn_Xa; conn_Xa = NULL; }
+  if (conn_Xs){ delete [] conn_Xs; conn_Xs = NULL; }
+  if (conn_gap){ delete [] conn_gap; conn_gap = NULL; }
+
+  // Free the load transfer data
+  if (global_W){ delete [] global_W; global_W = NULL; }
+  if (global_xs0bar){ delete [] global_xs0bar; global_xs0bar = NULL; }
+  if (global_R){ delete [] global_R; global_R = NULL; }
+  if (global_S){ delete [] global_S; global_S = NULL; }
+
+  // Free the Jacobian-vector product data
+  if (global_M1){ delete [] global_M1; global_M1 = NULL; }
+  if (global_ipiv){ delete [] global_ipiv; global_ipiv = NULL; }
+
+  // Free the single precision transfer data
+  if (single_W){ delete [] single_W; single_W = NULL; }
+  if (single_xs0bar){ delete [] single_xs0bar; single_xs0bar = NULL; }
+  if (single_R){ delete [] single_R; single_R = NULL; }
+  if (single_S){ delete [] single_S; single_S = NULL; }
+
+  // Free the partitioned structural mesh data
+  if (recv_procs){ delete [] recv_procs; recv_procs = NULL; }
+  if (recv_ptr){ delete [] recv_ptr; recv_ptr = NULL; }
+  if (send_procs){ delete [] send_procs; send_procs = NULL; }
+  if (send_ptr){ delete [] send_ptr; send_ptr = NULL; }
+  if (send_ids){ delete [] send_ids; send_ids = NULL; }
+  if (ref_ids){ delete [] ref_ids; ref_ids = NULL; }
+  nrecv_procs = 0;
+  nsend_procs = 0;
+}
+
 void MELD::setStructNodes(const F2FScalar *struct_X, int struct_nnodes){
   // Free the structural data if any is allocated
   if (Xs_local){ delete [] Xs_local; Xs_local = NULL;}
@@ -114,6 +171,7 @@ void MELD::setStructNodes(const F2FScalar *struct_X, int struct_nnodes){
   ns_local = struct_nnodes;
   Xs_local = new F2FScalar[3*ns_local];
   memcpy(Xs_local, struct_X, 3*ns_local*sizeof(F2FScalar));
+  struct_hash_local = hashNodes(struct_X, ns_local, F2F_HASH_OFFSET_BASIS);
 
   mesh_update = 1;
 }
@@ -122,94 +180,98 @@ void MELD::setStructNodes(const F2FScalar *struct_X, int struct_nnodes){
   Collect a structural vector to create a global image then distribute to the
   aerodynamic processors
 */
-void MELD::collectStructuralVector(const F2FScalar *local, F2FScalar *global) {
-
-  // Collect how many structural nodes every processor has
-  if (struct_comm != MPI_COMM_NULL){
-    int struct_nprocs;
-    int struct_rank;
-    MPI_Comm_size(struct_comm,&struct_nprocs);
-    MPI_Comm_rank(struct_comm,&struct_rank);
-
-    int *ns_list = new int[struct_nprocs];
-    memset(ns_list, 0, struct_nprocs*sizeof(int));
-
-    MPI_Gather(&ns_local,1, MPI_INT, ns_list, 1, MPI_INT, struct_root, struct_comm);
-
-    // Collect the structural nodes on the master
-    int send_size = ns_local*3;
-    int *disps = new int[struct_nprocs];
-    memset(disps, 0, struct_nprocs*sizeof(int));
-
-    if ( struct_rank == struct_root){
-      for (int proc = 0; proc < struct_nprocs; proc++){
-        ns_list[proc] *= 3;
-        if (proc > 0){
-          disps[proc] = disps[proc-1] + ns_list[proc-1];
-        }
-      }
+void MELD::collectStructuralVector(const F2FScalar *local, F2FScalar *global,
+                                   int vars_per_node) {
+  // In partitioned mode only the referenced nodes are received from the
+  // processors that own them
+  if (send_ptr){
+    F2FScalar *send_buf = new F2FScalar[vars_per_node*send_ptr[nsend_procs]];
+    for ( int i = 0; i < send_ptr[nsend_procs]; i++ ) {
+      memcpy(&send_buf[vars_per_node*i], &local[vars_per_node*send_ids[i]],
+             vars_per_node*sizeof(F2FScalar));
     }
 
-    MPI_Gatherv(local, send_size, F2F_MPI_TYPE, global, ns_list, disps, F2F_MPI_TYPE, 0, struct_comm);
+    MPI_Request *requests = new MPI_Request[nrecv_procs + nsend_procs];
+    for ( int k = 0; k < nrecv_procs; k++ ) {
+      int size = vars_per_node*(recv_ptr[k+1] - recv_ptr[k]);
+      MPI_Irecv(&global[vars_per_node*recv_ptr[k]], size, F2F_MPI_TYPE,
+                recv_procs[k], 0, global_comm, &requests[k]);
+    }
+    for ( int k = 0; k < nsend_procs; k++ ) {
+      int size = vars_per_node*(send_ptr[k+1] - send_ptr[k]);
+      MPI_Isend(&send_buf[vars_per_node*send_ptr[k]], size, F2F_MPI_TYPE,
+                send_procs[k], 0, global_comm, &requests[nrecv_procs+k]);
+    }
+    MPI_Waitall(nrecv_procs + nsend_procs, requests, MPI_STATUSES_IGNORE);
 
-    delete [] ns_list;
-    delete [] disps;
+    delete [] requests;
+    delete [] send_buf;
+    return;
   }
 
-  // Pass the global list to all the processors
-  MPI_Bcast(global, 3*ns, F2F_MPI_TYPE, struct_root, global_comm);
+  // Otherwise every processor assembles the full vector
+  allgatherStructuralVector(local, global, vars_per_node);
 }
 
 /*
   Reduce vector to get the total across all aero procs then distribute to the
   structural processors
 */
-void MELD::distributeStructuralVector(F2FScalar *global, F2FScalar *local) {
-
-  // Get the contributions from each aero processor
-  MPI_Allreduce(MPI_IN_PLACE, global, ns*3, F2F_MPI_TYPE, MPI_SUM, global_comm);
-
-  // Collect how many nodes each structural processor has
-  if ( struct_comm != MPI_COMM_NULL ) {
-    int struct_nprocs;
-    int struct_rank;
-    MPI_Comm_size(struct_comm, &struct_nprocs);
-    MPI_Comm_rank(struct_comm, &struct_rank);
-
-    int *ns_list = new int[struct_nprocs];
-
-    MPI_Gather(&ns_local, 1, MPI_INT, ns_list, 1, MPI_INT, 0, struct_comm);
-
-    // Distribute to the structural processors
-    int *disps = new int[struct_nprocs];
-    memset(disps, 0, struct_nprocs*sizeof(int));
+void MELD::distributeStructuralVector(F2FScalar *global, F2FScalar *local,
+                                      int vars_per_node) {
+  // In partitioned mode the contributions are sent back to the processors
+  // that own the nodes and summed there in a fixed order
+  if (send_ptr){
+    F2FScalar *recv_buf = new F2FScalar[vars_per_node*send_ptr[nsend_procs]];
+
+    MPI_Request *requests = new MPI_Request[nrecv_procs + nsend_procs];
+    for ( int k = 0; k < nsend_procs; k++ ) {
+      int size = vars_per_node*(send_ptr[k+1] - send_ptr[k]);
+      MPI_Irecv(&recv_buf[vars_per_node*send_ptr[k]], size, F2F_MPI_TYPE,
+                send_procs[k], 1, global_comm, &requests[k]);
+    }
+    for ( int k = 0; k < nrecv_procs; k++ ) {
+      int size = vars_per_node*(recv_ptr[k+1] - recv_ptr[k]);
+      MPI_Isend(&global[vars_per_node*recv_ptr[k]], size, F2F_MPI_TYPE,
+                recv_procs[k], 1, global_comm, &requests[nsend_procs+k]);
+    }
+    MPI_Waitall(nrecv_procs + nsend_procs, requests, MPI_STATUSES_IGNORE);
 
-    if ( struct_rank == 0){
-      for (int proc = 0; proc < struct_nprocs; proc++){
-        ns_list[proc] *= 3;
-        if (proc > 0){
-          disps[proc] = disps[proc-1] + ns_list[proc-1];
-        }
+    memset(local, 0, vars_per_node*ns_local*sizeof(F2FScalar));
+    for ( int i = 0; i < send_ptr[nsend_procs]; i++ ) {
+      for ( int j = 0; j < vars_per_node; j++ ) {
+        local[vars_per_node*send_ids[i]+j] += recv_buf[vars_per_node*i+j];
       }
     }
 
-    MPI_Scatterv(global, ns_list, disps, F2F_MPI_TYPE, local, ns_local*3, F2F_MPI_TYPE, 0, struct_comm);
-
-    delete [] ns_list;
-    delete [] disps;
+    delete [] requests;
+    delete [] recv_buf;
+    return;
   }
 
+  // Otherwise sum the contributions of every processor to the local nodes
+  reduceScatterStructuralVector(global, local, vars_per_node);
 }
 
-void MELD::distributeStructuralMesh() {
+/*
+  Update the image of the structural mesh if the structural nodes were set
+  since the last update. Returns 1 if the mesh was updated and 0 otherwise
+*/
+int MELD::distributeStructuralMesh() {
   MPI_Allreduce(MPI_IN_PLACE, &mesh_update, 1, MPI_INT, MPI_SUM, global_comm);
-  if ( mesh_update > 0 ) {
-    ns = 0;
-    if (struct_comm != MPI_COMM_NULL) {
-      MPI_Reduce(&ns_local, &ns, 1, MPI_INT, MPI_SUM, 0, struct_comm);
-    }
-
-    MPI_Bcast(&ns, 1, MPI_INT, struct_root, global_comm);
+  int updated = (mesh_update > 0);
+  if ( mesh_update > 0 ){
+    struct_hash = gatherHash(struct_hash_local);
+  }
+  if ( mesh_update > 0 && send_ptr ) {
+    // The partition is fixed, so only update the referenced node locations.
+    // The local nodes are kept to partition the mesh again in reconnect()
+    collectStructuralVector(Xs_local, Xs);
+    mesh_update = 0;
+  }
+  else if ( mesh_update > 0 ) {
+    ns = setStructuralLayout(ns_local);
+    ns_global = ns;
 
     // Allocate memory for structural data, initialize displacement array
     if (Xs){ delete [] Xs; }
@@ -222,10 +284,14 @@ void MELD::distributeStructuralMesh() {
     memset(Us, 0, 3*ns*sizeof(F2FScalar));
 
     collectStructuralVector(Xs_local, Xs);
-    if(Xs_local){ delete [] Xs_local; Xs_local = NULL;}
+    if (!partitioned){
+      delete [] Xs_local;
+      Xs_local = NULL;
+    }
     mesh_update = 0;
   }
 
+  return updated;
 }
 
 
@@ -247,76 +313,648 @@ void MELD::initialize() {
   // Allocate and compute the weights
   global_W = new F2FScalar[nn*na];
   computeWeights(global_W);
-  
-  // Allocate and initialize load transfer variables
-  global_xs0bar = new F2FScalar[3*na];
-  global_R = new F2FScalar[9*na];
-  global_S = new F2FScalar[9*na];
-
-  // Allocate and initialize Jacobian-vector product variables
-  global_M1 = new F2FScalar[15*15*na];
-  global_ipiv = new int[15*na];
+
+  finalizeConnectivity();
+}
+
+/*
+  Partition the structural mesh and allocate the data for the transfers and
+  products once the connectivity and weights are set
+*/
+void MELD::finalizeConnectivity() {
+  // Drop the structural nodes that are not referenced on this processor
+  if (partitioned){
+    partitionStructuralMesh();
+  }
+
+  // Save the node locations for updating the connectivity
+  storeConnectivityMesh();
+
+  if (single_precision){
+    // Only keep the single precision weights and load transfer variables
+    setSingleWeights();
+    single_xs0bar = new float[3*na];
+    single_R = new float[9*na];
+    single_S = new float[9*na];
+  }
+  else {
+    // Allocate and initialize load transfer variables
+    global_xs0bar = new F2FScalar[3*na];
+    global_R = new F2FScalar[9*na];
+    global_S = new F2FScalar[9*na];
+
+    // Allocate and initialize Jacobian-vector product variables
+    global_M1 = new F2FScalar[15*15*na];
+    global_ipiv = new int[15*na];
+  }
+}
+
+/*
+  Use single precision weights and load transfer data for forward-only
+  analysis. The weights are still computed in double precision, and the
+  transfers accumulate their sums in double precision, but the stored
+  per-node data takes half the memory. The factorizations of M1 used by the
+  load transfer are not stored, so the Jacobian-vector products are not
+  available. This must be set before initialize() or loadConnectivity() and
+  is not available in complex mode
+
+  Arguments
+  ---------
+  flag : non-zero to use single precision transfers
+*/
+void MELD::setSinglePrecision(int flag) {
+  int rank;
+  MPI_Comm_rank(global_comm, &rank);
+  if (global_conn){
+    if (rank == struct_root){
+      printf("Transfer scheme [%i]: the precision can only be set before "
+             "initialize()\n", object_id);
+    }
+    return;
+  }
+
+#ifdef FUNTOFEM_USE_COMPLEX
+  if (flag){
+    if (rank == struct_root){
+      printf("Transfer scheme [%i]: single precision transfers are not "
+             "available in complex mode\n", object_id);
+    }
+    return;
+  }
+#endif
+
+  single_precision = (flag ? 1 : 0);
+}
+
+/*
+  Replace the single precision weights with a double precision copy
+*/
+void MELD::setDoubleWeights() {
+  if (single_W){
+    global_W = new F2FScalar[nn*na];
+    for ( int i = 0; i < nn*na; i++ ) {
+      global_W[i] = single_W[i];
+    }
+    delete [] single_W;
+    single_W = NULL;
+  }
+}
+
+/*
+  Replace the double precision weights with a single precision copy
+*/
+void MELD::setSingleWeights() {
+  if (global_W){
+    single_W = new float[nn*na];
+    for ( int i = 0; i < nn*na; i++ ) {
+      single_W[i] = F2FRealPart(global_W[i]);
+    }
+    delete [] global_W;
+    global_W = NULL;
+  }
+}
+
+/*
+  Report the memory used by the arrays of the scheme on this processor
+
+  Returns
+  -------
+  names : names of the allocated arrays
+  bytes : size of each array in bytes
+*/
+int MELD::getMemoryUsage(const char **names, size_t *bytes) {
+  size_t s = sizeof(F2FScalar), f = sizeof(float), k = sizeof(int);
+  int n = TransferScheme::getMemoryUsage(names, bytes);
+  n = addMemoryUsage(n, "Xs_local", Xs_local, s*3*ns_local, names, bytes);
+
+  // Connectivity, weights and load transfer data
+  n = addMemoryUsage(n, "global_conn", global_conn, k*nn*na, names, bytes);
+  n = addMemoryUsage(n, "global_W", global_W, s*nn*na, names, bytes);
+  n = addMemoryUsage(n, "global_xs0bar", global_xs0bar, s*3*na, names, bytes);
+  n = addMemoryUsage(n, "global_R", global_R, s*9*na, names, bytes);
+  n = addMemoryUsage(n, "global_S", global_S, s*9*na, names, bytes);
+  n = addMemoryUsage(n, "global_M1", global_M1, s*15*15*na, names, bytes);
+  n = addMemoryUsage(n, "global_ipiv", global_ipiv, k*15*na, names, bytes);
+  n = addMemoryUsage(n, "single_W", single_W, f*nn*na, names, bytes);
+  n = addMemoryUsage(n, "single_xs0bar", single_xs0bar, f*3*na, names, bytes);
+  n = addMemoryUsage(n, "single_R", single_R, f*9*na, names, bytes);
+  n = addMemoryUsage(n, "single_S", single_S, f*9*na, names, bytes);
+
+  // Node locations and gaps for updating the connectivity
+  n = addMemoryUsage(n, "conn_Xa", conn_Xa, s*3*conn_na, names, bytes);
+  n = addMemoryUsage(n, "conn_Xs", conn_Xs, s*3*conn_ns, names, bytes);
+  n = addMemoryUsage(n, "conn_gap", conn_gap, sizeof(double)*na, names,
+                     bytes);
+
+  // Partitioned structural mesh data
+  n = addMemoryUsage(n, "ref_ids", ref_ids, k*ns, names, bytes);
+  n = addMemoryUsage(n, "recv_procs", recv_procs, k*nrecv_procs, names,
+                     bytes);
+  n = addMemoryUsage(n, "recv_ptr", recv_ptr, k*(nrecv_procs+1), names,
+                     bytes);
+  n = addMemoryUsage(n, "send_procs", send_procs, k*nsend_procs, names,
+                     bytes);
+  n = addMemoryUsage(n, "send_ptr", send_ptr, k*(nsend_procs+1), names,
+                     bytes);
+  if (send_ptr){
+    n = addMemoryUsage(n, "send_ids", send_ids, k*send_ptr[nsend_procs],
+                       names, bytes);
+  }
+  return n;
+}
+
+/*
+  Fingerprint of the meshes and settings the connectivity is computed for
+*/
+uint64_t MELD::computeFingerprint() {
+  int info[4] = {na, ns_global, nn, isymm};
+  double beta = F2FRealPart(global_beta);
+  uint64_t h = hashData(info, sizeof(info), F2F_HASH_OFFSET_BASIS);
+  h = hashData(&beta, sizeof(double), h);
+  h = hashData(&struct_hash, sizeof(uint64_t), h);
+  return hashNodes(Xa, na, h);
+}
+
+/*
+  Save the aerostructural connectivity and weights together with the
+  fingerprint of the meshes they were computed for. The connectivity is
+  written in the ordering of the full structural mesh, so the file can also
+  be loaded with a different partitioned setting
+
+  Arguments
+  ---------
+  filename : name of the file (with the rank appended on more than one
+             processor)
+
+  Returns
+  -------
+  fail : non-zero if the connectivity could not be saved on any processor
+*/
+int MELD::saveConnectivity(const char *filename) {
+  int fail = 0;
+  if (!global_conn){
+    fail = 1;
+  }
+  else {
+    const int *conn = global_conn;
+    int *conn_full = NULL;
+    if (ref_ids){
+      conn_full = new int[nn*na];
+      for ( int i = 0; i < nn*na; i++ ) {
+        int indx = global_conn[i];
+        if (indx >= ns){
+          conn_full[i] = ref_ids[indx-ns] + ns_global;
+        }
+        else {
+          conn_full[i] = ref_ids[indx];
+        }
+      }
+      conn = conn_full;
+    }
+
+    // The file always holds the weights in double precision
+    if (single_precision){ setDoubleWeights(); }
+    fail = writeConnectivityFile(filename, conn_fingerprint, nn, conn,
+                                 global_W, conn_gap);
+    if (single_precision){ setSingleWeights(); }
+    if (conn_full){ delete [] conn_full; }
+  }
+
+  MPI_Allreduce(MPI_IN_PLACE, &fail, 1, MPI_INT, MPI_MAX, global_comm);
+  return fail;
+}
+
+/*
+  Load the aerostructural connectivity and weights saved by
+  saveConnectivity() in place of initialize(). The file is rejected if it
+  was saved for different meshes or settings, in which case the scheme is
+  left uninitialized
+
+  Arguments
+  ---------
+  filename : name of the file (with the rank appended on more than one
+             processor)
+
+  Returns
+  -------
+  fail : non-zero if the file was rejected on any processor
+*/
+int MELD::loadConnectivity(const char *filename) {
+  // global number of structural nodes
+  distributeStructuralMesh();
+
+  int rank;
+  MPI_Comm_rank(global_comm, &rank);
+  if (global_conn){
+    if (rank == struct_root){
+      printf("Transfer scheme [%i]: the connectivity can only be loaded "
+             "before initialize()\n", object_id);
+    }
+    return 1;
+  }
+
+  // Check that user doesn't set more nearest nodes than exist in total
+  if (nn > ns) { nn = ns; }
+
+  int *conn = new int[nn*na];
+  F2FScalar *W = new F2FScalar[nn*na];
+  double *gap = new double[na];
+  int fail = readConnectivityFile(filename, computeFingerprint(), nn,
+                                  conn, W, gap);
+  MPI_Allreduce(MPI_IN_PLACE, &fail, 1, MPI_INT, MPI_MAX, global_comm);
+  if (fail){
+    delete [] conn;
+    delete [] W;
+    delete [] gap;
+    return fail;
+  }
+
+  // The gaps are only kept once reconnect() is used
+  global_conn = conn;
+  global_W = W;
+  delete [] gap;
+
+  finalizeConnectivity();
+
+  if (rank == struct_root){
+    printf("Transfer scheme [%i]: loaded the connectivity from %s\n",
+           object_id, filename);
+  }
+
+  return 0;
+}
+
+/*
+  Save the node counts and fingerprint of the current connectivity, and the
+  node locations once they are kept for reconnect()
+*/
+void MELD::storeConnectivityMesh() {
+  conn_na = na;
+  conn_ns = ns;
+  if (conn_Xa){
+    memcpy(conn_Xa, Xa, 3*na*sizeof(F2FScalar));
+    memcpy(conn_Xs, Xs, 3*ns*sizeof(F2FScalar));
+  }
+  conn_fingerprint = computeFingerprint();
+}
+
+/*
+  Update the aerostructural connectivity and weights after the nodes have been
+  moved with setAeroNodes() and setStructNodes(). The number of nodes must not
+  change.
+
+  The set of nearest structural nodes of an aerodynamic node can only change
+  once the gap between the distances to its (nn+1)-th and nn-th closest
+  structural nodes closes. The gap shrinks by at most twice the sum of the
+  movement of the aerodynamic node and the largest structural movement, so the
+  search is only repeated for the aerodynamic nodes whose gap may have closed,
+  starting from the previous connectivity for the rest. The weights are
+  recomputed for the aerodynamic nodes that moved, or are connected to a
+  structural node that moved, by more than tol. The node locations and gaps
+  this relies on are only stored from the first call, which searches every
+  aerodynamic node, so schemes that are never reconnected do not keep a
+  second copy of the meshes.
+
+  In partitioned mode each processor only holds the structural nodes
+  referenced by its connectivity, which may not include the new nearest
+  nodes. The full structural mesh is then gathered again from the nodes set
+  on each processor, and the connectivity is computed and partitioned from
+  scratch as in initialize().
+
+  Arguments
+  ---------
+  tol : movement below which the weights of a node are not recomputed
+*/
+void MELD::reconnect(double tol) {
+  if (partitioned && global_conn){
+    freeConnectivity();
+    mesh_update = 1;
+    initialize();
+    return;
+  }
+
+  distributeStructuralMesh();
+
+  if (!global_conn){
+    initialize();
+    return;
+  }
+
+  int rank;
+  MPI_Comm_rank(global_comm, &rank);
+  if (na != conn_na || ns != conn_ns){
+    if (rank == struct_root){
+      printf("Transfer scheme [%i]: reconnect requires the same number of "
+             "nodes, call initialize() on a new scheme\n", object_id);
+    }
+    return;
+  }
+
+  // The node locations and gaps of the connectivity are only kept once
+  // reconnect() is used, so the first call searches every aerodynamic node
+  int full = (conn_Xa == NULL);
+  if (full){
+    conn_Xa = new F2FScalar[3*na];
+    conn_Xs = new F2FScalar[3*ns];
+    conn_gap = new double[na];
+  }
+
+  // Find the largest structural movement and the structural nodes that moved
+  // by more than tol
+  int *s_moved = new int[ns];
+  double ds_max = 0.0;
+  int search_all = full;
+  for ( int j = 0; j < ns && !full; j++ ) {
+    F2FScalar v[3];
+    vec_diff(&conn_Xs[3*j], &Xs[3*j], v);
+    double ds = sqrt(F2FRealPart(vec_dot(v, v)));
+    if (ds > ds_max){ ds_max = ds; }
+    s_moved[j] = (ds > tol);
+
+    // A node moving onto or off the plane of symmetry adds or removes its
+    // reflection, so all the aerodynamic nodes must be searched again
+    if (isymm > -1){
+      double eps = 1e-7;
+      if ((fabs(F2FRealPart(Xs[3*j+isymm])) > eps) != 
+          (fabs(F2FRealPart(conn_Xs[3*j+isymm])) > eps)){
+        search_all = 1;
+      }
+    }
+  }
+
+  // Find the aerodynamic nodes to search for and to compute weights for
+  int *search_ids = new int[na];
+  int *weight_ids = new int[na];
+  int nsearch = 0, nweight = 0;
+  for ( int i = 0; i < na; i++ ) {
+    int search = search_all, moved = search_all;
+    if (!search){
+      F2FScalar v[3];
+      vec_diff(&conn_Xa[3*i], &Xa[3*i], v);
+      double da = sqrt(F2FRealPart(vec_dot(v, v)));
+
+      conn_gap[i] -= 2.0*(da + ds_max);
+      search = (conn_gap[i] <= 0.0);
+
+      moved = (search || da > tol);
+      for ( int j = 0; j < nn && !moved; j++ ) {
+        int indx = global_conn[nn*i+j];
+        if (indx >= ns){ indx -= ns; }
+        moved = s_moved[indx];
+      }
+    }
+
+    if (search){ search_ids[nsearch++] = i; }
+    if (moved){ weight_ids[nweight++] = i; }
+  }
+
+  if (nsearch > 0){
+    setAeroStructConn(global_conn, nsearch, search_ids);
+  }
+  if (nweight > 0){
+    if (single_precision){ setDoubleWeights(); }
+    computeWeights(global_W, nweight, weight_ids);
+    if (single_precision){ setSingleWeights(); }
+  }
+
+  // Save the node locations of the updated connectivity
+  storeConnectivityMesh();
+
+  // Report the number of updated aerodynamic nodes
+  int counts[3] = {nsearch, nweight, na};
+  MPI_Allreduce(MPI_IN_PLACE, counts, 3, MPI_INT, MPI_SUM, global_comm);
+  if (rank == struct_root){
+    printf("Transfer scheme [%i]: reconnect searched %d and reweighted %d "
+           "of %d aerodynamic nodes\n", object_id, counts[0], counts[1],
+           counts[2]);
+  }
+
+  delete [] s_moved;
+  delete [] search_ids;
+  delete [] weight_ids;
+}
+
+/*
+  Replace the global image of the structural mesh with the structural nodes
+  referenced by the local aerostructural connectivity and set up the
+  point-to-point exchange with the processors that own them. The
+  connectivity is renumbered to the local ordering of the referenced nodes
+*/
+void MELD::partitionStructuralMesh() {
+  int rank, nprocs;
+  MPI_Comm_rank(global_comm, &rank);
+  MPI_Comm_size(global_comm, &nprocs);
+
+  // Find the structural rank and number of structural nodes of every
+  // processor in the global communicator
+  int info[2] = {-1, 0};
+  if (struct_comm != MPI_COMM_NULL){
+    MPI_Comm_rank(struct_comm, &info[0]);
+    info[1] = ns_local;
+  }
+  int *all_info = new int[2*nprocs];
+  MPI_Allgather(info, 2, MPI_INT, all_info, 2, MPI_INT, global_comm);
+
+  // The global structural ordering follows the structural rank, so record
+  // the global rank and first global node of each structural processor
+  int struct_nprocs = 0;
+  for ( int p = 0; p < nprocs; p++ ) {
+    if (all_info[2*p] >= 0){ struct_nprocs++; }
+  }
+  int *owner = new int[struct_nprocs];
+  int *owner_ptr = new int[struct_nprocs+1];
+  for ( int p = 0; p < nprocs; p++ ) {
+    if (all_info[2*p] >= 0){
+      owner[all_info[2*p]] = p;
+      owner_ptr[all_info[2*p]+1] = all_info[2*p+1];
+    }
+  }
+  owner_ptr[0] = 0;
+  for ( int k = 0; k < struct_nprocs; k++ ) {
+    owner_ptr[k+1] += owner_ptr[k];
+  }
+
+  // Number the referenced nodes in increasing global order so that the nodes
+  // owned by each processor form a contiguous range
+  int *local_index = new int[ns];
+  for ( int j = 0; j < ns; j++ ) {
+    local_index[j] = -1;
+  }
+  for ( int i = 0; i < nn*na; i++ ) {
+    int indx = global_conn[i];
+    if (indx >= ns){ indx -= ns; }
+    local_index[indx] = 0;
+  }
+  int nref = 0;
+  for ( int j = 0; j < ns; j++ ) {
+    if (local_index[j] >= 0){ nref++; }
+  }
+  ref_ids = new int[nref];
+  nref = 0;
+  for ( int j = 0; j < ns; j++ ) {
+    if (local_index[j] >= 0){
+      local_index[j] = nref;
+      ref_ids[nref] = j;
+      nref++;
+    }
+  }
+
+  // Renumber the connectivity, keeping reflected nodes offset by the number
+  // of structural nodes
+  for ( int i = 0; i < nn*na; i++ ) {
+    int indx = global_conn[i];
+    if (indx >= ns){
+      global_conn[i] = local_index[indx-ns] + nref;
+    }
+    else {
+      global_conn[i] = local_index[indx];
+    }
+  }
+
+  // Count the referenced nodes owned by each processor
+  int *recv_count = new int[nprocs];
+  memset(recv_count, 0, nprocs*sizeof(int));
+  for ( int j = 0, k = 0; j < nref; j++ ) {
+    while (ref_ids[j] >= owner_ptr[k+1]){ k++; }
+    recv_count[owner[k]]++;
+  }
+
+  // Exchange the counts so that each owner knows who needs its nodes
+  int *send_count = new int[nprocs];
+  MPI_Alltoall(recv_count, 1, MPI_INT, send_count, 1, MPI_INT, global_comm);
+
+  nrecv_procs = 0;
+  nsend_procs = 0;
+  for ( int p = 0; p < nprocs; p++ ) {
+    if (recv_count[p] > 0){ nrecv_procs++; }
+    if (send_count[p] > 0){ nsend_procs++; }
+  }
+  recv_procs = new int[nrecv_procs];
+  recv_ptr = new int[nrecv_procs+1];
+  send_procs = new int[nsend_procs];
+  send_ptr = new int[nsend_procs+1];
+  recv_ptr[0] = 0;
+  send_ptr[0] = 0;
+  for ( int p = 0, r = 0, s = 0; p < nprocs; p++ ) {
+    if (recv_count[p] > 0){
+      recv_procs[r] = p;
+      recv_ptr[r+1] = recv_ptr[r] + recv_count[p];
+      r++;
+    }
+    if (send_count[p] > 0){
+      send_procs[s] = p;
+      send_ptr[s+1] = send_ptr[s] + send_count[p];
+      s++;
+    }
+  }
+
+  // Send the global ids of the referenced nodes to their owners
+  send_ids = new int[send_ptr[nsend_procs]];
+  MPI_Request *requests = new MPI_Request[nrecv_procs + nsend_procs];
+  for ( int k = 0; k < nsend_procs; k++ ) {
+    MPI_Irecv(&send_ids[send_ptr[k]], send_ptr[k+1] - send_ptr[k], MPI_INT,
+              send_procs[k], 0, global_comm, &requests[k]);
+  }
+  for ( int k = 0; k < nrecv_procs; k++ ) {
+    MPI_Isend(&ref_ids[recv_ptr[k]], recv_ptr[k+1] - recv_ptr[k], MPI_INT,
+              recv_procs[k], 0, global_comm, &requests[nsend_procs+k]);
+  }
+  MPI_Waitall(nrecv_procs + nsend_procs, requests, MPI_STATUSES_IGNORE);
+
+  // Convert the requested global ids to the local structural ordering
+  if (nsend_procs > 0){
+    int offset = owner_ptr[info[0]];
+    for ( int i = 0; i < send_ptr[nsend_procs]; i++ ) {
+      send_ids[i] -= offset;
+    }
+  }
+
+  // Keep only the locations of the referenced nodes
+  F2FScalar *Xs_ref = new F2FScalar[3*nref];
+  for ( int j = 0; j < nref; j++ ) {
+    memcpy(&Xs_ref[3*j], &Xs[3*ref_ids[j]], 3*sizeof(F2FScalar));
+  }
+  delete [] Xs;
+  delete [] Us;
+  Xs = Xs_ref;
+  Us = new F2FScalar[3*nref];
+  memset(Us, 0, 3*nref*sizeof(F2FScalar));
+  ns = nref;
+
+  delete [] all_info;
+  delete [] owner;
+  delete [] owner_ptr;
+  delete [] local_index;
+  delete [] recv_count;
+  delete [] send_count;
+  delete [] requests;
 }
 
 /* 
   Builds aerostructural connectivity through LocatePoint search, linking each
   aerodynamic node with a specified number of nearest structural nodes
+
+  Arguments
+  ---------
+  nids     : number of aerodynamic nodes to search for (all if negative)
+  aero_ids : the aerodynamic nodes to search for (all if NULL)
   
   Returns
   --------
   conn : aerostructural connectivity
 
 */
-void MELD::setAeroStructConn(int *conn) {
-  // Copy or duplicate and reflect the unique structural nodes
-  F2FScalar *Xs_dup = NULL;
-  int num_locate_nodes = 0;
-  int *locate_to_reflected_index = NULL;
-
+void MELD::setAeroStructConn(int *conn, int nids, const int *aero_ids) {
+  // Create instance of LocatePoint class to perform the following searches.
+  // With symmetry, the mirror images of the structural nodes are searched
+  // without duplicating the structural mesh and are numbered ns + k
+  int min_bin_size = 10;
+  LocatePoint *locator = new LocatePoint(Xs, ns, min_bin_size);
+  int num_locate_nodes = ns;
   if (isymm > -1) {
-    Xs_dup = new F2FScalar[6*ns];
-    memcpy(Xs_dup, Xs, 3*ns*sizeof(F2FScalar));
-
-    double tol = 1e-7;
-    for (int k = 0; k < ns; k++) {
-      if (fabs(F2FRealPart(Xs_dup[3*k+isymm])) > tol) {
-        // Node is not on the plane of symmetry, so copy and...
-        memcpy(&Xs_dup[3*(ns+k)], &Xs_dup[3*k], 3*sizeof(F2FScalar));
-        // reflect
-        Xs_dup[3*(ns+k)+isymm] *= -1.0;
-      } else {
-        Xs_dup[3*(ns+k)+0] = -(k+1)*9.0e9;
-        Xs_dup[3*(ns+k)+1] = -(k+1)*9.0e9+1;
-        Xs_dup[3*(ns+k)+2] = -(k+1)*9.0e9+2;
-      }
-    }
-    num_locate_nodes = 2*ns;
-  } else {
-    Xs_dup = new F2FScalar[3*ns];
-    memcpy(Xs_dup, Xs, 3*ns*sizeof(F2FScalar));
-    num_locate_nodes = ns;
+    num_locate_nodes = locator->getNumSymmPoints(isymm);
   }
 
-  // Create instance of LocatePoint class to perform the following searches
-  int min_bin_size = 10;
-  LocatePoint *locator = new LocatePoint(Xs_dup, num_locate_nodes, min_bin_size);
-
-  // Indices of nearest nodes
-  int *indx = new int[nn]; 
-  F2FScalar *dist = new F2FScalar[nn];
-
-  // For each aerodynamic node, copy the indices of the nearest n structural
-  // nodes into the conn array
-  for ( int i = 0; i < na; i++ ) {
-    F2FScalar xa0[3];
-    memcpy(xa0, &Xa[3*i], 3*sizeof(F2FScalar));
+  // Collect the aerodynamic nodes to search for
+  int nq = na;
+  const F2FScalar *xq = Xa;
+  F2FScalar *Xa_ids = NULL;
+  if (aero_ids){
+    nq = nids;
+    Xa_ids = new F2FScalar[3*nq];
+    for ( int k = 0; k < nq; k++ ) {
+      memcpy(&Xa_ids[3*k], &Xa[3*aero_ids[k]], 3*sizeof(F2FScalar));
+    }
+    xq = Xa_ids;
+  }
 
-    locator->locateKClosest(nn, indx, dist, xa0);
-    memcpy(&conn[nn*i], indx, nn*sizeof(int));
+  // Search for one extra node to record the gap between the nn-th and the
+  // (nn+1)-th closest structural nodes
+  int K = (nn < num_locate_nodes ? nn+1 : nn);
+  int *indx = new int[K*nq];
+  F2FScalar *dist = new F2FScalar[K*nq];
+
+  // For each aerodynamic node, find the indices of the nearest n structural
+  // nodes in one batched query
+  locator->locateKClosestBatch(K, nq, xq, indx, dist, nthreads, isymm);
+
+  // The gaps are only recorded once they are kept for reconnect()
+  for ( int k = 0; k < nq; k++ ) {
+    int i = (aero_ids ? aero_ids[k] : k);
+    memcpy(&conn[nn*i], &indx[K*k], nn*sizeof(int));
+    if (!conn_gap){
+      continue;
+    }
+    if (K > nn){
+      conn_gap[i] = (sqrt(F2FRealPart(dist[K*k+nn])) - 
+                     sqrt(F2FRealPart(dist[K*k+nn-1])));
+    }
+    else {
+      conn_gap[i] = 1.0e300; // every structural node is connected
+    }
   }
 
-  // Free the duplicate array
-  delete [] Xs_dup;
+  if (Xa_ids){ delete [] Xa_ids; }
 
   // Delete the LocatePoint object and release memory
   delete [] indx;
@@ -327,13 +965,23 @@ void MELD::setAeroStructConn(int *conn) {
 /* 
   Computes weights of structural nodes 
 
+  Arguments
+  ---------
+  nids     : number of aerodynamic nodes to compute weights for (all if
+             negative)
+  aero_ids : the aerodynamic nodes to compute weights for (all if NULL)
+
   Returns
   --------
   W : weights
 
 */
-void MELD::computeWeights(F2FScalar *W) {
-  for (int i = 0; i < na; i++) {
+void MELD::computeWeights(F2FScalar *W, int nids, const int *aero_ids) {
+  int nq = (aero_ids ? nids : na);
+
+  F2F_OMP_PARALLEL_FOR
+  for (int k = 0; k < nq; k++) {
+    int i = (aero_ids ? aero_ids[k] : k);
     const F2FScalar *xa0 = &Xa[3*i];
     const int *local_conn = &global_conn[i*nn];
     F2FScalar *w = &W[i*nn];
@@ -410,9 +1058,11 @@ void MELD::transferDisps(const F2FScalar *struct_disps,
   collectStructuralVector(struct_disps, Us);
   
   // Zero the outputs
-  memset(global_xs0bar, 0.0, 3*na*sizeof(F2FScalar));
-  memset(global_R, 0.0, 9*na*sizeof(F2FScalar));
-  memset(global_S, 0.0, 9*na*sizeof(F2FScalar));
+  if (!single_precision){
+    memset(global_xs0bar, 0.0, 3*na*sizeof(F2FScalar));
+    memset(global_R, 0.0, 9*na*sizeof(F2FScalar));
+    memset(global_S, 0.0, 9*na*sizeof(F2FScalar));
+  }
   memset(aero_disps, 0.0, 3*na*sizeof(F2FScalar));
 
   // Add structural displacments to structural node locations
@@ -421,13 +1071,42 @@ void MELD::transferDisps(const F2FScalar *struct_disps,
     Xsd[j] = Xs[j] + Us[j];
   }
 
+  // Double precision copies of the weights of each thread with single
+  // precision transfers
+  F2FScalar *Wd = NULL;
+  if (single_precision){
+    Wd = new F2FScalar[nn*nthreads];
+  }
+
+  F2F_OMP_PARALLEL_FOR
   for ( int i = 0; i < na; i++ ) {
     const F2FScalar *xa0 = &Xa[3*i];
+    const int *local_conn = &global_conn[i*nn];
+
+    // Get the weights and the locations of the load transfer data, which
+    // are computed in double precision and stored afterwards with single
+    // precision transfers
+    const F2FScalar *W;
+    F2FScalar *xs0bar, *R, *S;
+    F2FScalar xs0bar_d[3], R_d[9], S_d[9];
+    if (single_precision){
+      F2FScalar *w = &Wd[nn*F2FThreadNum()];
+      for ( int j = 0; j < nn; j++ ) {
+        w[j] = single_W[nn*i+j];
+      }
+      W = w;
+      xs0bar = xs0bar_d;
+      R = R_d;
+      S = S_d;
+    }
+    else {
+      W = &global_W[i*nn];
+      xs0bar = &global_xs0bar[3*i];
+      R = &global_R[9*i];
+      S = &global_S[9*i];
+    }
 
     // Compute the centroids of the original and displaced sets of nodes
-    F2FScalar *xs0bar = &global_xs0bar[3*i];
-    const int *local_conn = &global_conn[i*nn];
-    const F2FScalar *W = &global_W[i*nn];
     computeCentroid(local_conn, W, Xs, xs0bar);
 
     F2FScalar xsbar[3];
@@ -438,14 +1117,32 @@ void MELD::transferDisps(const F2FScalar *struct_disps,
     computeCovariance(Xs, Xsd, local_conn, W, xs0bar, xsbar, H);
 
     // Compute the optimal rotation
-    computeRotation(H, &global_R[9*i], &global_S[9*i]);
+    computeRotation(H, R, S);
+
+    if (single_precision){
+      for ( int k = 0; k < 3; k++ ) {
+        single_xs0bar[3*i+k] = F2FRealPart(xs0bar[k]);
+      }
+      for ( int k = 0; k < 9; k++ ) {
+        single_R[9*i+k] = F2FRealPart(R[k]);
+        single_S[9*i+k] = F2FRealPart(S[k]);
+      }
+    }
+    else {
+      // Assemble and factor M1 for this node. The factors only depend on R
+      // and S, so they are reused by transferLoads and every Jacobian-vector
+      // product until the next call to transferDisps
+      F2FScalar *M1 = &global_M1[15*15*i];
+      assembleM1(R, S, M1);
+      int m = 15, info = 0;
+      LAPACKgetrf(&m, &m, M1, &m, &global_ipiv[15*i], &info);
+    }
     
     // Form the vector r from the initial centroid to the aerodynamic surface node
     F2FScalar r[3]; 
     vec_diff(xs0bar, xa0, r);
 
     // Rotate r vector using rotation matrix
-    const F2FScalar *R = &global_R[9*i];
     F2FScalar rho[3];
     rho[0] = R[0]*r[0] + R[3]*r[1] + R[6]*r[2];
     rho[1] = R[1]*r[0] + R[4]*r[1] + R[7]*r[2];
@@ -460,6 +1157,7 @@ void MELD::transferDisps(const F2FScalar *struct_disps,
 
   // Free memory
   delete [] Xsd;
+  if (Wd){ delete [] Wd; }
 }
 
 /* 
@@ -593,81 +1291,113 @@ void MELD::transferLoads(const F2FScalar *aero_loads,
   F2FScalar *struct_loads_global = new F2FScalar[3*ns];
   memset(struct_loads_global, 0, 3*ns*sizeof(F2FScalar));
 
-  // Loop over all aerodynamic surface nodes
-  for ( int i = 0; i < na; i++ ) {
-    // Compute vector d from centroid to aero node
-    const F2FScalar *xa0 = &Xa[3*i];
-    const F2FScalar *xs0bar = &global_xs0bar[3*i];
-    F2FScalar r[3];
-    vec_diff(xs0bar, xa0, r);
-    
-    // Compute X
-    const F2FScalar *R = &global_R[9*i];
-    const F2FScalar *S = &global_S[9*i];
-    F2FScalar *M1 = &global_M1[15*15*i];
-    assembleM1(R, S, M1);
-
-    int *ipiv = &global_ipiv[15*i];
-    int m = 15, info = 0;
-    LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
-
-    const F2FScalar *fa = &Fa[3*i];
-    F2FScalar x[] = {-fa[0]*r[0], -fa[1]*r[0], -fa[2]*r[0],
-                     -fa[0]*r[1], -fa[1]*r[1], -fa[2]*r[1],
-                     -fa[0]*r[2], -fa[1]*r[2], -fa[2]*r[2],
-                     0.0, 0.0, 0.0,
-                     0.0, 0.0, 0.0};
-    int one = 1; info = 0;
-    LAPACKgetrs("N", &m, &one, M1, &m, ipiv, x, &m, &info);
-    F2FScalar X[] = {x[0], x[1], x[2],
-                     x[3], x[4], x[5],
-                     x[6], x[7], x[8]};
-
-    // Compute load contribution of aerodynamic surface node to structural node
-    for ( int j = 0; j < nn; j++ ) {
-      int indx = global_conn[i*nn+j];
-
-      if (indx < ns){
-        // Compute vector q from centroid to structural node
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar q[3];
-        vec_diff(xs0bar, xs0, q);
-
-        const F2FScalar w = global_W[nn*i+j];
-        F2FScalar *fs = &struct_loads_global[3*indx];
-
-        // fs = w*(X^{T}*q + w*fa)
-        fs[0] += w*(X[0]*q[0] + X[1]*q[1] + X[2]*q[2] + fa[0]); 
-        fs[1] += w*(X[3]*q[0] + X[4]*q[1] + X[5]*q[2] + fa[1]); 
-        fs[2] += w*(X[6]*q[0] + X[7]*q[1] + X[8]*q[2] + fa[2]); 
+  // Compute the contributions of each block of aerodynamic nodes in
+  // parallel, then add them to the structural nodes in a fixed order
+  F2FScalar *contrib = new F2FScalar[3*nn*F2F_AERO_BLOCK_SIZE];
+  for ( int i0 = 0; i0 < na; i0 += F2F_AERO_BLOCK_SIZE ) {
+    int i1 = (i0 + F2F_AERO_BLOCK_SIZE < na ?
+              i0 + F2F_AERO_BLOCK_SIZE : na);
+    memset(contrib, 0, 3*nn*(i1 - i0)*sizeof(F2FScalar));
+
+    F2F_OMP_PARALLEL_FOR
+    for ( int i = i0; i < i1; i++ ) {
+      // Get the load transfer data from transferDisps. With single precision
+      // transfers, M1 is assembled from R and S and factored for each node
+      const F2FScalar *xs0bar, *M1;
+      const int *ipiv;
+      F2FScalar xs0bar_d[3], M1_d[15*15];
+      int ipiv_d[15];
+      int m = 15, info = 0;
+      if (single_precision){
+        F2FScalar R[9], S[9];
+        for ( int k = 0; k < 3; k++ ) {
+          xs0bar_d[k] = single_xs0bar[3*i+k];
+        }
+        for ( int k = 0; k < 9; k++ ) {
+          R[k] = single_R[9*i+k];
+          S[k] = single_S[9*i+k];
+        }
+        assembleM1(R, S, M1_d);
+        LAPACKgetrf(&m, &m, M1_d, &m, ipiv_d, &info);
+        xs0bar = xs0bar_d;
+        M1 = M1_d;
+        ipiv = ipiv_d;
       }
       else {
-        indx -= ns;
+        xs0bar = &global_xs0bar[3*i];
+        M1 = &global_M1[15*15*i];
+        ipiv = &global_ipiv[15*i];
+      }
 
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;        
+      // Compute vector d from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3*i];
+      F2FScalar r[3];
+      vec_diff(xs0bar, xa0, r);
+
+      const F2FScalar *fa = &Fa[3*i];
+      F2FScalar x[] = {-fa[0]*r[0], -fa[1]*r[0], -fa[2]*r[0],
+                       -fa[0]*r[1], -fa[1]*r[1], -fa[2]*r[1],
+                       -fa[0]*r[2], -fa[1]*r[2], -fa[2]*r[2],
+                       0.0, 0.0, 0.0,
+                       0.0, 0.0, 0.0};
+      int one = 1; info = 0;
+      LAPACKgetrs("N", &m, &one, M1, &m, ipiv, x, &m, &info);
+      F2FScalar X[] = {x[0], x[1], x[2],
+                       x[3], x[4], x[5],
+                       x[6], x[7], x[8]};
+
+      // Compute load contribution of aerodynamic surface node to structural node
+      for ( int j = 0; j < nn; j++ ) {
+        int indx = global_conn[i*nn+j];
+
+        if (indx < ns){
+          // Compute vector q from centroid to structural node
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar q[3];
+          vec_diff(xs0bar, xs0, q);
+
+          const F2FScalar w = (single_precision ? single_W[nn*i+j] :
+                               global_W[nn*i+j]);
+          F2FScalar *fs = &contrib[3*(nn*(i - i0) + j)];
+
+          // fs = w*(X^{T}*q + w*fa)
+          fs[0] += w*(X[0]*q[0] + X[1]*q[1] + X[2]*q[2] + fa[0]); 
+          fs[1] += w*(X[3]*q[0] + X[4]*q[1] + X[5]*q[2] + fa[1]); 
+          fs[2] += w*(X[6]*q[0] + X[7]*q[1] + X[8]*q[2] + fa[2]); 
+        }
+        else {
+          indx -= ns;
 
-        F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;        
 
-        const F2FScalar w = global_W[nn*i+j];
-        F2FScalar *fs = &struct_loads_global[3*indx];
+          F2FScalar q[3];
+          vec_diff(xs0bar, rxs0, q);
+
+          const F2FScalar w = (single_precision ? single_W[nn*i+j] :
+                               global_W[nn*i+j]);
+          F2FScalar *fs = &contrib[3*(nn*(i - i0) + j)];
         
-        F2FScalar rfs[3];
-        rfs[0] = w*(X[0]*q[0] + X[1]*q[1] + X[2]*q[2] + fa[0]); 
-        rfs[1] = w*(X[3]*q[0] + X[4]*q[1] + X[5]*q[2] + fa[1]);
-        rfs[2] = w*(X[6]*q[0] + X[7]*q[1] + X[8]*q[2] + fa[2]); 
-        rfs[isymm] *= -1.0;
+          F2FScalar rfs[3];
+          rfs[0] = w*(X[0]*q[0] + X[1]*q[1] + X[2]*q[2] + fa[0]); 
+          rfs[1] = w*(X[3]*q[0] + X[4]*q[1] + X[5]*q[2] + fa[1]);
+          rfs[2] = w*(X[6]*q[0] + X[7]*q[1] + X[8]*q[2] + fa[2]); 
+          rfs[isymm] *= -1.0;
         
-        // fs = w*(X^{T}*q + w*fa)
-        fs[0] += rfs[0];
-        fs[1] += rfs[1];
-        fs[2] += rfs[2];
+          // fs = w*(X^{T}*q + w*fa)
+          fs[0] += rfs[0];
+          fs[1] += rfs[1];
+          fs[2] += rfs[2];
+        }
       }
     }
+
+    addStructuralContributions(nn, global_conn, i0, i1, contrib, 3,
+                               struct_loads_global);
   }
+  delete [] contrib;
 
   // distribute the structural loads
   distributeStructuralVector(struct_loads_global, struct_loads);
@@ -688,16 +1418,40 @@ void MELD::transferLoads(const F2FScalar *aero_loads,
 
 */
 void MELD::applydDduS(const F2FScalar *vecs, F2FScalar *prods) {
-  // Make a global image of the input vector
-  F2FScalar *vecs_global = new F2FScalar[3*ns];
-  collectStructuralVector(vecs, vecs_global);
+  applydDduSBlock(vecs, prods, 1);
+}
+
+/*  
+  Apply the action of the displacement transfer w.r.t structural displacments
+  Jacobian to a block of input vectors. The input and output vectors are
+  stored node-by-node so that component k of node j of vector f is located
+  at (3*j + k)*nvecs + f
+  
+  Arguments
+  ---------
+  vecs  : block of input vectors
+  nvecs : number of vectors in the block
+
+  Returns
+  --------
+  prods : block of output vectors
+
+*/
+void MELD::applydDduSBlock(const F2FScalar *vecs, F2FScalar *prods,
+                           int nvecs) {
+  if (checkDoublePrecision("applydDduS", prods, 3*na*nvecs)){ return; }
+
+  // Make a global image of the input vectors
+  F2FScalar *vecs_global = new F2FScalar[3*ns*nvecs];
+  collectStructuralVector(vecs, vecs_global, 3*nvecs);
 
   // Zero array of Jacobian-vector products every call
-  memset(prods, 0, 3*na*sizeof(F2FScalar));
+  memset(prods, 0, 3*na*nvecs*sizeof(F2FScalar));
 
   // Loop over all aerodynamic surface nodes
+  F2F_OMP_PARALLEL_FOR
   for ( int i = 0; i < na; i++ ) {
-    F2FScalar *prod = &prods[3*i];
+    F2FScalar *prod = &prods[3*nvecs*i];
 
     // Compute vector r from centroid to aero node
     const F2FScalar *xa0 = &Xa[3*i];
@@ -705,78 +1459,72 @@ void MELD::applydDduS(const F2FScalar *vecs, F2FScalar *prods) {
     F2FScalar r[3];
     vec_diff(xs0bar, xa0, r);
 
-    // Compute XX
-    const F2FScalar *R = &global_R[9*i];
-    const F2FScalar *S = &global_S[9*i];
-    F2FScalar M1[15*15];
-    assembleM1(R, S, M1);
-    int ipiv[15];
+    // Compute XX using the factorization of M1 from transferDisps
+    const F2FScalar *M1 = &global_M1[15*15*i];
+    const int *ipiv = &global_ipiv[15*i];
     int m = 15, info = 0;
-    LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
-    F2FScalar x[15];
+    F2FScalar x[15*3];
     F2FScalar XX[9*3];
 
-    memset(x, 0.0, 15*sizeof(F2FScalar));
-    x[0] -= r[0]; 
-    x[3] -= r[1];
-    x[6] -= r[2];
-    int nrhs = 1; info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[0], x, 9*sizeof(F2FScalar));
-
-    memset(x, 0.0, 15*sizeof(F2FScalar));
-    x[1] -= r[0]; 
-    x[4] -= r[1];
-    x[7] -= r[2];
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[9], x, 9*sizeof(F2FScalar));
-
-    memset(x, 0.0, 15*sizeof(F2FScalar));
-    x[2] -= r[0]; 
-    x[5] -= r[1];
-    x[8] -= r[2];
-    info = 0;
+    memset(x, 0.0, 15*3*sizeof(F2FScalar));
+    for ( int k = 0; k < 3; k++ ) {
+      x[15*k+k] -= r[0];
+      x[15*k+3+k] -= r[1];
+      x[15*k+6+k] -= r[2];
+    }
+    int nrhs = 3;
     LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[18], x, 9*sizeof(F2FScalar));
+    for ( int k = 0; k < 3; k++ ) {
+      memcpy(&XX[9*k], &x[15*k], 9*sizeof(F2FScalar));
+    }
 
     // Loop over linked structural nodes and add up nonzero contributions to
     // Jacobian-vector product
     for ( int j = 0; j < nn; j++ ){
       int indx = global_conn[nn*i+j];
 
-      // Compute vector q from centroid to structural node and get components
-      // of vector input corresponding to current structural node
+      // Compute vector q from centroid to structural node
       F2FScalar q[3];
-      F2FScalar v[3];
+      bool reflected = false;
       if (indx < ns) {
         const F2FScalar *xs0 = &Xs[3*indx];
         vec_diff(xs0bar, xs0, q);
-        memcpy(v, &vecs_global[3*indx], 3*sizeof(F2FScalar));
       }
       else {
         indx -= ns;
+        reflected = true;
         const F2FScalar *xs0 = &Xs[3*indx];
         F2FScalar rxs0[3];
         memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
         rxs0[isymm] *= -1.0;        
         vec_diff(xs0bar, rxs0, q);
-        memcpy(v, &vecs_global[3*indx], 3*sizeof(F2FScalar));
-        v[isymm] *= -1.0;
       }
 
-      // Compute each component of the Jacobian vector product as follows:
-      // Jv[k] = w * [ q[0] q[1] q[2] ][ X[0] X[3] X[6] ][ v[0] ] + w*v[k]
-      //                               [ X[1] X[4] X[7] ][ v[1] ]
-      //                               [ X[2] X[5] X[8] ][ v[2] ]
       F2FScalar w = global_W[nn*i+j];
+      const F2FScalar *vglobal = &vecs_global[3*nvecs*indx];
+
+      for ( int f = 0; f < nvecs; f++ ) {
+        // Get the components of the input vector corresponding to the current
+        // structural node
+        F2FScalar v[3];
+        v[0] = vglobal[f];
+        v[1] = vglobal[nvecs+f];
+        v[2] = vglobal[2*nvecs+f];
+        if (reflected) {
+          v[isymm] *= -1.0;
+        }
 
-      for ( int k = 0; k < 3; k++ ) {
-        F2FScalar *X = &XX[9*k];
-        prod[k] -= w*(q[0]*(X[0]*v[0] + X[3]*v[1] + X[6]*v[2]) + 
-                      q[1]*(X[1]*v[0] + X[4]*v[1] + X[7]*v[2]) + 
-                      q[2]*(X[2]*v[0] + X[5]*v[1] + X[8]*v[2])) + 
-                   w*v[k];
+        // Compute each component of the Jacobian vector product as follows:
+        // Jv[k] = w * [ q[0] q[1] q[2] ][ X[0] X[3] X[6] ][ v[0] ] + w*v[k]
+        //                               [ X[1] X[4] X[7] ][ v[1] ]
+        //                               [ X[2] X[5] X[8] ][ v[2] ]
+        for ( int k = 0; k < 3; k++ ) {
+          F2FScalar *X = &XX[9*k];
+          prod[nvecs*k+f] -= w*(q[0]*(X[0]*v[0] + X[3]*v[1] + X[6]*v[2]) + 
+                                q[1]*(X[1]*v[0] + X[4]*v[1] + X[7]*v[2]) + 
+                                q[2]*(X[2]*v[0] + X[5]*v[1] + X[8]*v[2])) + 
+                             w*v[k];
+        }
       }
     }
   }
@@ -799,117 +1547,135 @@ void MELD::applydDduS(const F2FScalar *vecs, F2FScalar *prods) {
 
 */
 void MELD::applydDduSTrans( const F2FScalar *vecs, F2FScalar *prods ) {
+  applydDduSTransBlock(vecs, prods, 1);
+}
 
-  // Zero array of transpose Jacobian-vector products every call
-  F2FScalar *prods_global = new F2FScalar[3*ns];
-  memset(prods_global, 0, 3*ns*sizeof(F2FScalar));
-
-  // Loop over aerodynamic surface nodes
-  for ( int i = 0; i < na; i++ ) {
-    const F2FScalar *v = &vecs[3*i];
-
-    // Compute vector r from centroid to aero node
-    const F2FScalar *xa0 = &Xa[3*i];
-    const F2FScalar *xs0bar = &global_xs0bar[3*i];
-    F2FScalar r[3];
-    vec_diff(xs0bar, xa0, r);
-
-    // Compute XX
-    const F2FScalar *R = &global_R[9*i];
-    const F2FScalar *S = &global_S[9*i];
-    F2FScalar M1[15*15];
-    assembleM1(R, S, M1);
-    int ipiv[15];
-    int m = 15, info = 0;
-    LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
-    F2FScalar x[15];
-    F2FScalar XX[9*3];
+/*  
+  Apply the action of the displacement transfer w.r.t structural displacements
+  transpose Jacobian to a block of input vectors stored node-by-node
+  
+  Arguments
+  ----------
+  vecs  : block of input vectors
+  nvecs : number of vectors in the block
 
-    memset(x, 0.0, 15*sizeof(F2FScalar));
-    x[0] -= r[0]; 
-    x[3] -= r[1];
-    x[6] -= r[2];
-    int nrhs = 1; info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[0], x, 9*sizeof(F2FScalar));
+  Returns
+  --------
+  prods : block of output vectors
 
-    memset(x, 0.0, 15*sizeof(F2FScalar));
-    x[1] -= r[0]; 
-    x[4] -= r[1];
-    x[7] -= r[2];
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[9], x, 9*sizeof(F2FScalar));
+*/
+void MELD::applydDduSTransBlock( const F2FScalar *vecs, F2FScalar *prods,
+                                 int nvecs ) {
+  if (checkDoublePrecision("applydDduSTrans", prods, 3*ns_local*nvecs)){
+    return;
+  }
 
-    memset(x, 0.0, 15*sizeof(F2FScalar));
-    x[2] -= r[0]; 
-    x[5] -= r[1];
-    x[8] -= r[2];
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[18], x, 9*sizeof(F2FScalar));
+  // Zero array of transpose Jacobian-vector products every call
+  F2FScalar *prods_global = new F2FScalar[3*ns*nvecs];
+  memset(prods_global, 0, 3*ns*nvecs*sizeof(F2FScalar));
+
+  // Compute the contributions of each block of aerodynamic nodes in
+  // parallel, then add them to the structural nodes in a fixed order
+  F2FScalar *contrib = new F2FScalar[3*nvecs*nn*F2F_AERO_BLOCK_SIZE];
+  for ( int i0 = 0; i0 < na; i0 += F2F_AERO_BLOCK_SIZE ) {
+    int i1 = (i0 + F2F_AERO_BLOCK_SIZE < na ?
+              i0 + F2F_AERO_BLOCK_SIZE : na);
+    memset(contrib, 0, 3*nvecs*nn*(i1 - i0)*sizeof(F2FScalar));
+
+    F2F_OMP_PARALLEL_FOR
+    for ( int i = i0; i < i1; i++ ) {
+      const F2FScalar *vi = &vecs[3*nvecs*i];
+
+      // Compute vector r from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3*i];
+      const F2FScalar *xs0bar = &global_xs0bar[3*i];
+      F2FScalar r[3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Compute XX using the factorization of M1 from transferDisps
+      const F2FScalar *M1 = &global_M1[15*15*i];
+      const int *ipiv = &global_ipiv[15*i];
+      int m = 15, info = 0;
+      F2FScalar x[15*3];
+      F2FScalar XX[9*3];
+
+      memset(x, 0.0, 15*3*sizeof(F2FScalar));
+      for ( int k = 0; k < 3; k++ ) {
+        x[15*k+k] -= r[0];
+        x[15*k+3+k] -= r[1];
+        x[15*k+6+k] -= r[2];
+      }
+      int nrhs = 3;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      for ( int k = 0; k < 3; k++ ) {
+        memcpy(&XX[9*k], &x[15*k], 9*sizeof(F2FScalar));
+      }
  
-    // Loop over linked structural nodes and add up nonzero contributions to
-    // Jacobian-vector product
-    for ( int j = 0; j < nn; j++ ) {
-      int indx = global_conn[nn*i+j];
+      // Loop over linked structural nodes and add up nonzero contributions to
+      // Jacobian-vector product
+      for ( int j = 0; j < nn; j++ ) {
+        int indx = global_conn[nn*i+j];
+        bool reflected = false;
 
-      if (indx < ns) {
         // Compute vector q from centroid to structural node
-        const F2FScalar *xs0 = &Xs[3*indx];
         F2FScalar q[3];
-        vec_diff(xs0bar, xs0, q);
-
-        // Compute each component of the transpose Jacobian-vector product as
-        // follows:
-        // J^{T}*v = w[X_{1}^{T}*q X_{2}^{T}*q X_{3}^{T}*q]*v + w*v
-        F2FScalar w = global_W[nn*i+j];
-        F2FScalar *prod = &prods_global[3*indx];
-        prod[0] -= w*v[0];
-        prod[1] -= w*v[1];
-        prod[2] -= w*v[2];
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3*indx];
+          vec_diff(xs0bar, xs0, q);
+        }
+        else {
+          indx -= ns;
+          reflected = true;
+
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;        
+          vec_diff(xs0bar, rxs0, q);
+        }
 
+        // Form the columns of [X_{1}^{T}*q X_{2}^{T}*q X_{3}^{T}*q]
+        F2FScalar XTq[9];
         for ( int k = 0; k < 3; k++ ) {
           F2FScalar *X = &XX[9*k];
-          prod[0] -= w*(X[0]*q[0] + X[1]*q[1] + X[2]*q[2])*v[k]; 
-          prod[1] -= w*(X[3]*q[0] + X[4]*q[1] + X[5]*q[2])*v[k]; 
-          prod[2] -= w*(X[6]*q[0] + X[7]*q[1] + X[8]*q[2])*v[k]; 
+          XTq[3*k+0] = X[0]*q[0] + X[1]*q[1] + X[2]*q[2]; 
+          XTq[3*k+1] = X[3]*q[0] + X[4]*q[1] + X[5]*q[2]; 
+          XTq[3*k+2] = X[6]*q[0] + X[7]*q[1] + X[8]*q[2]; 
         }
-      }
-      else {
-        indx -= ns;
-
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;        
-
-        F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
 
         F2FScalar w = global_W[nn*i+j];
-        F2FScalar rprod[] = {0.0, 0.0, 0.0};
-        rprod[0] += w*v[0];
-        rprod[1] += w*v[1];
-        rprod[2] += w*v[2];
-
-        for ( int k = 0; k < 3; k++ ) {
-          F2FScalar *X = &XX[9*k];
-          rprod[0] += w*(X[0]*q[0] + X[1]*q[1] + X[2]*q[2])*v[k]; 
-          rprod[1] += w*(X[3]*q[0] + X[4]*q[1] + X[5]*q[2])*v[k]; 
-          rprod[2] += w*(X[6]*q[0] + X[7]*q[1] + X[8]*q[2])*v[k]; 
+        F2FScalar *prod = &contrib[3*nvecs*(nn*(i - i0) + j)];
+
+        for ( int f = 0; f < nvecs; f++ ) {
+          F2FScalar v[3];
+          v[0] = vi[f];
+          v[1] = vi[nvecs+f];
+          v[2] = vi[2*nvecs+f];
+
+          // Compute each component of the transpose Jacobian-vector product as
+          // follows:
+          // J^{T}*v = w[X_{1}^{T}*q X_{2}^{T}*q X_{3}^{T}*q]*v + w*v
+          F2FScalar rprod[3];
+          for ( int k = 0; k < 3; k++ ) {
+            rprod[k] = w*v[k] + w*(XTq[k]*v[0] + XTq[3+k]*v[1] + XTq[6+k]*v[2]);
+          }
+          if (reflected) {
+            rprod[isymm] *= -1.0;
+          }
+
+          prod[f] -= rprod[0];
+          prod[nvecs+f] -= rprod[1];
+          prod[2*nvecs+f] -= rprod[2];
         }
-        rprod[isymm] *= -1.0;
-
-        F2FScalar *prod = &prods_global[3*indx];
-        prod[0] -= rprod[0];
-        prod[1] -= rprod[1];
-        prod[2] -= rprod[2];
       }
     }
+
+    addStructuralContributions(nn, global_conn, i0, i1, contrib, 3*nvecs,
+                               prods_global);
   }
+  delete [] contrib;
   // distribute the results to the structural processors
-  distributeStructuralVector(prods_global,prods);
+  distributeStructuralVector(prods_global, prods, 3*nvecs);
 
   // clean up allocated memory
   delete [] prods_global;
@@ -929,163 +1695,213 @@ void MELD::applydDduSTrans( const F2FScalar *vecs, F2FScalar *prods ) {
 
 */
 void MELD::applydLduS(const F2FScalar *vecs, F2FScalar *prods) {
-  F2FScalar *vecs_global = new F2FScalar[3*ns];
-  collectStructuralVector(vecs, vecs_global);
+  applydLduSBlock(vecs, prods, 1);
+}
 
-  // Zero products
-  F2FScalar *prods_global = new F2FScalar[3*ns];
-  memset(prods_global, 0, 3*ns*sizeof(F2FScalar));
+/*  
+  Apply the action of the load transfer w.r.t structural displacements Jacobian
+  to a block of input vectors stored node-by-node
+  
+  Arguments
+  ----------
+  vecs  : block of input vectors
+  nvecs : number of vectors in the block
 
-  // Loop over aerodynamic surface nodes
-  for ( int i = 0; i < na; i++ ) {
-    // Compute vector r from centroid to aero node
-    const F2FScalar *xa0 = &Xa[3*i];
-    const F2FScalar *xs0bar = &global_xs0bar[3*i];
-    F2FScalar r[ 3];
-    vec_diff(xs0bar, xa0, r);
+  Returns
+  --------
+  prods : block of output vectors
 
-    // Get the load on the aerodynamic surface node
-    const F2FScalar *fa = &Fa[3*i];
+*/
+void MELD::applydLduSBlock(const F2FScalar *vecs, F2FScalar *prods,
+                           int nvecs) {
+  if (checkDoublePrecision("applydLduS", prods, 3*ns_local*nvecs)){ return; }
 
-    // Recompute X and Y
-    const F2FScalar *M1 = &global_M1[15*15*i];
-    const int *ipiv = &global_ipiv[15*i];
-    F2FScalar x[] = {-fa[0]*r[0], -fa[1]*r[0], -fa[2]*r[0], 
-                     -fa[0]*r[1], -fa[1]*r[1], -fa[2]*r[1], 
-                     -fa[0]*r[2], -fa[1]*r[2], -fa[2]*r[2],
-                     0.0, 0.0, 0.0,
-                     0.0, 0.0, 0.0};
-    int m = 15, nrhs = 1, info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    F2FScalar XT[] = {x[0], x[3], x[6], 
-                      x[1], x[4], x[7],
-                      x[2], x[5], x[8]};
-    F2FScalar nY[] = {-x[ 9], -x[10], -x[11],
-                      -x[10], -x[12], -x[13],
-                      -x[11], -x[13], -x[14]};
-
-    // Assemble X and Y into matrix M2
-    F2FScalar M2[15*15];
-    assembleM1(XT, nY, M2);
-
-    // Assemble matrix M3 from R and S
-    F2FScalar M3[15*15];
-    const F2FScalar *R = &global_R[9*i];
-    const F2FScalar *S = &global_S[9*i];
-    assembleM3(R, S, M3);
+  F2FScalar *vecs_global = new F2FScalar[3*ns*nvecs];
+  collectStructuralVector(vecs, vecs_global, 3*nvecs);
 
-    // Build right-hand side of first system to be solved
-    F2FScalar z2[15];
-    memset(z2, 0.0, 15*sizeof(F2FScalar));
-    for ( int j = 0; j < nn; j++ ){
-      int indx = global_conn[nn*i+j];
+  // Zero products
+  F2FScalar *prods_global = new F2FScalar[3*ns*nvecs];
+  memset(prods_global, 0, 3*ns*nvecs*sizeof(F2FScalar));
+
+  // Right-hand sides and solutions of the linear systems for each vector
+  // and each thread
+  F2FScalar *z1_work = new F2FScalar[15*nvecs*nthreads];
+  F2FScalar *z2_work = new F2FScalar[15*nvecs*nthreads];
+
+  // Compute the contributions of each block of aerodynamic nodes in
+  // parallel, then add them to the structural nodes in a fixed order
+  F2FScalar *contrib = new F2FScalar[3*nvecs*nn*F2F_AERO_BLOCK_SIZE];
+  for ( int i0 = 0; i0 < na; i0 += F2F_AERO_BLOCK_SIZE ) {
+    int i1 = (i0 + F2F_AERO_BLOCK_SIZE < na ?
+              i0 + F2F_AERO_BLOCK_SIZE : na);
+    memset(contrib, 0, 3*nvecs*nn*(i1 - i0)*sizeof(F2FScalar));
+
+    F2F_OMP_PARALLEL_FOR
+    for ( int i = i0; i < i1; i++ ) {
+      // Work arrays of the calling thread
+      F2FScalar *z1 = &z1_work[15*nvecs*F2FThreadNum()];
+      F2FScalar *z2 = &z2_work[15*nvecs*F2FThreadNum()];
+
+      // Compute vector r from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3*i];
+      const F2FScalar *xs0bar = &global_xs0bar[3*i];
+      F2FScalar r[ 3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Get the load on the aerodynamic surface node
+      const F2FScalar *fa = &Fa[3*i];
+
+      // Recompute X and Y
+      const F2FScalar *M1 = &global_M1[15*15*i];
+      const int *ipiv = &global_ipiv[15*i];
+      F2FScalar x[] = {-fa[0]*r[0], -fa[1]*r[0], -fa[2]*r[0], 
+                       -fa[0]*r[1], -fa[1]*r[1], -fa[2]*r[1], 
+                       -fa[0]*r[2], -fa[1]*r[2], -fa[2]*r[2],
+                       0.0, 0.0, 0.0,
+                       0.0, 0.0, 0.0};
+      int m = 15, nrhs = 1, info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      F2FScalar XT[] = {x[0], x[3], x[6], 
+                        x[1], x[4], x[7],
+                        x[2], x[5], x[8]};
+      F2FScalar nY[] = {-x[ 9], -x[10], -x[11],
+                        -x[10], -x[12], -x[13],
+                        -x[11], -x[13], -x[14]};
+
+      // Assemble X and Y into matrix M2
+      F2FScalar M2[15*15];
+      assembleM1(XT, nY, M2);
+
+      // Assemble matrix M3 from R and S
+      F2FScalar M3[15*15];
+      const F2FScalar *R = &global_R[9*i];
+      const F2FScalar *S = &global_S[9*i];
+      assembleM3(R, S, M3);
+
+      // Build right-hand sides of first system to be solved
+      memset(z2, 0.0, 15*nvecs*sizeof(F2FScalar));
+      for ( int j = 0; j < nn; j++ ){
+        int indx = global_conn[nn*i+j];
+        bool reflected = false;
+
+        // Get vector q
+        F2FScalar q[3];
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3*indx];
+          vec_diff(xs0bar, xs0, q);
+        }
+        else {
+          indx -= ns;
+          reflected = true;
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;        
+          vec_diff(xs0bar, rxs0, q);
+        }
 
-      // Get vector q and subset of input vector
-      F2FScalar q[3];
-      F2FScalar v[3];
-      if (indx < ns) {
-        const F2FScalar *xs0 = &Xs[3*indx];
-        vec_diff(xs0bar, xs0, q);
-        memcpy(v, &vecs[3*indx], 3*sizeof(F2FScalar));
-      }
-      else {
-        indx -= ns;
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;        
-        vec_diff(xs0bar, rxs0, q);
-        memcpy(v, &vecs[3*indx], 3*sizeof(F2FScalar));
-        v[isymm] *= -1.0;
+        F2FScalar w = global_W[nn*i+j];
+        const F2FScalar *vglobal = &vecs_global[3*nvecs*indx];
+
+        for ( int f = 0; f < nvecs; f++ ) {
+          // Get subset of input vector
+          F2FScalar v[3];
+          v[0] = vglobal[f];
+          v[1] = vglobal[nvecs+f];
+          v[2] = vglobal[2*nvecs+f];
+          if (reflected) {
+            v[isymm] *= -1.0;
+          }
+
+          F2FScalar *z = &z2[15*f];
+          z[0] -= w*q[0]*v[0];
+          z[1] -= w*q[1]*v[0];
+          z[2] -= w*q[2]*v[0];
+          z[3] -= w*q[0]*v[1];
+          z[4] -= w*q[1]*v[1];
+          z[5] -= w*q[2]*v[1];
+          z[6] -= w*q[0]*v[2];
+          z[7] -= w*q[1]*v[2];
+          z[8] -= w*q[2]*v[2];
+        }
       }
 
-      F2FScalar w = global_W[nn*i+j];
+      // Solve the first linear system
+      int ipiv3[15]; info = 0;
+      LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
+      info = 0;
+      LAPACKgetrs("N", &m, &nvecs, M3, &m, ipiv3, z2, &m, &info);
 
-      z2[0] -= w*q[0]*v[0];
-      z2[1] -= w*q[1]*v[0];
-      z2[2] -= w*q[2]*v[0];
-      z2[3] -= w*q[0]*v[1];
-      z2[4] -= w*q[1]*v[1];
-      z2[5] -= w*q[2]*v[1];
-      z2[6] -= w*q[0]*v[2];
-      z2[7] -= w*q[1]*v[2];
-      z2[8] -= w*q[2]*v[2];
-    }
-
-    // Solve the first linear system
-    int ipiv3[15]; info = 0;
-    LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M3, &m, ipiv3, z2, &m, &info);
+      // Compute right-hand side of second system
+      F2FScalar alpha = -1.0, beta = 0.0;
+      BLASgemm("N", "N", &m, &nvecs, &m, &alpha, M2, &m, z2, &m, 
+               &beta, z1, &m);
 
-    // Compute right-hand side of second system
-    F2FScalar z1[15];
-    F2FScalar alpha = -1.0, beta = 0.0;
-    int inc = 1;
-    BLASgemv("N", &m, &m, &alpha, M2, &m, z2, &inc, &beta, z1, &inc);
+      // Solve the second system
+      info = 0;
+      LAPACKgetrs("N", &m, &nvecs, M1, &m, ipiv, z1, &m, &info);
 
-    // Solve the second system
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, z1, &m, &info);
-
-    // Extract ZH
-    F2FScalar ZH[9] = {z1[0], z1[1], z1[2],
-                       z1[3], z1[4], z1[5],
-                       z1[6], z1[7], z1[8]};
-
-    // Loop over linked structural nodes and add contributions from aerodynamic surface node
-    // to global structural loads
-    for ( int j = 0; j < nn; j++ ) {
-      int indx = global_conn[nn*i+j];
+      // Loop over linked structural nodes and add contributions from aerodynamic surface node
+      // to global structural loads
+      for ( int j = 0; j < nn; j++ ) {
+        int indx = global_conn[nn*i+j];
+        bool reflected = false;
 
-      if (indx < ns) {
         // Compute vector q from centroid to structural node
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar q[3];
-        vec_diff(xs0bar, xs0, q);
-
-        // Compute load contribution of aerodynamic surface node to structural node
-        const F2FScalar w = global_W[nn*i+j];
-        F2FScalar *prod = &prods_global[3*indx];
-
-        // prod = w * [ ZH[0] ZH[1] ZH[2] ][ q[0] ]
-        //            [ ZH[3] ZH[4] ZH[5] ][ q[1] ]
-        //            [ ZH[6] ZH[7] ZH[8] ][ q[2] ]
-        prod[0] -= w*(ZH[0]*q[0] + ZH[1]*q[1] + ZH[2]*q[2]);
-        prod[1] -= w*(ZH[3]*q[0] + ZH[4]*q[1] + ZH[5]*q[2]);
-        prod[2] -= w*(ZH[6]*q[0] + ZH[7]*q[1] + ZH[8]*q[2]);
-      }
-      else {
-        indx -= ns;
-
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;        
-
         F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3*indx];
+          vec_diff(xs0bar, xs0, q);
+        }
+        else {
+          indx -= ns;
+          reflected = true;
+
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;        
+          vec_diff(xs0bar, rxs0, q);
+        }
 
         const F2FScalar w = global_W[nn*i+j];
-        F2FScalar *prod = &prods_global[3*indx];
-
-        F2FScalar rprod[3];
-        rprod[0] = w*(ZH[0]*q[0] + ZH[1]*q[1] + ZH[2]*q[2]);
-        rprod[1] = w*(ZH[3]*q[0] + ZH[4]*q[1] + ZH[5]*q[2]);
-        rprod[2] = w*(ZH[6]*q[0] + ZH[7]*q[1] + ZH[8]*q[2]);
-        rprod[isymm] *= -1.0;
+        F2FScalar *prod = &contrib[3*nvecs*(nn*(i - i0) + j)];
+
+        for ( int f = 0; f < nvecs; f++ ) {
+          // Extract ZH
+          const F2FScalar *ZH = &z1[15*f];
+
+          // Compute load contribution of aerodynamic surface node to structural
+          // node
+          // prod = w * [ ZH[0] ZH[1] ZH[2] ][ q[0] ]
+          //            [ ZH[3] ZH[4] ZH[5] ][ q[1] ]
+          //            [ ZH[6] ZH[7] ZH[8] ][ q[2] ]
+          F2FScalar rprod[3];
+          rprod[0] = w*(ZH[0]*q[0] + ZH[1]*q[1] + ZH[2]*q[2]);
+          rprod[1] = w*(ZH[3]*q[0] + ZH[4]*q[1] + ZH[5]*q[2]);
+          rprod[2] = w*(ZH[6]*q[0] + ZH[7]*q[1] + ZH[8]*q[2]);
+          if (reflected) {
+            rprod[isymm] *= -1.0;
+          }
+
+          prod[f] -= rprod[0];
+          prod[nvecs+f] -= rprod[1];
+          prod[2*nvecs+f] -= rprod[2];
+        }
+      }    
+    }
 
-        prod[0] -= rprod[0];
-        prod[1] -= rprod[1];
-        prod[2] -= rprod[2];
-      }
-    }    
+    addStructuralContributions(nn, global_conn, i0, i1, contrib, 3*nvecs,
+                               prods_global);
   }
+  delete [] contrib;
 
   // distribute the results to the structural processors
-  distributeStructuralVector(prods_global,prods);
+  distributeStructuralVector(prods_global, prods, 3*nvecs);
 
   // clean up allocated memory
+  delete [] z1_work;
+  delete [] z2_work;
   delete [] vecs_global;
   delete [] prods_global;
 }
@@ -1104,164 +1920,216 @@ void MELD::applydLduS(const F2FScalar *vecs, F2FScalar *prods) {
 
 */
 void MELD::applydLduSTrans(const F2FScalar *vecs, F2FScalar *prods) {
-  F2FScalar *vecs_global = new F2FScalar[3*ns];
-  collectStructuralVector(vecs, vecs_global);
+  applydLduSTransBlock(vecs, prods, 1);
+}
 
-  // Zero products every call
-  F2FScalar *prods_global = new F2FScalar[3*ns];
-  memset(prods_global, 0, 3*ns*sizeof(F2FScalar));
+/*  
+  Apply the action of the load transfer w.r.t structural displacements
+  transpose Jacobian to a block of input vectors stored node-by-node
+  
+  Arguments
+  ---------
+  vecs  : block of input vectors
+  nvecs : number of vectors in the block
 
-  // Loop over all aerodynamic surface nodes
-  for ( int i = 0; i < na; i++ ) {
-    // Compute vector r from centroid to aero node
-    const F2FScalar *xa0 = &Xa[3*i];
-    const F2FScalar *xs0bar = &global_xs0bar[3*i];
-    F2FScalar r[ 3];
-    vec_diff(xs0bar, xa0, r);
+  Returns
+  --------
+  prods : block of output vectors
 
-    // Get the load on the aerodynamic surface node
-    const F2FScalar *fa = &Fa[3*i];
+*/
+void MELD::applydLduSTransBlock(const F2FScalar *vecs, F2FScalar *prods,
+                                int nvecs) {
+  if (checkDoublePrecision("applydLduSTrans", prods, 3*ns_local*nvecs)){
+    return;
+  }
 
-    // Recompute X and Y
-    const F2FScalar *M1 = &global_M1[15*15*i];
-    const int *ipiv = &global_ipiv[15*i];
-    F2FScalar x[] = {-fa[0]*r[0], -fa[1]*r[0], -fa[2]*r[0], 
-                     -fa[0]*r[1], -fa[1]*r[1], -fa[2]*r[1], 
-                     -fa[0]*r[2], -fa[1]*r[2], -fa[2]*r[2],
-                     0.0, 0.0, 0.0,
-                     0.0, 0.0, 0.0};
-    int m = 15, nrhs = 1, info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    F2FScalar XT[] = {x[0], x[3], x[6], 
-                      x[1], x[4], x[7],
-                      x[2], x[5], x[8]};
-    F2FScalar nY[] = {-x[ 9], -x[10], -x[11],
-                      -x[10], -x[12], -x[13],
-                      -x[11], -x[13], -x[14]};
-
-    // Assemble X and Y into matrix M2
-    F2FScalar M2[15*15];
-    assembleM1(XT, nY, M2);
-
-    // Assemble matrix M3 from R and S
-    F2FScalar M3[15*15];
-    const F2FScalar *R = &global_R[9*i];
-    const F2FScalar *S = &global_S[9*i];
-    assembleM3(R, S, M3);
+  F2FScalar *vecs_global = new F2FScalar[3*ns*nvecs];
+  collectStructuralVector(vecs, vecs_global, 3*nvecs);
 
-    // Build right-hand side of first system to be solved
-    F2FScalar y2[15];
-    memset(y2, 0.0, 15*sizeof(F2FScalar));
-    for ( int j = 0; j < nn; j++ ){
-      int indx = global_conn[nn*i+j];
+  // Zero products every call
+  F2FScalar *prods_global = new F2FScalar[3*ns*nvecs];
+  memset(prods_global, 0, 3*ns*nvecs*sizeof(F2FScalar));
+
+  // Right-hand sides and solutions of the linear systems for each vector
+  // and each thread
+  F2FScalar *y1_work = new F2FScalar[15*nvecs*nthreads];
+  F2FScalar *y2_work = new F2FScalar[15*nvecs*nthreads];
+
+  // Compute the contributions of each block of aerodynamic nodes in
+  // parallel, then add them to the structural nodes in a fixed order
+  F2FScalar *contrib = new F2FScalar[3*nvecs*nn*F2F_AERO_BLOCK_SIZE];
+  for ( int i0 = 0; i0 < na; i0 += F2F_AERO_BLOCK_SIZE ) {
+    int i1 = (i0 + F2F_AERO_BLOCK_SIZE < na ?
+              i0 + F2F_AERO_BLOCK_SIZE : na);
+    memset(contrib, 0, 3*nvecs*nn*(i1 - i0)*sizeof(F2FScalar));
+
+    F2F_OMP_PARALLEL_FOR
+    for ( int i = i0; i < i1; i++ ) {
+      // Work arrays of the calling thread
+      F2FScalar *y1 = &y1_work[15*nvecs*F2FThreadNum()];
+      F2FScalar *y2 = &y2_work[15*nvecs*F2FThreadNum()];
+
+      // Compute vector r from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3*i];
+      const F2FScalar *xs0bar = &global_xs0bar[3*i];
+      F2FScalar r[ 3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Get the load on the aerodynamic surface node
+      const F2FScalar *fa = &Fa[3*i];
+
+      // Recompute X and Y
+      const F2FScalar *M1 = &global_M1[15*15*i];
+      const int *ipiv = &global_ipiv[15*i];
+      F2FScalar x[] = {-fa[0]*r[0], -fa[1]*r[0], -fa[2]*r[0], 
+                       -fa[0]*r[1], -fa[1]*r[1], -fa[2]*r[1], 
+                       -fa[0]*r[2], -fa[1]*r[2], -fa[2]*r[2],
+                       0.0, 0.0, 0.0,
+                       0.0, 0.0, 0.0};
+      int m = 15, nrhs = 1, info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      F2FScalar XT[] = {x[0], x[3], x[6], 
+                        x[1], x[4], x[7],
+                        x[2], x[5], x[8]};
+      F2FScalar nY[] = {-x[ 9], -x[10], -x[11],
+                        -x[10], -x[12], -x[13],
+                        -x[11], -x[13], -x[14]};
+
+      // Assemble X and Y into matrix M2
+      F2FScalar M2[15*15];
+      assembleM1(XT, nY, M2);
+
+      // Assemble matrix M3 from R and S
+      F2FScalar M3[15*15];
+      const F2FScalar *R = &global_R[9*i];
+      const F2FScalar *S = &global_S[9*i];
+      assembleM3(R, S, M3);
+
+      // Build right-hand sides of first system to be solved
+      memset(y2, 0.0, 15*nvecs*sizeof(F2FScalar));
+      for ( int j = 0; j < nn; j++ ){
+        int indx = global_conn[nn*i+j];
+        bool reflected = false;
+
+        // Get vector q
+        F2FScalar q[3];
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3*indx];
+          vec_diff(xs0bar, xs0, q);
+        }
+        else {
+          indx -= ns;
+          reflected = true;
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;        
+          vec_diff(xs0bar, rxs0, q);
+        }
 
-      // Get vector q and subset of input vector
-      F2FScalar q[3];
-      F2FScalar v[3];
-      if (indx < ns) {
-        const F2FScalar *xs0 = &Xs[3*indx];
-        vec_diff(xs0bar, xs0, q);
-        memcpy(v, &vecs_global[3*indx], 3*sizeof(F2FScalar));
-      }
-      else {
-        indx -= ns;
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;        
-        vec_diff(xs0bar, rxs0, q);
-        memcpy(v, &vecs_global[3*indx], 3*sizeof(F2FScalar));
-        v[isymm] *= -1.0;
+        F2FScalar w = global_W[nn*i+j];
+        const F2FScalar *vglobal = &vecs_global[3*nvecs*indx];
+
+        for ( int f = 0; f < nvecs; f++ ) {
+          // Get subset of input vector
+          F2FScalar v[3];
+          v[0] = vglobal[f];
+          v[1] = vglobal[nvecs+f];
+          v[2] = vglobal[2*nvecs+f];
+          if (reflected) {
+            v[isymm] *= -1.0;
+          }
+
+          F2FScalar *y = &y2[15*f];
+          y[0] -= w*q[0]*v[0];
+          y[1] -= w*q[1]*v[0];
+          y[2] -= w*q[2]*v[0];
+          y[3] -= w*q[0]*v[1];
+          y[4] -= w*q[1]*v[1];
+          y[5] -= w*q[2]*v[1];
+          y[6] -= w*q[0]*v[2];
+          y[7] -= w*q[1]*v[2];
+          y[8] -= w*q[2]*v[2];
+        }
       }
 
-      F2FScalar w = global_W[nn*i+j];
-
-      y2[0] -= w*q[0]*v[0];
-      y2[1] -= w*q[1]*v[0];
-      y2[2] -= w*q[2]*v[0];
-      y2[3] -= w*q[0]*v[1];
-      y2[4] -= w*q[1]*v[1];
-      y2[5] -= w*q[2]*v[1];
-      y2[6] -= w*q[0]*v[2];
-      y2[7] -= w*q[1]*v[2];
-      y2[8] -= w*q[2]*v[2];
-    }
-
-    // Solve the first linear system
-    const char *t = "T";
-    int ipiv3[15]; info = 0;
-    LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
-    info = 0;
-    LAPACKgetrs(t, &m, &nrhs, M3, &m, ipiv, y2, &m, &info);
-
-    // Compute right-hand side of second system
-    F2FScalar y1[15];
-    F2FScalar alpha = -1.0, beta = 0.0;
-    int inc = 1;
-    BLASgemv(t, &m, &m, &alpha, M2, &m, y2, &inc, &beta, y1, &inc);
+      // Solve the first linear system
+      const char *t = "T";
+      int ipiv3[15]; info = 0;
+      LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
+      info = 0;
+      LAPACKgetrs(t, &m, &nvecs, M3, &m, ipiv, y2, &m, &info);
 
-    // Solve the second system
-    info = 0;
-    LAPACKgetrs(t, &m, &nrhs, M1, &m, ipiv, y1, &m, &info);
+      // Compute right-hand side of second system
+      F2FScalar alpha = -1.0, beta = 0.0;
+      BLASgemm(t, "N", &m, &nvecs, &m, &alpha, M2, &m, y2, &m,
+               &beta, y1, &m);
 
-    // Extract YF
-    F2FScalar YF[] = {y1[0], y1[1], y1[2],
-                      y1[3], y1[4], y1[5],
-                      y1[6], y1[7], y1[8]};
+      // Solve the second system
+      info = 0;
+      LAPACKgetrs(t, &m, &nvecs, M1, &m, ipiv, y1, &m, &info);
 
-    // Loop over linked structural nodes and add contributions from aerodynamic
-    // surface node to global structural loads
-    for ( int j = 0; j < nn; j++ ) {
-      int indx = global_conn[nn*i+j];
+      // Loop over linked structural nodes and add contributions from aerodynamic
+      // surface node to global structural loads
+      for ( int j = 0; j < nn; j++ ) {
+        int indx = global_conn[nn*i+j];
+        bool reflected = false;
 
-      if (indx < ns) {
         // Compute vector q from centroid to structural node
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar q[3];
-        vec_diff(xs0bar, xs0, q);
-
-        // Compute load contribution of aerodynamic surface node to structural node
-        F2FScalar w = global_W[nn*i+j];
-        F2FScalar *prod = &prods_global[3*indx];
-
-        // prod  = w * [ YF[0] YF[3] YF[6] ][ q[0] ]
-        //             [ YF[1] YF[4] YF[7] ][ q[1] ]
-        //             [ YF[2] YF[5] YF[8] ][ q[2] ]
-        prod[0] -= w*(YF[0]*q[0] + YF[3]*q[1] + YF[6]*q[2]);
-        prod[1] -= w*(YF[1]*q[0] + YF[4]*q[1] + YF[7]*q[2]);
-        prod[2] -= w*(YF[2]*q[0] + YF[5]*q[1] + YF[8]*q[2]);
-      }
-      else {
-        indx -= ns;
-
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;        
-
         F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3*indx];
+          vec_diff(xs0bar, xs0, q);
+        }
+        else {
+          indx -= ns;
+          reflected = true;
+
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;        
+          vec_diff(xs0bar, rxs0, q);
+        }
 
         const F2FScalar w = global_W[nn*i+j];
-        F2FScalar *prod = &prods_global[3*indx];
-
-        F2FScalar rprod[3];
-        rprod[0] = w*(YF[0]*q[0] + YF[3]*q[1] + YF[6]*q[2]);
-        rprod[1] = w*(YF[1]*q[0] + YF[4]*q[1] + YF[7]*q[2]);
-        rprod[2] = w*(YF[2]*q[0] + YF[5]*q[1] + YF[8]*q[2]);
-        rprod[isymm] *= -1.0;
+        F2FScalar *prod = &contrib[3*nvecs*(nn*(i - i0) + j)];
+
+        for ( int f = 0; f < nvecs; f++ ) {
+          // Extract YF
+          const F2FScalar *YF = &y1[15*f];
+
+          // Compute load contribution of aerodynamic surface node to structural
+          // node
+          // prod  = w * [ YF[0] YF[3] YF[6] ][ q[0] ]
+          //             [ YF[1] YF[4] YF[7] ][ q[1] ]
+          //             [ YF[2] YF[5] YF[8] ][ q[2] ]
+          F2FScalar rprod[3];
+          rprod[0] = w*(YF[0]*q[0] + YF[3]*q[1] + YF[6]*q[2]);
+          rprod[1] = w*(YF[1]*q[0] + YF[4]*q[1] + YF[7]*q[2]);
+          rprod[2] = w*(YF[2]*q[0] + YF[5]*q[1] + YF[8]*q[2]);
+          if (reflected) {
+            rprod[isymm] *= -1.0;
+          }
+
+          prod[f] -= rprod[0];
+          prod[nvecs+f] -= rprod[1];
+          prod[2*nvecs+f] -= rprod[2];
+        }
+      }    
+    }
 
-        prod[0] -= rprod[0];
-        prod[1] -= rprod[1];
-        prod[2] -= rprod[2];
-      }
-    }    
+    addStructuralContributions(nn, global_conn, i0, i1, contrib, 3*nvecs,
+                               prods_global);
   }
+  delete [] contrib;
 
   // distribute the results to the structural processors
-  distributeStructuralVector(prods_global, prods);
+  distributeStructuralVector(prods_global, prods, 3*nvecs);
 
   // clean up allocated memory
+  delete [] y1_work;
+  delete [] y2_work;
   delete [] vecs_global;
   delete [] prods_global;
 }
@@ -1357,6 +2225,9 @@ void MELD::assembleM3(const F2FScalar *R, const F2FScalar *S,
 
 */
 void MELD::applydDdxA0(const F2FScalar *vecs , F2FScalar *prods) {
+  if (checkDoublePrecision("applydDdxA0", prods, 3*na)){ return; }
+
+  F2F_OMP_PARALLEL_FOR
   for (int i = 0; i < na; i++ ) {
     // Get vector of adjoint variables and rotation matrix for each aerodynamic
     // node
@@ -1385,6 +2256,8 @@ void MELD::applydDdxA0(const F2FScalar *vecs , F2FScalar *prods) {
 
 */
 void MELD::applydDdxS0( const F2FScalar *vecs , F2FScalar *prods ) {
+  if (checkDoublePrecision("applydDdxS0", prods, 3*ns_local)){ return; }
+
   // Set products to zero
   F2FScalar *prods_global = new F2FScalar[3*ns];
   memset(prods_global, 0.0, 3*ns*sizeof(F2FScalar));
@@ -1395,108 +2268,119 @@ void MELD::applydDdxS0( const F2FScalar *vecs , F2FScalar *prods ) {
     Xsd[j] = Xs[j] + Us[j];
   }
 
-  for (int i = 0; i < na; i++ ) {
-    const F2FScalar *lam = &vecs[3*i];
-
-    // Compute vector r from centroid to aero node
-    const F2FScalar *xa0 = &Xa[3*i];
-    const F2FScalar *xs0bar = &global_xs0bar[3*i];
-    F2FScalar r[3];
-    vec_diff(xs0bar, xa0, r);
-
-    // Compute displaced centroid xsbar
-    F2FScalar xsbar[3]; 
-    computeCentroid(&global_conn[i*nn], &global_W[i*nn], Xsd, xsbar);
+  // Compute the contributions of each block of aerodynamic nodes in
+  // parallel, then add them to the structural nodes in a fixed order
+  F2FScalar *contrib = new F2FScalar[3*nn*F2F_AERO_BLOCK_SIZE];
+  for ( int i0 = 0; i0 < na; i0 += F2F_AERO_BLOCK_SIZE ) {
+    int i1 = (i0 + F2F_AERO_BLOCK_SIZE < na ?
+              i0 + F2F_AERO_BLOCK_SIZE : na);
+    memset(contrib, 0, 3*nn*(i1 - i0)*sizeof(F2FScalar));
+
+    F2F_OMP_PARALLEL_FOR
+    for ( int i = i0; i < i1; i++ ) {
+      const F2FScalar *lam = &vecs[3*i];
+
+      // Compute vector r from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3*i];
+      const F2FScalar *xs0bar = &global_xs0bar[3*i];
+      F2FScalar r[3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Compute displaced centroid xsbar
+      F2FScalar xsbar[3]; 
+      computeCentroid(&global_conn[i*nn], &global_W[i*nn], Xsd, xsbar);
     
-    // Compute X
-    const F2FScalar *R = &global_R[9*i];
-    const F2FScalar *S = &global_S[9*i];
-    F2FScalar M1[15*15];
-    assembleM1(R, S, M1);
-    int ipiv[15];
-    int m = 15, info = 0;
-    LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
-    F2FScalar x[] = {-lam[0]*r[0], -lam[1]*r[0], -lam[2]*r[0],
-                     -lam[0]*r[1], -lam[1]*r[1], -lam[2]*r[1],
-                     -lam[0]*r[2], -lam[1]*r[2], -lam[2]*r[2],
-                     0.0, 0.0, 0.0,
-                     0.0, 0.0, 0.0};
-    int nrhs = 1; info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    F2FScalar X[] = {x[0], x[1], x[2],
-                     x[3], x[4], x[5],
-                     x[6], x[7], x[8]};
-
-    for (int j = 0; j < nn; j++ ) {
-      int indx = global_conn[nn*i+j];
-
-      if (indx < ns) {
-        // Compute vector q from centroid to structural node
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar q[3];
-        vec_diff(xs0bar, xs0, q);
-
-        // Compute vector p from displaced centroid to displaced structural node
-        F2FScalar *xs = &Xsd[3*indx];
-        F2FScalar p[3];
-        vec_diff(xsbar, xs, p);
-
-        // Compute the contribution to the products
-        F2FScalar w = global_W[nn*i+j];
-        F2FScalar *prod = &prods_global[3*indx];
-
-        // prod = -w*q^{T}*X - w*p^{T}*X^{T} + w*lam^{T}*(R - I)
+      // Compute X using the factorization of M1 from transferDisps
+      const F2FScalar *R = &global_R[9*i];
+      const F2FScalar *M1 = &global_M1[15*15*i];
+      const int *ipiv = &global_ipiv[15*i];
+      int m = 15, info = 0;
+      F2FScalar x[] = {-lam[0]*r[0], -lam[1]*r[0], -lam[2]*r[0],
+                       -lam[0]*r[1], -lam[1]*r[1], -lam[2]*r[1],
+                       -lam[0]*r[2], -lam[1]*r[2], -lam[2]*r[2],
+                       0.0, 0.0, 0.0,
+                       0.0, 0.0, 0.0};
+      int nrhs = 1; info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      F2FScalar X[] = {x[0], x[1], x[2],
+                       x[3], x[4], x[5],
+                       x[6], x[7], x[8]};
+
+      for (int j = 0; j < nn; j++ ) {
+        int indx = global_conn[nn*i+j];
+
+        if (indx < ns) {
+          // Compute vector q from centroid to structural node
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar q[3];
+          vec_diff(xs0bar, xs0, q);
+
+          // Compute vector p from displaced centroid to displaced structural node
+          F2FScalar *xs = &Xsd[3*indx];
+          F2FScalar p[3];
+          vec_diff(xsbar, xs, p);
+
+          // Compute the contribution to the products
+          F2FScalar w = global_W[nn*i+j];
+          F2FScalar *prod = &contrib[3*(nn*(i - i0) + j)];
+
+          // prod = -w*q^{T}*X - w*p^{T}*X^{T} + w*lam^{T}*(R - I)
    
-        prod[0] += -w*(q[0]*X[0] + q[1]*X[1] + q[2]*X[2]) -
-                    w*(X[0]*p[0] + X[3]*p[1] + X[6]*p[2]) +
-                    w*(lam[0]*(R[0] - 1.0) + lam[1]*R[1] + lam[2]*R[2]);
-        prod[1] += -w*(q[0]*X[3] + q[1]*X[4] + q[2]*X[5]) -
-                    w*(X[1]*p[0] + X[4]*p[1] + X[7]*p[2]) +
-                    w*(lam[0]*R[3] + lam[1]*(R[4] - 1.0) + lam[2]*R[5]);
-        prod[2] += -w*(q[0]*X[6] + q[1]*X[7] + q[2]*X[8]) -
-                    w*(X[2]*p[0] + X[5]*p[1] + X[8]*p[2]) +
-                    w*(lam[0]*R[6] + lam[1]*R[7] + lam[2]*(R[8] - 1.0));
-      }
-      else {
-        indx -= ns;
-
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;        
-
-        F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
-
-        F2FScalar *xs = &Xsd[3*indx];
-        F2FScalar rxs[3];
-        memcpy(rxs, xs, 3*sizeof(F2FScalar));
-        rxs[isymm] *= -1.0;        
-
-        F2FScalar p[3];
-        vec_diff(xsbar, rxs, p);
-
-        F2FScalar w = global_W[nn*i+j];
-        F2FScalar *prod = &prods_global[3*indx];
-
-        F2FScalar rprod[3];
-        rprod[0] = -w*(q[0]*X[0] + q[1]*X[1] + q[2]*X[2]) -
-                    w*(X[0]*p[0] + X[3]*p[1] + X[6]*p[2]) +
-                    w*(lam[0]*(R[0] - 1.0) + lam[1]*R[1] + lam[2]*R[2]);
-        rprod[1] = -w*(q[0]*X[3] + q[1]*X[4] + q[2]*X[5]) -
-                    w*(X[1]*p[0] + X[4]*p[1] + X[7]*p[2]) +
-                    w*(lam[0]*R[3] + lam[1]*(R[4] - 1.0) + lam[2]*R[5]);
-        rprod[2] = -w*(q[0]*X[6] + q[1]*X[7] + q[2]*X[8]) -
-                     w*(X[2]*p[0] + X[5]*p[1] + X[8]*p[2]) +
-                     w*(lam[0]*R[6] + lam[1]*R[7] + lam[2]*(R[8] - 1.0));
-        rprod[isymm] *= -1.0;
-
-        prod[0] += rprod[0];
-        prod[1] += rprod[1];
-        prod[2] += rprod[2];
+          prod[0] += -w*(q[0]*X[0] + q[1]*X[1] + q[2]*X[2]) -
+                      w*(X[0]*p[0] + X[3]*p[1] + X[6]*p[2]) +
+                      w*(lam[0]*(R[0] - 1.0) + lam[1]*R[1] + lam[2]*R[2]);
+          prod[1] += -w*(q[0]*X[3] + q[1]*X[4] + q[2]*X[5]) -
+                      w*(X[1]*p[0] + X[4]*p[1] + X[7]*p[2]) +
+                      w*(lam[0]*R[3] + lam[1]*(R[4] - 1.0) + lam[2]*R[5]);
+          prod[2] += -w*(q[0]*X[6] + q[1]*X[7] + q[2]*X[8]) -
+                      w*(X[2]*p[0] + X[5]*p[1] + X[8]*p[2]) +
+                      w*(lam[0]*R[6] + lam[1]*R[7] + lam[2]*(R[8] - 1.0));
+        }
+        else {
+          indx -= ns;
+
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;        
+
+          F2FScalar q[3];
+          vec_diff(xs0bar, rxs0, q);
+
+          F2FScalar *xs = &Xsd[3*indx];
+          F2FScalar rxs[3];
+          memcpy(rxs, xs, 3*sizeof(F2FScalar));
+          rxs[isymm] *= -1.0;        
+
+          F2FScalar p[3];
+          vec_diff(xsbar, rxs, p);
+
+          F2FScalar w = global_W[nn*i+j];
+          F2FScalar *prod = &contrib[3*(nn*(i - i0) + j)];
+
+          F2FScalar rprod[3];
+          rprod[0] = -w*(q[0]*X[0] + q[1]*X[1] + q[2]*X[2]) -
+                      w*(X[0]*p[0] + X[3]*p[1] + X[6]*p[2]) +
+                      w*(lam[0]*(R[0] - 1.0) + lam[1]*R[1] + lam[2]*R[2]);
+          rprod[1] = -w*(q[0]*X[3] + q[1]*X[4] + q[2]*X[5]) -
+                      w*(X[1]*p[0] + X[4]*p[1] + X[7]*p[2]) +
+                      w*(lam[0]*R[3] + lam[1]*(R[4] - 1.0) + lam[2]*R[5]);
+          rprod[2] = -w*(q[0]*X[6] + q[1]*X[7] + q[2]*X[8]) -
+                       w*(X[2]*p[0] + X[5]*p[1] + X[8]*p[2]) +
+                       w*(lam[0]*R[6] + lam[1]*R[7] + lam[2]*(R[8] - 1.0));
+          rprod[isymm] *= -1.0;
+
+          prod[0] += rprod[0];
+          prod[1] += rprod[1];
+          prod[2] += rprod[2];
+        }
       }
     }
+
+    addStructuralContributions(nn, global_conn, i0, i1, contrib, 3,
+                               prods_global);
   }
+  delete [] contrib;
   // distribute the results to the structural processors
   distributeStructuralVector(prods_global,prods);
 
@@ -1519,12 +2403,15 @@ void MELD::applydDdxS0( const F2FScalar *vecs , F2FScalar *prods ) {
 
 */
 void MELD::applydLdxA0( const F2FScalar *vecs , F2FScalar *prods ) {
+  if (checkDoublePrecision("applydLdxA0", prods, 3*na)){ return; }
+
   F2FScalar *vecs_global = new F2FScalar[3*ns];
   collectStructuralVector(vecs, vecs_global);
 
   // Zero products
   memset(prods, 0, 3*na*sizeof(F2FScalar));
 
+  F2F_OMP_PARALLEL_FOR
   for (int i = 0; i < na; i++ ) {
     const F2FScalar *fa = &Fa[3*i];
     const F2FScalar *xs0bar = &global_xs0bar[3*i];
@@ -1623,6 +2510,8 @@ void MELD::applydLdxA0( const F2FScalar *vecs , F2FScalar *prods ) {
 
 */
 void MELD::applydLdxS0( const F2FScalar *vecs , F2FScalar *prods ) {
+  if (checkDoublePrecision("applydLdxS0", prods, 3*ns_local)){ return; }
+
   F2FScalar *vecs_global = new F2FScalar[3*ns];
   collectStructuralVector(vecs, vecs_global);
 
@@ -1636,271 +2525,284 @@ void MELD::applydLdxS0( const F2FScalar *vecs , F2FScalar *prods ) {
     Xsd[j] = Xs[j] + Us[j];
   }
 
-  // Loop over aerodynamic surface nodes
-  for ( int i = 0; i < na; i++ ) {
-    // Compute vector r from centroid to aero node
-    const F2FScalar *xa0 = &Xa[3*i];
-    const F2FScalar *xs0bar = &global_xs0bar[3*i];
-    F2FScalar r[3];
-    vec_diff(xs0bar, xa0, r);
-
-    // Compute displaced centroid xsbar
-    F2FScalar xsbar[3]; 
-    computeCentroid(&global_conn[i*nn], &global_W[i*nn], Xsd, xsbar);
-
-    // Get the load on the aerodynamic surface node
-    const F2FScalar *fa = &Fa[3*i];
-
-    // Recompute X and Y
-    const F2FScalar *M1 = &global_M1[15*15*i];
-    const int *ipiv = &global_ipiv[15*i];
-    F2FScalar x[] = {-fa[0]*r[0], -fa[1]*r[0], -fa[2]*r[0], 
-                     -fa[0]*r[1], -fa[1]*r[1], -fa[2]*r[1], 
-                     -fa[0]*r[2], -fa[1]*r[2], -fa[2]*r[2],
-                     0.0, 0.0, 0.0,
-                     0.0, 0.0, 0.0};
-    int m = 15, nrhs = 1, info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    F2FScalar XT[] = {x[0], x[3], x[6], 
-                      x[1], x[4], x[7],
-                      x[2], x[5], x[8]};
-    F2FScalar nY[] = {-x[ 9], -x[10], -x[11],
-                      -x[10], -x[12], -x[13],
-                      -x[11], -x[13], -x[14]};
-
-    // Assemble X and Y into matrix M2
-    F2FScalar M2[15*15];
-    assembleM1(XT, nY, M2);
-
-    // Assemble matrix M3 from R and S
-    F2FScalar M3[15*15];
-    const F2FScalar *R = &global_R[9*i];
-    const F2FScalar *S = &global_S[9*i];
-    assembleM3(R, S, M3);
+  // Compute the contributions of each block of aerodynamic nodes in
+  // parallel, then add them to the structural nodes in a fixed order
+  F2FScalar *contrib = new F2FScalar[3*nn*F2F_AERO_BLOCK_SIZE];
+  for ( int i0 = 0; i0 < na; i0 += F2F_AERO_BLOCK_SIZE ) {
+    int i1 = (i0 + F2F_AERO_BLOCK_SIZE < na ?
+              i0 + F2F_AERO_BLOCK_SIZE : na);
+    memset(contrib, 0, 3*nn*(i1 - i0)*sizeof(F2FScalar));
+
+    F2F_OMP_PARALLEL_FOR
+    for ( int i = i0; i < i1; i++ ) {
+      // Compute vector r from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3*i];
+      const F2FScalar *xs0bar = &global_xs0bar[3*i];
+      F2FScalar r[3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Compute displaced centroid xsbar
+      F2FScalar xsbar[3]; 
+      computeCentroid(&global_conn[i*nn], &global_W[i*nn], Xsd, xsbar);
+
+      // Get the load on the aerodynamic surface node
+      const F2FScalar *fa = &Fa[3*i];
+
+      // Recompute X and Y
+      const F2FScalar *M1 = &global_M1[15*15*i];
+      const int *ipiv = &global_ipiv[15*i];
+      F2FScalar x[] = {-fa[0]*r[0], -fa[1]*r[0], -fa[2]*r[0], 
+                       -fa[0]*r[1], -fa[1]*r[1], -fa[2]*r[1], 
+                       -fa[0]*r[2], -fa[1]*r[2], -fa[2]*r[2],
+                       0.0, 0.0, 0.0,
+                       0.0, 0.0, 0.0};
+      int m = 15, nrhs = 1, info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      F2FScalar XT[] = {x[0], x[3], x[6], 
+                        x[1], x[4], x[7],
+                        x[2], x[5], x[8]};
+      F2FScalar nY[] = {-x[ 9], -x[10], -x[11],
+                        -x[10], -x[12], -x[13],
+                        -x[11], -x[13], -x[14]};
+
+      // Assemble X and Y into matrix M2
+      F2FScalar M2[15*15];
+      assembleM1(XT, nY, M2);
+
+      // Assemble matrix M3 from R and S
+      F2FScalar M3[15*15];
+      const F2FScalar *R = &global_R[9*i];
+      const F2FScalar *S = &global_S[9*i];
+      assembleM3(R, S, M3);
+
+      // Build right-hand side of first system to be solved
+      F2FScalar z2[15];
+      memset(z2, 0.0, 15*sizeof(F2FScalar));
+      for ( int j = 0; j < nn; j++ ){
+        int indx = global_conn[nn*i+j];
+
+        // Get vector q, and subset of input vector
+        F2FScalar q[3];
+        F2FScalar lam[3];
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3*indx];
+          vec_diff(xs0bar, xs0, q);
+          memcpy(lam, &vecs_global[3*indx], 3*sizeof(F2FScalar));
+        }
+        else {
+          indx -= ns;
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;        
+          vec_diff(xs0bar, rxs0, q);
+          memcpy(lam, &vecs_global[3*indx], 3*sizeof(F2FScalar));
+          lam[isymm] *= -1.0;
+        }
 
-    // Build right-hand side of first system to be solved
-    F2FScalar z2[15];
-    memset(z2, 0.0, 15*sizeof(F2FScalar));
-    for ( int j = 0; j < nn; j++ ){
-      int indx = global_conn[nn*i+j];
+        F2FScalar w = global_W[nn*i+j];
 
-      // Get vector q, and subset of input vector
-      F2FScalar q[3];
-      F2FScalar lam[3];
-      if (indx < ns) {
-        const F2FScalar *xs0 = &Xs[3*indx];
-        vec_diff(xs0bar, xs0, q);
-        memcpy(lam, &vecs_global[3*indx], 3*sizeof(F2FScalar));
-      }
-      else {
-        indx -= ns;
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;        
-        vec_diff(xs0bar, rxs0, q);
-        memcpy(lam, &vecs_global[3*indx], 3*sizeof(F2FScalar));
-        lam[isymm] *= -1.0;
+        z2[0] -= w*q[0]*lam[0];
+        z2[1] -= w*q[1]*lam[0];
+        z2[2] -= w*q[2]*lam[0];
+        z2[3] -= w*q[0]*lam[1];
+        z2[4] -= w*q[1]*lam[1];
+        z2[5] -= w*q[2]*lam[1];
+        z2[6] -= w*q[0]*lam[2];
+        z2[7] -= w*q[1]*lam[2];
+        z2[8] -= w*q[2]*lam[2];
       }
 
-      F2FScalar w = global_W[nn*i+j];
-
-      z2[0] -= w*q[0]*lam[0];
-      z2[1] -= w*q[1]*lam[0];
-      z2[2] -= w*q[2]*lam[0];
-      z2[3] -= w*q[0]*lam[1];
-      z2[4] -= w*q[1]*lam[1];
-      z2[5] -= w*q[2]*lam[1];
-      z2[6] -= w*q[0]*lam[2];
-      z2[7] -= w*q[1]*lam[2];
-      z2[8] -= w*q[2]*lam[2];
-    }
-
-    // Solve the first linear system
-    int ipiv3[15]; info = 0;
-    LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M3, &m, ipiv3, z2, &m, &info);
-
-    // Compute right-hand side of second system
-    F2FScalar z1[15];
-    F2FScalar alpha = -1.0, beta = 0.0;
-    int inc = 1;
-    BLASgemv("N", &m, &m, &alpha, M2, &m, z2, &inc, &beta, z1, &inc);
-
-    // Solve the second system
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, z1, &m, &info);
-
-    // Extract ZH
-    F2FScalar ZH[9] = {z1[0], z1[1], z1[2],
-                         z1[3], z1[4], z1[5],
-                         z1[6], z1[7], z1[8]};
-
-    // Compute centroid of adjoint variables
-    F2FScalar lambar[3]; 
-    computeCentroid(&global_conn[i*nn], &global_W[i*nn], vecs_global, lambar);
-
-    // Compute X1, X2, X3
-    memset(x, 0.0, 15*sizeof(F2FScalar));
-    x[0] -= fa[0]; 
-    x[1] -= fa[1];
-    x[2] -= fa[2];
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    F2FScalar X1[] = {x[0], x[1], x[2],
-                      x[3], x[4], x[5],
-                      x[6], x[7], x[8]};
-
-    memset(x, 0.0, 15*sizeof(F2FScalar));
-    x[3] -= fa[0]; 
-    x[4] -= fa[1];
-    x[5] -= fa[2];
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    F2FScalar X2[] = {x[0], x[1], x[2],
-                      x[3], x[4], x[5],
-                      x[6], x[7], x[8]};
-
-    memset(x, 0.0, 15*sizeof(F2FScalar));
-    x[6] -= fa[0]; 
-    x[7] -= fa[1];
-    x[8] -= fa[2];
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    F2FScalar X3[] = {x[0], x[1], x[2],
-                      x[3], x[4], x[5],
-                      x[6], x[7], x[8]};
-
-    // Compute vector for third term
-    F2FScalar qXlam[] = {0.0, 0.0, 0.0};
-    for (int j = 0; j < nn; j++) {
-      int indx = global_conn[nn*i+j];
-
-      // Get vector q and subset of input vector
-      F2FScalar q[3];
-      F2FScalar lam[3];
-      if (indx < ns) {
-        const F2FScalar *xs0 = &Xs[3*indx];
-        vec_diff(xs0bar, xs0, q);
-        memcpy(lam, &vecs_global[3*indx], 3*sizeof(F2FScalar));
-      }
-      else {
-        indx -= ns;
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;        
-        vec_diff(xs0bar, rxs0, q);
-        memcpy(lam, &vecs_global[3*indx], 3*sizeof(F2FScalar));
-        lam[isymm] *= -1.0;
-      }
+      // Solve the first linear system
+      int ipiv3[15]; info = 0;
+      LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
+      info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M3, &m, ipiv3, z2, &m, &info);
+
+      // Compute right-hand side of second system
+      F2FScalar z1[15];
+      F2FScalar alpha = -1.0, beta = 0.0;
+      int inc = 1;
+      BLASgemv("N", &m, &m, &alpha, M2, &m, z2, &inc, &beta, z1, &inc);
+
+      // Solve the second system
+      info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, z1, &m, &info);
+
+      // Extract ZH
+      F2FScalar ZH[9] = {z1[0], z1[1], z1[2],
+                           z1[3], z1[4], z1[5],
+                           z1[6], z1[7], z1[8]};
+
+      // Compute centroid of adjoint variables
+      F2FScalar lambar[3]; 
+      computeCentroid(&global_conn[i*nn], &global_W[i*nn], vecs_global, lambar);
+
+      // Compute X1, X2, X3
+      memset(x, 0.0, 15*sizeof(F2FScalar));
+      x[0] -= fa[0]; 
+      x[1] -= fa[1];
+      x[2] -= fa[2];
+      info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      F2FScalar X1[] = {x[0], x[1], x[2],
+                        x[3], x[4], x[5],
+                        x[6], x[7], x[8]};
+
+      memset(x, 0.0, 15*sizeof(F2FScalar));
+      x[3] -= fa[0]; 
+      x[4] -= fa[1];
+      x[5] -= fa[2];
+      info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      F2FScalar X2[] = {x[0], x[1], x[2],
+                        x[3], x[4], x[5],
+                        x[6], x[7], x[8]};
+
+      memset(x, 0.0, 15*sizeof(F2FScalar));
+      x[6] -= fa[0]; 
+      x[7] -= fa[1];
+      x[8] -= fa[2];
+      info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      F2FScalar X3[] = {x[0], x[1], x[2],
+                        x[3], x[4], x[5],
+                        x[6], x[7], x[8]};
+
+      // Compute vector for third term
+      F2FScalar qXlam[] = {0.0, 0.0, 0.0};
+      for (int j = 0; j < nn; j++) {
+        int indx = global_conn[nn*i+j];
+
+        // Get vector q and subset of input vector
+        F2FScalar q[3];
+        F2FScalar lam[3];
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3*indx];
+          vec_diff(xs0bar, xs0, q);
+          memcpy(lam, &vecs_global[3*indx], 3*sizeof(F2FScalar));
+        }
+        else {
+          indx -= ns;
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;        
+          vec_diff(xs0bar, rxs0, q);
+          memcpy(lam, &vecs_global[3*indx], 3*sizeof(F2FScalar));
+          lam[isymm] *= -1.0;
+        }
 
-      F2FScalar w = global_W[nn*i+j];
-      for (int m = 0; m < 3; m++){
-        for (int n = 0; n < 3; n++) {
-          qXlam[0] += w*q[m]*X1[m+3*n]*lam[n];
-          qXlam[1] += w*q[m]*X2[m+3*n]*lam[n];
-          qXlam[2] += w*q[m]*X3[m+3*n]*lam[n];
+        F2FScalar w = global_W[nn*i+j];
+        for (int m = 0; m < 3; m++){
+          for (int n = 0; n < 3; n++) {
+            qXlam[0] += w*q[m]*X1[m+3*n]*lam[n];
+            qXlam[1] += w*q[m]*X2[m+3*n]*lam[n];
+            qXlam[2] += w*q[m]*X3[m+3*n]*lam[n];
+          }
         }
       }
-    }
 
-    // Loop over linked structural nodes and add contributions from aerodynamic
-    // surface node to global structural loads
-    for ( int j = 0; j < nn; j++ ) {
-      int indx = global_conn[nn*i+j];
+      // Loop over linked structural nodes and add contributions from aerodynamic
+      // surface node to global structural loads
+      for ( int j = 0; j < nn; j++ ) {
+        int indx = global_conn[nn*i+j];
+
+        if (indx < ns) {
+          // Compute vector q from centroid to structural node
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar q[3];
+          vec_diff(xs0bar, xs0, q);
+
+          // Compute vector p from displaced centroid to displaced structural node
+          F2FScalar *xs = &Xsd[3*indx];
+          F2FScalar p[3];
+          vec_diff(xsbar, xs, p);
+
+          // Compute vector lamp from centroid of adjoint variables to the
+          // components of the adjoint variable corresponding to this node
+          const F2FScalar *lam = &vecs_global[3*indx];
+          F2FScalar lamp[3];
+          vec_diff(lambar, lam, lamp);
+
+          // Take contribution of first term
+          F2FScalar w = global_W[nn*i+j];
+          F2FScalar *prod = &contrib[3*(nn*(i - i0) + j)];
+          prod[0] -= w*(q[0]*ZH[0] + q[1]*ZH[1] + q[2]*ZH[2]) +
+                     w*(ZH[0]*p[0] + ZH[3]*p[1] + ZH[6]*p[2]);
+          prod[1] -= w*(q[0]*ZH[3] + q[1]*ZH[4] + q[2]*ZH[5]) +
+                     w*(ZH[1]*p[0] + ZH[4]*p[1] + ZH[7]*p[2]);
+          prod[2] -= w*(q[0]*ZH[6] + q[1]*ZH[7] + q[2]*ZH[8]) +
+                     w*(ZH[2]*p[0] + ZH[5]*p[1] + ZH[8]*p[2]);
+
+          // Take contribution of second term
+          prod[0] -= w*(lamp[0]*XT[0] + lamp[1]*XT[1] + lamp[2]*XT[2]);
+          prod[1] -= w*(lamp[0]*XT[3] + lamp[1]*XT[4] + lamp[2]*XT[5]);
+          prod[2] -= w*(lamp[0]*XT[6] + lamp[1]*XT[7] + lamp[2]*XT[8]);
+
+          // Take contribution of third term
+          prod[0] += w*qXlam[0];
+          prod[1] += w*qXlam[1];
+          prod[2] += w*qXlam[2];
+        }
+        else {
+          indx -= ns;
 
-      if (indx < ns) {
-        // Compute vector q from centroid to structural node
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar q[3];
-        vec_diff(xs0bar, xs0, q);
+          const F2FScalar *xs0 = &Xs[3*indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;        
 
-        // Compute vector p from displaced centroid to displaced structural node
-        F2FScalar *xs = &Xsd[3*indx];
-        F2FScalar p[3];
-        vec_diff(xsbar, xs, p);
+          F2FScalar q[3];
+          vec_diff(xs0bar, rxs0, q);
 
-        // Compute vector lamp from centroid of adjoint variables to the
-        // components of the adjoint variable corresponding to this node
-        const F2FScalar *lam = &vecs_global[3*indx];
-        F2FScalar lamp[3];
-        vec_diff(lambar, lam, lamp);
+          F2FScalar *xs = &Xsd[3*indx];
+          F2FScalar rxs[3];
+          memcpy(rxs, xs, 3*sizeof(F2FScalar));
+          rxs[isymm] *= -1.0;        
 
-        // Take contribution of first term
-        F2FScalar w = global_W[nn*i+j];
-        F2FScalar *prod = &prods_global[3*indx];
-        prod[0] -= w*(q[0]*ZH[0] + q[1]*ZH[1] + q[2]*ZH[2]) +
-                   w*(ZH[0]*p[0] + ZH[3]*p[1] + ZH[6]*p[2]);
-        prod[1] -= w*(q[0]*ZH[3] + q[1]*ZH[4] + q[2]*ZH[5]) +
-                   w*(ZH[1]*p[0] + ZH[4]*p[1] + ZH[7]*p[2]);
-        prod[2] -= w*(q[0]*ZH[6] + q[1]*ZH[7] + q[2]*ZH[8]) +
-                   w*(ZH[2]*p[0] + ZH[5]*p[1] + ZH[8]*p[2]);
-
-        // Take contribution of second term
-        prod[0] -= w*(lamp[0]*XT[0] + lamp[1]*XT[1] + lamp[2]*XT[2]);
-        prod[1] -= w*(lamp[0]*XT[3] + lamp[1]*XT[4] + lamp[2]*XT[5]);
-        prod[2] -= w*(lamp[0]*XT[6] + lamp[1]*XT[7] + lamp[2]*XT[8]);
-
-        // Take contribution of third term
-        prod[0] += w*qXlam[0];
-        prod[1] += w*qXlam[1];
-        prod[2] += w*qXlam[2];
-      }
-      else {
-        indx -= ns;
+          F2FScalar p[3];
+          vec_diff(xsbar, rxs, p);
 
-        const F2FScalar *xs0 = &Xs[3*indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3*sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;        
-
-        F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
-
-        F2FScalar *xs = &Xsd[3*indx];
-        F2FScalar rxs[3];
-        memcpy(rxs, xs, 3*sizeof(F2FScalar));
-        rxs[isymm] *= -1.0;        
-
-        F2FScalar p[3];
-        vec_diff(xsbar, rxs, p);
+          F2FScalar lam[3];
+          memcpy(lam, &vecs_global[3*indx], 3*sizeof(F2FScalar));
+          lam[isymm] *= -1.0;
+          F2FScalar lamp[3];
+          vec_diff(lambar, lam, lamp);
 
-        F2FScalar lam[3];
-        memcpy(lam, &vecs_global[3*indx], 3*sizeof(F2FScalar));
-        lam[isymm] *= -1.0;
-        F2FScalar lamp[3];
-        vec_diff(lambar, lam, lamp);
+          F2FScalar w = global_W[nn*i+j];
+          F2FScalar *prod = &contrib[3*(nn*(i - i0) + j)];
 
-        F2FScalar w = global_W[nn*i+j];
-        F2FScalar *prod = &prods_global[3*indx];
+          F2FScalar rprod[3];
 
-        F2FScalar rprod[3];
+          rprod[0] = w*(q[0]*ZH[0] + q[1]*ZH[1] + q[2]*ZH[2]) +
+                     w*(ZH[0]*p[0] + ZH[3]*p[1] + ZH[6]*p[2]);
+          rprod[1] = w*(q[0]*ZH[3] + q[1]*ZH[4] + q[2]*ZH[5]) +
+                     w*(ZH[1]*p[0] + ZH[4]*p[1] + ZH[7]*p[2]);
+          rprod[2] = w*(q[0]*ZH[6] + q[1]*ZH[7] + q[2]*ZH[8]) +
+                     w*(ZH[2]*p[0] + ZH[5]*p[1] + ZH[8]*p[2]);
 
-        rprod[0] = w*(q[0]*ZH[0] + q[1]*ZH[1] + q[2]*ZH[2]) +
-                   w*(ZH[0]*p[0] + ZH[3]*p[1] + ZH[6]*p[2]);
-        rprod[1] = w*(q[0]*ZH[3] + q[1]*ZH[4] + q[2]*ZH[5]) +
-                   w*(ZH[1]*p[0] + ZH[4]*p[1] + ZH[7]*p[2]);
-        rprod[2] = w*(q[0]*ZH[6] + q[1]*ZH[7] + q[2]*ZH[8]) +
-                   w*(ZH[2]*p[0] + ZH[5]*p[1] + ZH[8]*p[2]);
+          rprod[0] += w*(lamp[0]*XT[0] + lamp[1]*XT[1] + lamp[2]*XT[2]);
+          rprod[1] += w*(lamp[0]*XT[3] + lamp[1]*XT[4] + lamp[2]*XT[5]);
+          rprod[2] += w*(lamp[0]*XT[6] + lamp[1]*XT[7] + lamp[2]*XT[8]);
 
-        rprod[0] += w*(lamp[0]*XT[0] + lamp[1]*XT[1] + lamp[2]*XT[2]);
-        rprod[1] += w*(lamp[0]*XT[3] + lamp[1]*XT[4] + lamp[2]*XT[5]);
-        rprod[2] += w*(lamp[0]*XT[6] + lamp[1]*XT[7] + lamp[2]*XT[8]);
+          rprod[0] -= w*qXlam[0];
+          rprod[1] -= w*qXlam[1];
+          rprod[2] -= w*qXlam[2];
 
-        rprod[0] -= w*qXlam[0];
-        rprod[1] -= w*qXlam[1];
-        rprod[2] -= w*qXlam[2];
+          rprod[isymm] *= -1.0;
 
-        rprod[isymm] *= -1.0;
+          prod[0] -= rprod[0];
+          prod[1] -= rprod[1];
+          prod[2] -= rprod[2];
+        }
+      }        
+    }
 
-        prod[0] -= rprod[0];
-        prod[1] -= rprod[1];
-        prod[2] -= rprod[2];
-      }
-    }        
+    addStructuralContributions(nn, global_conn, i0, i1, contrib, 3,
+                               prods_global);
   }
+  delete [] contrib;
   // distribute the results to the structural processors
   distributeStructuralVector(prods_global,prods);
 
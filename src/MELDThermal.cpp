@@ -63,6 +63,21 @@ MELDThermal::MELDThermal( MPI_Comm all, MPI_Comm structure, int _struct_root,
   // Initialize the aerostuctural connectivity
   global_conn = NULL;
   global_W = NULL;
+  single_W = NULL;
+  conn_source = NULL;
+  shared_fail = 0;
+
+  // Initialize the data for updating the connectivity
+  conn_Xa = NULL;
+  conn_Xs = NULL;
+  conn_gap = NULL;
+  conn_na = 0;
+  conn_ns = 0;
+  conn_fingerprint = 0;
+
+  // Initialize the hashes of the structural node locations
+  struct_hash_local = F2F_HASH_OFFSET_BASIS;
+  struct_hash = F2F_HASH_OFFSET_BASIS;
 
   // Initialize object id
   object_id = TransferScheme::object_count++;
@@ -79,11 +94,20 @@ MELDThermal::MELDThermal( MPI_Comm all, MPI_Comm structure, int _struct_root,
 }
 
 MELDThermal::~MELDThermal(){
-  // Free the aerostructural connectivity data
+  // Free the aerostructural connectivity data, unless it is shared
+  if (conn_source){
+    global_conn = NULL;
+    global_W = NULL;
+    single_W = NULL;
+  }
   if (global_conn){ delete [] global_conn; }
+  if (conn_Xa){ delete [] conn_Xa; }
+  if (conn_Xs){ delete [] conn_Xs; }
+  if (conn_gap){ delete [] conn_gap; }
 
   // Free the load transfer data
   if (global_W){ delete [] global_W; }
+  if (single_W){ delete [] single_W; }
 
   int rank;
   MPI_Comm_rank(global_comm,&rank);
@@ -99,6 +123,7 @@ void MELDThermal::setStructNodes( const F2FScalar *struct_X, int struct_nnodes )
   ns_local = struct_nnodes;
   Xs_local = new F2FScalar[3*ns_local];
   memcpy(Xs_local, struct_X, 3*ns_local*sizeof(F2FScalar));
+  struct_hash_local = hashNodes(struct_X, ns_local, F2F_HASH_OFFSET_BASIS);
 
   mesh_update = 1;
 }
@@ -134,40 +159,7 @@ void MELDThermal::setAeroNodes(const F2FScalar *aero_X, int aero_nnodes){
 */
 void MELDThermal::collectStructuralVector( const F2FScalar *local, F2FScalar *global,
 					   int vars_per_node ){
-  // Collect how many structural nodes every processor has
-  if (struct_comm != MPI_COMM_NULL){
-    int struct_nprocs;
-    int struct_rank;
-    MPI_Comm_size(struct_comm, &struct_nprocs);
-    MPI_Comm_rank(struct_comm, &struct_rank);
-
-    int *ns_list = new int[struct_nprocs];
-    memset(ns_list, 0, struct_nprocs*sizeof(int));
-
-    MPI_Gather(&ns_local, 1, MPI_INT, ns_list, 1, MPI_INT, struct_root, struct_comm);
-
-    // Collect the structural nodes on the master
-    int send_size = ns_local*vars_per_node;
-    int *disps = new int[struct_nprocs];
-    memset(disps, 0, struct_nprocs*sizeof(int));
-
-    if ( struct_rank == struct_root){
-      for (int proc = 0; proc < struct_nprocs; proc++){
-        ns_list[proc] *= vars_per_node;
-        if (proc > 0){
-          disps[proc] = disps[proc-1] + ns_list[proc-1];
-        }
-      }
-    }
-
-    MPI_Gatherv(local, send_size, F2F_MPI_TYPE, global, ns_list, disps, F2F_MPI_TYPE, 0, struct_comm);
-
-    delete [] ns_list;
-    delete [] disps;
-  }
-
-  // Pass the global list to all the processors
-  MPI_Bcast(global, vars_per_node*ns, F2F_MPI_TYPE, struct_root, global_comm);
+  allgatherStructuralVector(local, global, vars_per_node);
 }
 
 /*
@@ -176,49 +168,15 @@ void MELDThermal::collectStructuralVector( const F2FScalar *local, F2FScalar *gl
 */
 void MELDThermal::distributeStructuralVector( F2FScalar *global, F2FScalar *local,
 					      int vars_per_node ){
-  // Get the contributions from each aero processor
-  MPI_Allreduce(MPI_IN_PLACE, global, ns*vars_per_node, F2F_MPI_TYPE, MPI_SUM, global_comm);
-
-  // Collect how many nodes each structural processor has
-  if ( struct_comm != MPI_COMM_NULL ) {
-    int struct_nprocs;
-    int struct_rank;
-    MPI_Comm_size(struct_comm, &struct_nprocs);
-    MPI_Comm_rank(struct_comm, &struct_rank);
-
-    int *ns_list = new int[struct_nprocs];
-
-    MPI_Gather(&ns_local,1, MPI_INT, ns_list, 1, MPI_INT, 0, struct_comm);
-
-    // Distribute to the structural processors
-    int *disps = new int[struct_nprocs];
-    memset(disps, 0, struct_nprocs*sizeof(int));
-
-    if ( struct_rank == 0){
-      for (int proc = 0; proc < struct_nprocs; proc++){
-        ns_list[proc] *= vars_per_node;
-        if (proc > 0){
-          disps[proc] = disps[proc-1] + ns_list[proc-1];
-        }
-      }
-    }
-
-    MPI_Scatterv(global, ns_list, disps, F2F_MPI_TYPE, local, ns_local*vars_per_node, F2F_MPI_TYPE, 0, struct_comm);
-
-    delete [] ns_list;
-    delete [] disps;
-  }
+  reduceScatterStructuralVector(global, local, vars_per_node);
 }
 
 void MELDThermal::distributeStructuralMesh(){
   MPI_Allreduce(MPI_IN_PLACE, &mesh_update, 1, MPI_INT, MPI_SUM, global_comm);
   if (mesh_update > 0){
-    ns = 0;
-    if (struct_comm != MPI_COMM_NULL){
-      MPI_Reduce(&ns_local, &ns, 1, MPI_INT, MPI_SUM, 0, struct_comm);
-    }
+    struct_hash = gatherHash(struct_hash_local);
 
-    MPI_Bcast(&ns, 1, MPI_INT, struct_root, global_comm);
+    ns = setStructuralLayout(ns_local);
 
     // Allocate memory for structural data, initialize displacement array
     if (Xs){ delete [] Xs; }
@@ -244,6 +202,13 @@ void MELDThermal::initialize() {
   // global number of structural nodes
   distributeStructuralMesh();
 
+  // Use the connectivity and weights of the source scheme
+  if (conn_source){
+    checkSharedConnectivity();
+    getSharedConnectivity();
+    return;
+  }
+
   // Check that user doesn't set more nearest nodes than exist in total
   if (nn > ns) { nn = ns; }
 
@@ -254,67 +219,504 @@ void MELDThermal::initialize() {
   // Allocate and compute the weights
   global_W = new F2FScalar[nn*na];
   computeWeights(global_W);
+
+  // Save the node locations for updating the connectivity
+  storeConnectivityMesh();
+
+  if (single_precision){
+    setSingleWeights();
+  }
+}
+
+/*
+  Save the node counts and fingerprint of the current connectivity, and the
+  node locations once they are kept for reconnect()
+*/
+void MELDThermal::storeConnectivityMesh() {
+  conn_na = na;
+  conn_ns = ns;
+  if (conn_Xa){
+    memcpy(conn_Xa, Xa, 3*na*sizeof(F2FScalar));
+    memcpy(conn_Xs, Xs, 3*ns*sizeof(F2FScalar));
+  }
+  conn_fingerprint = computeFingerprint();
+}
+
+/*
+  Store the weights in single precision for forward-only transfers. The
+  precision must be set before the connectivity is computed or loaded
+
+  Arguments
+  ---------
+  flag : non-zero to use single precision transfers
+*/
+void MELDThermal::setSinglePrecision(int flag) {
+  int rank;
+  MPI_Comm_rank(global_comm, &rank);
+  if (global_conn){
+    if (rank == struct_root){
+      printf("Transfer scheme [%i]: the precision can only be set before "
+             "initialize()\n", object_id);
+    }
+    return;
+  }
+
+#ifdef FUNTOFEM_USE_COMPLEX
+  if (flag){
+    if (rank == struct_root){
+      printf("Transfer scheme [%i]: single precision transfers are not "
+             "available in complex mode\n", object_id);
+    }
+    return;
+  }
+#endif
+
+  single_precision = (flag ? 1 : 0);
+}
+
+/*
+  Replace the single precision weights with a double precision copy
+*/
+void MELDThermal::setDoubleWeights() {
+  if (single_W){
+    global_W = new F2FScalar[nn*na];
+    for ( int i = 0; i < nn*na; i++ ) {
+      global_W[i] = single_W[i];
+    }
+    delete [] single_W;
+    single_W = NULL;
+  }
+}
+
+/*
+  Replace the double precision weights with a single precision copy
+*/
+void MELDThermal::setSingleWeights() {
+  if (global_W){
+    single_W = new float[nn*na];
+    for ( int i = 0; i < nn*na; i++ ) {
+      single_W[i] = F2FRealPart(global_W[i]);
+    }
+    delete [] global_W;
+    global_W = NULL;
+  }
+}
+
+/*
+  Use the connectivity and weights of a MELD scheme in place of computing
+  them in initialize(). The source scheme must be initialized with the same
+  aerodynamic and structural nodes before this scheme, must not be
+  partitioned and must outlive this scheme. The number of nearest nodes,
+  weighting and precision of the source are used
+
+  Arguments
+  ---------
+  source : the MELD scheme that owns the connectivity and weights
+*/
+void MELDThermal::shareConnectivity(MELD *source) {
+  if (global_conn){
+    int rank;
+    MPI_Comm_rank(global_comm, &rank);
+    if (rank == struct_root){
+      printf("Transfer scheme [%i]: the connectivity can only be shared "
+             "before initialize()\n", object_id);
+    }
+    return;
+  }
+
+  // The source is checked when this scheme is initialized
+  conn_source = source;
+  shared_fail = 1;
+}
+
+/*
+  Check on all processors that the connectivity and weights of the source
+  scheme can be used for the meshes of this scheme. This is done when the
+  connectivity is set up rather than in each transfer
+*/
+void MELDThermal::checkSharedConnectivity() {
+  shared_fail = (!conn_source->global_conn || conn_source->partitioned ||
+                 conn_source->na != na || conn_source->ns != ns);
+  MPI_Allreduce(MPI_IN_PLACE, &shared_fail, 1, MPI_INT, MPI_MAX,
+                global_comm);
+  if (shared_fail){
+    int rank;
+    MPI_Comm_rank(global_comm, &rank);
+    if (rank == struct_root){
+      fprintf(stderr, "Transfer scheme [%i]: the connectivity of scheme "
+              "[%i] cannot be shared, it must be initialized first with "
+              "the same nodes and without partitioning\n", object_id,
+              conn_source->object_id);
+    }
+  }
+}
+
+/*
+  Point to the current connectivity and weights of the source scheme
+
+  Returns
+  -------
+  fail : non-zero if the source cannot be used for the meshes of this scheme
+*/
+int MELDThermal::getSharedConnectivity() {
+  if (!conn_source){
+    return 0;
+  }
+
+  if (shared_fail){
+    global_conn = NULL;
+    global_W = NULL;
+    single_W = NULL;
+    return shared_fail;
+  }
+
+  nn = conn_source->nn;
+  global_conn = conn_source->global_conn;
+  global_W = conn_source->global_W;
+  single_W = conn_source->single_W;
+  single_precision = conn_source->single_precision;
+  return 0;
+}
+
+/*
+  Report the memory used by the arrays of the scheme on this processor. The
+  fluxes and temperatures have one entry per node
+
+  Returns
+  -------
+  names : names of the allocated arrays
+  bytes : size of each array in bytes
+*/
+int MELDThermal::getMemoryUsage(const char **names, size_t *bytes) {
+  size_t s = sizeof(F2FScalar), k = sizeof(int);
+  int n = 0;
+  n = addMemoryUsage(n, "Xa", Xa, s*3*na, names, bytes);
+  n = addMemoryUsage(n, "Fa", Fa, s*na, names, bytes);
+  n = addMemoryUsage(n, "Xs", Xs, s*3*ns, names, bytes);
+  n = addMemoryUsage(n, "Us", Us, s*ns, names, bytes);
+  n = addMemoryUsage(n, "Xs_local", Xs_local, s*3*ns_local, names, bytes);
+
+  int nprocs;
+  MPI_Comm_size(global_comm, &nprocs);
+  n = addMemoryUsage(n, "struct_counts", struct_counts, k*nprocs, names, bytes);
+  n = addMemoryUsage(n, "struct_offsets", struct_offsets, k*nprocs, names,
+                     bytes);
+
+  // Connectivity and weights, unless they are owned by the source scheme
+  if (!conn_source){
+    n = addMemoryUsage(n, "global_conn", global_conn, k*nn*na, names, bytes);
+    n = addMemoryUsage(n, "global_W", global_W, s*nn*na, names, bytes);
+    n = addMemoryUsage(n, "single_W", single_W, sizeof(float)*nn*na, names,
+                       bytes);
+  }
+
+  // Node locations and gaps for updating the connectivity
+  n = addMemoryUsage(n, "conn_Xa", conn_Xa, s*3*conn_na, names, bytes);
+  n = addMemoryUsage(n, "conn_Xs", conn_Xs, s*3*conn_ns, names, bytes);
+  n = addMemoryUsage(n, "conn_gap", conn_gap, sizeof(double)*na, names,
+                     bytes);
+  return n;
+}
+
+/*
+  Fingerprint of the meshes and settings the connectivity is computed for
+*/
+uint64_t MELDThermal::computeFingerprint() {
+  int info[4] = {na, ns, nn, isymm};
+  double beta = F2FRealPart(global_beta);
+  uint64_t h = hashData(info, sizeof(info), F2F_HASH_OFFSET_BASIS);
+  h = hashData(&beta, sizeof(double), h);
+  h = hashData(&struct_hash, sizeof(uint64_t), h);
+  return hashNodes(Xa, na, h);
+}
+
+/*
+  Save the aerostructural connectivity and weights together with the
+  fingerprint of the meshes they were computed for
+
+  Arguments
+  ---------
+  filename : name of the file (with the rank appended on more than one
+             processor)
+
+  Returns
+  -------
+  fail : non-zero if the connectivity could not be saved on any processor
+*/
+int MELDThermal::saveConnectivity(const char *filename) {
+  // The shared connectivity is saved with the source scheme
+  int fail = 1;
+  if (global_conn && !conn_source){
+    if (single_precision){ setDoubleWeights(); }
+    fail = writeConnectivityFile(filename, conn_fingerprint, nn, global_conn,
+                                 global_W, conn_gap);
+    if (single_precision){ setSingleWeights(); }
+  }
+
+  MPI_Allreduce(MPI_IN_PLACE, &fail, 1, MPI_INT, MPI_MAX, global_comm);
+  return fail;
+}
+
+/*
+  Load the aerostructural connectivity and weights saved by
+  saveConnectivity() in place of initialize(). The file is rejected if it
+  was saved for different meshes or settings, in which case the scheme is
+  left uninitialized
+
+  Arguments
+  ---------
+  filename : name of the file (with the rank appended on more than one
+             processor)
+
+  Returns
+  -------
+  fail : non-zero if the file was rejected on any processor
+*/
+int MELDThermal::loadConnectivity(const char *filename) {
+  // global number of structural nodes
+  distributeStructuralMesh();
+
+  int rank;
+  MPI_Comm_rank(global_comm, &rank);
+  if (global_conn || conn_source){
+    if (rank == struct_root){
+      printf("Transfer scheme [%i]: the connectivity can only be loaded "
+             "before initialize() and when it is not shared\n", object_id);
+    }
+    return 1;
+  }
+
+  // Check that user doesn't set more nearest nodes than exist in total
+  if (nn > ns) { nn = ns; }
+
+  int *conn = new int[nn*na];
+  F2FScalar *W = new F2FScalar[nn*na];
+  double *gap = new double[na];
+  int fail = readConnectivityFile(filename, computeFingerprint(), nn,
+                                  conn, W, gap);
+  MPI_Allreduce(MPI_IN_PLACE, &fail, 1, MPI_INT, MPI_MAX, global_comm);
+  if (fail){
+    delete [] conn;
+    delete [] W;
+    delete [] gap;
+    return fail;
+  }
+
+  // The gaps are only kept once reconnect() is used
+  global_conn = conn;
+  global_W = W;
+  delete [] gap;
+
+  // Save the node locations for updating the connectivity
+  storeConnectivityMesh();
+
+  if (single_precision){
+    setSingleWeights();
+  }
+
+  if (rank == struct_root){
+    printf("Transfer scheme [%i]: loaded the connectivity from %s\n",
+           object_id, filename);
+  }
+
+  return 0;
+}
+
+/*
+  Update the aerostructural connectivity and weights after the nodes have been
+  moved with setAeroNodes() and setStructNodes(). The number of nodes must not
+  change.
+
+  The set of nearest structural nodes of an aerodynamic node can only change
+  once the gap between the distances to its (nn+1)-th and nn-th closest
+  structural nodes closes. The gap shrinks by at most twice the sum of the
+  movement of the aerodynamic node and the largest structural movement, so the
+  search is only repeated for the aerodynamic nodes whose gap may have closed,
+  starting from the previous connectivity for the rest. The weights are
+  recomputed for the aerodynamic nodes that moved, or are connected to a
+  structural node that moved, by more than tol. The node locations and gaps
+  this relies on are only stored from the first call, which searches every
+  aerodynamic node, so schemes that are never reconnected do not keep a
+  second copy of the meshes.
+
+  Arguments
+  ---------
+  tol : movement below which the weights of a node are not recomputed
+*/
+void MELDThermal::reconnect(double tol) {
+  distributeStructuralMesh();
+
+  // The shared connectivity is updated by the source scheme
+  if (conn_source){
+    checkSharedConnectivity();
+    getSharedConnectivity();
+    return;
+  }
+
+  if (!global_conn){
+    initialize();
+    return;
+  }
+
+  int rank;
+  MPI_Comm_rank(global_comm, &rank);
+  if (na != conn_na || ns != conn_ns){
+    if (rank == struct_root){
+      printf("Transfer scheme [%i]: reconnect requires the same number of "
+             "nodes, call initialize() on a new scheme\n", object_id);
+    }
+    return;
+  }
+
+  // The node locations and gaps of the connectivity are only kept once
+  // reconnect() is used, so the first call searches every aerodynamic node
+  int full = (conn_Xa == NULL);
+  if (full){
+    conn_Xa = new F2FScalar[3*na];
+    conn_Xs = new F2FScalar[3*ns];
+    conn_gap = new double[na];
+  }
+
+  // Find the largest structural movement and the structural nodes that moved
+  // by more than tol
+  int *s_moved = new int[ns];
+  double ds_max = 0.0;
+  int search_all = full;
+  for ( int j = 0; j < ns && !full; j++ ) {
+    F2FScalar v[3];
+    vec_diff(&conn_Xs[3*j], &Xs[3*j], v);
+    double ds = sqrt(F2FRealPart(vec_dot(v, v)));
+    if (ds > ds_max){ ds_max = ds; }
+    s_moved[j] = (ds > tol);
+
+    // A node moving onto or off the plane of symmetry adds or removes its
+    // reflection, so all the aerodynamic nodes must be searched again
+    if (isymm > -1){
+      double eps = 1e-7;
+      if ((fabs(F2FRealPart(Xs[3*j+isymm])) > eps) != 
+          (fabs(F2FRealPart(conn_Xs[3*j+isymm])) > eps)){
+        search_all = 1;
+      }
+    }
+  }
+
+  // Find the aerodynamic nodes to search for and to compute weights for
+  int *search_ids = new int[na];
+  int *weight_ids = new int[na];
+  int nsearch = 0, nweight = 0;
+  for ( int i = 0; i < na; i++ ) {
+    int search = search_all, moved = search_all;
+    if (!search){
+      F2FScalar v[3];
+      vec_diff(&conn_Xa[3*i], &Xa[3*i], v);
+      double da = sqrt(F2FRealPart(vec_dot(v, v)));
+
+      conn_gap[i] -= 2.0*(da + ds_max);
+      search = (conn_gap[i] <= 0.0);
+
+      moved = (search || da > tol);
+      for ( int j = 0; j < nn && !moved; j++ ) {
+        int indx = global_conn[nn*i+j];
+        if (indx >= ns){ indx -= ns; }
+        moved = s_moved[indx];
+      }
+    }
+
+    if (search){ search_ids[nsearch++] = i; }
+    if (moved){ weight_ids[nweight++] = i; }
+  }
+
+  if (nsearch > 0){
+    setAeroStructConn(global_conn, nsearch, search_ids);
+  }
+  if (nweight > 0){
+    if (single_precision){ setDoubleWeights(); }
+    computeWeights(global_W, nweight, weight_ids);
+    if (single_precision){ setSingleWeights(); }
+  }
+
+  // Save the node locations of the updated connectivity
+  storeConnectivityMesh();
+
+  // Report the number of updated aerodynamic nodes
+  int counts[3] = {nsearch, nweight, na};
+  MPI_Allreduce(MPI_IN_PLACE, counts, 3, MPI_INT, MPI_SUM, global_comm);
+  if (rank == struct_root){
+    printf("Transfer scheme [%i]: reconnect searched %d and reweighted %d "
+           "of %d aerodynamic nodes\n", object_id, counts[0], counts[1],
+           counts[2]);
+  }
+
+  delete [] s_moved;
+  delete [] search_ids;
+  delete [] weight_ids;
 }
 
 /*
   Builds aerostructural connectivity through LocatePoint search, linking each
   aerodynamic node with a specified number of nearest structural nodes
 
+  Arguments
+  ---------
+  nids     : number of aerodynamic nodes to search for (all if negative)
+  aero_ids : the aerodynamic nodes to search for (all if NULL)
+
   Return
   --------
   conn : aerostructural connectivity
 
 */
-void MELDThermal::setAeroStructConn(int *conn) {
-  // Copy or duplicate and reflect the unique structural nodes
-  F2FScalar *Xs_dup = NULL;
-  int num_locate_nodes = 0;
-
+void MELDThermal::setAeroStructConn(int *conn, int nids, const int *aero_ids) {
+  // Create instance of LocatePoint class to perform the following searches.
+  // With symmetry, the mirror images of the structural nodes are searched
+  // without duplicating the structural mesh and are numbered ns + k
+  int min_bin_size = 10;
+  LocatePoint *locator = new LocatePoint(Xs, ns, min_bin_size);
+  int num_locate_nodes = ns;
   if (isymm > -1) {
-    Xs_dup = new F2FScalar[6*ns];
-    memcpy(Xs_dup, Xs, 3*ns*sizeof(F2FScalar));
-
-    double tol = 1e-7;
-    for (int k = 0; k < ns; k++) {
-      if (fabs(F2FRealPart(Xs_dup[3*k+isymm])) > tol) {
-        // Node is not on the plane of symmetry, so copy and...
-        memcpy(&Xs_dup[3*(ns+k)], &Xs_dup[3*k], 3*sizeof(F2FScalar));
-        // reflect
-        Xs_dup[3*(ns+k)+isymm] *= -1.0;
-      } else {
-        Xs_dup[3*(ns+k)+0] = -(k+1)*9.0e9;
-        Xs_dup[3*(ns+k)+1] = -(k+1)*9.0e9+1;
-        Xs_dup[3*(ns+k)+2] = -(k+1)*9.0e9+2;
-      }
-    }
-    num_locate_nodes = 2*ns;
-  } else {
-    Xs_dup = new F2FScalar[3*ns];
-    memcpy(Xs_dup, Xs, 3*ns*sizeof(F2FScalar));
-    num_locate_nodes = ns;
+    num_locate_nodes = locator->getNumSymmPoints(isymm);
   }
 
-  // Create instance of LocatePoint class to perform the following searches
-  int min_bin_size = 10;
-  // bug is in one of these variables:
-  LocatePoint *locator = new LocatePoint(Xs_dup, num_locate_nodes, min_bin_size);
-
-  // Indices of nearest nodes
-  int *indx = new int[nn];
-  F2FScalar *dist = new F2FScalar[nn];
-
-  // For each aerodynamic node, copy the indices of the nearest n structural
-  // nodes into the conn array
-  for ( int i = 0; i < na; i++ ) {
-    F2FScalar xa0[3];
-    memcpy(xa0, &Xa[3*i], 3*sizeof(F2FScalar));
+  // Collect the aerodynamic nodes to search for
+  int nq = na;
+  const F2FScalar *xq = Xa;
+  F2FScalar *Xa_ids = NULL;
+  if (aero_ids){
+    nq = nids;
+    Xa_ids = new F2FScalar[3*nq];
+    for ( int k = 0; k < nq; k++ ) {
+      memcpy(&Xa_ids[3*k], &Xa[3*aero_ids[k]], 3*sizeof(F2FScalar));
+    }
+    xq = Xa_ids;
+  }
 
-    locator->locateKClosest(nn, indx, dist, xa0);
-    memcpy(&conn[nn*i], indx, nn*sizeof(int));
+  // Search for one extra node to record the gap between the nn-th and the
+  // (nn+1)-th closest structural nodes
+  int K = (nn < num_locate_nodes ? nn+1 : nn);
+  int *indx = new int[K*nq];
+  F2FScalar *dist = new F2FScalar[K*nq];
+
+  // For each aerodynamic node, find the indices of the nearest n structural
+  // nodes in one batched query
+  locator->locateKClosestBatch(K, nq, xq, indx, dist, nthreads, isymm);
+
+  // The gaps are only recorded once they are kept for reconnect()
+  for ( int k = 0; k < nq; k++ ) {
+    int i = (aero_ids ? aero_ids[k] : k);
+    memcpy(&conn[nn*i], &indx[K*k], nn*sizeof(int));
+    if (!conn_gap){
+      continue;
+    }
+    if (K > nn){
+      conn_gap[i] = (sqrt(F2FRealPart(dist[K*k+nn])) - 
+                     sqrt(F2FRealPart(dist[K*k+nn-1])));
+    }
+    else {
+      conn_gap[i] = 1.0e300; // every structural node is connected
+    }
   }
 
-  // Free the duplicate array
-  delete [] Xs_dup;
+  if (Xa_ids){ delete [] Xa_ids; }
 
   // Delete the LocatePoint object and release memory
   delete [] indx;
@@ -325,13 +727,23 @@ void MELDThermal::setAeroStructConn(int *conn) {
 /*
   Computes weights of structural nodes
 
+  Arguments
+  ---------
+  nids     : number of aerodynamic nodes to compute weights for (all if
+             negative)
+  aero_ids : the aerodynamic nodes to compute weights for (all if NULL)
+
   Returns
   --------
   W : weights
 
 */
-void MELDThermal::computeWeights(F2FScalar *W) {
-  for (int i = 0; i < na; i++) {
+void MELDThermal::computeWeights(F2FScalar *W, int nids, const int *aero_ids) {
+  int nq = (aero_ids ? nids : na);
+
+  F2F_OMP_PARALLEL_FOR
+  for (int k = 0; k < nq; k++) {
+    int i = (aero_ids ? aero_ids[k] : k);
     const F2FScalar *xa0 = &Xa[3*i];
     const int *local_conn = &global_conn[i*nn];
     F2FScalar *w = &W[i*nn];
@@ -411,18 +823,20 @@ void MELDThermal::transferTemp(const F2FScalar *struct_Temp,
 
   // Zero the outputs
   memset(aero_Temp, 0.0, na*sizeof(F2FScalar));
+  if (getSharedConnectivity()){ return; }
 
+  F2F_OMP_PARALLEL_FOR
   for ( int i = 0; i < na; i++ ) {
     const int *local_conn = &global_conn[i*nn];
-    const F2FScalar *w = &global_W[i*nn];
 
     F2FScalar Taero = 0.0;
     for ( int j = 0; j < nn; j++ ){
+      F2FScalar w = (single_precision ? single_W[i*nn+j] : global_W[i*nn+j]);
       if (local_conn[j] < ns) {
-        Taero += w[j]*Us[local_conn[j]];
+        Taero += w*Us[local_conn[j]];
       }
       else {
-        Taero += w[j]*Us[local_conn[j] -ns];
+        Taero += w*Us[local_conn[j] -ns];
       }
     }
 
@@ -447,27 +861,38 @@ void MELDThermal::transferFlux(const F2FScalar *aero_flux,
                                F2FScalar *struct_flux) {
   // Copy prescribed aero loads into member variable
   memcpy(Fa, aero_flux, na*sizeof(F2FScalar));
+  if (getSharedConnectivity()){
+    memset(struct_flux, 0, ns_local*sizeof(F2FScalar));
+    return;
+  }
 
   // Zero struct flux
   F2FScalar *struct_flux_global = new F2FScalar[ns];
   memset(struct_flux_global, 0, ns*sizeof(F2FScalar));
 
-  for ( int i = 0; i < na; i++ ) {
-    const int *local_conn = &global_conn[i*nn];
-    const F2FScalar *w = &global_W[i*nn];
-    const F2FScalar *fa = &Fa[i];
-
-    for ( int j = 0; j < nn; j++ ){
-      int index = 0;
-      if (local_conn[j] < ns) {
-        index = local_conn[j];
-      }
-      else {
-        index = local_conn[j] - ns;
+  // Compute the contributions of each block of aerodynamic nodes in
+  // parallel, then add them to the structural nodes in a fixed order
+  F2FScalar *contrib = new F2FScalar[nn*F2F_AERO_BLOCK_SIZE];
+  for ( int i0 = 0; i0 < na; i0 += F2F_AERO_BLOCK_SIZE ) {
+    int i1 = (i0 + F2F_AERO_BLOCK_SIZE < na ?
+              i0 + F2F_AERO_BLOCK_SIZE : na);
+    memset(contrib, 0, nn*(i1 - i0)*sizeof(F2FScalar));
+
+    F2F_OMP_PARALLEL_FOR
+    for ( int i = i0; i < i1; i++ ) {
+      const F2FScalar *fa = &Fa[i];
+
+      // The flux contribution is the same for reflected structural nodes
+      for ( int j = 0; j < nn; j++ ){
+        F2FScalar w = (single_precision ? single_W[i*nn+j] : global_W[i*nn+j]);
+        contrib[nn*(i - i0) + j] += w*fa[0];
       }
-      struct_flux_global[index] += w[j]*fa[0];
     }
+
+    addStructuralContributions(nn, global_conn, i0, i1, contrib, 1,
+                               struct_flux_global);
   }
+  delete [] contrib;
 
   // set vars_per_node = 1 for flux
   distributeStructuralVector(struct_flux_global, struct_flux, 1);
@@ -488,34 +913,58 @@ void MELDThermal::transferFlux(const F2FScalar *aero_flux,
 
 */
 void MELDThermal::applydTdtS(const F2FScalar *vecs, F2FScalar *prods) {
-  // Make a global image of the input vector
-  F2FScalar *vecs_global = new F2FScalar[ns];
-  collectStructuralVector(vecs, vecs_global, 1); // set vars_per_node = 1 for temps
+  applydTdtSBlock(vecs, prods, 1);
+}
+
+/*
+  Apply the action of the temperature transfer w.r.t structural temperature
+  Jacobian to a block of input vectors. The vectors are stored node-by-node
+  so that entry f of node j is located at j*nvecs + f
+
+  Arguments
+  ---------
+  vecs  : block of input vectors
+  nvecs : number of vectors in the block
+
+  Returns
+  --------
+  prods : block of output vectors
+
+*/
+void MELDThermal::applydTdtSBlock(const F2FScalar *vecs, F2FScalar *prods,
+                                  int nvecs) {
+  if (getSharedConnectivity()){
+    memset(prods, 0, na*nvecs*sizeof(F2FScalar));
+    return;
+  }
+
+  // Make a global image of the input vectors
+  F2FScalar *vecs_global = new F2FScalar[ns*nvecs];
+  collectStructuralVector(vecs, vecs_global, nvecs);
 
   // Zero array of Jacobian-vector products every call
-  memset(prods, 0, na*sizeof(F2FScalar));
+  memset(prods, 0, na*nvecs*sizeof(F2FScalar));
 
   // Loop over all aerodynamic surface nodes
+  F2F_OMP_PARALLEL_FOR
   for ( int i = 0; i < na; i++ ) {
+    F2FScalar *prod = &prods[nvecs*i];
 
     // Loop over linked structural nodes and add up nonzero contributions to
     // Jacobian-vector product
     for ( int j = 0; j < nn; j++ ){
       int indx = global_conn[nn*i+j];
-
-      F2FScalar v;
-      if (indx < ns) {
-        v = vecs_global[indx];
-      }
-      else {
+      if (indx >= ns) {
         indx -= ns;
-        v = vecs_global[indx];
       }
 
       // Compute each component of the Jacobian vector product as follows:
       // Jv[k] = w*v[k]
-      F2FScalar w = global_W[nn*i+j];
-      prods[i] -= w*v;
+      F2FScalar w = (single_precision ? single_W[nn*i+j] : global_W[nn*i+j]);
+      const F2FScalar *v = &vecs_global[nvecs*indx];
+      for ( int f = 0; f < nvecs; f++ ) {
+        prod[f] -= w*v[f];
+      }
     }
   }
 
@@ -537,32 +986,70 @@ void MELDThermal::applydTdtS(const F2FScalar *vecs, F2FScalar *prods) {
 
 */
 void MELDThermal::applydTdtSTrans( const F2FScalar *vecs, F2FScalar *prods ) {
+  applydTdtSTransBlock(vecs, prods, 1);
+}
 
-  // Zero array of transpose Jacobian-vector products every call
-  F2FScalar *prods_global = new F2FScalar[ns];
-  memset(prods_global, 0, ns*sizeof(F2FScalar));
+/*
+  Apply the action of the temperature transfer w.r.t structural temperature
+  transpose Jacobian to a block of input vectors stored node-by-node
 
-  // Loop over aerodynamic surface nodes
-  for ( int i = 0; i < na; i++ ) {
+  Arguments
+  ----------
+  vecs  : block of input vectors
+  nvecs : number of vectors in the block
 
-    // Loop over linked structural nodes and add up nonzero contributions to
-    // Jacobian-vector product
-    for ( int j = 0; j < nn; j++ ) {
-      int indx = global_conn[nn*i+j];
-      F2FScalar w = global_W[nn*i+j];
+  Returns
+  --------
+  prods : block of output vectors
 
-      if (indx < ns) {
-        prods_global[indx] -= w*vecs[i];
-      }
-      else {
-        indx -= ns;
-        prods_global[indx] -= w*vecs[i];
+*/
+void MELDThermal::applydTdtSTransBlock( const F2FScalar *vecs,
+                                        F2FScalar *prods, int nvecs ) {
+  if (getSharedConnectivity()){
+    memset(prods, 0, ns_local*nvecs*sizeof(F2FScalar));
+    return;
+  }
+
+  // Zero array of transpose Jacobian-vector products every call
+  F2FScalar *prods_global = new F2FScalar[ns*nvecs];
+  memset(prods_global, 0, ns*nvecs*sizeof(F2FScalar));
+
+  // Compute the contributions of each block of aerodynamic nodes in
+  // parallel, then add them to the structural nodes in a fixed order
+  F2FScalar *contrib = new F2FScalar[nvecs*nn*F2F_AERO_BLOCK_SIZE];
+  for ( int i0 = 0; i0 < na; i0 += F2F_AERO_BLOCK_SIZE ) {
+    int i1 = (i0 + F2F_AERO_BLOCK_SIZE < na ?
+              i0 + F2F_AERO_BLOCK_SIZE : na);
+    memset(contrib, 0, nvecs*nn*(i1 - i0)*sizeof(F2FScalar));
+
+    F2F_OMP_PARALLEL_FOR
+    for ( int i = i0; i < i1; i++ ) {
+      const F2FScalar *v = &vecs[nvecs*i];
+
+      // Loop over linked structural nodes and add up nonzero contributions to
+      // Jacobian-vector product
+      for ( int j = 0; j < nn; j++ ) {
+        int indx = global_conn[nn*i+j];
+        F2FScalar w = (single_precision ? single_W[nn*i+j] :
+                       global_W[nn*i+j]);
+        if (indx >= ns) {
+          indx -= ns;
+        }
+
+        F2FScalar *prod = &contrib[nvecs*(nn*(i - i0) + j)];
+        for ( int f = 0; f < nvecs; f++ ) {
+          prod[f] -= w*v[f];
+        }
       }
     }
+
+    addStructuralContributions(nn, global_conn, i0, i1, contrib, nvecs,
+                               prods_global);
   }
+  delete [] contrib;
 
   // distribute the results to the structural processors
-  distributeStructuralVector(prods_global, prods, 1); // set vars_per_node = 1 for flux
+  distributeStructuralVector(prods_global, prods, nvecs);
 
   // clean up allocated memory
   delete [] prods_global;
@@ -602,6 +1089,19 @@ void MELDThermal::applydQdqATrans( const F2FScalar *vecs, F2FScalar *prods ) {
   applydTdtS(vecs, prods);
 }
 
+/*
+  Block versions of the flux transfer Jacobian-vector products
+*/
+void MELDThermal::applydQdqABlock(const F2FScalar *vecs, F2FScalar *prods,
+                                  int nvecs) {
+  applydTdtSTransBlock(vecs, prods, nvecs);
+}
+
+void MELDThermal::applydQdqATransBlock(const F2FScalar *vecs,
+                                       F2FScalar *prods, int nvecs) {
+  applydTdtSBlock(vecs, prods, nvecs);
+}
+
 /*
   Tests flux transfer by computing derivative of product of heat flux on and
   temperatures of aerodynamic surface nodes with respect to structural node
@@ -49,6 +49,21 @@ Octree::Octree(F2FScalar *points, int num_points,
   memcpy(Xpts, points, 3*npts*sizeof(double));
 #endif
   
+  // Tree data is allocated in generate()
+  nbins = 0;
+  bin_depths = NULL;
+  bin_parents = NULL;
+  bin_corners = NULL;
+  points_bins = NULL;
+  nleaf = 0;
+  leaf_bins = NULL;
+  leaf_ptr = NULL;
+  leaf_points = NULL;
+  max_bins = 0;
+  max_leaf = 0;
+  point_ids = NULL;
+  work = NULL;
+
   // Initialize recursion exit conditions
   min_points = min_point_count;
   min_edge = min_edge_length;
@@ -68,6 +83,8 @@ Octree::~Octree() {
   if (bin_corners) delete [] bin_corners;
   if (points_bins) delete [] points_bins;
   if (leaf_bins) delete [] leaf_bins;
+  if (leaf_ptr) delete [] leaf_ptr;
+  if (leaf_points) delete [] leaf_points;
 
   printf("Octree: freeing octree data...\n\n");
 }
@@ -78,15 +95,24 @@ Octree::~Octree() {
 void Octree::generate() {
   // Create base-level bin
   nbins = 1;
-  bin_depths = new int[nbins];
+  max_bins = 8*(npts/(min_points > 0 ? min_points : 1)) + 9;
+  bin_depths = new int[max_bins];
   bin_depths[0] = 0;
-  bin_parents = new int[nbins];
+  bin_parents = new int[max_bins];
   bin_parents[0] = 0;
-  bin_corners = new double[6*nbins];
-  points_bins = new int[npts];
-  memset(points_bins, 0, npts*sizeof(int)); // all points start in base bin
+  bin_corners = new double[6*max_bins];
   nleaf = 0;
-  leaf_bins = new int[nbins]; // cannot allocate an array of length zero
+  max_leaf = max_bins;
+  leaf_bins = new int[max_leaf];
+  leaf_ptr = new int[max_leaf+1];
+  leaf_ptr[0] = 0;
+
+  // All points start in the base bin
+  point_ids = new int[npts];
+  work = new int[npts];
+  for (int i = 0; i < npts; i++) {
+    point_ids[i] = i;
+  }
 
   // Find corners of base bin
   double xmin[] = {Xpts[0], Xpts[1], Xpts[2]};
@@ -104,11 +130,52 @@ void Octree::generate() {
   memcpy(&bin_corners[3], xmax, 3*sizeof(double));
 
   // Recursively divide the base bin to create the tree
-  bool is_base_leaf_bin = divide(0);
+  bool is_base_leaf_bin = divide(0, 0, npts);
   if (is_base_leaf_bin) {
     leaf_bins[nleaf] = 0; // base-level bin is only leaf
+    leaf_ptr[nleaf+1] = npts;
+    nleaf++;
     printf("Octree error: the base-level bin could not be subdivided.\n");
   }
+
+  // The points are now sorted by leaf bin, so record the bin of each point
+  // from the leaf lists
+  leaf_points = point_ids;
+  point_ids = NULL;
+  delete [] work;
+  work = NULL;
+
+  points_bins = new int[npts];
+  memset(points_bins, 0, npts*sizeof(int));
+  for (int k = 0; k < nleaf; k++) {
+    for (int j = leaf_ptr[k]; j < leaf_ptr[k+1]; j++) {
+      points_bins[leaf_points[j]] = leaf_bins[k];
+    }
+  }
+}
+
+/*
+  Double the length of the bin arrays
+*/
+void Octree::extendBins() {
+  int new_max_bins = 2*max_bins;
+
+  int *new_bin_depths = new int[new_max_bins];
+  memcpy(new_bin_depths, bin_depths, nbins*sizeof(int));
+  delete [] bin_depths;
+  bin_depths = new_bin_depths;
+
+  int *new_bin_parents = new int[new_max_bins];
+  memcpy(new_bin_parents, bin_parents, nbins*sizeof(int));
+  delete [] bin_parents;
+  bin_parents = new_bin_parents;
+
+  double *new_bin_corners = new double[6*new_max_bins];
+  memcpy(new_bin_corners, bin_corners, 6*nbins*sizeof(double));
+  delete [] bin_corners;
+  bin_corners = new_bin_corners;
+
+  max_bins = new_max_bins;
 }
 
 /*
@@ -117,18 +184,16 @@ void Octree::generate() {
   Arguments
   ---------
   bin_id : ID of bin
+  start  : start of the bin's points in point_ids
+  end    : end of the bin's points in point_ids
 
   Returns
   -------
   divide : boolean indicating whether the bin satisfies the exit conditions
-
 */
-bool Octree::divide(int bin_id) {
+bool Octree::divide(int bin_id, int start, int end) {
   // Count points in bin
-  int bin_count = 0;
-  for (int i = 0; i < npts; i++) {
-    if (points_bins[i] == bin_id) bin_count++;
-  }
+  int bin_count = end - start;
   bool count_check = bin_count <= min_points;
 
   // Find smallest edge of bin
@@ -158,23 +223,35 @@ bool Octree::divide(int bin_id) {
                    0.5*(bin_corners[6*bin_id+4] + bin_corners[6*bin_id+1]),
                    0.5*(bin_corners[6*bin_id+5] + bin_corners[6*bin_id+2])};
 
+  // Sort the points of the bin by octant with a stable counting sort. A point
+  // on the center plane is placed in the lower octant.
+  int octant_ptr[9];
+  memset(octant_ptr, 0, 9*sizeof(int));
+  for (int j = start; j < end; j++) {
+    double *x = &Xpts[3*point_ids[j]];
+    int octant = ((x[0] > xcen[0]) ? 1 : 0) |
+                 ((x[1] > xcen[1]) ? 2 : 0) |
+                 ((x[2] > xcen[2]) ? 4 : 0);
+    work[j] = octant;
+    octant_ptr[octant+1]++;
+  }
+  for (int i = 0; i < 8; i++) {
+    octant_ptr[i+1] += octant_ptr[i];
+  }
+  int offset[8];
+  memcpy(offset, octant_ptr, 8*sizeof(int));
+  int *sorted = new int[bin_count];
+  for (int j = start; j < end; j++) {
+    sorted[offset[work[j]]++] = point_ids[j];
+  }
+  memcpy(&point_ids[start], sorted, bin_count*sizeof(int));
+  delete [] sorted;
+
   // Add 8 new bins
   for (int i = 0; i < 8; i++) {
-    // Reallocate memory for the old data plus that of one new bin
-    int *new_bin_depths = new int[nbins+1];
-    memcpy(new_bin_depths, bin_depths, nbins*sizeof(int));
-    delete [] bin_depths;
-    bin_depths = new_bin_depths;
-
-    int *new_bin_parents = new int[nbins+1];
-    memcpy(new_bin_parents, bin_parents, nbins*sizeof(int));
-    delete [] bin_parents;
-    bin_parents = new_bin_parents;
-
-    double *new_bin_corners = new double[6*(nbins+1)];
-    memcpy(new_bin_corners, bin_corners, 6*nbins*sizeof(double));
-    delete [] bin_corners;
-    bin_corners = new_bin_corners;
+    if (nbins >= max_bins) {
+      extendBins();
+    }
 
     // Update depths and parents arrays
     int new_bin_id = nbins;
@@ -210,29 +287,26 @@ bool Octree::divide(int bin_id) {
       bin_corners[6*new_bin_id+5] = bin_corners[6*bin_id+5];
     }
 
-    // Find the points that fall inside the new bin
-    for (int i = 0; i < npts; i++) {
-      if (points_bins[i] == bin_id) {
-        double *x = &Xpts[3*i];
-        double *min_corner = &bin_corners[6*new_bin_id];
-        double *max_corner = &bin_corners[6*new_bin_id+3];
-        bool is_in_bin = x[0] >= min_corner[0] and x[0] <= max_corner[0] and
-                         x[1] >= min_corner[1] and x[1] <= max_corner[1] and 
-                         x[2] >= min_corner[2] and x[2] <= max_corner[2];
-        if (is_in_bin) points_bins[i] = new_bin_id;
-      }
-    }
-
     // Divide the new bin and keep track of leaf bins
-    bool is_leaf_bin = divide(new_bin_id);
+    int child_start = start + octant_ptr[i];
+    int child_end = start + octant_ptr[i+1];
+    bool is_leaf_bin = divide(new_bin_id, child_start, child_end);
     if (is_leaf_bin) {
-      if (nleaf > 0) {
-        int *new_leaf_bins = new int[nleaf+1];
+      if (nleaf >= max_leaf) {
+        int *new_leaf_bins = new int[2*max_leaf];
         memcpy(new_leaf_bins, leaf_bins, nleaf*sizeof(int));
         delete [] leaf_bins;
         leaf_bins = new_leaf_bins;
+
+        int *new_leaf_ptr = new int[2*max_leaf+1];
+        memcpy(new_leaf_ptr, leaf_ptr, (nleaf+1)*sizeof(int));
+        delete [] leaf_ptr;
+        leaf_ptr = new_leaf_ptr;
+
+        max_leaf *= 2;
       }
       leaf_bins[nleaf] = new_bin_id;
+      leaf_ptr[nleaf+1] = child_end;
       nleaf++;
     }
   }
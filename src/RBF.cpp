@@ -22,15 +22,18 @@
 #include <cstring>
 #include <math.h>
 #include <cstdlib>
+#include <random>
 
 #include "funtofemlapack.h"
 
 #include "RBF.h"
 #include "Octree.h"
+#include "LocatePoint.h"
 
 RBF::RBF(MPI_Comm all, MPI_Comm structure, int _struct_root,
          MPI_Comm aero, int _aero_root,
-         enum RbfType rbf_type, int sampling_ratio) {
+         enum RbfType rbf_type, int sampling_ratio,
+         double _support_radius, unsigned int _sampling_seed) {
   // TODO: figure out parallelism for RBFs
   global_comm = all;
   struct_comm = structure;
@@ -48,7 +51,23 @@ RBF::RBF(MPI_Comm all, MPI_Comm structure, int _struct_root,
   Us = NULL; 
   ns = 0;
 
+  // Initialize the interpolation data
+  interp_mat = NULL;
+  compact = 0;
+  support_radius = _support_radius;
+  npoly = 0;
+  M_rowp = M_cols = NULL;
+  M_vals = NULL;
+  Aas_rowp = Aas_cols = NULL;
+  Aas_vals = NULL;
+  L_perm = L_first = L_ptr = NULL;
+  L_vals = L_diag = NULL;
+  MinvPt = NULL;
+  Sp = NULL;
+  Sp_ipiv = NULL;
+
   // Point to the selected type of RBF
+  phi = NULL;
   switch (rbf_type) {
     case GAUSSIAN:
       phi = &gaussian;
@@ -62,11 +81,18 @@ RBF::RBF(MPI_Comm all, MPI_Comm structure, int _struct_root,
     case THIN_PLATE_SPLINE:
       phi = &thinPlateSpline;
       break;
+    case WENDLAND_C2:
+      compact = 1;
+      break;
   }
 
   // Initialize sampling data
   denominator = sampling_ratio;
+  sampling_seed = _sampling_seed;
   sample_ids = NULL;
+  greedy = 0;
+  greedy_tol = 0.0;
+  greedy_max = 0;
 
   // Initialize object id
   object_id = TransferScheme::object_count++;
@@ -83,17 +109,113 @@ RBF::~RBF() {
   // Free the sample ids matrix
   if (sample_ids) { delete [] sample_ids; }
 
-  // The interpolation should be freed automatically by Eigen
+  // Free the interpolation data
+  if (interp_mat) { delete [] interp_mat; }
+  if (M_rowp) { delete [] M_rowp; }
+  if (M_cols) { delete [] M_cols; }
+  if (M_vals) { delete [] M_vals; }
+  if (Aas_rowp) { delete [] Aas_rowp; }
+  if (Aas_cols) { delete [] Aas_cols; }
+  if (Aas_vals) { delete [] Aas_vals; }
+  if (L_perm) { delete [] L_perm; }
+  if (L_first) { delete [] L_first; }
+  if (L_ptr) { delete [] L_ptr; }
+  if (L_vals) { delete [] L_vals; }
+  if (L_diag) { delete [] L_diag; }
+  if (MinvPt) { delete [] MinvPt; }
+  if (Sp) { delete [] Sp; }
+  if (Sp_ipiv) { delete [] Sp_ipiv; }
 
   printf("Transfer scheme [%i]: freeing RBF data...\n", object_id);
 }
 
+/*
+  Select the interpolation centers greedily in initialize() instead of
+  sampling the octree leaf bins
+
+  Arguments
+  ---------
+  tol         : relative tolerance on the largest power function (bound on
+                the interpolation error) over the structural nodes
+  max_centers : maximum number of centers (no limit if <= 0)
+*/
+void RBF::setGreedySampling(double tol, int max_centers) {
+  greedy = 1;
+  greedy_tol = tol;
+  greedy_max = max_centers;
+}
+
+/*
+  Report the memory used by the arrays of the scheme on this processor,
+  including the dense or sparse interpolation data
+
+  Returns
+  -------
+  names : names of the allocated arrays
+  bytes : size of each array in bytes
+*/
+int RBF::getMemoryUsage(const char **names, size_t *bytes) {
+  size_t s = sizeof(F2FScalar), k = sizeof(int);
+  int n = TransferScheme::getMemoryUsage(names, bytes);
+  n = addMemoryUsage(n, "sample_ids", sample_ids, k*nsub, names, bytes);
+  n = addMemoryUsage(n, "interp_mat", interp_mat, s*na*nsub, names, bytes);
+  if (M_rowp) {
+    n = addMemoryUsage(n, "M_rowp", M_rowp, k*(nsub+1), names, bytes);
+    n = addMemoryUsage(n, "M_cols", M_cols, k*M_rowp[nsub], names, bytes);
+    n = addMemoryUsage(n, "M_vals", M_vals, s*M_rowp[nsub], names, bytes);
+  }
+  if (Aas_rowp) {
+    n = addMemoryUsage(n, "Aas_rowp", Aas_rowp, k*(na+1), names, bytes);
+    n = addMemoryUsage(n, "Aas_cols", Aas_cols, k*Aas_rowp[na], names, bytes);
+    n = addMemoryUsage(n, "Aas_vals", Aas_vals, s*Aas_rowp[na], names, bytes);
+  }
+  if (L_ptr) {
+    n = addMemoryUsage(n, "L_perm", L_perm, k*nsub, names, bytes);
+    n = addMemoryUsage(n, "L_first", L_first, k*nsub, names, bytes);
+    n = addMemoryUsage(n, "L_ptr", L_ptr, k*(nsub+1), names, bytes);
+    n = addMemoryUsage(n, "L_vals", L_vals, s*L_ptr[nsub], names, bytes);
+    n = addMemoryUsage(n, "L_diag", L_diag, s*nsub, names, bytes);
+  }
+  n = addMemoryUsage(n, "MinvPt", MinvPt, s*nsub*npoly, names, bytes);
+  n = addMemoryUsage(n, "Sp", Sp, s*npoly*npoly, names, bytes);
+  n = addMemoryUsage(n, "Sp_ipiv", Sp_ipiv, k*npoly, names, bytes);
+  return n;
+}
+
+/*
+  Evaluate the radial basis function between two points
+
+  Arguments
+  ---------
+  x        : target point
+  y        : source point
+
+  Returns 
+  -------
+  phi : evaluation of radial basis function
+*/
+F2FScalar RBF::evalBasis(F2FScalar *x, F2FScalar *y) {
+  if (compact) {
+    F2FScalar r = sqrt((x[0] - y[0])*(x[0] - y[0]) + 
+                       (x[1] - y[1])*(x[1] - y[1]) + 
+                       (x[2] - y[2])*(x[2] - y[2]));
+    return wendlandC2(r/support_radius);
+  }
+  return phi(x, y);
+}
+
 /* 
   Sample the structural nodes and build the interpolation matrix
 */
 void RBF::initialize() {
   // Sample the structural nodes
-  if (denominator > 1) {
+  if (greedy) {
+    greedySample();
+
+    // Write full and sampled point clouds to ASCII file for Tecplot
+    writeCloudsToTecplot();
+
+  } else if (denominator > 1) {
     printf("Transfer scheme [%i]: attempting to sample nodes using octree...\n",
            object_id);
 
@@ -107,40 +229,16 @@ void RBF::initialize() {
     nsub = octree->nleaf;
     sample_ids = new int[nsub];
 
-    // Randomly sample one point from each leaf bin of the octree
+    // Randomly sample one point from each leaf bin of the octree. The
+    // generator is seeded explicitly so sampled runs are repeatable
+    std::mt19937 generator(sampling_seed);
     for (int i = 0; i < nsub; i++) {
-      int bin_id = octree->leaf_bins[i];
-      int num_bin_pts = 0;
-      int *bin_points_ids = new int[1]; // must allocate array to start
-
-      // First find the ids of the points in each leaf bin
-      for (int j = 0; j < ns; j++) {
-        if (octree->points_bins[j] == bin_id) {
-          if (num_bin_pts > 0) {
-            int *new_bin_points_ids = new int[num_bin_pts+1];
-            memcpy(new_bin_points_ids, bin_points_ids, num_bin_pts*sizeof(int));
-            delete [] bin_points_ids;
-            bin_points_ids = new_bin_points_ids;
-          } 
-          bin_points_ids[num_bin_pts] = j;
-          num_bin_pts++;
-        }
-      }
+      const int *bin_points_ids = &octree->leaf_points[octree->leaf_ptr[i]];
+      int num_bin_pts = octree->leaf_ptr[i+1] - octree->leaf_ptr[i];
 
-      // Then randomly pick one id
-      double h = 1.0/num_bin_pts;
-      double random_num = (1.0*rand())/RAND_MAX;
-      int k = 0;
-      while (k < num_bin_pts) {
-        if (random_num < (k+1)*h) break;
-        k++;
-      }
-
-      // Add id to array of sampled ids
+      // Add a randomly picked id to array of sampled ids
+      int k = generator() % num_bin_pts;
       sample_ids[i] = bin_points_ids[k];
-
-      // Free allocated memory
-      delete [] bin_points_ids;
     }
 
     // Delete octree
@@ -162,6 +260,12 @@ void RBF::initialize() {
     }
   }
 
+  // The compactly supported basis only stores the sparse matrices
+  if (compact) {
+    buildSparseInterpolation();
+    return;
+  }
+
   // Allocate memory for interpolation matrix
   interp_mat = new F2FScalar[na*nsub];
 
@@ -169,6 +273,199 @@ void RBF::initialize() {
   buildInterpolationMatrix();
 }
 
+/*
+  Select the centers greedily from the structural nodes
+
+  The worst-case interpolation error at a point x is bounded by the power
+  function P(x) = sqrt(phi(x, x) - b(x)^{T}*C_{ss}^{-1}*b(x)), where
+  b(x) = [phi(x, x_j); p(x)] for the selected centers x_j. The centers are
+  seeded with a set of points that is unisolvent for the polynomial terms,
+  picked by Gaussian elimination with row pivoting on P. Then the node with
+  the largest power function is added until it drops below greedy_tol times
+  its value after the seed, or until greedy_max centers are selected.
+
+  Adding a center is an incremental Cholesky update: with the kernel
+  K_0(x, y) = phi(x, y) - b_0(x)^{T}*C_0^{-1}*b_0(y) of the seed, the new
+  Newton basis function is
+
+  v_{m}(x) = (K_0(x, x_m) - sum_{j < m} v_{j}(x)*v_{j}(x_m))/P(x_m)
+
+  and the squared power function is updated as P(x)^2 -= v_{m}(x)^2, so each
+  step costs O(ns*m) without refactoring
+*/
+void RBF::greedySample() {
+  int max_centers = (greedy_max > 0 && greedy_max < ns) ? greedy_max : ns;
+
+  // Select the polynomial terms from the full structural mesh
+  setPolynomialTerms(Xs, ns);
+  if (max_centers < npoly) {
+    max_centers = npoly;
+  }
+
+  int *selected = new int[ns];
+  memset(selected, 0, ns*sizeof(int));
+  sample_ids = new int[max_centers];
+
+  // Seed the centers by Gaussian elimination with row pivoting on P
+  int np2 = 2*npoly;
+  F2FScalar *R = new F2FScalar[npoly*ns];
+  for (int i = 0; i < ns; i++) {
+    evalPolynomial(&Xs[3*i], &R[npoly*i]);
+  }
+  for (int k = 0; k < npoly; k++) {
+    int piv = -1;
+    double rmax = 0.0;
+    for (int i = 0; i < ns; i++) {
+      if (!selected[i] && fabs(F2FRealPart(R[k+npoly*i])) > rmax) {
+        rmax = fabs(F2FRealPart(R[k+npoly*i]));
+        piv = i;
+      }
+    }
+    if (piv < 0) { // the nodes do not span the polynomial terms
+      npoly = k;
+      break;
+    }
+    selected[piv] = 1;
+    sample_ids[k] = piv;
+    for (int i = 0; i < ns; i++) {
+      if (!selected[i]) {
+        F2FScalar scale = R[k+npoly*i]/R[k+npoly*piv];
+        for (int l = k; l < npoly; l++) {
+          R[l+npoly*i] -= scale*R[l+npoly*piv];
+        }
+      }
+    }
+  }
+  delete [] R;
+
+  // Factor the seed system C_0 = [K_0 P_0; P_0^{T} 0]
+  np2 = 2*npoly;
+  F2FScalar *C0 = new F2FScalar[np2*np2];
+  memset(C0, 0, np2*np2*sizeof(F2FScalar));
+  F2FScalar p[4];
+  for (int j = 0; j < npoly; j++) {
+    F2FScalar *xj = &Xs[3*sample_ids[j]];
+    for (int i = 0; i < npoly; i++) {
+      C0[i+np2*j] = evalBasis(&Xs[3*sample_ids[i]], xj);
+    }
+    evalPolynomial(xj, p);
+    for (int k = 0; k < npoly; k++) {
+      C0[npoly+k+np2*j] = p[k];
+      C0[j+np2*(npoly+k)] = p[k];
+    }
+  }
+  int *ipiv = new int[np2];
+  int info = 0;
+  LAPACKgetrf(&np2, &np2, C0, &np2, ipiv, &info);
+
+  // Compute b_0(x) and C_0^{-1}*b_0(x) at every node
+  F2FScalar *b0 = new F2FScalar[np2*ns];
+  F2FScalar *g0 = new F2FScalar[np2*ns];
+  for (int i = 0; i < ns; i++) {
+    for (int j = 0; j < npoly; j++) {
+      b0[j+np2*i] = evalBasis(&Xs[3*i], &Xs[3*sample_ids[j]]);
+    }
+    evalPolynomial(&Xs[3*i], &b0[npoly+np2*i]);
+  }
+  memcpy(g0, b0, np2*ns*sizeof(F2FScalar));
+  LAPACKgetrs("N", &np2, &ns, C0, &np2, ipiv, g0, &np2, &info);
+  delete [] C0;
+  delete [] ipiv;
+
+  // Squared power function after the seed
+  F2FScalar *power2 = new F2FScalar[ns];
+  double pmax0 = 0.0;
+  for (int i = 0; i < ns; i++) {
+    power2[i] = 0.0;
+    if (!selected[i]) {
+      power2[i] = evalBasis(&Xs[3*i], &Xs[3*i]);
+      for (int k = 0; k < np2; k++) {
+        power2[i] -= b0[k+np2*i]*g0[k+np2*i];
+      }
+      if (F2FRealPart(power2[i]) > pmax0) {
+        pmax0 = F2FRealPart(power2[i]);
+      }
+    }
+  }
+
+  // Add the node with the largest power function until the tolerance or
+  // the budget is met, storing the Newton basis evaluated at every node
+  F2FScalar **V = new F2FScalar*[max_centers];
+  int m = npoly;
+  double pmax = pmax0;
+  while (m < max_centers) {
+    int inew = -1;
+    pmax = 0.0;
+    for (int i = 0; i < ns; i++) {
+      if (!selected[i] && F2FRealPart(power2[i]) > pmax) {
+        pmax = F2FRealPart(power2[i]);
+        inew = i;
+      }
+    }
+    if (inew < 0 || sqrt(pmax) <= greedy_tol*sqrt(pmax0)) {
+      break;
+    }
+
+    F2FScalar *xnew = &Xs[3*inew];
+    F2FScalar pnew = sqrt(power2[inew]);
+    F2FScalar *v = new F2FScalar[ns];
+    for (int i = 0; i < ns; i++) {
+      // K_0(x, x_new)
+      F2FScalar c = evalBasis(&Xs[3*i], xnew);
+      for (int k = 0; k < np2; k++) {
+        c -= b0[k+np2*i]*g0[k+np2*inew];
+      }
+      for (int j = npoly; j < m; j++) {
+        c -= V[j][i]*V[j][inew];
+      }
+      v[i] = c/pnew;
+    }
+    for (int i = 0; i < ns; i++) {
+      if (!selected[i]) {
+        power2[i] -= v[i]*v[i];
+      }
+    }
+    V[m] = v;
+    selected[inew] = 1;
+    power2[inew] = 0.0;
+    sample_ids[m] = inew;
+    m++;
+  }
+  nsub = m;
+
+  // Only keep the ids of the selected centers
+  if (nsub < max_centers) {
+    int *ids = new int[nsub];
+    memcpy(ids, sample_ids, nsub*sizeof(int));
+    delete [] sample_ids;
+    sample_ids = ids;
+  }
+
+  // Find the largest remaining power function
+  pmax = 0.0;
+  for (int i = 0; i < ns; i++) {
+    if (!selected[i] && F2FRealPart(power2[i]) > pmax) {
+      pmax = F2FRealPart(power2[i]);
+    }
+  }
+
+  // Report the selection
+  double percent_sampled = (100.0*nsub)/ns;
+  printf("Transfer scheme [%i]: greedy selection of %d centers (%4.1f%% of "
+         "nodes), relative power function %e\n", object_id, nsub,
+         percent_sampled, (pmax0 > 0.0 ? sqrt(pmax/pmax0) : 0.0));
+
+  // Free allocated memory
+  for (int j = npoly; j < m; j++) {
+    delete [] V[j];
+  }
+  delete [] V;
+  delete [] b0;
+  delete [] g0;
+  delete [] power2;
+  delete [] selected;
+}
+
 /* 
   Auxiliary function for building the interpolation matrix
 */
@@ -325,6 +622,414 @@ void RBF::buildInterpolationMatrix() {
   delete [] Aas;
 }
 
+/*
+  Build the sparse data for the compactly supported interpolation
+
+  Only the pairs of points within the support radius give non-zero entries in
+  the RBF matrix M between the sampled structural points and in the RBF part
+  of the evaluation matrix A_{as}, so both are assembled in CSR format using a
+  radius search. Rather than forming C_{ss}^{-1}, the interpolation system
+
+  [ M  P^{T} ] [ a ] = [ b_r ]
+  [ P    0   ] [ c ]   [ b_p ]
+
+  is solved through the Schur complement of the polynomial block, for which
+  M^{-1}*P^{T} and the LU factors of P*M^{-1}*P^{T} are stored here
+*/
+void RBF::buildSparseInterpolation() {
+  // Copy out the sampled structural points
+  F2FScalar *Xsub = new F2FScalar[3*nsub];
+  for (int i = 0; i < nsub; i++) {
+    int indx = sample_ids[i];
+    for (int k = 0; k < 3; k++) {
+      Xsub[3*i+k] = Xs[3*indx+k];
+    }
+  }
+
+  // Select the polynomial terms from the sampled points
+  setPolynomialTerms(Xsub, nsub);
+
+  // Find the points within the support radius of each point
+  int max_num_points = 10;
+  LocatePoint *locator = new LocatePoint(Xsub, nsub, max_num_points);
+  int *indx = new int[nsub];
+  F2FScalar *dist = new F2FScalar[nsub];
+
+  // Assemble the RBF matrix between the sampled points
+  M_rowp = new int[nsub+1];
+  M_rowp[0] = 0;
+  for (int i = 0; i < nsub; i++) {
+    int nr = locator->locateInRadius(support_radius, nsub, indx, dist,
+                                     &Xsub[3*i]);
+    M_rowp[i+1] = M_rowp[i] + nr;
+  }
+  M_cols = new int[M_rowp[nsub]];
+  M_vals = new F2FScalar[M_rowp[nsub]];
+  for (int i = 0; i < nsub; i++) {
+    int nr = locator->locateInRadius(support_radius, nsub, indx, dist,
+                                     &Xsub[3*i]);
+    for (int j = 0; j < nr; j++) {
+      M_cols[M_rowp[i]+j] = indx[j];
+      M_vals[M_rowp[i]+j] = wendlandC2(sqrt(dist[j])/support_radius);
+    }
+  }
+
+  // Assemble the RBF part of the evaluation matrix at the aerodynamic nodes
+  Aas_rowp = new int[na+1];
+  Aas_rowp[0] = 0;
+  for (int i = 0; i < na; i++) {
+    int nr = locator->locateInRadius(support_radius, nsub, indx, dist,
+                                     &Xa[3*i]);
+    Aas_rowp[i+1] = Aas_rowp[i] + nr;
+  }
+  Aas_cols = new int[Aas_rowp[na]];
+  Aas_vals = new F2FScalar[Aas_rowp[na]];
+  for (int i = 0; i < na; i++) {
+    int nr = locator->locateInRadius(support_radius, nsub, indx, dist,
+                                     &Xa[3*i]);
+    for (int j = 0; j < nr; j++) {
+      Aas_cols[Aas_rowp[i]+j] = indx[j];
+      Aas_vals[Aas_rowp[i]+j] = wendlandC2(sqrt(dist[j])/support_radius);
+    }
+  }
+
+  delete locator;
+  delete [] indx;
+  delete [] dist;
+
+  int rank;
+  MPI_Comm_rank(global_comm, &rank);
+  if (rank == struct_root) {
+    printf("Transfer scheme [%i]: compact RBF matrix has %4.1f non-zeros "
+           "per row, %4.1f per aerodynamic node\n", object_id,
+           (1.0*M_rowp[nsub])/(nsub > 0 ? nsub : 1),
+           (1.0*Aas_rowp[na])/(na > 0 ? na : 1));
+  }
+
+  // Factor the RBF matrix once for all the transfers
+  factorSparse();
+
+  // Compute M^{-1}*P^{T} one polynomial term at a time
+  F2FScalar *P = new F2FScalar[npoly*nsub];
+  for (int j = 0; j < nsub; j++) {
+    evalPolynomial(&Xsub[3*j], &P[npoly*j]);
+  }
+  MinvPt = new F2FScalar[nsub*npoly];
+  F2FScalar *b = new F2FScalar[nsub];
+  for (int k = 0; k < npoly; k++) {
+    for (int j = 0; j < nsub; j++) {
+      b[j] = P[k+npoly*j];
+    }
+    solveSparse(b, &MinvPt[nsub*k]);
+  }
+
+  // Form and factor the Schur complement P*M^{-1}*P^{T}
+  Sp = new F2FScalar[npoly*npoly];
+  memset(Sp, 0, npoly*npoly*sizeof(F2FScalar));
+  for (int l = 0; l < npoly; l++) {
+    for (int k = 0; k < npoly; k++) {
+      for (int j = 0; j < nsub; j++) {
+        Sp[k+npoly*l] += P[k+npoly*j]*MinvPt[j+nsub*l];
+      }
+    }
+  }
+  Sp_ipiv = new int[npoly];
+  int info = 0;
+  LAPACKgetrf(&npoly, &npoly, Sp, &npoly, Sp_ipiv, &info);
+  if (info != 0) {
+    printf("Transfer scheme [%i]: singular polynomial block in the compact "
+           "RBF interpolation, info = %d\n", object_id, info);
+  }
+
+  delete [] P;
+  delete [] b;
+  delete [] Xsub;
+}
+
+/*
+  Select the polynomial terms of the interpolation: a constant plus a linear
+  term for each coordinate direction that the points span (a constant
+  coordinate would make P rank deficient)
+
+  Arguments
+  ---------
+  X : point coordinates
+  n : number of points
+*/
+void RBF::setPolynomialTerms(const F2FScalar *X, int n) {
+  double xmin[3], xmax[3];
+  for (int k = 0; k < 3; k++) {
+    xmin[k] = xmax[k] = (n > 0 ? F2FRealPart(X[k]) : 0.0);
+  }
+  for (int i = 0; i < n; i++) {
+    for (int k = 0; k < 3; k++) {
+      double x = F2FRealPart(X[3*i+k]);
+      if (x < xmin[k]) xmin[k] = x;
+      if (x > xmax[k]) xmax[k] = x;
+    }
+  }
+  double extent = 0.0;
+  for (int k = 0; k < 3; k++) {
+    if (xmax[k] - xmin[k] > extent) extent = xmax[k] - xmin[k];
+  }
+  npoly = 1;
+  for (int k = 0; k < 3; k++) {
+    if (xmax[k] - xmin[k] > 1.0e-10*extent) {
+      poly_dirs[npoly-1] = k;
+      npoly++;
+    }
+  }
+}
+
+/*
+  Evaluate the polynomial terms at a point
+
+  Arguments
+  ---------
+  x : point
+
+  Returns
+  -------
+  p : the npoly polynomial terms
+*/
+void RBF::evalPolynomial(const F2FScalar *x, F2FScalar *p) {
+  p[0] = 1.0;
+  for (int k = 1; k < npoly; k++) {
+    p[k] = x[poly_dirs[k-1]];
+  }
+}
+
+/*
+  Factor M = L*D*L^{T} within its envelope. The sampled points are first
+  reordered with the reverse Cuthill-McKee algorithm so that the non-zeros
+  of the compactly supported basis stay close to the diagonal. M is
+  symmetric positive definite for the Wendland basis, so no pivoting is
+  needed, and the factorization is not conjugated so that it is analytic in
+  complex mode
+*/
+void RBF::factorSparse() {
+  // Breadth-first search from a node of minimum degree in each connected
+  // component, visiting the neighbors in order of increasing degree
+  int *order = new int[nsub];
+  int *visited = new int[nsub];
+  memset(visited, 0, nsub*sizeof(int));
+  int nvisited = 0;
+  while (nvisited < nsub) {
+    int start = -1;
+    for (int i = 0; i < nsub; i++) {
+      if (!visited[i] &&
+          (start < 0 ||
+           M_rowp[i+1] - M_rowp[i] < M_rowp[start+1] - M_rowp[start])) {
+        start = i;
+      }
+    }
+    visited[start] = 1;
+    order[nvisited] = start;
+    nvisited++;
+
+    for (int head = nvisited-1; head < nvisited; head++) {
+      int i = order[head];
+      int first = nvisited;
+      for (int jp = M_rowp[i]; jp < M_rowp[i+1]; jp++) {
+        int j = M_cols[jp];
+        if (!visited[j]) {
+          visited[j] = 1;
+          order[nvisited] = j;
+          nvisited++;
+        }
+      }
+
+      // Insertion sort of the new nodes by degree
+      for (int k = first+1; k < nvisited; k++) {
+        int j = order[k];
+        int deg = M_rowp[j+1] - M_rowp[j];
+        int l = k-1;
+        for ( ; l >= first && M_rowp[order[l]+1] - M_rowp[order[l]] > deg; l--) {
+          order[l+1] = order[l];
+        }
+        order[l+1] = j;
+      }
+    }
+  }
+
+  // Reverse the ordering, storing the new position of each point in visited
+  L_perm = new int[nsub];
+  int *iperm = visited;
+  for (int i = 0; i < nsub; i++) {
+    L_perm[i] = order[nsub-1-i];
+    iperm[L_perm[i]] = i;
+  }
+  delete [] order;
+
+  // Find the envelope of the reordered matrix
+  L_first = new int[nsub];
+  L_ptr = new int[nsub+1];
+  L_ptr[0] = 0;
+  for (int i = 0; i < nsub; i++) {
+    int ip = L_perm[i];
+    L_first[i] = i;
+    for (int jp = M_rowp[ip]; jp < M_rowp[ip+1]; jp++) {
+      int j = iperm[M_cols[jp]];
+      if (j < L_first[i]) {
+        L_first[i] = j;
+      }
+    }
+    L_ptr[i+1] = L_ptr[i] + i - L_first[i];
+  }
+
+  // Factor the rows in turn. Row i holds u_ij = L_ij*D_j until it is
+  // complete, so that D_i = M_ii - sum_j u_ij*L_ij
+  L_vals = new F2FScalar[L_ptr[nsub]];
+  L_diag = new F2FScalar[nsub];
+  memset(L_vals, 0, L_ptr[nsub]*sizeof(F2FScalar));
+  for (int i = 0; i < nsub; i++) {
+    int ip = L_perm[i];
+    int fi = L_first[i];
+    F2FScalar *Li = &L_vals[L_ptr[i]];
+
+    F2FScalar d = 0.0;
+    for (int jp = M_rowp[ip]; jp < M_rowp[ip+1]; jp++) {
+      int j = iperm[M_cols[jp]];
+      if (j < i) {
+        Li[j-fi] = M_vals[jp];
+      }
+      else if (j == i) {
+        d = M_vals[jp];
+      }
+    }
+
+    for (int j = fi; j < i; j++) {
+      int fj = L_first[j];
+      const F2FScalar *Lj = &L_vals[L_ptr[j]];
+      F2FScalar u = Li[j-fi];
+      for (int k = (fi > fj ? fi : fj); k < j; k++) {
+        u -= Li[k-fi]*Lj[k-fj];
+      }
+      Li[j-fi] = u;
+    }
+
+    for (int j = fi; j < i; j++) {
+      F2FScalar u = Li[j-fi];
+      Li[j-fi] = u/L_diag[j];
+      d -= u*Li[j-fi];
+    }
+    L_diag[i] = d;
+
+    if (F2FRealPart(d) <= 0.0) {
+      printf("Transfer scheme [%i]: compact RBF matrix is not positive "
+             "definite, pivot %d = %e\n", object_id, i, F2FRealPart(d));
+    }
+  }
+  delete [] visited;
+
+  int rank;
+  MPI_Comm_rank(global_comm, &rank);
+  if (rank == struct_root) {
+    printf("Transfer scheme [%i]: compact RBF factor has %4.1f entries "
+           "per row\n", object_id, (1.0*L_ptr[nsub])/(nsub > 0 ? nsub : 1));
+  }
+}
+
+/*
+  Solve M*x = b with the LDL^{T} factors of the reordered RBF matrix
+
+  Arguments
+  ---------
+  b : right-hand side of length nsub
+
+  Returns
+  -------
+  x : solution of length nsub
+*/
+void RBF::solveSparse(const F2FScalar *b, F2FScalar *x) {
+  F2FScalar *y = new F2FScalar[nsub];
+  for (int i = 0; i < nsub; i++) {
+    y[i] = b[L_perm[i]];
+  }
+
+  // Solve L*D*z = y
+  for (int i = 0; i < nsub; i++) {
+    int fi = L_first[i];
+    const F2FScalar *Li = &L_vals[L_ptr[i]];
+    F2FScalar z = y[i];
+    for (int k = fi; k < i; k++) {
+      z -= Li[k-fi]*y[k];
+    }
+    y[i] = z;
+  }
+  for (int i = 0; i < nsub; i++) {
+    y[i] /= L_diag[i];
+  }
+
+  // Solve L^{T}*x = z by columns of L^{T}
+  for (int i = nsub-1; i >= 0; i--) {
+    int fi = L_first[i];
+    const F2FScalar *Li = &L_vals[L_ptr[i]];
+    for (int k = fi; k < i; k++) {
+      y[k] -= Li[k-fi]*y[i];
+    }
+    x[L_perm[i]] = y[i];
+  }
+
+  delete [] y;
+}
+
+/*
+  Solve the (symmetric) interpolation system for three right-hand sides
+
+  [ M  P^{T} ] [ x_r ] = [ b_r ]
+  [ P    0   ] [ x_p ]   [ b_p ]
+
+  using x_p = (P*M^{-1}*P^{T})^{-1}*(P*M^{-1}*b_r - b_p) and
+  x_r = M^{-1}*b_r - M^{-1}*P^{T}*x_p
+
+  Arguments
+  ---------
+  br : RBF part of the right-hand sides (nsub x 3, column-major)
+  bp : polynomial part of the right-hand sides (npoly x 3, column-major)
+
+  Returns
+  -------
+  xr : RBF part of the solutions (nsub x 3, column-major)
+  xp : polynomial part of the solutions (npoly x 3, column-major)
+*/
+void RBF::solveInterpolation(const F2FScalar *br, const F2FScalar *bp,
+                             F2FScalar *xr, F2FScalar *xp) {
+  for (int d = 0; d < 3; d++) {
+    solveSparse(&br[nsub*d], &xr[nsub*d]);
+  }
+
+  // Right-hand side of the Schur complement system
+  F2FScalar *p = new F2FScalar[npoly];
+  for (int d = 0; d < 3; d++) {
+    for (int k = 0; k < npoly; k++) {
+      xp[k+npoly*d] = -bp[k+npoly*d];
+    }
+  }
+  for (int j = 0; j < nsub; j++) {
+    evalPolynomial(&Xs[3*sample_ids[j]], p);
+    for (int d = 0; d < 3; d++) {
+      for (int k = 0; k < npoly; k++) {
+        xp[k+npoly*d] += p[k]*xr[j+nsub*d];
+      }
+    }
+  }
+  delete [] p;
+
+  int n = 3;
+  int info = 0;
+  LAPACKgetrs("N", &npoly, &n, Sp, &npoly, Sp_ipiv, xp, &npoly, &info);
+
+  // Subtract off the polynomial contribution
+  for (int d = 0; d < 3; d++) {
+    for (int k = 0; k < npoly; k++) {
+      for (int j = 0; j < nsub; j++) {
+        xr[j+nsub*d] -= MinvPt[j+nsub*k]*xp[k+npoly*d];
+      }
+    }
+  }
+}
+
 /*
   Computes the displacements of aerodynamic surface nodes by fitting an
   optimal rigid rotation and translation to the displacement of the set of
@@ -357,10 +1062,39 @@ void RBF::transferDisps(const F2FScalar *struct_disps, F2FScalar *aero_disps) {
 
   // Apply action of interpolation matrix
   F2FScalar *UA = new F2FScalar[na*3];
-  int n = 3;
-  F2FScalar alpha = 1.0, beta = 0.0;
-  BLASgemm("N", "N", &na, &n, &nsub, &alpha, interp_mat, &na,
-           US, &nsub, &beta, UA, &na);
+  if (compact) {
+    // Solve for the coefficients and evaluate at the aerodynamic nodes
+    F2FScalar *coef = new F2FScalar[nsub*3];
+    F2FScalar *cpoly = new F2FScalar[npoly*3];
+    F2FScalar *zero = new F2FScalar[npoly*3];
+    memset(zero, 0, npoly*3*sizeof(F2FScalar));
+    solveInterpolation(US, zero, coef, cpoly);
+
+    F2FScalar p[4];
+    for (int i = 0; i < na; i++) {
+      evalPolynomial(&Xa[3*i], p);
+      for (int d = 0; d < 3; d++) {
+        F2FScalar u = 0.0;
+        for (int k = 0; k < npoly; k++) {
+          u += p[k]*cpoly[k+npoly*d];
+        }
+        for (int jp = Aas_rowp[i]; jp < Aas_rowp[i+1]; jp++) {
+          u += Aas_vals[jp]*coef[Aas_cols[jp]+nsub*d];
+        }
+        UA[i+na*d] = u;
+      }
+    }
+
+    delete [] coef;
+    delete [] cpoly;
+    delete [] zero;
+  }
+  else {
+    int n = 3;
+    F2FScalar alpha = 1.0, beta = 0.0;
+    BLASgemm("N", "N", &na, &n, &nsub, &alpha, interp_mat, &na,
+             US, &nsub, &beta, UA, &na);
+  }
 
   // Copy aerodynamic displacements to output
   for (int i = 0; i < na; i++) {
@@ -404,15 +1138,44 @@ void RBF::transferLoads(const F2FScalar *aero_loads, F2FScalar *struct_loads) {
 
   // Apply action of transpose of the interpolation matrix
   F2FScalar *Fsub = new F2FScalar[nsub*3];
-  int n = 3;
-  F2FScalar alpha = 1.0, beta = 0.0;
+  if (compact) {
+    // Apply the transpose of the evaluation matrix, then solve with the
+    // (symmetric) interpolation system
+    F2FScalar *Fr = new F2FScalar[nsub*3];
+    F2FScalar *Fp = new F2FScalar[npoly*3];
+    F2FScalar *cpoly = new F2FScalar[npoly*3];
+    memset(Fr, 0, nsub*3*sizeof(F2FScalar));
+    memset(Fp, 0, npoly*3*sizeof(F2FScalar));
+
+    F2FScalar p[4];
+    for (int i = 0; i < na; i++) {
+      evalPolynomial(&Xa[3*i], p);
+      for (int d = 0; d < 3; d++) {
+        for (int k = 0; k < npoly; k++) {
+          Fp[k+npoly*d] += p[k]*Fxyz[i+na*d];
+        }
+        for (int jp = Aas_rowp[i]; jp < Aas_rowp[i+1]; jp++) {
+          Fr[Aas_cols[jp]+nsub*d] += Aas_vals[jp]*Fxyz[i+na*d];
+        }
+      }
+    }
+    solveInterpolation(Fr, Fp, Fsub, cpoly);
+
+    delete [] Fr;
+    delete [] Fp;
+    delete [] cpoly;
+  }
+  else {
+    int n = 3;
+    F2FScalar alpha = 1.0, beta = 0.0;
 #ifdef FUNTOFEM_USE_COMPLEX
     const char *t = "C";
 #else
     const char *t = "T";
 #endif
-  BLASgemm(t, "N", &nsub, &n, &na, &alpha, interp_mat, &na,
-           Fxyz, &na, &beta, Fsub, &nsub);
+    BLASgemm(t, "N", &nsub, &n, &na, &alpha, interp_mat, &na,
+             Fxyz, &na, &beta, Fsub, &nsub);
+  }
 
   // Copy the structural forces to struct loads
   for (int i = 0; i < nsub; i++) {
@@ -671,6 +1434,30 @@ F2FScalar RBF::thinPlateSpline(F2FScalar *x, F2FScalar *y) {
   return eval;
 }
 
+/*
+  Defines the Wendland C2 compactly supported radial basis function
+
+  phi(r) = (1 - r)**4*(4*r + 1) for r < 1 and zero otherwise,
+  where r = ||x - y||_{2}/support_radius
+
+  Arguments
+  ---------
+  r        : distance normalized by the support radius
+
+  Returns 
+  -------
+  phi : evaluation of radial basis function
+
+*/
+F2FScalar RBF::wendlandC2(F2FScalar r) {
+  if (F2FRealPart(r) >= 1.0) {
+    return 0.0;
+  }
+  F2FScalar s = 1.0 - r;
+  F2FScalar eval = s*s*s*s*(4.0*r + 1.0);
+  return eval;
+}
+
 /*
   Write full and sampled structural point clouds to ASCII file that can be read
   into Tecplot
@@ -20,6 +20,7 @@
 */
 #include <stdio.h>
 #include <stdlib.h>
+#include <math.h>
 #include <cstring>
 
 #include "TransferScheme.h"
@@ -28,6 +29,23 @@
 // Initialize object counter to zero
 int TransferScheme::object_count = 0;
 
+TransferScheme::TransferScheme() {
+  // Run the aerodynamic node loops on a single thread by default
+  nthreads = 1;
+
+  // Use double precision data for the transfers by default
+  single_precision = 0;
+
+  // The layout of the structural nodes is set with the structural mesh
+  struct_counts = NULL;
+  struct_offsets = NULL;
+  struct_ordered = 0;
+
+  // The centroid of the aerodynamic nodes is not yet computed
+  memset(xa0bar, 0, 3*sizeof(F2FScalar));
+  xa0bar_update = 1;
+}
+
 TransferScheme::~TransferScheme() {
   // Free the aerodynamic data
   if (Xa){ delete [] Xa; }
@@ -36,6 +54,333 @@ TransferScheme::~TransferScheme() {
   // Free the structural data
   if (Xs){ delete [] Xs; }
   if (Us){ delete [] Us; }
+  if (struct_counts){ delete [] struct_counts; }
+  if (struct_offsets){ delete [] struct_offsets; }
+}
+
+/*
+  Set the number of shared-memory threads used for the loops over the
+  aerodynamic nodes. This has no effect unless the library is compiled with
+  OpenMP
+*/
+void TransferScheme::setNumThreads(int num_threads){
+  nthreads = (num_threads > 0 ? num_threads : 1);
+}
+
+/*
+  Check that the double precision data needed by a Jacobian-vector product
+  is available, i.e. the scheme is not using single precision transfers.
+  Otherwise the output of the product is zeroed so that it does not keep
+  the values of a previous call
+
+  Arguments
+  ---------
+  name  : name of the product for the error message
+  prods : output of the product
+  size  : number of entries of the output on this processor
+
+  Returns
+  -------
+  fail : non-zero if only the single precision data is stored
+*/
+int TransferScheme::checkDoublePrecision(const char *name, F2FScalar *prods,
+                                         int size){
+  if (single_precision){
+    memset(prods, 0, size*sizeof(F2FScalar));
+    int rank;
+    MPI_Comm_rank(global_comm, &rank);
+    if (rank == struct_root){
+      fprintf(stderr, "Transfer scheme [%i]: %s is not available with "
+              "single precision transfers\n", object_id, name);
+    }
+    return 1;
+  }
+  return 0;
+}
+
+/*
+  Report the memory used by the arrays of the scheme on this processor. The
+  number of arrays is returned, so the report can be sized by a first call
+  with NULL arguments. The sizes are computed in size_t so that they are
+  correct for arrays with more than 2^31 bytes
+
+  Returns
+  -------
+  names : names of the allocated arrays
+  bytes : size of each array in bytes
+*/
+int TransferScheme::getMemoryUsage(const char **names, size_t *bytes){
+  int n = 0;
+  n = addMemoryUsage(n, "Xa", Xa, sizeof(F2FScalar)*3*na, names, bytes);
+  n = addMemoryUsage(n, "Fa", Fa, sizeof(F2FScalar)*3*na, names, bytes);
+  n = addMemoryUsage(n, "Xs", Xs, sizeof(F2FScalar)*3*ns, names, bytes);
+  n = addMemoryUsage(n, "Us", Us, sizeof(F2FScalar)*3*ns, names, bytes);
+
+  int nprocs;
+  MPI_Comm_size(global_comm, &nprocs);
+  n = addMemoryUsage(n, "struct_counts", struct_counts, sizeof(int)*nprocs,
+                     names, bytes);
+  n = addMemoryUsage(n, "struct_offsets", struct_offsets, sizeof(int)*nprocs,
+                     names, bytes);
+  return n;
+}
+
+/*
+  Add an entry to the memory usage report unless the array is not allocated
+
+  Arguments
+  ---------
+  n    : number of entries in the report
+  name : name of the array
+  ptr  : the array
+  size : size of the array in bytes
+
+  Returns
+  -------
+  names : names of the arrays, if not NULL
+  bytes : sizes of the arrays, if not NULL
+  n     : updated number of entries
+*/
+int TransferScheme::addMemoryUsage(int n, const char *name, const void *ptr,
+                                   size_t size, const char **names,
+                                   size_t *bytes){
+  if (!ptr){
+    return n;
+  }
+  if (names){ names[n] = name; }
+  if (bytes){ bytes[n] = size; }
+  return n+1;
+}
+
+/*
+  Add the contributions of the aerodynamic nodes i0 <= i < i1 to the linked
+  structural nodes. The contributions are stored for each entry of the
+  connectivity and are always added in the order of the serial loop, so the
+  result does not depend on the number of threads used to compute them
+
+  Arguments
+  ---------
+  nn            : number of structural nodes linked to each aerodynamic node
+  conn          : aerostructural connectivity
+  i0, i1        : range of aerodynamic nodes in the block
+  contrib       : contributions of the block of aerodynamic nodes
+  vars_per_node : number of entries per structural node
+
+  Returns
+  -------
+  global        : structural vector the contributions are added to
+*/
+void TransferScheme::addStructuralContributions(int nn, const int *conn,
+                                                int i0, int i1,
+                                                const F2FScalar *contrib,
+                                                int vars_per_node,
+                                                F2FScalar *global){
+  for ( int i = i0; i < i1; i++ ) {
+    for ( int j = 0; j < nn; j++ ) {
+      int indx = conn[nn*i+j];
+      if (indx >= ns){
+        indx -= ns;
+      }
+
+      const F2FScalar *c = &contrib[vars_per_node*(nn*(i - i0) + j)];
+      F2FScalar *g = &global[vars_per_node*indx];
+      for ( int k = 0; k < vars_per_node; k++ ) {
+        g[k] += c[k];
+      }
+    }
+  }
+}
+
+/*
+  Hash data with the 64-bit FNV-1a hash, starting from the hash value h
+*/
+uint64_t TransferScheme::hashData(const void *data, size_t size, uint64_t h){
+  const unsigned char *bytes = (const unsigned char*)data;
+  for ( size_t k = 0; k < size; k++ ) {
+    h ^= bytes[k];
+    h *= 1099511628211ULL;
+  }
+  return h;
+}
+
+/*
+  Hash the real part of the locations of n nodes, starting from the hash
+  value h. The imaginary part is left out so that the same hash is found in
+  real and complex mode
+*/
+uint64_t TransferScheme::hashNodes(const F2FScalar *X, int n, uint64_t h){
+  for ( int k = 0; k < 3*n; k++ ) {
+    double x = F2FRealPart(X[k]);
+    h = hashData(&x, sizeof(double), h);
+  }
+  return h;
+}
+
+/*
+  Combine the hashes of every processor in the order of the global ranks
+*/
+uint64_t TransferScheme::gatherHash(uint64_t local_hash){
+  int nprocs;
+  MPI_Comm_size(global_comm, &nprocs);
+  uint64_t *hashes = new uint64_t[nprocs];
+  MPI_Allgather(&local_hash, sizeof(uint64_t), MPI_BYTE,
+                hashes, sizeof(uint64_t), MPI_BYTE, global_comm);
+  uint64_t h = hashData(hashes, nprocs*sizeof(uint64_t),
+                        F2F_HASH_OFFSET_BASIS);
+  delete [] hashes;
+  return h;
+}
+
+/*
+  Connectivity files start with a header of F2F_CONN_HEADER_SIZE bytes
+  holding the magic string, the format version, the size of F2FScalar, the
+  number of aerodynamic nodes, the number of nearest nodes and the mesh
+  fingerprint. The header is followed by the connectivity (na*nn ints), the
+  weights (na*nn F2FScalars) and the gaps (na doubles), each starting on an
+  8-byte boundary, so that the arrays can be memory mapped directly, e.g.
+  with numpy.memmap. On more than one processor, each processor writes its
+  aerodynamic nodes to filename.rank
+*/
+static const char F2F_CONN_MAGIC[8] = "F2FCONN";
+static const int F2F_CONN_VERSION = 1;
+static const long F2F_CONN_HEADER_SIZE = 64;
+
+static long alignOffset( long offset ){
+  return 8*((offset + 7)/8);
+}
+
+static void getConnectivityFileName( MPI_Comm comm, const char *filename,
+                                     char *name, size_t len ){
+  int rank, nprocs;
+  MPI_Comm_rank(comm, &rank);
+  MPI_Comm_size(comm, &nprocs);
+  if (nprocs > 1){
+    snprintf(name, len, "%s.%d", filename, rank);
+  }
+  else {
+    snprintf(name, len, "%s", filename);
+  }
+}
+
+/*
+  Write the connectivity, weights and gaps of the aerodynamic nodes on this
+  processor together with the mesh fingerprint. The gaps are written as zero
+  if they are not kept
+
+  Returns
+  -------
+  fail : non-zero if the file could not be written
+*/
+int TransferScheme::writeConnectivityFile(const char *filename,
+                                          uint64_t fingerprint, int nn,
+                                          const int *conn, const F2FScalar *W,
+                                          const double *gap){
+  char name[1024];
+  getConnectivityFileName(global_comm, filename, name, sizeof(name));
+
+  FILE *fp = fopen(name, "wb");
+  if (!fp){
+    fprintf(stderr, "Transfer scheme [%i]: cannot open %s for writing\n",
+            object_id, name);
+    return 1;
+  }
+
+  char header[F2F_CONN_HEADER_SIZE];
+  memset(header, 0, F2F_CONN_HEADER_SIZE);
+  int info[4] = {F2F_CONN_VERSION, (int)sizeof(F2FScalar), na, nn};
+  memcpy(header, F2F_CONN_MAGIC, 8);
+  memcpy(&header[8], info, 4*sizeof(int));
+  memcpy(&header[24], &fingerprint, sizeof(uint64_t));
+
+  // Write the header and the arrays, padding each array to 8 bytes
+  double *zero_gap = NULL;
+  if (!gap){
+    zero_gap = new double[na];
+    memset(zero_gap, 0, na*sizeof(double));
+    gap = zero_gap;
+  }
+  long conn_size = alignOffset(na*nn*sizeof(int));
+  char pad[8] = {0, 0, 0, 0, 0, 0, 0, 0};
+  int fail = 0;
+  if (fwrite(header, 1, F2F_CONN_HEADER_SIZE, fp) !=
+      (size_t)F2F_CONN_HEADER_SIZE){ fail = 1; }
+  if (!fail && na > 0){
+    if (fwrite(conn, sizeof(int), na*nn, fp) != (size_t)(na*nn) ||
+        fwrite(pad, 1, conn_size - na*nn*sizeof(int), fp) !=
+        (size_t)(conn_size - na*nn*sizeof(int)) ||
+        fwrite(W, sizeof(F2FScalar), na*nn, fp) != (size_t)(na*nn) ||
+        fwrite(gap, sizeof(double), na, fp) != (size_t)na){
+      fail = 1;
+    }
+  }
+  if (fclose(fp) != 0){ fail = 1; }
+  if (zero_gap){ delete [] zero_gap; }
+
+  if (fail){
+    fprintf(stderr, "Transfer scheme [%i]: failed to write %s\n",
+            object_id, name);
+  }
+
+  return fail;
+}
+
+/*
+  Read the connectivity, weights and gaps of the aerodynamic nodes on this
+  processor. The file is rejected if it was written for a different number of
+  nodes or nearest nodes, a different scalar type, or if its fingerprint does
+  not match the current meshes
+
+  Returns
+  -------
+  fail : non-zero if the file does not exist or was rejected
+*/
+int TransferScheme::readConnectivityFile(const char *filename,
+                                         uint64_t fingerprint, int nn,
+                                         int *conn, F2FScalar *W,
+                                         double *gap){
+  char name[1024];
+  getConnectivityFileName(global_comm, filename, name, sizeof(name));
+
+  FILE *fp = fopen(name, "rb");
+  if (!fp){
+    return 1;
+  }
+
+  char header[F2F_CONN_HEADER_SIZE];
+  int info[4];
+  uint64_t file_fingerprint = 0;
+  int fail = 0;
+  if (fread(header, 1, F2F_CONN_HEADER_SIZE, fp) !=
+      (size_t)F2F_CONN_HEADER_SIZE){
+    fail = 1;
+  }
+  else {
+    memcpy(info, &header[8], 4*sizeof(int));
+    memcpy(&file_fingerprint, &header[24], sizeof(uint64_t));
+    if (memcmp(header, F2F_CONN_MAGIC, 8) != 0 ||
+        info[0] != F2F_CONN_VERSION || info[1] != (int)sizeof(F2FScalar) ||
+        info[2] != na || info[3] != nn || file_fingerprint != fingerprint){
+      fprintf(stderr, "Transfer scheme [%i]: %s does not match the current "
+              "meshes and settings\n", object_id, name);
+      fail = 1;
+    }
+  }
+
+  // Read the arrays, skipping the padding after the connectivity
+  if (!fail && na > 0){
+    long conn_size = alignOffset(na*nn*sizeof(int));
+    if (fread(conn, sizeof(int), na*nn, fp) != (size_t)(na*nn) ||
+        fseek(fp, F2F_CONN_HEADER_SIZE + conn_size, SEEK_SET) != 0 ||
+        fread(W, sizeof(F2FScalar), na*nn, fp) != (size_t)(na*nn) ||
+        fread(gap, sizeof(double), na, fp) != (size_t)na){
+      fprintf(stderr, "Transfer scheme [%i]: failed to read %s\n",
+              object_id, name);
+      fail = 1;
+    }
+  }
+  fclose(fp);
+
+  return fail;
 }
 
 /*
@@ -52,6 +397,9 @@ void TransferScheme::setAeroNodes(const F2FScalar *aero_X, int aero_nnodes){
   na_global = 0;
   MPI_Allreduce(&na, &na_global, 1, MPI_INT, MPI_SUM, global_comm);
 
+  // Recompute the centroid of the nodes for the rigid transformation
+  xa0bar_update = 1;
+
   // Allocate memory for aerodynamic data, copy in node locations, initialize
   // displacement and load arrays
   if (na > 0){
@@ -142,6 +490,160 @@ void TransferScheme::distributeAerodynamicVector(F2FScalar *global,
   delete [] disps;
 }
 
+/*
+  Gather the number of structural nodes of every processor and compute the
+  offsets of their nodes in the global image of the structural mesh, which
+  stores the nodes in the order of the ranks of the structural communicator.
+  The tables are reused by every structural vector exchange, so the counts
+  are not gathered again until the structural nodes are set
+
+  Arguments
+  ---------
+  ns_local : number of structural nodes on this processor
+
+  Returns
+  -------
+  ns       : number of nodes in the global structural mesh
+*/
+int TransferScheme::setStructuralLayout(int ns_local) {
+  int nprocs;
+  MPI_Comm_size(global_comm, &nprocs);
+
+  // Gather the structural rank, or -1, and the node count of every processor
+  int info[2] = {-1, 0};
+  if (struct_comm != MPI_COMM_NULL){
+    MPI_Comm_rank(struct_comm, &info[0]);
+    info[1] = ns_local;
+  }
+  int *all_info = new int[2*nprocs];
+  MPI_Allgather(info, 2, MPI_INT, all_info, 2, MPI_INT, global_comm);
+
+  if (!struct_counts){
+    struct_counts = new int[nprocs];
+    struct_offsets = new int[nprocs];
+  }
+
+  // Find the global rank of each structural processor
+  int *struct_procs = new int[nprocs];
+  int struct_nprocs = 0;
+  for ( int proc = 0; proc < nprocs; proc++ ) {
+    struct_counts[proc] = 0;
+    struct_offsets[proc] = 0;
+    if (all_info[2*proc] >= 0){
+      struct_procs[all_info[2*proc]] = proc;
+      struct_nprocs++;
+    }
+  }
+
+  // Place the nodes in the order of the structural ranks
+  int offset = 0;
+  for ( int k = 0; k < struct_nprocs; k++ ) {
+    int proc = struct_procs[k];
+    struct_counts[proc] = all_info[2*proc+1];
+    struct_offsets[proc] = offset;
+    offset += struct_counts[proc];
+  }
+
+  // Check whether the nodes are also in the order of the global ranks
+  struct_ordered = 1;
+  int next = 0;
+  for ( int proc = 0; proc < nprocs; proc++ ) {
+    if (struct_counts[proc] > 0){
+      if (struct_offsets[proc] != next){
+        struct_ordered = 0;
+      }
+      next += struct_counts[proc];
+    }
+  }
+
+  delete [] all_info;
+  delete [] struct_procs;
+
+  return offset;
+}
+
+/*
+  Assemble the global image of a structural vector on every processor from
+  the parts held by the structural processors
+
+  Arguments
+  ---------
+  local         : vector of the structural nodes on this processor
+  vars_per_node : number of entries per node
+
+  Returns
+  -------
+  global        : vector of the global structural mesh
+*/
+void TransferScheme::allgatherStructuralVector(const F2FScalar *local,
+                                               F2FScalar *global,
+                                               int vars_per_node) {
+  int rank, nprocs;
+  MPI_Comm_rank(global_comm, &rank);
+  MPI_Comm_size(global_comm, &nprocs);
+
+  int *counts = new int[2*nprocs];
+  int *offsets = &counts[nprocs];
+  for ( int proc = 0; proc < nprocs; proc++ ) {
+    counts[proc] = vars_per_node*struct_counts[proc];
+    offsets[proc] = vars_per_node*struct_offsets[proc];
+  }
+
+  MPI_Allgatherv(local, counts[rank], F2F_MPI_TYPE,
+                 global, counts, offsets, F2F_MPI_TYPE, global_comm);
+
+  delete [] counts;
+}
+
+/*
+  Sum the contributions of every processor to a global structural vector and
+  return the entries of the structural nodes on this processor. The global
+  vector is used as a work array
+
+  Arguments
+  ---------
+  global        : contributions of this processor to the global vector
+  vars_per_node : number of entries per node
+
+  Returns
+  -------
+  local         : summed vector of the structural nodes on this processor
+*/
+void TransferScheme::reduceScatterStructuralVector(F2FScalar *global,
+                                                   F2FScalar *local,
+                                                   int vars_per_node) {
+  int rank, nprocs;
+  MPI_Comm_rank(global_comm, &rank);
+  MPI_Comm_size(global_comm, &nprocs);
+
+  int *counts = new int[nprocs];
+  for ( int proc = 0; proc < nprocs; proc++ ) {
+    counts[proc] = vars_per_node*struct_counts[proc];
+  }
+
+  if (struct_ordered){
+    // Each processor only receives the sums for its own nodes
+    MPI_Reduce_scatter(global, local, counts, F2F_MPI_TYPE, MPI_SUM,
+                       global_comm);
+  }
+  else {
+    // The nodes are not in rank order, so sum the whole vector and copy out
+    // the local part
+    int size = 0;
+    for ( int proc = 0; proc < nprocs; proc++ ) {
+      size += counts[proc];
+    }
+    MPI_Allreduce(MPI_IN_PLACE, global, size, F2F_MPI_TYPE, MPI_SUM,
+                  global_comm);
+    if (counts[rank] > 0){
+      memcpy(local, &global[vars_per_node*struct_offsets[rank]],
+             counts[rank]*sizeof(F2FScalar));
+    }
+  }
+
+  delete [] counts;
+}
+
 /*
   Set the initial structural node locations
 */
@@ -182,57 +684,51 @@ void TransferScheme::transformEquivRigidMotion(const F2FScalar *aero_disps,
                                                F2FScalar *R, 
                                                F2FScalar *t,
                                                F2FScalar *u) {
-  // Gather aerodynamic node locations and displacements
-  F2FScalar *Xa_global = new F2FScalar[3*na_global]; 
-  collectAerodynamicVector(Xa, Xa_global);
-  F2FScalar *Ua_global = new F2FScalar[3*na_global];
-  collectAerodynamicVector(aero_disps, Ua_global);
-
-  // Adds aerodynamic displacements to aerodynamic node locations
-  F2FScalar *Xad_global = new F2FScalar[3*na_global];
-  for (int i = 0 ; i < 3*na_global; i++) {
-    Xad_global[i] = Xa_global[i] + Ua_global[i];
-  }
-
-  // Allocate global array of elastic displacements
-  F2FScalar *u_global = new F2FScalar[3*na_global];
-
-  // Compute centroids of the original and displaced node locations
-  F2FScalar x0_bar[3];
-  memset(x0_bar, 0.0, 3*sizeof(F2FScalar));
-  F2FScalar x_bar[3];
-  memset(x_bar, 0.0, 3*sizeof(F2FScalar));
-
-  for (int j = 0; j < na_global; j++) {
-    x0_bar[0] += Xa_global[3*j+0];
-    x0_bar[1] += Xa_global[3*j+1];
-    x0_bar[2] += Xa_global[3*j+2];
-    x_bar[0] += Xad_global[3*j+0];
-    x_bar[1] += Xad_global[3*j+1];
-    x_bar[2] += Xad_global[3*j+2];
-  }
-
-  x0_bar[0] *= 1.0/na_global;
-  x0_bar[1] *= 1.0/na_global;
-  x0_bar[2] *= 1.0/na_global;
-  x_bar[0] *= 1.0/na_global;
-  x_bar[1] *= 1.0/na_global;
-  x_bar[2] *= 1.0/na_global;
-
-  // Form the covariance matrix
-  F2FScalar H[9];
-  memset(H, 0.0, 9*sizeof(F2FScalar));
-
-  for (int j = 0; j < na_global; j++) {
+  // Compute the centroid of the aerodynamic nodes once after they are set
+  if (xa0bar_update){
+    memset(xa0bar, 0, 3*sizeof(F2FScalar));
+    for (int j = 0; j < na; j++) {
+      xa0bar[0] += Xa[3*j+0];
+      xa0bar[1] += Xa[3*j+1];
+      xa0bar[2] += Xa[3*j+2];
+    }
+    MPI_Allreduce(MPI_IN_PLACE, xa0bar, 3, F2F_MPI_TYPE, MPI_SUM, aero_comm);
+    for (int k = 0; k < 3; k++) {
+      xa0bar[k] *= 1.0/na_global;
+    }
+    xa0bar_update = 0;
+  }
+
+  // Sum the original and displaced node locations and their products on this
+  // processor. The locations are taken relative to the centroid of the
+  // aerodynamic nodes, which is the same on every processor, to avoid the
+  // cancellation when the centroids are removed from the covariance
+  F2FScalar c[3];
+  memcpy(c, xa0bar, 3*sizeof(F2FScalar));
+
+  F2FScalar sums[15];
+  memset(sums, 0, 15*sizeof(F2FScalar));
+  F2FScalar *x0_bar = &sums[0];
+  F2FScalar *x_bar = &sums[3];
+  F2FScalar *H = &sums[6];
+
+  for (int j = 0; j < na; j++) {
     F2FScalar q[3];
-    q[0] = Xa_global[3*j+0] - x0_bar[0];
-    q[1] = Xa_global[3*j+1] - x0_bar[1];
-    q[2] = Xa_global[3*j+2] - x0_bar[2];
+    q[0] = Xa[3*j+0] - c[0];
+    q[1] = Xa[3*j+1] - c[1];
+    q[2] = Xa[3*j+2] - c[2];
 
     F2FScalar p[3];
-    p[0] = Xad_global[3*j+0] - x_bar[0];
-    p[1] = Xad_global[3*j+1] - x_bar[1];
-    p[2] = Xad_global[3*j+2] - x_bar[2];
+    p[0] = q[0] + aero_disps[3*j+0];
+    p[1] = q[1] + aero_disps[3*j+1];
+    p[2] = q[2] + aero_disps[3*j+2];
+
+    x0_bar[0] += q[0];
+    x0_bar[1] += q[1];
+    x0_bar[2] += q[2];
+    x_bar[0] += p[0];
+    x_bar[1] += p[1];
+    x_bar[2] += p[2];
 
     H[0] += p[0]*q[0];
     H[1] += p[1]*q[0];
@@ -245,8 +741,28 @@ void TransferScheme::transformEquivRigidMotion(const F2FScalar *aero_disps,
     H[8] += p[2]*q[2];
   }
 
-  for (int k = 0; k < 9; k++) {
-    H[k] *= 1.0/na_global;
+  // Combine the sums from all the aerodynamic processors
+  MPI_Allreduce(MPI_IN_PLACE, sums, 15, F2F_MPI_TYPE, MPI_SUM, aero_comm);
+
+  // Compute centroids of the original and displaced node locations and the
+  // covariance matrix H = sum (xa + ua - x_bar)*(xa - x0_bar)^{T}/na
+  for (int k = 0; k < 15; k++) {
+    sums[k] *= 1.0/na_global;
+  }
+
+  H[0] -= x_bar[0]*x0_bar[0];
+  H[1] -= x_bar[1]*x0_bar[0];
+  H[2] -= x_bar[2]*x0_bar[0];
+  H[3] -= x_bar[0]*x0_bar[1];
+  H[4] -= x_bar[1]*x0_bar[1];
+  H[5] -= x_bar[2]*x0_bar[1];
+  H[6] -= x_bar[0]*x0_bar[2];
+  H[7] -= x_bar[1]*x0_bar[2];
+  H[8] -= x_bar[2]*x0_bar[2];
+
+  for (int k = 0; k < 3; k++) {
+    x0_bar[k] += c[k];
+    x_bar[k] += c[k];
   }
 
   // Compute rotation matrix
@@ -257,16 +773,17 @@ void TransferScheme::transformEquivRigidMotion(const F2FScalar *aero_disps,
   t[1] = x_bar[1] - R[1]*x0_bar[0] - R[4]*x0_bar[1] - R[7]*x0_bar[2];
   t[2] = x_bar[2] - R[2]*x0_bar[0] - R[5]*x0_bar[1] - R[8]*x0_bar[2];
 
-  // Compute elastic deformations (deviation from rigid motion)
-  for (int j = 0; j < na_global; j++) {
+  // Compute elastic deformations (deviation from rigid motion) of the nodes
+  // on this processor
+  for (int j = 0; j < na; j++) {
     F2FScalar Xa_rigid[] = {t[0], t[1], t[2]};
-    F2FScalar *x = &Xa_global[3*j];
+    const F2FScalar *x = &Xa[3*j];
     Xa_rigid[0] += R[0]*x[0] + R[3]*x[1] + R[6]*x[2];
     Xa_rigid[1] += R[1]*x[0] + R[4]*x[1] + R[7]*x[2];
     Xa_rigid[2] += R[2]*x[0] + R[5]*x[1] + R[8]*x[2];
-    u_global[3*j+0] = Xad_global[3*j+0] - Xa_rigid[0];
-    u_global[3*j+1] = Xad_global[3*j+1] - Xa_rigid[1];
-    u_global[3*j+2] = Xad_global[3*j+2] - Xa_rigid[2];
+    u[3*j+0] = x[0] + aero_disps[3*j+0] - Xa_rigid[0];
+    u[3*j+1] = x[1] + aero_disps[3*j+1] - Xa_rigid[1];
+    u[3*j+2] = x[2] + aero_disps[3*j+2] - Xa_rigid[2];
   }
 
   // Copy rotation matrix and centroid to global variables for use in computing
@@ -274,15 +791,6 @@ void TransferScheme::transformEquivRigidMotion(const F2FScalar *aero_disps,
   memcpy(Raero, R, 9*sizeof(F2FScalar));
   memcpy(xa0bar, x0_bar, 3*sizeof(F2FScalar));
   memcpy(xabar, x_bar, 3*sizeof(F2FScalar));
-
-  // Scatter elastic deformations to aerodynamic processors
-  distributeAerodynamicVector(u_global, u);
-
-  // Free memory
-  delete [] Xa_global;
-  delete [] Ua_global;
-  delete [] Xad_global;
-  delete [] u_global;
 }
 
 /*
@@ -1268,54 +1776,245 @@ void TransferScheme::testdLdxS0Products(const F2FScalar *struct_disps,
   delete [] grad;
 }
 
-/* 
-  Computes decomposition H = RS using the Singular Value Decomposition (SVD)
+/*
+  Compute the adjugate of the 4x4 matrix A (row-major) from the 2x2 minors
+  of its first two and last two rows and return the determinant of A
+*/
+static F2FReal adjugate4( const F2FReal *A, F2FReal *adj ){
+  F2FReal s0 = A[0]*A[5] - A[4]*A[1];
+  F2FReal s1 = A[0]*A[6] - A[4]*A[2];
+  F2FReal s2 = A[0]*A[7] - A[4]*A[3];
+  F2FReal s3 = A[1]*A[6] - A[5]*A[2];
+  F2FReal s4 = A[1]*A[7] - A[5]*A[3];
+  F2FReal s5 = A[2]*A[7] - A[6]*A[3];
+
+  F2FReal c5 = A[10]*A[15] - A[14]*A[11];
+  F2FReal c4 = A[9]*A[15] - A[13]*A[11];
+  F2FReal c3 = A[9]*A[14] - A[13]*A[10];
+  F2FReal c2 = A[8]*A[15] - A[12]*A[11];
+  F2FReal c1 = A[8]*A[14] - A[12]*A[10];
+  F2FReal c0 = A[8]*A[13] - A[12]*A[9];
+
+  adj[0] = A[5]*c5 - A[6]*c4 + A[7]*c3;
+  adj[1] = -A[1]*c5 + A[2]*c4 - A[3]*c3;
+  adj[2] = A[13]*s5 - A[14]*s4 + A[15]*s3;
+  adj[3] = -A[9]*s5 + A[10]*s4 - A[11]*s3;
+
+  adj[4] = -A[4]*c5 + A[6]*c2 - A[7]*c1;
+  adj[5] = A[0]*c5 - A[2]*c2 + A[3]*c1;
+  adj[6] = -A[12]*s5 + A[14]*s2 - A[15]*s1;
+  adj[7] = A[8]*s5 - A[10]*s2 + A[11]*s1;
+
+  adj[8] = A[4]*c4 - A[5]*c2 + A[7]*c0;
+  adj[9] = -A[0]*c4 + A[1]*c2 - A[3]*c0;
+  adj[10] = A[12]*s4 - A[13]*s2 + A[15]*s0;
+  adj[11] = -A[8]*s4 + A[9]*s2 - A[11]*s0;
+
+  adj[12] = -A[4]*c3 + A[5]*c1 - A[6]*c0;
+  adj[13] = A[0]*c3 - A[1]*c1 + A[2]*c0;
+  adj[14] = -A[12]*s3 + A[13]*s1 - A[14]*s0;
+  adj[15] = A[8]*s3 - A[9]*s1 + A[10]*s0;
+
+  return s0*c5 - s1*c4 + s2*c3 + s3*c2 - s4*c1 + s5*c0;
+}
+
+/*
+  Compute the rotation R that maximizes tr(R^{T}*H), which is the rotation
+  of the polar decomposition H = R*S, from the unit quaternion q that
+  maximizes q^{T}*K*q for a symmetric 4x4 matrix K built from H (Horn,
+  1987). The largest eigenvalue of K is found with Newton's method on the
+  characteristic polynomial starting from an upper bound, and q is the
+  largest row of the adjugate of K - lambda*I (Theobald, 2005).
+
+  The eigenvector is not well defined if the gap between the largest and
+  the other eigenvalues of K is small. This happens when H has rank one or
+  less, or H is close to a reflection with two equal small singular values
 
   Arguments
   ----------
-  H : covariance matrix
+  H : real part of the covariance matrix
 
   Returns
   --------
-  R : rotation matrix
-  S : symmetric matrix from polar decomposition of H
+  R    : rotation matrix
+  fail : non-zero if the largest eigenvalue of K is close to repeated
+*/
+static int computeRotationQuaternion( const F2FReal *H, F2FReal *R ){
+  // Entries H_ij = H[i + 3*j] of the column-major covariance matrix
+  F2FReal xx = H[0], yx = H[1], zx = H[2];
+  F2FReal xy = H[3], yy = H[4], zy = H[5];
+  F2FReal xz = H[6], yz = H[7], zz = H[8];
+
+  F2FReal K[16];
+  K[0] = xx + yy + zz;
+  K[1] = zy - yz;
+  K[2] = xz - zx;
+  K[3] = yx - xy;
+  K[5] = xx - yy - zz;
+  K[6] = xy + yx;
+  K[7] = xz + zx;
+  K[10] = -xx + yy - zz;
+  K[11] = yz + zy;
+  K[15] = -xx - yy + zz;
+  K[4] = K[1]; K[8] = K[2]; K[12] = K[3];
+  K[9] = K[6]; K[13] = K[7]; K[14] = K[11];
+
+  // Characteristic polynomial lambda^4 + c2*lambda^2 + c1*lambda + c0
+  F2FReal adj[16];
+  F2FReal norm2 = (xx*xx + xy*xy + xz*xz + yx*yx + yy*yy + yz*yz +
+                   zx*zx + zy*zy + zz*zz);
+  F2FReal c2 = -2.0*norm2;
+  F2FReal c1 = -8.0*(xx*(yy*zz - yz*zy) - xy*(yx*zz - yz*zx) +
+                     xz*(yx*zy - yy*zx));
+  F2FReal c0 = adjugate4(K, adj);
+
+  F2FReal norm = sqrt(norm2);
+  if (norm == 0.0){
+    return 1;
+  }
+
+  // The largest eigenvalue is at most the sum of the singular values of H,
+  // which is at most sqrt(3)*|H|_F. Newton's method converges monotonically
+  // from above since all the roots are real
+  F2FReal lambda = sqrt(3.0)*norm;
+  F2FReal dp = 0.0;
+  int converged = 0;
+  for ( int k = 0; k < 50 && !converged; k++ ) {
+    F2FReal l2 = lambda*lambda;
+    F2FReal p = (l2 + c2)*l2 + c1*lambda + c0;
+    dp = (4.0*l2 + 2.0*c2)*lambda + c1;
+    if (!(dp > 0.0)){
+      break;
+    }
+    F2FReal dl = p/dp;
+    lambda -= dl;
+    converged = (fabs(dl) <= 1e-14*norm);
+  }
+
+  // The derivative of the characteristic polynomial at the largest
+  // eigenvalue is the product of the gaps to the other eigenvalues. Reject
+  // a close to repeated largest eigenvalue, where this product is small
+  // compared to |H|_F^3 and Newton's method converges slowly
+  F2FReal tol = 1e-4*norm2*norm;
+  if (!converged || !(dp > tol)){
+    return 1;
+  }
 
+  // Take the largest row of the adjugate of K - lambda*I as the eigenvector
+  for ( int i = 0; i < 4; i++ ) {
+    K[5*i] -= lambda;
+  }
+  adjugate4(K, adj);
+
+  int imax = 0;
+  F2FReal qmax = 0.0;
+  for ( int i = 0; i < 4; i++ ) {
+    F2FReal *a = &adj[4*i];
+    F2FReal qn = a[0]*a[0] + a[1]*a[1] + a[2]*a[2] + a[3]*a[3];
+    if (qn > qmax){
+      qmax = qn;
+      imax = i;
+    }
+  }
+  if (!(qmax > 0.0)){
+    return 1;
+  }
+
+  F2FReal *q = &adj[4*imax];
+  F2FReal qinv = 1.0/sqrt(qmax);
+  F2FReal w = qinv*q[0], x = qinv*q[1], y = qinv*q[2], z = qinv*q[3];
+
+  // Rotation matrix of the unit quaternion, stored column-major
+  R[0] = w*w + x*x - y*y - z*z;
+  R[1] = 2.0*(x*y + w*z);
+  R[2] = 2.0*(x*z - w*y);
+
+  R[3] = 2.0*(x*y - w*z);
+  R[4] = w*w - x*x + y*y - z*z;
+  R[5] = 2.0*(y*z + w*x);
+
+  R[6] = 2.0*(x*z + w*y);
+  R[7] = 2.0*(y*z - w*x);
+  R[8] = w*w - x*x - y*y + z*z;
+
+  // Refine the rotation with a Newton step R <- R*(I + [omega]_x) on the
+  // symmetry of S = R^{T}*H, which solves (tr(S)*I - S)*omega = 2*a where
+  // [a]_x is the skew-symmetric part of S
+  F2FReal S[9];
+  for ( int j = 0; j < 3; j++ ) {
+    for ( int i = 0; i < 3; i++ ) {
+      S[i+3*j] = R[3*i]*H[3*j] + R[3*i+1]*H[3*j+1] + R[3*i+2]*H[3*j+2];
+    }
+  }
+  F2FReal a[3];
+  a[0] = S[5] - S[7];
+  a[1] = S[6] - S[2];
+  a[2] = S[1] - S[3];
+
+  F2FReal trS = S[0] + S[4] + S[8];
+  F2FReal A[9];
+  A[0] = trS - S[0];
+  A[4] = trS - S[4];
+  A[8] = trS - S[8];
+  A[1] = A[3] = -0.5*(S[1] + S[3]);
+  A[2] = A[6] = -0.5*(S[2] + S[6]);
+  A[5] = A[7] = -0.5*(S[5] + S[7]);
+
+  // Solve the symmetric 3x3 system with the adjugate
+  F2FReal C0 = A[4]*A[8] - A[5]*A[5];
+  F2FReal C1 = A[2]*A[5] - A[1]*A[8];
+  F2FReal C2 = A[1]*A[5] - A[2]*A[4];
+  F2FReal C4 = A[0]*A[8] - A[2]*A[2];
+  F2FReal C5 = A[1]*A[2] - A[0]*A[5];
+  F2FReal C8 = A[0]*A[4] - A[1]*A[1];
+  F2FReal detA = A[0]*C0 + A[1]*C1 + A[2]*C2;
+  if (detA != 0.0){
+    F2FReal omega[3];
+    omega[0] = (C0*a[0] + C1*a[1] + C2*a[2])/detA;
+    omega[1] = (C1*a[0] + C4*a[1] + C5*a[2])/detA;
+    omega[2] = (C2*a[0] + C5*a[1] + C8*a[2])/detA;
+
+    F2FReal dR[9];
+    for ( int i = 0; i < 3; i++ ) {
+      dR[i] = R[3+i]*omega[2] - R[6+i]*omega[1];
+      dR[3+i] = R[6+i]*omega[0] - R[i]*omega[2];
+      dR[6+i] = R[i]*omega[1] - R[3+i]*omega[0];
+    }
+    for ( int i = 0; i < 9; i++ ) {
+      R[i] += dR[i];
+    }
+  }
+
+  return 0;
+}
+
+/*
+  Compute the rotation of the polar decomposition H = R*S with the Singular
+  Value Decomposition (SVD) of H, correcting reflections to the closest
+  rotation
+
+  Arguments
+  ----------
+  H : real part of the covariance matrix, destroyed on exit
+
+  Returns
+  --------
+  R : rotation matrix
 */
-void TransferScheme::computeRotation(const F2FScalar *H, 
-                                     F2FScalar *R, F2FScalar *S) {
-  // Allocate memory for local variables
+static void computeRotationSVD( F2FReal *H, F2FReal *R ){
   int m = 3, n = 3, lda = 3, ldu = 3, ldvt = 3, info, lwork = 50; // for SVD
   F2FReal work[50]; // work matrix for SVD
   F2FReal U[9], VT[9]; // output matrices for SVD
-  F2FReal detR; // determinant of rotation matrix
   F2FReal s[3];
-  F2FReal Hcopy[9];
-  
-  // Copy over the values of H - LAPACK conveniently destroys
-  // the entries of H
-#ifdef FUNTOFEM_USE_COMPLEX
-  F2FScalar Hreal[9], Himag[9];
-  for ( int i = 0; i < 9; i++ ){
-    Hcopy[i] = F2FRealPart(H[i]);
-
-    // Keep the real and the imaginary parts of the input for later
-    // use...
-    Hreal[i] = F2FRealPart(H[i]);
-    Himag[i] = F2FImagPart(H[i]);
-  }
-#else
-  memcpy(Hcopy, H, 9*sizeof(F2FScalar));
-#endif
 
   // Perform SVD of the covariance matrix
-  LAPACKdgesvd( "All", "All", &m, &n, Hcopy, &lda, s, U, &ldu, VT, &ldvt, work,
+  LAPACKdgesvd( "All", "All", &m, &n, H, &lda, s, U, &ldu, VT, &ldvt, work,
                 &lwork, &info ); // compute SVD
 
   // R = U * V^T
   // [ R[0] R[3] R[6] ] = [ U[0] U[3] U[6] ][ VT[0] VT[3] VT[6] ]
   // [ R[1] R[4] R[7] ]   [ U[1] U[4] U[7] ][ VT[1] VT[4] VT[7] ]
   // [ R[2] R[5] R[8] ]   [ U[2] U[5] U[8] ][ VT[2] VT[5] VT[8] ]
-
   R[0] = U[0]*VT[0] + U[3]*VT[1] + U[6]*VT[2];
   R[1] = U[1]*VT[0] + U[4]*VT[1] + U[7]*VT[2];
   R[2] = U[2]*VT[0] + U[5]*VT[1] + U[8]*VT[2];
@@ -1329,24 +2028,66 @@ void TransferScheme::computeRotation(const F2FScalar *H,
   R[8] = U[2]*VT[6] + U[5]*VT[7] + U[8]*VT[8];
 
   // Take determinant of rotation matrix
-  detR = F2FRealPart(det(R));
+  F2FReal detR = (R[0]*(R[4]*R[8] - R[5]*R[7]) -
+                  R[3]*(R[1]*R[8] - R[2]*R[7]) +
+                  R[6]*(R[1]*R[5] - R[2]*R[4]));
+
+  // If negative determinant, matrix computed is a reflection, so flip the
+  // sign of the contribution of the smallest singular value
+  if (detR < 0.0) {
+    for ( int j = 0; j < 3; j++ ) {
+      for ( int i = 0; i < 3; i++ ) {
+        R[i+3*j] -= 2.0*U[6+i]*VT[2+3*j];
+      }
+    }
+  }
+}
 
-  // If negative determinant, matrix computed is a reflection
-  // Can calculate rotation matrix from reflection found
-  if ( F2FRealPart(detR) < 0.0 ) {
-    // Rotation matrix given is a reflection
-    // Can calculate rotation matrix from reflection found
-    R[0] = U[0]*VT[0] + U[3]*VT[1] - U[6]*VT[2];
-    R[1] = U[1]*VT[0] + U[4]*VT[1] - U[7]*VT[2];
-    R[2] = U[2]*VT[0] + U[5]*VT[1] - U[8]*VT[2];
+/* 
+  Computes decomposition H = RS, where R is a rotation and S is symmetric.
+  The rotation is computed in closed form from a quaternion, with the
+  Singular Value Decomposition (SVD) as a fallback when the rotation is
+  close to not unique. In complex mode, the rotation is computed from the
+  real part of H and its imaginary part is found by differentiating the
+  symmetry conditions on S
 
-    R[3] = U[0]*VT[3] + U[3]*VT[4] - U[6]*VT[5];
-    R[4] = U[1]*VT[3] + U[4]*VT[4] - U[7]*VT[5];
-    R[5] = U[2]*VT[3] + U[5]*VT[4] - U[8]*VT[5];
+  Arguments
+  ----------
+  H : covariance matrix
 
-    R[6] = U[0]*VT[6] + U[3]*VT[7] - U[6]*VT[8];
-    R[7] = U[1]*VT[6] + U[4]*VT[7] - U[7]*VT[8];
-    R[8] = U[2]*VT[6] + U[5]*VT[7] - U[8]*VT[8];
+  Returns
+  --------
+  R : rotation matrix
+  S : symmetric matrix from polar decomposition of H
+
+*/
+void TransferScheme::computeRotation(const F2FScalar *H, 
+                                     F2FScalar *R, F2FScalar *S) {
+  F2FReal Hcopy[9];
+  F2FReal Rreal[9];
+
+  // Copy over the real part of H
+#ifdef FUNTOFEM_USE_COMPLEX
+  F2FScalar Hreal[9], Himag[9];
+  for ( int i = 0; i < 9; i++ ){
+    Hcopy[i] = F2FRealPart(H[i]);
+
+    // Keep the real and the imaginary parts of the input for later
+    // use...
+    Hreal[i] = F2FRealPart(H[i]);
+    Himag[i] = F2FImagPart(H[i]);
+  }
+#else
+  memcpy(Hcopy, H, 9*sizeof(F2FScalar));
+#endif
+
+  // Compute the rotation from the quaternion and fall back to the SVD
+  // (which destroys the entries of Hcopy) if it is not well defined
+  if (computeRotationQuaternion(Hcopy, Rreal)){
+    computeRotationSVD(Hcopy, Rreal);
+  }
+  for ( int i = 0; i < 9; i++ ){
+    R[i] = Rreal[i];
   }
 
 #ifdef FUNTOFEM_USE_COMPLEX
@@ -1364,7 +2105,7 @@ void TransferScheme::computeRotation(const F2FScalar *H,
   // Assemble matrix system and factor
   F2FScalar M1[15*15];
   assembleM1(R, Sreal, M1);
-  int ipiv[15]; m = 15; info = 0;
+  int ipiv[15], m = 15, info = 0;
   LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
 
   for (int k = 0; k < 9; k++) {
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from mpi4py import MPI
+import numpy as np
+import unittest
+
+from pyfuntofem.model import FUNtoFEMmodel, Body, Scenario, Function
+from pyfuntofem.solver_interface import SolverInterface
+
+try:
+    from funtofem import TransferScheme
+    from pyfuntofem.driver import FUNtoFEMnlbgs
+    from pyfuntofem.fake_solver import FakeSolver
+    has_transfer = True
+except ImportError:
+    has_transfer = False
+
+class LinearStructure(SolverInterface):
+    """
+    Structural solver with linear responses to the loads and heat flux. The adjoint
+    of each function is scaled differently, so that they converge at different rates
+    """
+    def __init__(self, comm, model, scale, ns=6):
+        ns = ns if comm.Get_rank() == 0 else 0
+        rng = np.random.RandomState(1)
+        self.A = 0.3*rng.rand(3*ns, 3*ns)
+        self.B = 0.3*rng.rand(ns, ns)
+        self.scale = np.array(scale)
+        for body in model.bodies:
+            body.struct_nnodes = ns
+            body.struct_X = 10.0*rng.rand(3*ns)
+            body.struct_disps = np.zeros(3*ns)
+            body.struct_temps = body.T_ref*np.ones(ns)
+
+        # The relaxed adjoint variables and active functions at each iteration
+        self.history = []
+
+    def iterate(self, scenario, bodies, step):
+        for body in bodies:
+            body.struct_disps = self.A.dot(body.struct_loads)
+            body.struct_temps = body.T_ref + self.B.dot(body.struct_heat_flux)
+        return 0
+
+    def iterate_adjoint(self, scenario, bodies, step):
+        for body in bodies:
+            self.history.append((body.psi_S.copy(), body.psi_T_S.copy(),
+                                 scenario.adjoint_active.copy()))
+            body.psi_S[:] = self.scale*self.A.T.dot(body.struct_rhs) + 1.0
+            body.psi_T_S[:] = self.scale*self.B.T.dot(body.struct_rhs_T) + 1.0
+        return 0
+
+if has_transfer:
+    class PerFunctionNLBGS(FUNtoFEMnlbgs):
+        """
+        NLBGS driver with the Aitken relaxation of the adjoint done one function at
+        a time, as before the relaxation state was stored in blocks
+        """
+        def _aitken_adjoint_relax(self, scenario):
+            nfunctions = scenario.count_adjoint_functions()
+            active = scenario.adjoint_active
+            res = np.zeros((nfunctions, 2))
+            if self.aitken_init:
+                self.aitken_init = False
+                self.up_prev = []
+                self.aitken_vec = []
+                self.theta = []
+                self.therm_up_prev = []
+                self.aitken_therm_vec = []
+                self.theta_therm = []
+                for body in self.model.bodies:
+                    n = body.struct_nnodes*body.xfer_ndof
+                    self.up_prev.append([np.zeros(n, dtype=TransferScheme.dtype)
+                                         for func in range(nfunctions)])
+                    self.aitken_vec.append([np.zeros(n, dtype=TransferScheme.dtype)
+                                            for func in range(nfunctions)])
+                    self.theta.append([self.theta_init]*nfunctions)
+
+                    n = body.struct_nnodes*body.therm_xfer_ndof
+                    self.therm_up_prev.append([body.T_ref*np.ones(n, dtype=TransferScheme.dtype)
+                                               for func in range(nfunctions)])
+                    self.aitken_therm_vec.append([body.T_ref*np.ones(n, dtype=TransferScheme.dtype)
+                                                  for func in range(nfunctions)])
+                    self.theta_therm.append([self.theta_therm_init]*nfunctions)
+
+            for ibody, body in enumerate(self.model.bodies):
+                for field, (psi, vec, prev, theta) in enumerate(
+                        [(body.psi_S, self.aitken_vec, self.up_prev, self.theta),
+                         (body.psi_T_S, self.aitken_therm_vec, self.therm_up_prev,
+                          self.theta_therm)]):
+                    for func in range(nfunctions):
+                        if not active[func]:
+                            psi[:,func] = vec[ibody][func][:]
+                            continue
+
+                        up = psi[:,func] - vec[ibody][func]
+                        res[func,field] = self.comm.allreduce(np.linalg.norm(np.real(up))**2)
+                        dup = up - prev[ibody][func]
+                        norm2 = self.comm.allreduce(np.linalg.norm(dup)**2)
+                        if norm2 > 1e-13:
+                            theta[ibody][func] *= 1.0 - self.comm.allreduce(dup.dot(up))/norm2
+                            theta[ibody][func] = np.max((np.min((theta[ibody][func], self.theta_max)),
+                                                         self.theta_min))
+                        vec[ibody][func] += theta[ibody][func]*up
+                        prev[ibody][func] = up[:]
+                        psi[:,func] = vec[ibody][func][:]
+
+            return res
+
+@unittest.skipUnless(has_transfer, 'requires the TransferScheme extension')
+class AdjointConvergenceTest(unittest.TestCase):
+    """
+    Two functions whose adjoints converge at different rates
+    """
+    scale = [-0.2, -4.0]
+
+    def solve(self, driver_class, rtol):
+        comm = MPI.COMM_WORLD
+        model = FUNtoFEMmodel('model')
+        plate = Body('plate', 'aerothermoelastic', group=0, boundary=1)
+        model.add_body(plate)
+        steady = Scenario('steady', group=0, steps=60, rtol=rtol)
+        steady.add_function(Function('f', analysis_type='structural'))
+        steady.add_function(Function('g', analysis_type='structural'))
+        model.add_scenario(steady)
+
+        structure = LinearStructure(comm, model, self.scale)
+        solvers = {'flow': FakeSolver(comm, model), 'structural': structure}
+        transfer_options = {'analysis_type': 'aerothermoelastic', 'scheme': 'meld',
+                            'thermal_scheme': 'meld', 'npts': 3}
+        driver = driver_class(solvers, comm, comm, 0, comm, 0, transfer_options, model=model,
+                              theta_max=2.0)
+
+        self.assertEqual(driver.solve_forward(), 0)
+        self.assertEqual(driver.solve_adjoint(), 0)
+
+        return driver, plate, steady, structure.history
+
+    def comm_any(self, flag):
+        return MPI.COMM_WORLD.allreduce(flag, op=MPI.LOR)
+
+    def test_frozen_columns(self):
+        driver, body, scenario, history = self.solve(FUNtoFEMnlbgs, 1e-10)
+
+        # The first function converges first and the iterations stop once both have
+        active = np.array([h[2] for h in history])
+        self.assertTrue(np.any(~active[:,0] & active[:,1]))
+        self.assertFalse(np.any(active[:,0] & ~active[:,1]))
+        self.assertFalse(np.any(scenario.adjoint_active))
+        self.assertLess(len(scenario.adjoint_residuals), scenario.steps)
+
+        # The adjoint variables of a converged function are frozen while the other
+        # function keeps iterating
+        first = np.argmin(active[:,0])
+        frozen = [h for h in history[first:] if h[2][1]]
+        self.assertGreater(len(frozen), 1)
+        for psi_S, psi_T_S, act in frozen:
+            self.assertTrue(np.array_equal(psi_S[:,0], history[first][0][:,0]))
+            self.assertTrue(np.array_equal(psi_T_S[:,0], history[first][1][:,0]))
+        changed = [not np.array_equal(a[0][:,1], b[0][:,1]) for a, b in zip(frozen[:-1], frozen[1:])]
+        self.assertTrue(self.comm_any(np.any(changed)))
+        self.assertTrue(np.array_equal(body.psi_S[:,0], history[first][0][:,0]))
+
+    def test_per_function_aitken(self):
+        # The block relaxation reproduces the per-function one, with and without
+        # frozen functions
+        for rtol in [0.0, 1e-10]:
+            driver, body, scenario, history = self.solve(FUNtoFEMnlbgs, rtol)
+            ref_driver, ref, ref_scenario, ref_history = self.solve(PerFunctionNLBGS, rtol)
+
+            self.assertEqual(len(scenario.adjoint_residuals), len(ref_scenario.adjoint_residuals))
+            self.assertTrue(np.allclose(scenario.adjoint_residuals,
+                                        ref_scenario.adjoint_residuals, rtol=1e-8, atol=1e-14))
+            self.assertFalse(np.allclose(ref_driver.theta[0], driver.theta_init))
+            self.assertTrue(np.allclose(driver.theta[0], ref_driver.theta[0], rtol=1e-10))
+            self.assertTrue(np.allclose(driver.theta_therm[0], ref_driver.theta_therm[0],
+                                        rtol=1e-10))
+            for name in ['psi_S', 'psi_T_S']:
+                self.assertTrue(np.allclose(getattr(body, name), getattr(ref, name),
+                                            rtol=1e-10, atol=1e-14), name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from mpi4py import MPI
+import numpy as np
+import unittest
+
+try:
+    from funtofem import TransferScheme
+    has_transfer = True
+except ImportError:
+    has_transfer = False
+
+@unittest.skipUnless(has_transfer, 'requires the TransferScheme extension')
+class BlockProductTest(unittest.TestCase):
+    """
+    Compare the block Jacobian-vector products of MELD (native) and RBF (one
+    column at a time) against the single-vector products
+    """
+    nvecs = 4
+
+    def setUp(self):
+        self.comm = MPI.COMM_WORLD
+        self.rng = np.random.RandomState(self.comm.Get_rank())
+        self.ns = 30
+        self.na = 20
+        self.dtype = TransferScheme.dtype
+
+    def create(self, scheme):
+        comm = self.comm
+        if scheme == 'meld':
+            transfer = TransferScheme.pyMELD(comm, comm, 0, comm, 0, -1, 10, 0.5)
+        else:
+            transfer = TransferScheme.pyRBF(comm, comm, 0, comm, 0,
+                                            TransferScheme.PY_THIN_PLATE_SPLINE, 1)
+        transfer.setStructNodes(self.rng.rand(3*self.ns).astype(self.dtype))
+        transfer.setAeroNodes(self.rng.rand(3*self.na).astype(self.dtype))
+        transfer.initialize()
+
+        # Set the state that the load transfer products are linearized about
+        ua = np.zeros(3*self.na, dtype=self.dtype)
+        fs = np.zeros(3*self.ns, dtype=self.dtype)
+        transfer.transferDisps(0.01*self.rng.rand(3*self.ns).astype(self.dtype), ua)
+        transfer.transferLoads(self.rng.rand(3*self.na).astype(self.dtype), fs)
+
+        return transfer
+
+    def products(self):
+        return [('applydDduS', 3*self.ns, 3*self.na),
+                ('applydDduSTrans', 3*self.na, 3*self.ns),
+                ('applydLduS', 3*self.ns, 3*self.ns),
+                ('applydLduSTrans', 3*self.ns, 3*self.ns)]
+
+    def assertColumnsEqual(self, a, b):
+        scale = np.abs(b).max() if b.size else 0.0
+        self.assertTrue(np.allclose(a, b, rtol=1e-12, atol=1e-12*scale))
+
+    def check_block(self, scheme):
+        transfer = self.create(scheme)
+        for name, nin, nout in self.products():
+            V = self.rng.rand(nin, self.nvecs).astype(self.dtype)
+            P = np.zeros((nout, self.nvecs), dtype=self.dtype)
+            getattr(transfer, name + 'Block')(V, P)
+
+            for k in range(self.nvecs):
+                p = np.zeros(nout, dtype=self.dtype)
+                getattr(transfer, name)(np.array(V[:, k]), p)
+                self.assertColumnsEqual(P[:, k], p)
+
+    def check_columns(self, scheme):
+        # A subset of the columns of non-contiguous blocks
+        transfer = self.create(scheme)
+        cols = [2, 0]
+        for name, nin, nout in self.products():
+            V = np.asfortranarray(self.rng.rand(nin, self.nvecs).astype(self.dtype))
+            P = np.ones((2*nout, self.nvecs), dtype=self.dtype)[::2, :]
+            getattr(transfer, name + 'Block')(V, P, cols)
+
+            for k in range(self.nvecs):
+                if k in cols:
+                    p = np.zeros(nout, dtype=self.dtype)
+                    getattr(transfer, name)(np.array(V[:, k]), p)
+                    self.assertColumnsEqual(P[:, k], p)
+                else:
+                    self.assertTrue(np.all(P[:, k] == 1.0))
+
+    def check_strided(self, scheme):
+        # Structural vectors with ndof entries per node, of which the first three are used
+        transfer = self.create(scheme)
+        ndof = 6
+        us = self.rng.rand(ndof*self.ns).astype(self.dtype)
+        us3 = np.array(us.reshape(-1, ndof)[:, :3].flatten())
+        fa = self.rng.rand(3*self.na).astype(self.dtype)
+
+        ua = np.zeros(3*self.na, dtype=self.dtype)
+        ua_ref = np.zeros(3*self.na, dtype=self.dtype)
+        transfer.transferDisps(us, ua, ndof)
+        transfer.transferDisps(us3, ua_ref)
+        self.assertColumnsEqual(ua, ua_ref)
+
+        fs = np.ones(ndof*self.ns, dtype=self.dtype)
+        fs_ref = np.zeros(3*self.ns, dtype=self.dtype)
+        transfer.transferLoads(fa, fs, ndof)
+        transfer.transferLoads(fa, fs_ref)
+        self.assertColumnsEqual(fs.reshape(-1, ndof)[:, :3].flatten(), fs_ref)
+        self.assertTrue(np.all(fs.reshape(-1, ndof)[:, 3:] == 1.0))
+
+        for name, nin, nout in self.products():
+            v = self.rng.rand(nin).astype(self.dtype)
+            p_ref = np.zeros(nout, dtype=self.dtype)
+            getattr(transfer, name)(v, p_ref)
+
+            # Expand the structural input and output vectors
+            if nin == 3*self.ns:
+                v_in = self.rng.rand(ndof*self.ns).astype(self.dtype)
+                v_in.reshape(-1, ndof)[:, :3] = v.reshape(-1, 3)
+            else:
+                v_in = v
+            p = np.ones(nout//3*ndof if nout == 3*self.ns else nout, dtype=self.dtype)
+            getattr(transfer, name)(v_in, p, ndof)
+            if nout == 3*self.ns:
+                self.assertTrue(np.all(p.reshape(-1, ndof)[:, 3:] == 1.0))
+                p = p.reshape(-1, ndof)[:, :3].flatten()
+            self.assertColumnsEqual(p, p_ref)
+
+    def test_meld_block(self):
+        self.check_block('meld')
+
+    def test_rbf_block(self):
+        self.check_block('rbf')
+
+    def test_meld_columns(self):
+        self.check_columns('meld')
+
+    def test_rbf_columns(self):
+        self.check_columns('rbf')
+
+    def test_meld_strided(self):
+        self.check_strided('meld')
+
+    def test_rbf_strided(self):
+        self.check_strided('rbf')
+
+if __name__ == '__main__':
+    unittest.main()
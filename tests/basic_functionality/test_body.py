@@ -22,6 +22,7 @@ limitations under the License.
 
 from pyfuntofem.model import Body
 from pyfuntofem.model import Variable
+import numpy as np
 import unittest
 
 class BodyTest(unittest.TestCase):
@@ -60,6 +61,27 @@ class BodyTest(unittest.TestCase):
         assert body.variables['aerodynamic'][1].body == body.id
         assert body.variables['aerodynamic'][1].value== 1.0
 
+    def test_body_get_buffer(self):
+        body = self.create_body()
+
+        buf = body.get_buffer('aero_disps', 6, np.double)
+        assert buf.shape == (6,)
+        assert np.all(buf == 0.0)
+
+        # the same array is returned while the shape and dtype are unchanged
+        buf[:] = 1.0
+        assert body.get_buffer('aero_disps', 6, np.double) is buf
+        assert body.get_buffer('aero_disps', (6,), np.double) is buf
+
+        # a change in the node count or type reallocates it
+        buf2 = body.get_buffer('aero_disps', 9, np.double)
+        assert buf2 is not buf and buf2.shape == (9,)
+        buf3 = body.get_buffer('aero_disps', 9, np.complex128)
+        assert buf3 is not buf2 and buf3.dtype == np.complex128
+
+        # buffers with different names are independent
+        assert body.get_buffer('struct_loads', (3, 2), np.double) is not buf3
+
     def test_body_update_id(self):
         body = self.create_body()
         body.update_id(2)
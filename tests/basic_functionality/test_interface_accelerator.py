@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from pyfuntofem.model import FUNtoFEMmodel, Body, Scenario
+from pyfuntofem.solver_interface import SolverInterface
+from pyfuntofem.interface_accelerator import IQNILS
+from mpi4py import MPI
+import numpy as np
+import unittest
+
+try:
+    from funtofem import TransferScheme
+    from pyfuntofem.driver import FUNtoFEMnlbgsFSISubiters
+    has_transfer = True
+except ImportError:
+    has_transfer = False
+
+class LinearFlow(SolverInterface):
+    """
+    Unsteady flow solver with loads linear in the aerodynamic displacements
+    """
+    def __init__(self, comm, model, na=8):
+        # Keep the meshes on the first processor
+        na = na if comm.Get_rank() == 0 else 0
+        rng = np.random.RandomState(2)
+        self.J = 0.1*rng.rand(3*na, 3*na)/np.sqrt(max(na, 1))
+        self.b = rng.rand(3*na)
+        for body in model.bodies:
+            body.aero_nnodes = na
+            body.aero_X = 4.0*rng.rand(3*na)
+
+    def step_solver(self, scenario, bodies, step, fsi_subiter):
+        for body in bodies:
+            body.aero_loads = self.J.dot(body.aero_disps) + step*self.b
+        return 0
+
+class LinearStepStructure(SolverInterface):
+    """
+    Unsteady structural solver with displacements linear in the loads, keeping the
+    displacements of each time step
+    """
+    def __init__(self, comm, model, ns=6):
+        self.comm = comm
+        ns = ns if comm.Get_rank() == 0 else 0
+        rng = np.random.RandomState(3)
+        self.A = -0.1*rng.rand(3*ns, 3*ns)/np.sqrt(max(ns, 1))
+        self.history = []
+        for body in model.bodies:
+            body.struct_nnodes = ns
+            body.struct_X = 4.0*rng.rand(3*ns)
+            body.struct_disps = np.zeros(3*ns)
+
+    def step_solver(self, scenario, bodies, step, fsi_subiter):
+        for body in bodies:
+            body.struct_disps = self.A.dot(body.struct_loads)
+        return 0
+
+    def step_post(self, scenario, bodies, step):
+        self.history.append(self.comm.bcast(np.array(bodies[0].struct_disps), root=0))
+        return 0
+
+class IQNILSTest(unittest.TestCase):
+    def build_problem(self, n=12):
+        # Linear fixed-point problem x = A*x + b that diverges without acceleration
+        rng = np.random.RandomState(0)
+        A = rng.rand(n, n)
+        A *= 1.5/np.max(np.abs(np.linalg.eigvals(A)))
+        b = rng.rand(n)
+        x_star = np.linalg.solve(np.eye(n) - A, b)
+        return A, b, x_star
+
+    def solve(self, accelerator, A, b, x_star, fields=None, max_iters=50):
+        x = np.zeros(b.size)
+        accelerator.reset(x, fields)
+        for iters in range(1, max_iters+1):
+            x = accelerator.update(A.dot(x) + b)
+            if np.linalg.norm(x - x_star) < 1e-8*np.linalg.norm(x_star):
+                break
+        return iters, x
+
+    def test_convergence(self):
+        A, b, x_star = self.build_problem()
+        accelerator = IQNILS(MPI.COMM_WORLD, history=20)
+        iters, x = self.solve(accelerator, A, b, x_star)
+
+        # The least-squares model is exact for a linear problem after n+1 iterations
+        assert iters <= b.size + 2
+        assert np.allclose(x, x_star)
+
+    def test_fields(self):
+        A, b, x_star = self.build_problem()
+        fields = np.zeros(b.size, dtype=int)
+        fields[b.size//2:] = 1
+        accelerator = IQNILS(MPI.COMM_WORLD, history=20)
+        iters, x = self.solve(accelerator, A, b, x_star, fields)
+        assert np.allclose(x, x_star)
+
+    def test_reuse(self):
+        A, b, x_star = self.build_problem()
+        accelerator = IQNILS(MPI.COMM_WORLD, history=20, reuse=1)
+        iters0, x = self.solve(accelerator, A, b, x_star)
+
+        # The columns of the first solve give the Jacobian of the second one
+        iters1, x = self.solve(accelerator, A, 2.0*b, 2.0*x_star)
+        assert iters1 < iters0
+        assert np.allclose(x, 2.0*x_star)
+
+    def test_filter(self):
+        # Drive the accelerator with chosen residuals so that the two columns of V differ by eps
+        rng = np.random.RandomState(1)
+        n = 12
+        r0 = rng.rand(n)
+        d = rng.rand(n)
+        e = rng.rand(n)
+        for eps, filtered in [(1e-4, False), (1e-9, True)]:
+            accelerator = IQNILS(MPI.COMM_WORLD, filter_tol=1e-6)
+            x = np.zeros(n)
+            accelerator.reset(x)
+            xts = []
+            for r in [r0, r0 + d, r0 + 2.0*d + eps*e]:
+                xts.append(x + r)
+                x = accelerator.update(xts[-1])
+
+            V = np.column_stack((d + eps*e, d))
+            W = np.column_stack((xts[2] - xts[1], xts[1] - xts[0]))
+            r2 = r0 + 2.0*d + eps*e
+
+            # Only the nearly dependent older column is dropped
+            c = np.zeros(2)
+            if filtered:
+                c[:1] = np.linalg.lstsq(V[:, :1], -r2, rcond=None)[0]
+            else:
+                c = np.linalg.lstsq(V, -r2, rcond=None)[0]
+            assert np.allclose(x, xts[2] + W.dot(c), rtol=1e-8)
+
+@unittest.skipUnless(has_transfer, 'requires the TransferScheme extension')
+class AcceleratedSubiterationsTest(unittest.TestCase):
+    def solve(self, fsi_subiters, accelerator=None):
+        comm = MPI.COMM_WORLD
+        model = FUNtoFEMmodel('model')
+        model.add_body(Body('plate', 'aeroelastic', group=0, boundary=1))
+        model.add_scenario(Scenario('unsteady', group=0, steady=False, steps=3))
+
+        structure = LinearStepStructure(comm, model)
+        solvers = {'flow': LinearFlow(comm, model), 'structural': structure}
+        transfer_options = {'analysis_type': 'aeroelastic', 'scheme': 'meld', 'npts': 4}
+        driver = FUNtoFEMnlbgsFSISubiters(solvers, comm, comm, 0, comm, 0, transfer_options,
+                                          model=model, fsi_subiters=fsi_subiters,
+                                          accelerator=accelerator)
+        self.assertEqual(driver.solve_forward(), 0)
+
+        return structure.history
+
+    def test_single_subiteration(self):
+        # The accelerator also updates the displacements of the last subiteration
+        ref = self.solve(1)
+        hist = self.solve(1, IQNILS(MPI.COMM_WORLD, reuse=2))
+        for u, u_ref in zip(hist, ref):
+            self.assertFalse(np.allclose(u, u_ref))
+
+    def test_subiterations(self):
+        # Accelerated subiterations are closer to the coupled solution of each time step
+        exact = self.solve(100)
+        plain = self.solve(4)
+        hist = self.solve(4, IQNILS(MPI.COMM_WORLD, theta=0.5))
+        for u, u_plain, u_exact in zip(hist, plain, exact):
+            self.assertLess(np.linalg.norm(u - u_exact), np.linalg.norm(u_plain - u_exact))
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from mpi4py import MPI
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyfuntofem.model import FUNtoFEMmodel, Body, Scenario
+from pyfuntofem.solver_interface import SolverInterface
+
+try:
+    from funtofem import TransferScheme
+    from pyfuntofem.driver import FUNtoFEMnlbgs
+    from pyfuntofem.fake_solver import FakeSolver
+    has_transfer = True
+except ImportError:
+    has_transfer = False
+
+class LinearStructure(SolverInterface):
+    """
+    Structural solver with linear responses to the loads and heat flux
+    """
+    def __init__(self, comm, model, ns=6):
+        ns = ns if comm.Get_rank() == 0 else 0
+        rng = np.random.RandomState(1)
+        self.A = 0.3*rng.rand(3*ns, 3*ns)
+        self.B = 0.3*rng.rand(ns, ns)
+        for body in model.bodies:
+            body.struct_nnodes = ns
+            body.struct_X = 10.0*rng.rand(3*ns)
+            body.struct_disps = np.zeros(3*ns)
+            body.struct_temps = body.T_ref*np.ones(ns)
+
+    def iterate(self, scenario, bodies, step):
+        for body in bodies:
+            body.struct_disps = self.A.dot(body.struct_loads)
+            body.struct_temps = body.T_ref + self.B.dot(body.struct_heat_flux)
+        return 0
+
+class CountingTransfer(object):
+    """
+    Wrapper of a transfer scheme that counts the calls of some of its methods
+    """
+    def __init__(self, transfer):
+        self.transfer = transfer
+        self.counts = {'reconnect': 0, 'setStructNodes': 0, 'setAeroNodes': 0}
+
+    def __getattr__(self, name):
+        attr = getattr(self.transfer, name)
+        if name in self.counts:
+            def counted(*args):
+                self.counts[name] += 1
+                return attr(*args)
+            return counted
+        return attr
+
+@unittest.skipUnless(has_transfer, 'requires the TransferScheme extension')
+class MELDConnectivityTest(unittest.TestCase):
+    """
+    Tests of the saved, updated and partitioned MELD connectivity. The
+    partitioned tests only compare different layouts when run on more than
+    one processor, e.g. with mpirun -np 3 python -m pytest
+    """
+    nn = 10
+    beta = 0.5
+
+    def setUp(self):
+        self.comm = MPI.COMM_WORLD
+        rank = self.comm.Get_rank()
+
+        # Give each processor a different number of nodes
+        rng = np.random.RandomState(rank)
+        self.ns = 40 + 15*(rank % 3)
+        self.na = 30 + 5*(rank % 3)
+        dtype = TransferScheme.dtype
+
+        self.Xs = rng.rand(3*self.ns).astype(dtype)
+        self.Xa = rng.rand(3*self.na).astype(dtype)
+        self.Xs[0::3] *= 4.0
+        self.Xa[0::3] *= 4.0
+        self.us = 0.01*rng.rand(3*self.ns).astype(dtype)
+        self.fa = rng.rand(3*self.na).astype(dtype)
+        self.ts = rng.rand(self.ns).astype(dtype)
+        self.ha = rng.rand(self.na).astype(dtype)
+
+        # Moved node locations for the reconnect tests
+        self.Xs_moved = self.Xs + 0.2*rng.rand(3*self.ns)
+        self.Xa_moved = self.Xa + 0.3*rng.rand(3*self.na)
+
+        # Share a scratch directory between the processors
+        tmpdir = tempfile.mkdtemp() if rank == 0 else None
+        self.tmpdir = self.comm.bcast(tmpdir, root=0)
+
+    def tearDown(self):
+        self.comm.Barrier()
+        if self.comm.Get_rank() == 0:
+            shutil.rmtree(self.tmpdir)
+
+    def create(self, Xs, Xa, symmetry=-1, beta=None, partitioned=0):
+        beta = self.beta if beta is None else beta
+        meld = TransferScheme.pyMELD(self.comm, self.comm, 0, self.comm, 0,
+                                     symmetry, self.nn, beta, partitioned)
+        meld.setStructNodes(Xs)
+        meld.setAeroNodes(Xa)
+        return meld
+
+    def transfer(self, meld):
+        ua = np.zeros(3*self.na, dtype=TransferScheme.dtype)
+        fs = np.zeros(3*self.ns, dtype=TransferScheme.dtype)
+        meld.transferDisps(self.us, ua)
+        meld.transferLoads(self.fa, fs)
+        return ua, fs
+
+    def create_thermal(self, Xs, Xa, source=None):
+        thermal = TransferScheme.pyMELDThermal(self.comm, self.comm, 0, self.comm, 0,
+                                               -1, self.nn, self.beta)
+        if source is not None:
+            thermal.shareConnectivity(source)
+        thermal.setStructNodes(Xs)
+        thermal.setAeroNodes(Xa)
+        return thermal
+
+    def transfer_thermal(self, thermal):
+        ta = np.zeros(self.na, dtype=TransferScheme.dtype)
+        hs = np.zeros(self.ns, dtype=TransferScheme.dtype)
+        thermal.transferTemp(self.ts, ta)
+        thermal.transferFlux(self.ha, hs)
+        return ta, hs
+
+    def assertTransfersEqual(self, a, b, rtol=0.0):
+        for x, y in zip(a, b):
+            if rtol == 0.0:
+                equal = np.array_equal(x, y)
+            else:
+                equal = np.allclose(x, y, rtol=rtol, atol=rtol*np.abs(y).max())
+            self.assertTrue(self.comm.allreduce(equal, op=MPI.LAND))
+
+    def test_save_load(self):
+        path = os.path.join(self.tmpdir, 'meld.conn')
+        for symmetry in [-1, 1]:
+            meld = self.create(self.Xs, self.Xa, symmetry=symmetry)
+            meld.initialize()
+            ref = self.transfer(meld)
+            self.assertTrue(meld.save(path))
+
+            # The loaded connectivity reproduces the transfers exactly
+            loaded = self.create(self.Xs, self.Xa, symmetry=symmetry)
+            self.assertTrue(loaded.load(path))
+            self.assertTransfersEqual(self.transfer(loaded), ref)
+
+    def test_load_mismatch(self):
+        path = os.path.join(self.tmpdir, 'meld.conn')
+        meld = self.create(self.Xs, self.Xa)
+        meld.initialize()
+        self.assertTrue(meld.save(path))
+
+        # Reject a file saved for other node locations or settings
+        self.assertFalse(self.create(self.Xs, self.Xa_moved).load(path))
+        self.assertFalse(self.create(self.Xs_moved, self.Xa).load(path))
+        self.assertFalse(self.create(self.Xs, self.Xa, symmetry=1).load(path))
+        self.assertFalse(self.create(self.Xs, self.Xa, beta=2.0*self.beta).load(path))
+
+        # A scheme that rejected the file can still be initialized
+        meld = self.create(self.Xs, self.Xa_moved)
+        self.assertFalse(meld.load(path))
+        meld.initialize()
+        ref = self.create(self.Xs, self.Xa_moved)
+        ref.initialize()
+        self.assertTransfersEqual(self.transfer(meld), self.transfer(ref))
+
+    def test_reconnect(self):
+        for partitioned in [0, 1]:
+            for symmetry in [-1, 1]:
+                meld = self.create(self.Xs, self.Xa, symmetry=symmetry,
+                                   partitioned=partitioned)
+                meld.initialize()
+                self.transfer(meld)
+
+                # Move both meshes, then only the aerodynamic mesh back
+                for Xs, Xa in [(self.Xs_moved, self.Xa_moved),
+                               (self.Xs_moved, self.Xa)]:
+                    meld.setStructNodes(Xs)
+                    meld.setAeroNodes(Xa)
+                    meld.reconnect()
+
+                    ref = self.create(Xs, Xa, symmetry=symmetry,
+                                      partitioned=partitioned)
+                    ref.initialize()
+                    self.assertTransfersEqual(self.transfer(meld),
+                                              self.transfer(ref), rtol=1e-12)
+
+    def test_partitioned(self):
+        for symmetry in [-1, 1]:
+            ref = self.create(self.Xs, self.Xa, symmetry=symmetry)
+            ref.initialize()
+            meld = self.create(self.Xs, self.Xa, symmetry=symmetry, partitioned=1)
+            meld.initialize()
+            self.assertTransfersEqual(self.transfer(meld), self.transfer(ref),
+                                      rtol=1e-12)
+
+    def test_shared(self):
+        meld = self.create(self.Xs, self.Xa)
+        meld.initialize()
+        shared = self.create_thermal(self.Xs, self.Xa, source=meld)
+        shared.initialize()
+
+        # The shared connectivity gives the same transfers as a separate one
+        ref = self.create_thermal(self.Xs, self.Xa)
+        ref.initialize()
+        self.assertTransfersEqual(self.transfer_thermal(shared), self.transfer_thermal(ref))
+
+        # The thermal scheme picks up the reconnect of the source
+        meld.setStructNodes(self.Xs_moved)
+        meld.setAeroNodes(self.Xa_moved)
+        meld.reconnect()
+        shared.setStructNodes(self.Xs_moved)
+        shared.setAeroNodes(self.Xa_moved)
+
+        ref = self.create_thermal(self.Xs_moved, self.Xa_moved)
+        ref.initialize()
+        self.assertTransfersEqual(self.transfer_thermal(shared), self.transfer_thermal(ref),
+                                  rtol=1e-12)
+
+    def test_shared_mismatch(self):
+        ta = np.zeros(self.na-1, dtype=TransferScheme.dtype)
+
+        # Sources with other nodes or a partitioned mesh cannot be shared
+        for Xa, partitioned in [(self.Xa, 0), (self.Xa[:-3], 1)]:
+            meld = self.create(self.Xs, Xa, partitioned=partitioned)
+            meld.initialize()
+            thermal = self.create_thermal(self.Xs, self.Xa[:-3], source=meld)
+            thermal.initialize()
+
+            ta[:] = 1.0
+            with self.assertRaises(RuntimeError):
+                thermal.transferTemp(self.ts, ta)
+            self.assertTrue(np.all(ta == 0.0))
+
+@unittest.skipUnless(has_transfer, 'requires the TransferScheme extension')
+class DriverReconnectTest(unittest.TestCase):
+    def solve(self, transfer_options, count=False):
+        comm = MPI.COMM_WORLD
+        model = FUNtoFEMmodel('model')
+        plate = Body('plate', 'aerothermoelastic', group=0, boundary=1)
+        model.add_body(plate)
+        for name in ['cruise', 'climb']:
+            model.add_scenario(Scenario(name, group=0, steps=10))
+
+        solvers = {'flow': FakeSolver(comm, model),
+                   'structural': LinearStructure(comm, model)}
+        driver = FUNtoFEMnlbgs(solvers, comm, comm, 0, comm, 0, transfer_options, model=model)
+        if count:
+            plate.transfer = CountingTransfer(plate.transfer)
+            plate.thermal_transfer = CountingTransfer(plate.thermal_transfer)
+        self.assertEqual(driver.solve_forward(), 0)
+
+        return plate
+
+    def test_reconnect_once(self):
+        transfer_options = {'analysis_type': 'aerothermoelastic', 'scheme': 'meld',
+                            'thermal_scheme': 'meld', 'npts': 3}
+        ref = self.solve(transfer_options)
+
+        transfer_options['reconnect'] = 0.0
+        body = self.solve(transfer_options, count=True)
+
+        # One reconnect for both scenarios, which the shared thermal scheme picks up,
+        # and the nodes set once per scenario
+        self.assertEqual(body.transfer.counts,
+                         {'reconnect': 1, 'setStructNodes': 2, 'setAeroNodes': 2})
+        self.assertEqual(body.thermal_transfer.counts,
+                         {'reconnect': 0, 'setStructNodes': 2, 'setAeroNodes': 2})
+
+        for name in ['struct_disps', 'struct_temps', 'aero_disps', 'aero_temps']:
+            self.assertTrue(np.allclose(getattr(body, name), getattr(ref, name)), name)
+
+if __name__ == '__main__':
+    unittest.main()
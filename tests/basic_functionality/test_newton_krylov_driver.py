@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from pyfuntofem.model import FUNtoFEMmodel, Body, Scenario, Function
+from pyfuntofem.solver_interface import SolverInterface
+from mpi4py import MPI
+import numpy as np
+import unittest
+
+try:
+    from funtofem import TransferScheme
+    from pyfuntofem.driver import FUNtoFEMnlbgs, FUNtoFEMnewtonKrylov
+    from pyfuntofem.fake_solver import FakeSolver
+    has_transfer = True
+except ImportError:
+    has_transfer = False
+
+class LinearStructure(SolverInterface):
+    """
+    Structural solver with linear responses to the loads and heat flux
+    """
+    def __init__(self, comm, model, ns=6):
+        # Keep the structure on the first processor
+        ns = ns if comm.Get_rank() == 0 else 0
+        rng = np.random.RandomState(1)
+        self.A = 0.3*rng.rand(3*ns, 3*ns)
+        self.B = 0.3*rng.rand(ns, ns)
+        for body in model.bodies:
+            body.struct_nnodes = ns
+            body.struct_X = 10.0*rng.rand(3*ns)
+            body.struct_disps = np.zeros(3*ns)
+            body.struct_temps = body.T_ref*np.ones(ns)
+
+    def iterate(self, scenario, bodies, step):
+        for body in bodies:
+            body.struct_disps = self.A.dot(body.struct_loads)
+            body.struct_temps = body.T_ref + self.B.dot(body.struct_heat_flux)
+        return 0
+
+    def iterate_adjoint(self, scenario, bodies, step):
+        for body in bodies:
+            body.psi_S[:] = self.A.T.dot(body.struct_rhs) + 1.0
+            body.psi_T_S[:] = self.B.T.dot(body.struct_rhs_T) + 1.0
+        return 0
+
+@unittest.skipUnless(has_transfer, 'requires the TransferScheme extension')
+class NewtonKrylovTest(unittest.TestCase):
+    def solve(self, driver_class):
+        comm = MPI.COMM_WORLD
+        model = FUNtoFEMmodel('model')
+        plate = Body('plate', 'aerothermoelastic', group=0, boundary=1)
+        model.add_body(plate)
+        steady = Scenario('steady', group=0, steps=40, rtol=1e-12)
+        steady.add_function(Function('f', analysis_type='structural'))
+        model.add_scenario(steady)
+
+        solvers = {'flow': FakeSolver(comm, model),
+                   'structural': LinearStructure(comm, model)}
+        transfer_options = {'analysis_type': 'aerothermoelastic', 'scheme': 'meld',
+                            'thermal_scheme': 'meld', 'npts': 3}
+        driver = driver_class(solvers, comm, comm, 0, comm, 0, transfer_options, model=model)
+
+        self.assertEqual(driver.solve_forward(), 0)
+        self.assertEqual(driver.solve_adjoint(), 0)
+
+        return plate, steady
+
+    def test_newton_krylov(self):
+        ref, ref_scenario = self.solve(FUNtoFEMnlbgs)
+        body, scenario = self.solve(FUNtoFEMnewtonKrylov)
+
+        # Newton-Krylov converges in fewer coupled iterations than NLBGS
+        self.assertLess(len(scenario.residuals), len(ref_scenario.residuals))
+
+        for name in ['struct_disps', 'struct_temps', 'aero_disps', 'psi_S', 'psi_T_S',
+                     'aero_shape_term', 'struct_shape_term']:
+            a = np.asarray(getattr(ref, name))
+            b = np.asarray(getattr(body, name))
+            self.assertTrue(np.allclose(b, a, rtol=1e-8, atol=1e-10), name)
+
+if __name__ == '__main__':
+    unittest.main()
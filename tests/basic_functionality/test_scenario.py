@@ -19,9 +19,40 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
-from pyfuntofem.model import Scenario, Function, Variable
+from pyfuntofem.model import FUNtoFEMmodel, Body, Scenario, Function, Variable
+from pyfuntofem.solver_interface import SolverInterface
+from mpi4py import MPI
+import numpy as np
 import unittest
 
+try:
+    from pyfuntofem.driver import FUNtoFEMnlbgs
+    from pyfuntofem.fake_solver import FakeSolver
+    has_transfer = True
+except ImportError:
+    has_transfer = False
+
+class LinearStructure(SolverInterface):
+    """
+    Structural solver with linear responses to the loads and heat flux
+    """
+    def __init__(self, comm, model, ns=6):
+        ns = ns if comm.Get_rank() == 0 else 0
+        rng = np.random.RandomState(1)
+        self.A = 0.3*rng.rand(3*ns, 3*ns)
+        self.B = 0.3*rng.rand(ns, ns)
+        for body in model.bodies:
+            body.struct_nnodes = ns
+            body.struct_X = 10.0*rng.rand(3*ns)
+            body.struct_disps = np.zeros(3*ns)
+            body.struct_temps = body.T_ref*np.ones(ns)
+
+    def iterate(self, scenario, bodies, step):
+        for body in bodies:
+            body.struct_disps = self.A.dot(body.struct_loads)
+            body.struct_temps = body.T_ref + self.B.dot(body.struct_heat_flux)
+        return 0
+
 class ScenarioTest(unittest.TestCase):
     # Note: most of the functionality for Scenario is tested by test_body.py
     def build_scenario(self):
@@ -45,6 +76,10 @@ class ScenarioTest(unittest.TestCase):
         # Check the attributes
         assert scenario.steps == 10
         assert scenario.steady == False
+        assert scenario.atol == 0.0
+        assert scenario.rtol == 0.0
+        assert scenario.residuals == []
+        assert scenario.adjoint_residuals == []
 
         # Check the variables
         assert scenario.variables['aerodynamic'][0].name == 'Mach'
@@ -64,3 +99,40 @@ class ScenarioTest(unittest.TestCase):
         assert scenario.functions[1].analysis_type == 'structural'
         assert scenario.functions[1].adjoint == False
         
+
+@unittest.skipUnless(has_transfer, 'requires the TransferScheme extension')
+class ScenarioConvergenceTest(unittest.TestCase):
+    def solve(self, rtol):
+        comm = MPI.COMM_WORLD
+        model = FUNtoFEMmodel('model')
+        model.add_body(Body('plate', 'aerothermoelastic', group=0, boundary=1))
+        steady = Scenario('steady', group=0, steps=50, rtol=rtol)
+        model.add_scenario(steady)
+
+        solvers = {'flow': FakeSolver(comm, model),
+                   'structural': LinearStructure(comm, model)}
+        transfer_options = {'analysis_type': 'aerothermoelastic', 'scheme': 'meld',
+                            'thermal_scheme': 'meld', 'npts': 3}
+        driver = FUNtoFEMnlbgs(solvers, comm, comm, 0, comm, 0, transfer_options, model=model)
+        self.assertEqual(driver.solve_forward(), 0)
+
+        return steady
+
+    def test_residuals(self):
+        rtol = 1e-8
+        ref = self.solve(0.0)
+        scenario = self.solve(rtol)
+
+        # Without a tolerance all the steps are taken
+        self.assertEqual(len(ref.residuals), ref.steps)
+
+        # The iterations stop at the first step where both residuals meet the tolerance
+        n = len(scenario.residuals)
+        self.assertLess(n, scenario.steps)
+        tol = rtol*scenario.residuals[0]
+        self.assertTrue(np.all(scenario.residuals[-1] <= tol))
+        for res in scenario.residuals[:-1]:
+            self.assertTrue(np.any(res > tol))
+
+        # The history is the same as the one of the full solve up to that step
+        self.assertTrue(np.allclose(scenario.residuals, ref.residuals[:n], rtol=1e-12, atol=0.0))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from mpi4py import MPI
+import numpy as np
+import unittest
+
+try:
+    from funtofem import TransferScheme
+    has_transfer = TransferScheme.dtype == np.float64
+except ImportError:
+    has_transfer = False
+
+@unittest.skipUnless(has_transfer, 'requires the real TransferScheme extension')
+class SinglePrecisionTest(unittest.TestCase):
+    """
+    Compare the single precision transfers against the double precision ones
+    """
+    rtol = 1e-5
+
+    def setUp(self):
+        self.comm = MPI.COMM_WORLD
+        rng = np.random.RandomState(self.comm.Get_rank())
+        self.ns = 40
+        self.na = 30
+        self.Xs = rng.rand(3*self.ns)
+        self.Xa = rng.rand(3*self.na)
+        self.us = 0.01*rng.rand(3*self.ns)
+        self.fa = rng.rand(3*self.na)
+        self.ts = rng.rand(self.ns)
+        self.ha = rng.rand(self.na)
+
+    def create(self, cls, single, *args):
+        transfer = cls(self.comm, self.comm, 0, self.comm, 0, *args)
+        if single:
+            transfer.setSinglePrecision()
+        transfer.setStructNodes(self.Xs)
+        transfer.setAeroNodes(self.Xa)
+        transfer.initialize()
+        return transfer
+
+    def assertClose(self, a, b):
+        err = np.abs(a - b).max() if a.size else 0.0
+        scale = np.abs(b).max() if b.size else 0.0
+        err = self.comm.allreduce(err, op=MPI.MAX)
+        scale = self.comm.allreduce(scale, op=MPI.MAX)
+        self.assertLessEqual(err, self.rtol*scale)
+
+    def transfer(self, transfer):
+        ua = np.zeros(3*self.na)
+        fs = np.zeros(3*self.ns)
+        transfer.transferDisps(self.us, ua)
+        transfer.transferLoads(self.fa, fs)
+        return ua, fs
+
+    def test_meld(self):
+        ref = self.create(TransferScheme.pyMELD, False, -1, 10, 0.5)
+        meld = self.create(TransferScheme.pyMELD, True, -1, 10, 0.5)
+        self.assertTrue(meld.getSinglePrecision())
+        for x, y in zip(self.transfer(meld), self.transfer(ref)):
+            self.assertClose(x, y)
+
+        # The Jacobian-vector products are not available and return zero
+        self.assertFalse(meld.hasJacobianProducts())
+        p = np.ones(3*self.na)
+        with self.assertRaises(RuntimeError):
+            meld.applydDduS(self.us, p)
+        self.assertTrue(np.all(p == 0.0))
+
+        P = np.ones((3*self.na, 2))
+        with self.assertRaises(RuntimeError):
+            meld.applydDduSBlock(np.column_stack((self.us, self.us)), P)
+        self.assertTrue(np.all(P == 0.0))
+
+    def test_linearized_meld(self):
+        ref = self.create(TransferScheme.pyLinearizedMELD, False, 10, 0.5)
+        lmeld = self.create(TransferScheme.pyLinearizedMELD, True, 10, 0.5)
+        for x, y in zip(self.transfer(lmeld), self.transfer(ref)):
+            self.assertClose(x, y)
+
+        # The products use the single precision operator
+        self.assertTrue(lmeld.hasJacobianProducts())
+        for name, v, n in [('applydDduS', self.us, 3*self.na),
+                           ('applydDduSTrans', self.fa, 3*self.ns)]:
+            p = np.zeros(n)
+            p_ref = np.zeros(n)
+            getattr(lmeld, name)(v, p)
+            getattr(ref, name)(v, p_ref)
+            self.assertClose(p, p_ref)
+
+        # The double precision operator is not stored
+        with self.assertRaises(RuntimeError):
+            lmeld.getDispOperator()
+
+    def test_meld_thermal(self):
+        ref = self.create(TransferScheme.pyMELDThermal, False, -1, 10, 0.5)
+        thermal = self.create(TransferScheme.pyMELDThermal, True, -1, 10, 0.5)
+        out = []
+        for t in [thermal, ref]:
+            ta = np.zeros(self.na)
+            hs = np.zeros(self.ns)
+            t.transferTemp(self.ts, ta)
+            t.transferFlux(self.ha, hs)
+            out.append((ta, hs))
+        for x, y in zip(*out):
+            self.assertClose(x, y)
+
+        p = np.zeros(self.na)
+        p_ref = np.zeros(self.na)
+        thermal.applydTdtS(self.ts, p)
+        ref.applydTdtS(self.ts, p_ref)
+        self.assertClose(p, p_ref)
+
+if __name__ == '__main__':
+    unittest.main()